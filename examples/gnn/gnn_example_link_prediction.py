@@ -26,6 +26,7 @@ from ogb.linkproppred import Evaluator
 from wg_torch import comm as comm
 from wg_torch import embedding_ops as embedding_ops
 from wg_torch import graph_ops as graph_ops
+from wg_torch import inference as inference
 from wg_torch.wm_tensor import *
 
 from wholegraph.torch import wholegraph_pytorch as wg
@@ -94,6 +95,19 @@ parser.add_option(
     default=False,
     help="whether use nccl for embeddings, default False",
 )
+parser.add_option(
+    "--negative_sample",
+    dest="negative_sample",
+    default="uniform",
+    help="negative sample distribution, valid values are: uniform, degree",
+)
+parser.add_option(
+    "--negative_pool",
+    type="int",
+    dest="negative_pool",
+    default=0,
+    help="negative count shared by all sources of a batch, 0 for one per source",
+)
 
 (options, args) = parser.parse_args()
 
@@ -319,88 +333,41 @@ class EdgePredictionGNNModel(torch.nn.Module):
     def predict(self, h_src, h_dst):
         return self.predictor(h_src * h_dst)
 
-    def fullbatch_single_layer_forward(
-        self, dist_homo_graph, i, input_feat, output_feat, batch_size
+    def full_graph_layer_forward(
+        self,
+        i,
+        x_feat,
+        x_target_feat,
+        target_gid,
+        target_gid_1,
+        edge_indice,
+        csr_row_ptr,
+        csr_col_ind,
+        sample_dup_count,
     ):
-        start_node_id = (
-            dist_homo_graph.node_count
-            * wg.get_rank(dist_homo_graph.wm_comm)
-            // wg.get_size(dist_homo_graph.wm_comm)
-        )
-        end_node_id = (
-            dist_homo_graph.node_count
-            * (wg.get_rank(dist_homo_graph.wm_comm) + 1)
-            // wg.get_size(dist_homo_graph.wm_comm)
-        )
-        min_node_count = dist_homo_graph.node_count // wg.get_size(
-            dist_homo_graph.wm_comm
+        sub_graph = create_sub_graph(
+            target_gid,
+            target_gid_1,
+            edge_indice,
+            csr_row_ptr,
+            csr_col_ind,
+            sample_dup_count,
+            self.add_self_loop,
         )
-        total_node_count = end_node_id - start_node_id
-        batch_count = max((min_node_count + batch_size - 1) // batch_size, 1)
-        last_batchsize = total_node_count - (batch_count - 1) * batch_size
-        embedding_lookup_fn = embedding_ops.EmbeddingLookupFn.apply
-        for batch_id in range(batch_count):
-            current_batchsize = (
-                last_batchsize if batch_id == batch_count - 1 else batch_size
-            )
-            batch_start_node_id = start_node_id + batch_id * batch_size
-            target_ids = torch.arange(
-                batch_start_node_id,
-                batch_start_node_id + current_batchsize,
-                dtype=dist_homo_graph.edges_csr_col.dtype,
-                device="cuda",
-            )
-            (
-                neighboor_gids_offset,
-                neighboor_gids_vdata,
-                neighboor_src_lids,
-            ) = graph_ops.unweighted_sample_without_replacement_single_layer(
-                target_ids,
-                dist_homo_graph.edges_csr_row,
-                dist_homo_graph.edges_csr_col,
-                -1,
-            )
-            (
-                unique_gids,
-                neighbor_raw_to_unique_mapping,
-                unique_output_neighbor_count,
-            ) = torch.ops.wholegraph.append_unique(target_ids, neighboor_gids_vdata)
-            csr_row_ptr = neighboor_gids_offset
-            csr_col_ind = neighbor_raw_to_unique_mapping
-            sample_dup_count = unique_output_neighbor_count
-            neighboor_count = neighboor_gids_vdata.size()[0]
-            edge_indice_i = torch.cat(
-                [
-                    torch.reshape(neighbor_raw_to_unique_mapping, (1, neighboor_count)),
-                    torch.reshape(neighboor_src_lids, (1, neighboor_count)),
-                ]
-            )
-            target_ids_i = unique_gids
-            x_feat = embedding_lookup_fn(target_ids_i, input_feat)
-            sub_graph = create_sub_graph(
-                target_ids_i,
-                target_ids,
-                edge_indice_i,
-                csr_row_ptr,
-                csr_col_ind,
-                sample_dup_count,
-                self.add_self_loop,
-            )
-            x_target_feat = x_feat[: target_ids.numel()]
-            x_feat = layer_forward(self.gnn_layers[i], x_feat, x_target_feat, sub_graph)
-            if i != self.num_layer - 1:
-                if options.framework == "dgl":
-                    x_feat = x_feat.flatten(1)
-                x_feat = F.relu(x_feat)
-            else:
-                if options.framework == "dgl" and self.mean_output:
-                    x_feat = x_feat.mean(1)
-            embedding_ops.embedding_2d_sub_tensor_assign(
-                x_feat, output_feat, batch_start_node_id
-            )
-
-    def forward(self, src_ids, pos_dst_ids, neg_dst_ids):
-        assert src_ids.shape == pos_dst_ids.shape and src_ids.shape == neg_dst_ids.shape
+        x_feat = layer_forward(self.gnn_layers[i], x_feat, x_target_feat, sub_graph)
+        if i != self.num_layer - 1:
+            if options.framework == "dgl":
+                x_feat = x_feat.flatten(1)
+            x_feat = F.relu(x_feat)
+        else:
+            if options.framework == "dgl" and self.mean_output:
+                x_feat = x_feat.mean(1)
+        return x_feat
+
+    def forward(self, src_ids, pos_dst_ids, neg_dst_ids, shared_negative=False):
+        # with shared_negative, each source is scored against all of neg_dst_ids
+        assert src_ids.shape == pos_dst_ids.shape
+        assert shared_negative or src_ids.shape == neg_dst_ids.shape
         id_count = src_ids.size(0)
         ids = torch.cat([src_ids, pos_dst_ids, neg_dst_ids])
         # add both forward and reverse edge into hashset
@@ -412,7 +379,13 @@ class EdgePredictionGNNModel(torch.nn.Module):
             ids_unique, exclude_edge_hashset=exclude_edge_hashset
         )
         out_feat = torch.nn.functional.embedding(reverse_map, out_feat_unique)
-        src_feat, pos_dst_feat, neg_dst_feat = torch.split(out_feat, id_count)
+        src_feat, pos_dst_feat, neg_dst_feat = torch.split(
+            out_feat, [id_count, id_count, neg_dst_ids.size(0)]
+        )
+        if shared_negative:
+            pos_score = self.predict(src_feat, pos_dst_feat)
+            neg_score = self.predict(src_feat.unsqueeze(1), neg_dst_feat.unsqueeze(0))
+            return pos_score, neg_score.reshape(-1, 1)
         scores = self.predict(
             torch.cat([src_feat, src_feat]), torch.cat([pos_dst_feat, neg_dst_feat])
         )
@@ -428,7 +401,10 @@ def compute_mrr(model, node_emb, src, dst, neg_dst, batch_size=1024):
         end = min(start + batch_size, src.shape[0])
         all_dst = torch.cat([dst[start:end, None], neg_dst[start:end]], 1)
         h_src = embedding_lookup_fn(src[start:end], node_emb)[:, None, :]
-        h_dst = embedding_lookup_fn(all_dst.view(-1), node_emb).view(*all_dst.shape, -1)
+        # negative candidates repeat a lot, gather each of them once.
+        h_dst = embedding_lookup_fn(all_dst.view(-1), node_emb, None, None, True).view(
+            *all_dst.shape, -1
+        )
         pred = model.predict(h_src, h_dst).squeeze(-1)
         relevance = torch.zeros(*pred.shape, dtype=torch.bool)
         relevance[:, 0] = True
@@ -455,38 +431,14 @@ def evaluate(model: EdgePredictionGNNModel, dist_homo_graph, edge_split):
     global use_chunked
     global use_host_memory
     model.eval()
-    embedding = dist_homo_graph.node_feat
-    node_feats = [None, None]
-    wm_tensor_type = get_intra_node_wm_tensor_type(use_chunked, use_host_memory)
-    node_feats[0] = create_wm_tensor(
-        dist_homo_graph.wm_comm,
-        [embedding.shape[0], options.hiddensize],
-        [],
-        embedding.dtype,
-        wm_tensor_type,
+    input_feat = inference.layerwise_inference(
+        dist_homo_graph,
+        model.full_graph_layer_forward,
+        [options.hiddensize] * options.layernum,
+        batch_size=1024,
+        chunked=use_chunked,
+        use_host_memory=use_host_memory,
     )
-    if options.layernum > 1:
-        node_feats[1] = create_wm_tensor(
-            dist_homo_graph.wm_comm,
-            [embedding.shape[0], options.hiddensize],
-            [],
-            embedding.dtype,
-            wm_tensor_type,
-        )
-    output_feat = node_feats[0]
-    input_feat = embedding
-    del embedding
-    for i in range(options.layernum):
-        model.fullbatch_single_layer_forward(
-            dist_homo_graph, i, input_feat, output_feat, 1024
-        )
-        wg.barrier(dist_homo_graph.wm_comm)
-        input_feat = output_feat
-        output_feat = node_feats[(i + 1) % 2]
-    del output_feat
-    del node_feats[1]
-    del node_feats[0]
-    del node_feats
     dgl_mrr_results = []
     ogb_mrr_results = []
     for split in ["valid", "test"]:
@@ -518,18 +470,32 @@ def train(dist_homo_graph, model, optimizer, raw_model, edge_split):
             "Test OGB MRR:",
             ogb_mrr[1],
         )
+    negative_sample_mode = (
+        graph_ops.NegativeSampleMode.DEGREE
+        if options.negative_sample == "degree"
+        else graph_ops.NegativeSampleMode.UNIFORM
+    )
     while epoch < options.epochs:
-        epoch_iter_count = dist_homo_graph.start_iter(options.batchsize)
+        epoch_iter_count = dist_homo_graph.start_iter(options.batchsize, epoch)
         if comm.get_rank() == 0:
             print("%d steps for epoch %d." % (epoch_iter_count, epoch))
         iter_id = 0
         while iter_id < epoch_iter_count:
             src_nid, pos_dst_nid = dist_homo_graph.get_train_edge_batch(iter_id)
             # neg_dst_nid = torch.randint_like(src_nid, 0, dist_homo_graph.node_count)
-            neg_dst_nid = dist_homo_graph.per_source_negative_sample(src_nid)
+            if options.negative_pool > 0:
+                neg_dst_nid = dist_homo_graph.batch_shared_negative_sample(
+                    options.negative_pool, negative_sample_mode
+                )
+            else:
+                neg_dst_nid = dist_homo_graph.per_source_negative_sample(
+                    src_nid, mode=negative_sample_mode
+                )
             optimizer.zero_grad()
             model.train()
-            pos_score, neg_score = model(src_nid, pos_dst_nid, neg_dst_nid)
+            pos_score, neg_score = model(
+                src_nid, pos_dst_nid, neg_dst_nid, options.negative_pool > 0
+            )
             pos_label = torch.ones_like(pos_score)
             neg_label = torch.zeros_like(neg_score)
             score = torch.cat([pos_score, neg_score])
@@ -25,6 +25,8 @@ from torch.utils.data import DataLoader
 from wg_torch import comm as comm
 from wg_torch import embedding_ops as embedding_ops
 from wg_torch import graph_ops as graph_ops
+from wg_torch import historical_embedding as historical_embedding
+from wg_torch import inference as inference
 from wg_torch.wm_tensor import *
 
 from wholegraph.torch import wholegraph_pytorch as wg
@@ -89,6 +91,37 @@ parser.add_option(
     default=30,
     help="inference sample count, -1 is all",
 )
+parser.add_option(
+    "--fullgraphinference",
+    action="store_true",
+    dest="fullgraphinference",
+    default=False,
+    help="whether use layer-wise full graph inference for valid and test, "
+    "default False",
+)
+parser.add_option(
+    "--history",
+    action="store_true",
+    dest="history",
+    default=False,
+    help="whether use historical embeddings of hidden layers in training, "
+    "only the inner hop is sampled, default False",
+)
+parser.add_option(
+    "--historystaleness",
+    type="int",
+    dest="historystaleness",
+    default=-1,
+    help="max steps a historical embedding can be used, -1 for no bound",
+)
+parser.add_option(
+    "--historyrefresh",
+    type="int",
+    dest="historyrefresh",
+    default=0,
+    help="steps between full refreshes of historical embeddings, 0 to only refresh "
+    "before the first step",
+)
 parser.add_option(
     "-w",
     "--dataloaderworkers",
@@ -302,9 +335,82 @@ class HomoGNNModel(torch.nn.Module):
         self.mean_output = True if options.model == "gat" else False
         self.add_self_loop = True if options.model == "gat" else False
         self.gather_fn = embedding_ops.EmbeddingLookUpModule(need_backward=False)
+        self.history = None
+
+    def enable_history(self, max_staleness, refresh_interval):
+        self.history = historical_embedding.HistoricalEmbedding(
+            self.graph.wm_comm,
+            self.graph.node_count,
+            [self.hidden_feat_dim] * (self.num_layer - 1),
+            chunked=self.graph.is_chunked,
+            use_host_memory=self.graph.use_host_memory,
+            max_staleness=max_staleness,
+            refresh_interval=refresh_interval,
+        )
+
+    def history_forward(self, ids):
+        # only the inner hop is sampled, neighbors of hidden layers come from history.
+        (
+            target_gids,
+            edge_indice,
+            csr_row_ptrs,
+            csr_col_inds,
+            sample_dup_counts,
+        ) = self.graph.unweighted_sample_without_replacement(
+            ids, [self.max_neighbors[0]]
+        )
+        batch_count = ids.numel()
+        neighbor_gids = target_gids[0][batch_count:]
+        x_feat = self.gather_fn(target_gids[0], self.graph.node_feat)
+        for i in range(self.num_layer):
+            edge_indice_i = edge_indice[0]
+            csr_row_ptr = csr_row_ptrs[0]
+            csr_col_ind = csr_col_inds[0]
+            sample_dup_count = sample_dup_counts[0]
+            if i > 0:
+                x_history, fresh_mask = self.history.pull(i - 1, neighbor_gids)
+                x_feat = torch.cat([x_feat, x_history.to(x_feat.dtype)])
+                fresh_mask = torch.cat(
+                    [
+                        torch.ones(batch_count, dtype=torch.bool, device="cuda"),
+                        fresh_mask,
+                    ]
+                )
+                (
+                    edge_indice_i,
+                    csr_row_ptr,
+                    csr_col_ind,
+                    sample_dup_count,
+                ) = historical_embedding.drop_stale_neighbor_edges(
+                    edge_indice_i, csr_row_ptr, csr_col_ind, fresh_mask
+                )
+            x_target_feat = x_feat[:batch_count]
+            sub_graph = create_sub_graph(
+                target_gids[0],
+                target_gids[1],
+                edge_indice_i,
+                csr_row_ptr,
+                csr_col_ind,
+                sample_dup_count,
+                self.add_self_loop,
+            )
+            x_feat = layer_forward(self.gnn_layers[i], x_feat, x_target_feat, sub_graph)
+            if i != self.num_layer - 1:
+                if options.framework == "dgl":
+                    x_feat = x_feat.flatten(1)
+                x_feat = F.relu(x_feat)
+                self.history.push(i, ids, x_feat)
+                x_feat = F.dropout(x_feat, options.dropout, training=self.training)
+        if options.framework == "dgl" and self.mean_output:
+            out_feat = x_feat.mean(1)
+        else:
+            out_feat = x_feat
+        return out_feat
 
     def forward(self, ids):
         ids = ids.to(self.graph.id_type()).cuda()
+        if self.history is not None and self.training:
+            return self.history_forward(ids)
         (
             target_gids,
             edge_indice,
@@ -337,16 +443,63 @@ class HomoGNNModel(torch.nn.Module):
             out_feat = x_feat
         return out_feat
 
+    def full_graph_layer_forward(
+        self,
+        i,
+        x_feat,
+        x_target_feat,
+        target_gid,
+        target_gid_1,
+        edge_indice,
+        csr_row_ptr,
+        csr_col_ind,
+        sample_dup_count,
+    ):
+        sub_graph = create_sub_graph(
+            target_gid,
+            target_gid_1,
+            edge_indice,
+            csr_row_ptr,
+            csr_col_ind,
+            sample_dup_count,
+            self.add_self_loop,
+        )
+        x_feat = layer_forward(self.gnn_layers[i], x_feat, x_target_feat, sub_graph)
+        if i != self.num_layer - 1:
+            if options.framework == "dgl":
+                x_feat = x_feat.flatten(1)
+            x_feat = F.relu(x_feat)
+        else:
+            if options.framework == "dgl" and self.mean_output:
+                x_feat = x_feat.mean(1)
+        return x_feat
+
+    def full_graph_inference(self):
+        layer_dims = [self.hidden_feat_dim] * (self.num_layer - 1)
+        layer_dims.append(self.class_count)
+        return inference.layerwise_inference(
+            self.graph, self.full_graph_layer_forward, layer_dims
+        )
+
 
 def valid_test(dataloader, model, name):
     total_correct = 0
     total_valid_sample = 0
     if comm.get_rank() == 0:
         print("%s..." % (name,))
+    full_graph_logits = None
+    if options.fullgraphinference:
+        model.eval()
+        full_graph_logits = model.module.full_graph_inference()
     for i, (idx, label) in enumerate(dataloader):
         label = torch.reshape(label, (-1,)).cuda()
         model.eval()
-        logits = model(idx)
+        if full_graph_logits is not None:
+            logits = embedding_ops.embedding_lookup_nograd_common(
+                full_graph_logits, idx.cuda()
+            )
+        else:
+            logits = model(idx)
         pred = torch.argmax(logits, 1)
         correct = (pred == label).sum()
         total_correct += correct.cpu()
@@ -421,12 +574,20 @@ def train_torch_sampler(train_data, valid_data, model, optimizer):
     while epoch < options.epochs:
         for i, (idx, label) in enumerate(train_dataloader):
             label = torch.reshape(label, (-1,)).cuda()
+            history = model.module.history
+            if history is not None and history.need_refresh():
+                model.eval()
+                history.refresh(
+                    model.module.graph, model.module.full_graph_layer_forward
+                )
             optimizer.zero_grad()
             model.train()
             logits = model(idx)
             loss = loss_fcn(logits, label)
             loss.backward()
             optimizer.step()
+            if history is not None:
+                history.advance()
             if comm.get_rank() == 0 and train_step % 100 == 0:
                 print(
                     "[%s] [LOSS] step=%d, loss=%f"
@@ -601,6 +762,8 @@ def main():
         options.classnum,
         options.neighbors,
     )
+    if options.history:
+        model.enable_history(options.historystaleness, options.historyrefresh)
     print("Rank=%d, model created." % (comma.Get_rank(),))
     model.cuda()
     print("Rank=%d, model movded to cuda." % (comma.Get_rank(),))
@@ -108,6 +108,73 @@ parser.add_option(
     default=False,
     help="whether use nccl for embeddings, default False",
 )
+parser.add_option(
+    "--dedup_grads",
+    action="store_true",
+    dest="dedup_grads",
+    default=False,
+    help="whether sum embedding gradients by index before exchange, default False",
+)
+parser.add_option(
+    "--async_embedding_update",
+    action="store_true",
+    dest="async_embedding_update",
+    default=False,
+    help="whether overlap embedding update with next step, default False",
+)
+parser.add_option(
+    "--stale_embedding_update",
+    action="store_true",
+    dest="stale_embedding_update",
+    default=False,
+    help="whether allow one step stale embeddings in async update, default False",
+)
+parser.add_option(
+    "--grad_wire_dtype",
+    dest="grad_wire_dtype",
+    default="",
+    help="embedding gradient dtype in exchange, valid values are: half, bfloat16, int8",
+)
+parser.add_option(
+    "--grad_error_feedback",
+    action="store_true",
+    dest="grad_error_feedback",
+    default=False,
+    help="whether feed back low precision gradient rounding error, default False",
+)
+parser.add_option(
+    "--hot_embedding_count",
+    type="int",
+    dest="hot_embedding_count",
+    default=0,
+    help="rows kept on device of host memory embedding, 0 for no tiering",
+)
+parser.add_option(
+    "--embedding_migrate_interval",
+    type="int",
+    dest="embedding_migrate_interval",
+    default=100,
+    help="embedding gathers between hot embedding row migrations",
+)
+parser.add_option(
+    "--embedding_optimizer",
+    dest="embedding_optimizer",
+    default="adam",
+    help="embedding optimizer, valid values are: adam, rowwise_adagrad, rowwise_adam",
+)
+parser.add_option(
+    "--opt_state_dtype",
+    dest="opt_state_dtype",
+    default="",
+    help="embedding optimizer state dtype, valid values are: half, bfloat16, int8",
+)
+parser.add_option(
+    "--stochastic_rounding",
+    action="store_true",
+    dest="stochastic_rounding",
+    default=False,
+    help="whether round embedding optimizer states stochastically, default False",
+)
 
 (options, args) = parser.parse_args()
 
@@ -449,6 +516,7 @@ def train(train_data, valid_data, model, optimizer):
         epoch = epoch + 1
         if epoch == skip_count:
             skip_epoch_time = time.time()
+    embedding_ops.wait_optimizers(force=True)
     comm.synchronize()
     train_end_time = time.time()
     train_time = train_end_time - train_start_time
@@ -504,6 +572,7 @@ def train_old(train_data, valid_data, model, optimizer):
                 )
             train_step = train_step + 1
         epoch = epoch + 1
+    embedding_ops.wait_optimizers(force=True)
     comm.synchronize()
     train_end_time = time.time()
     train_time = train_end_time - train_start_time
@@ -546,8 +615,31 @@ def main():
     )
     if comma.Get_rank() == 0:
         print("Framework=%s, Model=%s" % (options.framework, options.model))
+    low_precision_dtypes = {
+        "half": torch.float16,
+        "bfloat16": torch.bfloat16,
+        "int8": torch.int8,
+    }
+    opt_state_dtype = low_precision_dtypes.get(options.opt_state_dtype)
+    if options.embedding_optimizer == "rowwise_adagrad":
+        embedding_optimizer = embedding_ops.EmbeddingRowWiseAdaGradOptimizer()
+    elif options.embedding_optimizer == "rowwise_adam":
+        embedding_optimizer = embedding_ops.EmbeddingRowWiseAdamOptimizer(
+            state_dtype=opt_state_dtype,
+            stochastic_rounding=options.stochastic_rounding,
+        )
+    else:
+        embedding_optimizer = embedding_ops.EmbeddingLazyAdamOptimizer(
+            state_dtype=opt_state_dtype,
+            stochastic_rounding=options.stochastic_rounding,
+        )
     embedding_ops.init_embedding_backward_env(
-        wm_comm, embedding_ops.EmbeddingLazyAdamOptimizer()
+        wm_comm,
+        embedding_optimizer,
+        async_update=options.async_embedding_update,
+        allow_stale=options.stale_embedding_update,
+        grad_wire_dtype=low_precision_dtypes.get(options.grad_wire_dtype),
+        grad_error_feedback=options.grad_error_feedback,
     )
 
     train_data, valid_data, test_data = graph_ops.load_pickle_data(
@@ -565,18 +657,26 @@ def main():
         use_host_memory,
         ignore_embeddings=["paper"],
     )
+    use_tiered_embedding = options.hot_embedding_count > 0 and not options.use_nccl
     dist_homo_graph.create_node_embedding(
         "paper",
-        use_chunked=use_chunked,
-        use_host_memory=use_host_memory,
+        use_chunked=use_chunked and not use_tiered_embedding,
+        use_host_memory=use_host_memory or use_tiered_embedding,
         use_nccl=options.use_nccl,
     )
     lt = get_local_tensor(dist_homo_graph.node_feat)
     torch.nn.init.xavier_uniform_(lt)
     torch.set_printoptions(edgeitems=10, linewidth=200)
     del lt
+    node_embedding = dist_homo_graph.node_feat
+    if use_tiered_embedding:
+        node_embedding = embedding_ops.TieredEmbedding(
+            node_embedding,
+            options.hot_embedding_count,
+            migrate_interval=options.embedding_migrate_interval,
+        )
     dist_homo_graph.node_feat = embedding_ops.TrainableEmbedding(
-        dist_homo_graph.node_feat
+        node_embedding, dedup_grads=options.dedup_grads
     )
     print("Rank=%d, Graph loaded." % (comma.Get_rank(),))
     model = HomoGNNModel(
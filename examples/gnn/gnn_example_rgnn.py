@@ -56,6 +56,13 @@ parser.add_option(
     default="25,15",
     help="train neighboor sample count",
 )
+parser.add_option(
+    "--edge_type_neighbors",
+    dest="edge_type_neighbors",
+    default="",
+    help="neighbor sample count of each edge type, e.g. 25,10,10,10,10, "
+    "layers separated by ';', empty to sample as homogeneous graph",
+)
 parser.add_option(
     "--hiddensize", type="int", dest="hiddensize", default=1024, help="hidden size"
 )
@@ -827,14 +834,9 @@ class MAG240HomoGraph(object):
             options.truncate_dim = self.feature_size
             return
         assert 0 < options.truncate_dim <= self.feature_size
-        if isinstance(self.homo_graph.node_feat, torch.Tensor):
-            self.homo_graph.node_feat = self.homo_graph.node_feat[
-                :, : options.truncate_dim
-            ]
-        else:
-            self.homo_graph.node_feat = wg.get_sub_chunked_tensor(
-                self.homo_graph.node_feat, [0, 0], [-1, 64]
-            )
+        self.homo_graph.node_feat = embedding_ops.get_column_sub_tensor(
+            self.homo_graph.node_feat, 0, options.truncate_dim
+        )
         self.feature_size = options.truncate_dim
 
 
@@ -851,31 +853,60 @@ def parse_max_neighbors(num_layer, neighbor_str):
     return max_neighbors
 
 
+def parse_edge_type_max_neighbors(num_layer, neighbor_str):
+    layer_str_vec = neighbor_str.split(";")
+    assert len(layer_str_vec) == 1 or len(layer_str_vec) == num_layer
+    max_neighbors = []
+    for layer_str in layer_str_vec:
+        max_neighbors.append(
+            {etype: int(ns) for etype, ns in enumerate(layer_str.split(","))}
+        )
+    for i in range(len(max_neighbors), num_layer):
+        max_neighbors.append(max_neighbors[0])
+    return max_neighbors
+
+
 def build_dgl_subgraph(idx: torch.Tensor, graph: MAG240HomoGraph, max_neighbors):
     paper_ids = idx.cuda()
     mixed_paper_ids = embedding_ops.embedding_lookup_nograd_common(
         graph.type_to_mixed_id[0], paper_ids
     )
-    (
-        target_gids,
-        edge_indice,
-        csr_row_ptrs,
-        csr_col_inds,
-        sample_dup_counts,
-    ) = graph.homo_graph.unweighted_sample_without_replacement(
-        mixed_paper_ids, max_neighbors
-    )
+    edge_types = None
+    if isinstance(max_neighbors[0], dict):
+        (
+            target_gids,
+            edge_indice,
+            csr_row_ptrs,
+            csr_col_inds,
+            sample_dup_counts,
+            edge_types,
+        ) = graph.homo_graph.typed_sample_without_replacement(
+            mixed_paper_ids, max_neighbors, graph.csr_col_edge_type, graph.num_etypes
+        )
+    else:
+        (
+            target_gids,
+            edge_indice,
+            csr_row_ptrs,
+            csr_col_inds,
+            sample_dup_counts,
+        ) = graph.homo_graph.unweighted_sample_without_replacement(
+            mixed_paper_ids, max_neighbors
+        )
     mfgs = []
     for layer in range(options.layernum):
         block = dgl.create_block(
             ("csc", (csr_row_ptrs[layer], csr_col_inds[layer], torch.IntTensor([]))),
             device="cuda",
         )
-        edge_type = graph.get_edge_type(
-            target_gids[layer + 1],
-            csr_row_ptrs[layer],
-            target_gids[layer][csr_col_inds[layer].long()],
-        )
+        if edge_types is not None:
+            edge_type = edge_types[layer]
+        else:
+            edge_type = graph.get_edge_type(
+                target_gids[layer + 1],
+                csr_row_ptrs[layer],
+                target_gids[layer][csr_col_inds[layer].long()],
+            )
         block.edata["etype"] = edge_type
         mfgs += [block]
     x = graph.homo_graph.gather(target_gids[0], dtype=torch.float32)
@@ -952,19 +983,34 @@ def build_wg_subgraph(idx: torch.Tensor, graph: MAG240HomoGraph, max_neighbors):
     target_gids[hops] = mixed_paper_ids
     sub_graphs = [None] * hops
     for i in range(hops - 1, -1, -1):
-        (
-            neighboor_gids_offset,
-            neighboor_gids_vdata,
-            neighboor_src_lids,
-        ) = graph_ops.unweighted_sample_without_replacement_single_layer(
-            target_gids[i + 1],
-            graph.csr_row_ptr,
-            graph.csr_col_ind,
-            max_neighbors[hops - i - 1],
-        )
-        edge_type = graph.get_edge_type(
-            target_gids[i + 1], neighboor_gids_offset, neighboor_gids_vdata
-        )
+        if isinstance(max_neighbors[hops - i - 1], dict):
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+                edge_type,
+            ) = graph_ops.typed_sample_without_replacement_single_layer(
+                target_gids[i + 1],
+                graph.csr_row_ptr,
+                graph.csr_col_ind,
+                graph.csr_col_edge_type,
+                max_neighbors[hops - i - 1],
+                graph.num_etypes,
+            )
+        else:
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+            ) = graph_ops.unweighted_sample_without_replacement_single_layer(
+                target_gids[i + 1],
+                graph.csr_row_ptr,
+                graph.csr_col_ind,
+                max_neighbors[hops - i - 1],
+            )
+            edge_type = graph.get_edge_type(
+                target_gids[i + 1], neighboor_gids_offset, neighboor_gids_vdata
+            )
         edge_typed_ids = torch.ops.wholegraph.pack_to_typed_ids(
             neighboor_gids_vdata, edge_type
         )
@@ -1031,6 +1077,10 @@ def train(train_data, valid_data, model, graph, optimizer):
     )
 
     max_neighbors = parse_max_neighbors(options.layernum, options.neighbors)
+    if options.edge_type_neighbors != "":
+        max_neighbors = parse_edge_type_max_neighbors(
+            options.layernum, options.edge_type_neighbors
+        )
 
     train_dataloader = torch.utils.data.DataLoader(
         train_dataset,
@@ -16,6 +16,7 @@ from optparse import OptionParser
 
 import numpy as np
 import torch
+from wg_torch.compressed_file import compress_part_files
 from wg_torch.graph_ops import (
     check_data_integrity,
     numpy_dtype_to_string,
@@ -23,6 +24,7 @@ from wg_torch.graph_ops import (
     save_meta_file,
     get_part_filename,
     graph_name_normalize,
+    reshard_part_files,
 )
 
 from wholegraph.torch import wholegraph_pytorch as wg
@@ -277,6 +279,40 @@ def build_homo_graph(root_dir: str, graph_name: str):
     wg.destroy_graph_builder(graph_builder)
 
 
+def reshard_homo_graph(root_dir: str, graph_name: str, world_size: int):
+    normalized_graph_name = graph_name_normalize(graph_name)
+    output_dir = os.path.join(root_dir, normalized_graph_name, "converted")
+    meta_file = load_meta_file(output_dir, normalized_graph_name)
+    node_meta = meta_file["nodes"][0]
+    print("resharding node feature...")
+    reshard_part_files(
+        os.path.join(output_dir, node_meta["emb_file_prefix"]),
+        np.dtype(node_meta["dtype"]),
+        world_size,
+        node_meta["emb_dim"],
+    )
+    print("resharding graph...")
+    reshard_part_files(
+        os.path.join(output_dir, "homograph_csr_row_ptr"), np.int64, world_size
+    )
+    reshard_part_files(
+        os.path.join(output_dir, "homograph_csr_col_idx"), np.int32, world_size
+    )
+
+
+def compress_homo_graph(root_dir: str, graph_name: str, codec: str):
+    normalized_graph_name = graph_name_normalize(graph_name)
+    output_dir = os.path.join(root_dir, normalized_graph_name, "converted")
+    meta_file = load_meta_file(output_dir, normalized_graph_name)
+    print("compressing node feature...")
+    compress_part_files(
+        os.path.join(output_dir, meta_file["nodes"][0]["emb_file_prefix"]), codec
+    )
+    print("compressing graph...")
+    compress_part_files(os.path.join(output_dir, "homograph_csr_row_ptr"), codec)
+    compress_part_files(os.path.join(output_dir, "homograph_csr_col_idx"), codec)
+
+
 if __name__ == "__main__":
     parser = OptionParser()
     parser.add_option(
@@ -294,12 +330,32 @@ if __name__ == "__main__":
         help="graph name, ogbn-papers100M, ogbn-products or ogbl-citation2",
     )
     parser.add_option(
-        "-p", "--phase", dest="phase", default="build", help="phase, convert or build"
+        "-p",
+        "--phase",
+        dest="phase",
+        default="build",
+        help="phase, convert, build, reshard or compress",
+    )
+    parser.add_option(
+        "-w",
+        "--world_size",
+        type="int",
+        dest="world_size",
+        default=8,
+        help="number of ranks to reshard files for, used in reshard phase.",
+    )
+
+    parser.add_option(
+        "-c",
+        "--codec",
+        dest="codec",
+        default="zstd",
+        help="block compression codec, lz4 or zstd, used in compress phase.",
     )
 
     (options, args) = parser.parse_args()
 
-    assert options.phase == "convert" or options.phase == "build"
+    assert options.phase in ["convert", "build", "reshard", "compress"]
 
     if options.phase == "convert":
         norm_graph_name = graph_name_normalize(options.graph_name)
@@ -320,5 +376,13 @@ if __name__ == "__main__":
             )
         else:
             raise ValueError("graph name unknown.")
-    else:
+    elif options.phase == "build":
         build_homo_graph(os.path.join(options.root_dir), options.graph_name)
+    elif options.phase == "reshard":
+        reshard_homo_graph(
+            os.path.join(options.root_dir), options.graph_name, options.world_size
+        )
+    else:
+        compress_homo_graph(
+            os.path.join(options.root_dir), options.graph_name, options.codec
+        )
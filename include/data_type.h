@@ -122,6 +122,7 @@ struct ThreeWMTHash : public std::unary_function<std::tuple<WMType, WMType, WMTy
 #define VEC_FLOAT_DOUBLE std::vector<whole_graph::WMType>({WMT_Float, WMT_Double})
 #define VEC_HALF_FLOAT std::vector<whole_graph::WMType>({WMT_Half, WMT_Float})
 #define VEC_BF16_HALF_FLOAT std::vector<whole_graph::WMType>({WMT_Bfloat16, WMT_Half, WMT_Float})
+#define VEC_INT8_BF16_HALF_FLOAT std::vector<whole_graph::WMType>({WMT_Int8, WMT_Bfloat16, WMT_Half, WMT_Float})
 #define VEC_HALF_FLOAT_DOUBLE std::vector<whole_graph::WMType>({WMT_Half, WMT_Float, WMT_Double})
 #define VEC_ALLFLOAT std::vector<whole_graph::WMType>({WMT_Bfloat16, WMT_Half, WMT_Float, WMT_Double})
 
@@ -202,6 +203,13 @@ struct ThreeWMTHash : public std::unary_function<std::tuple<WMType, WMType, WMTy
   }                                                \
     CASES_HALF_FLOAT(TEMPFUNC_NAME, ##__VA_ARGS__)
 
+#define CASES_INT8_BF16_HALF_FLOAT(TEMPFUNC_NAME, ...) \
+  case WMT_Int8: {                                    \
+    TEMPFUNC_NAME<int8_t, ##__VA_ARGS__>();           \
+    break;                                            \
+  }                                                   \
+    CASES_BF16_HALF_FLOAT(TEMPFUNC_NAME, ##__VA_ARGS__)
+
 #define CASES_HALF_FLOAT_DOUBLE(TEMPFUNC_NAME, ...) \
   case WMT_Half: {                                  \
     TEMPFUNC_NAME<__half, ##__VA_ARGS__>();         \
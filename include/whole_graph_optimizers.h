@@ -22,6 +22,8 @@ typedef enum {
   OPT_TYPE_LAZY_ADAM = 1,
   OPT_TYPE_RMSPROP = 2,
   OPT_TYPE_ADAGRAD = 3,
+  OPT_TYPE_ROWWISE_ADAGRAD = 5,
+  OPT_TYPE_ROWWISE_ADAM = 6,
 } OptimizerType;
 
 struct SGDInfo {
@@ -50,9 +52,27 @@ struct LazyAdamData {
   float beta2t = 1.0f;
 };
 
+// Lazy Adam with int8 states, m and sqrt(v) of each row are quantized by their row absmax.
+struct LazyAdamInt8Data {
+  float beta1t = 1.0f;
+  float beta2t = 1.0f;
+  float m_scale = 1.0f;
+  float v_scale = 1.0f;
+};
+
+// Row-wise Adam keeps m per element, and v as the mean over the row.
+struct RowWiseAdamData {
+  float beta1t = 1.0f;
+  float beta2t = 1.0f;
+  float v = 0.0f;
+};
+
 struct OptimizerInfo {
   OptimizerType type;
   float lr;
+  // round states to reduced precision stochastically instead of to nearest.
+  int stochastic_rounding;
+  unsigned long long random_seed;
   union {
     SGDInfo sgd_info;
     LazyAdamInfo lazy_adam_info;
@@ -17,6 +17,7 @@
 
 #include <cstdint>
 #include <string>
+#include <vector>
 
 #include "cuda_env_fns.h"
 #include "data_type.h"
@@ -174,6 +175,76 @@ void WholeMemoryChunkedGather(WMType output_t,
                               int64_t output_stride,
                               cudaStream_t stream = nullptr);
 
+typedef enum {
+  POOLING_SUM = 0,
+  POOLING_MEAN = 1,
+  POOLING_MAX = 2,
+} PoolingMode;
+
+/*!
+ * Pooled gather from WholeMemory, bag i pools rows indice[offsets[i]:offsets[i + 1]]
+ * @param output_t : output data type
+ * @param param_t : WholeMemory parameter data type
+ * @param index_t : indice data type
+ * @param output : output pointer, bag_count * embedding_dim
+ * @param max_indice_pos : for POOLING_MAX, position in indice of the max element, -1 for empty bag
+ * @param parameter : WholeMemory pointer
+ * @param indice : indice pointer
+ * @param offsets : int64 bag offsets into indice, bag_count + 1 elements
+ * @param storage_offset : storage offset in terms of param_t of WholeMemory
+ * @param bag_count : bag count
+ * @param embedding_dim : embedding dim of WholeMemory
+ * @param embedding_stride : embedding_stride of WholeMemory
+ * @param pooling_mode : PoolingMode
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryPooledGather(WMType output_t,
+                             WMType param_t,
+                             WMType index_t,
+                             void *output,
+                             int *max_indice_pos,
+                             const void *parameter,
+                             const void *indice,
+                             const int64_t *offsets,
+                             size_t storage_offset,
+                             int64_t bag_count,
+                             int64_t embedding_dim,
+                             int64_t embedding_stride,
+                             int pooling_mode,
+                             cudaStream_t stream = nullptr);
+
+/*!
+ * Pooled gather from chunked WholeMemory, bag i pools rows indice[offsets[i]:offsets[i + 1]]
+ * @param output_t : output data type
+ * @param param_t : chunked WholeMemory parameter data type
+ * @param index_t : indice data type
+ * @param output : output pointer, bag_count * embedding_dim
+ * @param max_indice_pos : for POOLING_MAX, position in indice of the max element, -1 for empty bag
+ * @param parameter : chunked WholeMemory pointer
+ * @param indice : indice pointer
+ * @param offsets : int64 bag offsets into indice, bag_count + 1 elements
+ * @param storage_offset : storage offset in terms of param_t of chunked WholeMemory
+ * @param bag_count : bag count
+ * @param embedding_dim : embedding dim of chunked WholeMemory
+ * @param embedding_stride : embedding_stride of chunked WholeMemory
+ * @param pooling_mode : PoolingMode
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryChunkedPooledGather(WMType output_t,
+                                    WMType param_t,
+                                    WMType index_t,
+                                    void *output,
+                                    int *max_indice_pos,
+                                    const void *parameter,
+                                    const void *indice,
+                                    const int64_t *offsets,
+                                    size_t storage_offset,
+                                    int64_t bag_count,
+                                    int64_t embedding_dim,
+                                    int64_t embedding_stride,
+                                    int pooling_mode,
+                                    cudaStream_t stream = nullptr);
+
 /*!
  * Gather from NCCL WholeMemory
  * @param param_t : NCCL WholeMemory parameter data type
@@ -202,6 +273,124 @@ void WholeMemoryNCCLGather(WMType param_t,
                            CUDAEnvFns cuda_env_fns,
                            cudaStream_t stream = nullptr);
 
+/*!
+ * Gather selected columns from WholeMemory
+ * @param output_t : output data type
+ * @param param_t : WholeMemory parameter data type
+ * @param index_t : indice data type
+ * @param output : output pointer
+ * @param parameter : WholeMemory pointer
+ * @param indice : indice pointer
+ * @param columns : int column ids to gather, on device
+ * @param storage_offset : storage offset in terms of param_t of WholeMemory
+ * @param indice_count : indice count to gather
+ * @param column_count : column count to gather
+ * @param embedding_stride : embedding_stride of WholeMemory
+ * @param output_stride : output store stride
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryGatherColumns(WMType output_t,
+                              WMType param_t,
+                              WMType index_t,
+                              void *output,
+                              const void *parameter,
+                              const void *indice,
+                              const int *columns,
+                              size_t storage_offset,
+                              int64_t indice_count,
+                              int64_t column_count,
+                              int64_t embedding_stride,
+                              int64_t output_stride,
+                              cudaStream_t stream = nullptr);
+
+/*!
+ * Gather selected columns from chunked WholeMemory
+ * @param output_t : output data type
+ * @param param_t : chunked WholeMemory parameter data type
+ * @param index_t : indice data type
+ * @param output : output pointer
+ * @param parameter : chunked WholeMemory pointer
+ * @param indice : indice pointer
+ * @param columns : int column ids to gather, on device
+ * @param storage_offset : storage offset in terms of param_t of chunked WholeMemory
+ * @param indice_count : indice count to gather
+ * @param column_count : column count to gather
+ * @param embedding_stride : embedding_stride of chunked WholeMemory
+ * @param output_stride : output store stride
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryChunkedGatherColumns(WMType output_t,
+                                     WMType param_t,
+                                     WMType index_t,
+                                     void *output,
+                                     const void *parameter,
+                                     const void *indice,
+                                     const int *columns,
+                                     size_t storage_offset,
+                                     int64_t indice_count,
+                                     int64_t column_count,
+                                     int64_t embedding_stride,
+                                     int64_t output_stride,
+                                     cudaStream_t stream = nullptr);
+
+/*!
+ * Gather selected columns from NCCL WholeMemory, only the selected columns are sent
+ * @param param_t : NCCL WholeMemory parameter data type
+ * @param index_t : indice data type
+ * @param output : output pointer
+ * @param parameter_wnmt : NCCL WholeMemory pointer
+ * @param indice : indice pointer
+ * @param columns : int column ids to gather, on device
+ * @param storage_offset : storage offset in terms of param_t of NCCL WholeMemory
+ * @param indice_count : indice count to gather
+ * @param column_count : column count to gather
+ * @param embedding_stride : embedding_stride of NCCL WholeMemory
+ * @param output_stride : output store stride
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryNCCLGatherColumns(WMType param_t,
+                                  WMType index_t,
+                                  void *output,
+                                  whole_graph::WholeNCCLMemory_t parameter_wnmt,
+                                  const void *indice,
+                                  const int *columns,
+                                  size_t storage_offset,
+                                  int64_t indice_count,
+                                  int64_t column_count,
+                                  int64_t embedding_stride,
+                                  int64_t output_stride,
+                                  CUDAEnvFns cuda_env_fns,
+                                  cudaStream_t stream = nullptr);
+
+/*!
+ * Gather the same indice from several NCCL WholeMemory tables of the same communicator
+ * and entry partition, indice are routed once and rows of all tables are exchanged in
+ * one packed all-to-all
+ * @param param_ts : NCCL WholeMemory parameter data types
+ * @param index_t : indice data type
+ * @param outputs : output pointers, contiguous
+ * @param parameter_wnmts : NCCL WholeMemory pointers
+ * @param indice : indice pointer
+ * @param storage_offsets : storage offsets in terms of param_t of NCCL WholeMemory
+ * @param indice_count : indice count to gather
+ * @param embedding_dims : embedding dims of NCCL WholeMemory
+ * @param embedding_strides : embedding_strides of NCCL WholeMemory
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : CUDA stream to use
+ */
+void WholeMemoryNCCLGroupedGather(const std::vector<WMType> &param_ts,
+                                  WMType index_t,
+                                  const std::vector<void *> &outputs,
+                                  const std::vector<whole_graph::WholeNCCLMemory_t> &parameter_wnmts,
+                                  const void *indice,
+                                  const std::vector<size_t> &storage_offsets,
+                                  int64_t indice_count,
+                                  const std::vector<int64_t> &embedding_dims,
+                                  const std::vector<int64_t> &embedding_strides,
+                                  CUDAEnvFns cuda_env_fns,
+                                  cudaStream_t stream = nullptr);
+
 /*!
  * Scatter to NCCL WholeMemory
  * @param param_t : NCCL WholeMemory parameter data type
@@ -234,6 +423,8 @@ void WholeMemoryNCCLScatter(WMType param_t,
  * Exchange embedding gradients
  * @param index_t : indice data type
  * @param grad_t : gradient data type
+ * @param wire_t : gradient data type sent to other ranks, grad_t, half, bfloat16 or int8 with per row scale,
+ *     received gradients are accumulated in float
  * @param local_indice_allocator : allocator for local indice
  * @param local_grad_allocator : allocator for local gradients
  * @param sparse_indices : pointer to indices
@@ -248,6 +439,7 @@ void WholeMemoryNCCLScatter(WMType param_t,
  */
 void WholeMemoryExchangeEmbeddingGrads(WMType index_t,
                                        WMType grad_t,
+                                       WMType wire_t,
                                        std::function<void *(size_t)> local_indice_allocator,
                                        std::function<void *(size_t)> local_grad_allocator,
                                        const void *sparse_indices,
@@ -178,6 +178,45 @@ void WmmpChunkedUnweightedSampleWithoutReplacement(const std::function<void *(si
                                                    const CUDAEnvFns &cuda_env_fns,
                                                    cudaStream_t stream = nullptr);
 
+/*!
+ * Unweighted neighbor sampling with replacement
+ * @param sample_output_allocator : allocator for sampled neighbor ids
+ * @param center_localid_allocator : allocator for center local ids of sampled neighbors
+ * @param sample_offset : output sample offset, should have center_node_count + 1 elements
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type
+ * @param id_type : id type
+ * @param center_nodes : center nodes to sample
+ * @param center_node_count : center node count
+ * @param max_sample_count : sample count of each center node, should be larger than 0,
+ *        center nodes without neighbors get no samples
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpUnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                         const std::function<void *(size_t)> &center_localid_allocator,
+                                         int *sample_offset,
+                                         void *wm_csr_row_ptr,
+                                         void *wm_csr_col_ptr,
+                                         WMType id_type,
+                                         const void *center_nodes,
+                                         int center_node_count,
+                                         int max_sample_count,
+                                         const CUDAEnvFns &cuda_env_fns,
+                                         cudaStream_t stream);
+
+void WmmpChunkedUnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                                const std::function<void *(size_t)> &center_localid_allocator,
+                                                int *sample_offset,
+                                                void *wm_csr_row_ptr,
+                                                void *wm_csr_col_ptr,
+                                                WMType id_type,
+                                                const void *center_nodes,
+                                                int center_node_count,
+                                                int max_sample_count,
+                                                const CUDAEnvFns &cuda_env_fns,
+                                                cudaStream_t stream);
+
 /*!
  * AppendUnique function, append neighbor to target and then do unique, keeping targets first.
  * @param target : target ids
@@ -309,6 +348,34 @@ void WmmpChunkedPerNodeUniformNegativeSample(const std::function<void *(size_t)>
                                              const CUDAEnvFns &cuda_env_fns,
                                              cudaStream_t stream = nullptr);
 
+/*!
+ * WmmpGetCSRDegree on WholeMemory
+ * @param degree : output degree of each node, node_count elements
+ * @param wm_csr_row_ptr : allocated csr_row_ptr, int64_t
+ * @param start_node : first node to get degree
+ * @param node_count : node count to get degree
+ * @param stream : CUDA stream to use
+ */
+void WmmpGetCSRDegree(int64_t *degree,
+                      void *wm_csr_row_ptr,
+                      int64_t start_node,
+                      int64_t node_count,
+                      cudaStream_t stream = nullptr);
+
+/*!
+ * WmmpChunkedGetCSRDegree on WholeChunkedMemory
+ * @param degree : output degree of each node, node_count elements
+ * @param wm_csr_row_ptr : allocated csr_row_ptr, int64_t
+ * @param start_node : first node to get degree
+ * @param node_count : node count to get degree
+ * @param stream : CUDA stream to use
+ */
+void WmmpChunkedGetCSRDegree(int64_t *degree,
+                             void *wm_csr_row_ptr,
+                             int64_t start_node,
+                             int64_t node_count,
+                             cudaStream_t stream = nullptr);
+
 void WmmpGetCSRMixedSubGraphEdgeTypes(WMType mixid_type,
                                       int8_t *output,
                                       const void *src_mixid,
@@ -383,6 +450,265 @@ void WmmpChunkedWeightedSampleWithoutReplacement(const std::function<void *(size
                                                  const CUDAEnvFns &cuda_env_fns,
                                                  cudaStream_t stream);
 
+/*!
+ * Build per row alias tables for weighted sampling, stored alongside CSR with one entry per edge
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_weight_ptr : edge weight, weight_type
+ * @param wm_alias_prob_ptr : output alias probability of each edge, weight_type
+ * @param wm_alias_idx_ptr : output alias index local to row of each edge, int32
+ * @param weight_type : weight type, float or double
+ * @param start_node : first node to build alias tables for
+ * @param node_count : node count to build alias tables for, each rank can build its own node range
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpBuildAliasTable(void *wm_csr_row_ptr,
+                         void *wm_csr_weight_ptr,
+                         void *wm_alias_prob_ptr,
+                         void *wm_alias_idx_ptr,
+                         WMType weight_type,
+                         int64_t start_node,
+                         int64_t node_count,
+                         const CUDAEnvFns &cuda_env_fns,
+                         cudaStream_t stream);
+
+void WmmpChunkedBuildAliasTable(void *wm_csr_row_ptr,
+                                void *wm_csr_weight_ptr,
+                                void *wm_alias_prob_ptr,
+                                void *wm_alias_idx_ptr,
+                                WMType weight_type,
+                                int64_t start_node,
+                                int64_t node_count,
+                                const CUDAEnvFns &cuda_env_fns,
+                                cudaStream_t stream);
+
+/*!
+ * Weighted neighbor sampling using alias tables built by WmmpBuildAliasTable
+ * @param sample_output_allocator : allocator for sampled neighbor ids
+ * @param center_localid_allocator : allocator for center local ids of sampled neighbors
+ * @param sample_offset : output sample offset, should have center_node_count + 1 elements
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type
+ * @param wm_alias_prob_ptr : alias probability of each edge, weight_type
+ * @param wm_alias_idx_ptr : alias index local to row of each edge, int32
+ * @param id_type : id type
+ * @param weight_type : weight type, float or double
+ * @param center_nodes : center nodes to sample
+ * @param center_node_count : center node count
+ * @param max_sample_count : max sample count of each center node, should be larger than 0
+ * @param with_replacement : if true, sample max_sample_count neighbors with replacement with O(1) per draw,
+ *        else sample by rejecting duplicated draws, max_sample_count should be no larger than 64
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpAliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                             const std::function<void *(size_t)> &center_localid_allocator,
+                             int *sample_offset,
+                             void *wm_csr_row_ptr,
+                             void *wm_csr_col_ptr,
+                             void *wm_alias_prob_ptr,
+                             void *wm_alias_idx_ptr,
+                             WMType id_type,
+                             WMType weight_type,
+                             const void *center_nodes,
+                             int center_node_count,
+                             int max_sample_count,
+                             bool with_replacement,
+                             const CUDAEnvFns &cuda_env_fns,
+                             cudaStream_t stream);
+
+void WmmpChunkedAliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                                    const std::function<void *(size_t)> &center_localid_allocator,
+                                    int *sample_offset,
+                                    void *wm_csr_row_ptr,
+                                    void *wm_csr_col_ptr,
+                                    void *wm_alias_prob_ptr,
+                                    void *wm_alias_idx_ptr,
+                                    WMType id_type,
+                                    WMType weight_type,
+                                    const void *center_nodes,
+                                    int center_node_count,
+                                    int max_sample_count,
+                                    bool with_replacement,
+                                    const CUDAEnvFns &cuda_env_fns,
+                                    cudaStream_t stream);
+
+/*!
+ * Neighbor sampling without replacement with a separate fanout for each edge type, all types are
+ * sampled in one pass over the edges of each center node, samples of each center node are grouped by type
+ * @param sample_output_allocator : allocator for sampled neighbor ids
+ * @param center_localid_allocator : allocator for center local ids of sampled neighbors
+ * @param sample_edge_type_allocator : allocator for edge types of sampled neighbors, int8
+ * @param sample_offset : output sample offset, should have center_node_count + 1 elements
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type
+ * @param wm_edge_type_ptr : edge type of each edge, int8
+ * @param id_type : id type
+ * @param center_nodes : center nodes to sample
+ * @param center_node_count : center node count
+ * @param type_max_sample_count : device array of edge_type_count fanouts, 0 to skip the type,
+ *        negative to sample all edges of the type
+ * @param edge_type_count : edge type count, no larger than 64
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpTypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                       const std::function<void *(size_t)> &center_localid_allocator,
+                                       const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                       int *sample_offset,
+                                       void *wm_csr_row_ptr,
+                                       void *wm_csr_col_ptr,
+                                       void *wm_edge_type_ptr,
+                                       WMType id_type,
+                                       const void *center_nodes,
+                                       int center_node_count,
+                                       const int *type_max_sample_count,
+                                       int edge_type_count,
+                                       const CUDAEnvFns &cuda_env_fns,
+                                       cudaStream_t stream);
+
+void WmmpChunkedTypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                              const std::function<void *(size_t)> &center_localid_allocator,
+                                              const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                              int *sample_offset,
+                                              void *wm_csr_row_ptr,
+                                              void *wm_csr_col_ptr,
+                                              void *wm_edge_type_ptr,
+                                              WMType id_type,
+                                              const void *center_nodes,
+                                              int center_node_count,
+                                              const int *type_max_sample_count,
+                                              int edge_type_count,
+                                              const CUDAEnvFns &cuda_env_fns,
+                                              cudaStream_t stream);
+
+/*!
+ * Temporal neighbor sampling on CSR whose edges of each row are sorted by time in ascending order
+ * @param sample_output_allocator : allocator for sampled neighbor ids
+ * @param center_localid_allocator : allocator for center local ids of sampled neighbors
+ * @param sample_time_allocator : allocator for time of sampled edges, time_type
+ * @param sample_offset : output sample offset, should have center_node_count + 1 elements
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type
+ * @param wm_edge_time_ptr : time of each edge, time_type, sorted in each row
+ * @param id_type : id type
+ * @param time_type : time type, int32, int64, float or double
+ * @param center_nodes : center nodes to sample
+ * @param query_time : query time of each center node, time_type
+ * @param center_node_count : center node count
+ * @param window : only edges with time in [query_time - window, query_time) are candidates,
+ *        negative for no lower bound
+ * @param include_query_time : if true, edges with time equal to query_time are also candidates
+ * @param max_sample_count : max sample count of each center node, 0 or negative to sample all candidates
+ * @param most_recent : if true, sample the latest max_sample_count candidates, else sample uniformly
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpTemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                        const std::function<void *(size_t)> &center_localid_allocator,
+                        const std::function<void *(size_t)> &sample_time_allocator,
+                        int *sample_offset,
+                        void *wm_csr_row_ptr,
+                        void *wm_csr_col_ptr,
+                        void *wm_edge_time_ptr,
+                        WMType id_type,
+                        WMType time_type,
+                        const void *center_nodes,
+                        const void *query_time,
+                        int center_node_count,
+                        double window,
+                        bool include_query_time,
+                        int max_sample_count,
+                        bool most_recent,
+                        const CUDAEnvFns &cuda_env_fns,
+                        cudaStream_t stream);
+
+void WmmpChunkedTemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                               const std::function<void *(size_t)> &center_localid_allocator,
+                               const std::function<void *(size_t)> &sample_time_allocator,
+                               int *sample_offset,
+                               void *wm_csr_row_ptr,
+                               void *wm_csr_col_ptr,
+                               void *wm_edge_time_ptr,
+                               WMType id_type,
+                               WMType time_type,
+                               const void *center_nodes,
+                               const void *query_time,
+                               int center_node_count,
+                               double window,
+                               bool include_query_time,
+                               int max_sample_count,
+                               bool most_recent,
+                               const CUDAEnvFns &cuda_env_fns,
+                               cudaStream_t stream);
+
+/*!
+ * Batched random walk, uniform, weighted by alias tables, or node2vec biased
+ * @param walk_output : output walks, id_type, start_node_count x (walk_length + 1), walks reaching a node
+ *        without neighbors stop there and the rest is filled with -1
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type, neighbors of each row should be sorted for node2vec walk
+ * @param wm_alias_prob_ptr : alias probability of each edge built by WmmpBuildAliasTable, weight_type,
+ *        nullptr for uniform walk
+ * @param wm_alias_idx_ptr : alias index local to row of each edge, int32, nullptr for uniform walk
+ * @param id_type : id type
+ * @param weight_type : weight type, float or double
+ * @param start_nodes : start node of each walk
+ * @param start_node_count : walk count
+ * @param walk_length : step count of each walk
+ * @param p : node2vec return parameter, 1 for first order walk
+ * @param q : node2vec in-out parameter, 1 for first order walk
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpRandomWalk(void *walk_output,
+                    void *wm_csr_row_ptr,
+                    void *wm_csr_col_ptr,
+                    void *wm_alias_prob_ptr,
+                    void *wm_alias_idx_ptr,
+                    WMType id_type,
+                    WMType weight_type,
+                    const void *start_nodes,
+                    int start_node_count,
+                    int walk_length,
+                    float p,
+                    float q,
+                    const CUDAEnvFns &cuda_env_fns,
+                    cudaStream_t stream);
+
+void WmmpChunkedRandomWalk(void *walk_output,
+                           void *wm_csr_row_ptr,
+                           void *wm_csr_col_ptr,
+                           void *wm_alias_prob_ptr,
+                           void *wm_alias_idx_ptr,
+                           WMType id_type,
+                           WMType weight_type,
+                           const void *start_nodes,
+                           int start_node_count,
+                           int walk_length,
+                           float p,
+                           float q,
+                           const CUDAEnvFns &cuda_env_fns,
+                           cudaStream_t stream);
+
+/*!
+ * Host version of WmmpRandomWalk, all pointers are host memory
+ * @param thread_count : worker thread count, 0 or negative for hardware concurrency
+ */
+void WmmpHostRandomWalk(void *walk_output,
+                        void *csr_row_ptr,
+                        void *csr_col_ptr,
+                        void *alias_prob_ptr,
+                        void *alias_idx_ptr,
+                        WMType id_type,
+                        WMType weight_type,
+                        const void *start_nodes,
+                        int start_node_count,
+                        int walk_length,
+                        float p,
+                        float q,
+                        int thread_count);
+
 void WmmpExtractSubGraphWithFilter(WMType id_type,
                                    WMType edge_value_type,
                                    int extract_type,
@@ -417,4 +743,40 @@ void WmmpExtractSubGraphWithFilterChunked(WMType id_type,
                                           const CUDAEnvFns &cuda_env_fns,
                                           cudaStream_t stream);
 
+/*!
+ * Extract the induced sub graph of a node set, that is all edges whose both endpoints are in the set.
+ * Membership is tested with a hash table built from node_ids.
+ * @param subgraph_row_ptr : output CSR row pointer of sub graph, should have node_count + 1 elements
+ * @param subgraph_col_allocator : allocator for CSR column index of sub graph, int32 local ids in node_ids
+ * @param subgraph_edge_id_allocator : allocator for edge ids of sub graph, int64 index of each edge in wm_csr_col_ptr
+ * @param wm_csr_row_ptr : csr_row_ptr, int64_t element count should be total_src_node_count + 1
+ * @param wm_csr_col_ptr : csr_col_ptr, id_type
+ * @param id_type : id type
+ * @param node_ids : node set, a duplicated node id maps to the local id of its first occurrence
+ * @param node_count : node count
+ * @param cuda_env_fns : CUDA environment functions
+ * @param stream : cudaStream to use
+ */
+void WmmpExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                                const std::function<void *(size_t)> &subgraph_col_allocator,
+                                const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                void *wm_csr_row_ptr,
+                                void *wm_csr_col_ptr,
+                                WMType id_type,
+                                const void *node_ids,
+                                int node_count,
+                                const CUDAEnvFns &cuda_env_fns,
+                                cudaStream_t stream);
+
+void WmmpChunkedExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                                       const std::function<void *(size_t)> &subgraph_col_allocator,
+                                       const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                       void *wm_csr_row_ptr,
+                                       void *wm_csr_col_ptr,
+                                       WMType id_type,
+                                       const void *node_ids,
+                                       int node_count,
+                                       const CUDAEnvFns &cuda_env_fns,
+                                       cudaStream_t stream);
+
 }// namespace whole_graph
\ No newline at end of file
@@ -0,0 +1,219 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# partition based mini-batch generation, Cluster-GCN style
+
+import torch
+from wg_torch import graph_ops as graph_ops
+
+
+def get_csr_row_ids(csr_row_ptr: torch.Tensor):
+    return torch.repeat_interleave(
+        torch.arange(csr_row_ptr.size(0) - 1, device=csr_row_ptr.device),
+        (csr_row_ptr[1:] - csr_row_ptr[:-1]).long(),
+    )
+
+
+def label_propagation_partition(
+    csr_row_ptr: torch.Tensor,
+    csr_col_ind: torch.Tensor,
+    cluster_count: int,
+    iterations: int = 10,
+    imbalance: float = 0.1,
+):
+    """
+    Offline graph partition by size constrained label propagation over the CSR.
+    Labels start from contiguous id ranges, then each node moves to the most frequent
+    label of its neighbors if that increases its internal edges and the target cluster
+    still has room, so clusters are bounded by (1 + imbalance) * node_count /
+    cluster_count nodes.
+    :param csr_row_ptr: CSR row pointer of the whole graph, better symmetric.
+    :param csr_col_ind: CSR column index of the whole graph.
+    :param cluster_count: number of clusters.
+    :param iterations: number of label propagation iterations.
+    :param imbalance: allowed cluster size imbalance.
+    :return: cluster label of each node, int64 tensor.
+    """
+    device = csr_row_ptr.device
+    node_count = csr_row_ptr.size(0) - 1
+    max_cluster_size = int((1.0 + imbalance) * node_count / cluster_count) + 1
+    labels = torch.arange(node_count, device=device) * cluster_count // node_count
+    row_ids = get_csr_row_ids(csr_row_ptr)
+    col_ids = csr_col_ind.long()
+    for _ in range(iterations):
+        key = row_ids * cluster_count + labels[col_ids]
+        unique_key, key_count = torch.unique(key, return_counts=True)
+        key_node = unique_key // cluster_count
+        key_label = unique_key % cluster_count
+        # most frequent label of each node, unique_key is sorted by node.
+        count_order = torch.argsort(key_count, descending=True, stable=True)
+        node_order = torch.argsort(key_node[count_order], stable=True)
+        best_idx = count_order[node_order]
+        first_mask = torch.ones_like(best_idx, dtype=torch.bool)
+        first_mask[1:] = key_node[best_idx[1:]] != key_node[best_idx[:-1]]
+        best_idx = best_idx[first_mask]
+        best_node = key_node[best_idx]
+        best_label = key_label[best_idx]
+        best_count = key_count[best_idx]
+        # neighbor count of current label of each node.
+        current_key = best_node * cluster_count + labels[best_node]
+        current_pos = torch.searchsorted(unique_key, current_key).clamp(
+            max=unique_key.numel() - 1
+        )
+        current_count = torch.where(
+            unique_key[current_pos] == current_key,
+            key_count[current_pos],
+            torch.zeros_like(best_count),
+        )
+        gain = best_count - current_count
+        move_mask = torch.logical_and(gain > 0, best_label != labels[best_node])
+        move_node = best_node[move_mask]
+        if move_node.numel() == 0:
+            break
+        move_label = best_label[move_mask]
+        move_gain = gain[move_mask]
+        # keep the moves of largest gain into each cluster within its room.
+        gain_order = torch.argsort(move_gain, descending=True, stable=True)
+        label_order = torch.argsort(move_label[gain_order], stable=True)
+        move_order = gain_order[label_order]
+        move_node = move_node[move_order]
+        move_label = move_label[move_order]
+        label_start = torch.searchsorted(
+            move_label, torch.arange(cluster_count, device=device)
+        )
+        rank_in_label = (
+            torch.arange(move_label.numel(), device=device) - label_start[move_label]
+        )
+        cluster_room = max_cluster_size - torch.bincount(
+            labels, minlength=cluster_count
+        )
+        allowed = rank_in_label < cluster_room[move_label]
+        labels[move_node[allowed]] = move_label[allowed]
+    return labels
+
+
+def get_cluster_permutation(labels: torch.Tensor, cluster_count: int):
+    """
+    Get node order that places nodes of the same cluster together.
+    :param labels: cluster label of each node.
+    :param cluster_count: number of clusters.
+    :return: perm and cluster_ptr, new node id i is old node id perm[i], cluster c has
+        new node ids in [cluster_ptr[c], cluster_ptr[c + 1]).
+    """
+    perm = torch.argsort(labels, stable=True)
+    cluster_ptr = torch.zeros(
+        cluster_count + 1, dtype=torch.int64, device=labels.device
+    )
+    cluster_ptr[1:] = torch.cumsum(torch.bincount(labels, minlength=cluster_count), 0)
+    return perm, cluster_ptr
+
+
+def reorder_csr(
+    csr_row_ptr: torch.Tensor, csr_col_ind: torch.Tensor, perm: torch.Tensor
+):
+    """
+    Renumber nodes of CSR graph by perm, node features should be reordered by
+    feat[perm] accordingly.
+    :param csr_row_ptr: CSR row pointer.
+    :param csr_col_ind: CSR column index.
+    :param perm: new node id i is old node id perm[i].
+    :return: new csr_row_ptr, new csr_col_ind and edge permutation, new edge j is old
+        edge edge_perm[j].
+    """
+    inverse_perm = torch.empty_like(perm)
+    inverse_perm[perm] = torch.arange(perm.numel(), device=perm.device)
+    degree = (csr_row_ptr[1:] - csr_row_ptr[:-1])[perm]
+    new_csr_row_ptr = torch.zeros_like(csr_row_ptr)
+    new_csr_row_ptr[1:] = torch.cumsum(degree, 0)
+    new_row_ids = get_csr_row_ids(new_csr_row_ptr)
+    edge_perm = (
+        csr_row_ptr[perm][new_row_ids]
+        + torch.arange(new_row_ids.numel(), device=perm.device)
+        - new_csr_row_ptr[new_row_ids]
+    )
+    new_csr_col_ind = inverse_perm[csr_col_ind[edge_perm].long()].to(csr_col_ind.dtype)
+    return new_csr_row_ptr, new_csr_col_ind, edge_perm
+
+
+class ClusterBatchSampler(object):
+    """
+    Cluster-GCN style mini-batch generator. Each epoch clusters are shuffled and split
+    among ranks, each batch is the union of clusters_per_batch clusters. With nodes
+    reordered by get_cluster_permutation, each cluster is a contiguous id range.
+    """
+
+    def __init__(
+        self, cluster_ptr: torch.Tensor, clusters_per_batch: int, rank=0, size=1
+    ):
+        self.cluster_ptr = cluster_ptr.cpu()
+        self.cluster_count = self.cluster_ptr.numel() - 1
+        self.clusters_per_batch = clusters_per_batch
+        self.rank = rank
+        self.size = size
+        self.batch_clusters = None
+
+    def start_iter(self, epoch: int):
+        """
+        Shuffle clusters of one epoch, all ranks use the same order.
+        :param epoch: epoch id, used as random seed.
+        :return: batch count of this rank.
+        """
+        generator = torch.Generator()
+        generator.manual_seed(0x76540123 + epoch)
+        cluster_order = torch.randperm(self.cluster_count, generator=generator)
+        local_cluster_count = self.cluster_count // self.size
+        cluster_order = cluster_order[
+            self.rank * local_cluster_count : (self.rank + 1) * local_cluster_count
+        ]
+        batch_count = local_cluster_count // self.clusters_per_batch
+        self.batch_clusters = cluster_order[
+            : batch_count * self.clusters_per_batch
+        ].reshape(batch_count, self.clusters_per_batch)
+        return batch_count
+
+    def get_batch(self, iter_id: int, id_dtype=torch.int64):
+        """
+        Get node ids of one batch, sorted.
+        :param iter_id: batch id in this epoch.
+        :param id_dtype: node id dtype.
+        :return: node ids on cuda.
+        """
+        clusters, _ = torch.sort(self.batch_clusters[iter_id])
+        node_ids = torch.cat(
+            [
+                torch.arange(self.cluster_ptr[c], self.cluster_ptr[c + 1])
+                for c in clusters.tolist()
+            ]
+        )
+        return node_ids.to(id_dtype).cuda()
+
+
+def get_cluster_batch_sub_graph(graph: graph_ops.HomoGraph, node_ids: torch.Tensor):
+    """
+    Induced sub graph of one batch, used as the sub graph of every layer.
+    :param graph: the graph
+    :param node_ids: node ids of the batch.
+    :return: edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count with local ids,
+        in the same layout as one layer of HomoGraph sampling outputs.
+    """
+    csr_row_ptr, csr_col_ind, _ = graph.extract_induced_subgraph(node_ids)
+    csr_row_ptr = csr_row_ptr.int()
+    sample_dup_count = torch.bincount(
+        csr_col_ind.long(), minlength=node_ids.numel()
+    ).to(torch.int32)
+    src_lids = torch.repeat_interleave(
+        torch.arange(node_ids.numel(), dtype=torch.int32, device=node_ids.device),
+        csr_row_ptr[1:] - csr_row_ptr[:-1],
+    )
+    edge_indice = torch.stack([csr_col_ind, src_lids])
+    return edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count
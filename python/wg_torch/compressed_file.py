@@ -0,0 +1,313 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# block compressed variant of the raw part file format
+#
+# File layout, all integers little endian:
+#   header: magic "WGBC", version (u32), codec id (u32), reserved (u32),
+#           raw byte size (u64), raw block size (u64), block count (u64)
+#   block index: block count x (compressed offset (u64), compressed size (u64))
+#   compressed blocks
+# Each block holds block_size raw bytes except the last one, so any raw byte range can be
+# decoded by reading only the blocks that overlap it.
+
+import os
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from wholegraph.torch import wholegraph_pytorch as wg
+
+COMPRESSED_FILE_SUFFIX = ".wgz"
+_MAGIC = b"WGBC"
+_VERSION = 1
+_HEADER_FORMAT = "<4sIIIQQQ"
+_HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+_CODEC_IDS = {"lz4": 1, "zstd": 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+default_block_size = 4 * 1024 * 1024
+
+
+def _compress_block(codec: str, data, level: int):
+    if codec == "lz4":
+        import lz4.block
+
+        return lz4.block.compress(
+            data, mode="high_compression" if level > 0 else "default", store_size=False
+        )
+    elif codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level if level > 0 else 3).compress(data)
+    raise ValueError("codec %s not supported, should be lz4 or zstd." % (codec,))
+
+
+def _decompress_block(codec: str, data, raw_size: int):
+    if codec == "lz4":
+        import lz4.block
+
+        return lz4.block.decompress(data, uncompressed_size=raw_size)
+    elif codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=raw_size)
+    raise ValueError("codec %s not supported, should be lz4 or zstd." % (codec,))
+
+
+def get_compressed_filename(filename: str):
+    return filename + COMPRESSED_FILE_SUFFIX
+
+
+def write_compressed_file(
+    data: np.ndarray,
+    filename: str,
+    codec: str = "zstd",
+    block_size: int = default_block_size,
+    level: int = 0,
+    num_threads: int = 8,
+):
+    """
+    Write data as a block compressed file, blocks are compressed in parallel.
+    :param data: numpy array to write, written in C order as raw file would be.
+    :param filename: output file name, should end with COMPRESSED_FILE_SUFFIX.
+    :param codec: lz4 or zstd.
+    :param block_size: raw byte size of each block.
+    :param level: compression level, 0 for codec default.
+    :param num_threads: number of compression threads.
+    :return: None
+    """
+    assert codec in _CODEC_IDS
+    raw = memoryview(np.ascontiguousarray(data).reshape(-1).view(np.uint8))
+    raw_size = len(raw)
+    block_count = (raw_size + block_size - 1) // block_size
+    with open(filename, "wb") as f:
+        f.write(
+            struct.pack(
+                _HEADER_FORMAT,
+                _MAGIC,
+                _VERSION,
+                _CODEC_IDS[codec],
+                0,
+                raw_size,
+                block_size,
+                block_count,
+            )
+        )
+        index_offset = f.tell()
+        block_index = np.zeros((block_count, 2), dtype=np.uint64)
+        f.write(block_index.tobytes())
+        offset = f.tell()
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            blocks = executor.map(
+                lambda i: _compress_block(
+                    codec, raw[i * block_size : (i + 1) * block_size], level
+                ),
+                range(block_count),
+            )
+            for i, block in enumerate(blocks):
+                f.write(block)
+                block_index[i] = (offset, len(block))
+                offset += len(block)
+        f.seek(index_offset)
+        f.write(block_index.tobytes())
+
+
+def read_compressed_file_header(filename: str):
+    """
+    Read header and block index of block compressed file.
+    :param filename: file name.
+    :return: codec, raw byte size, raw block size, block index array of (offset, size)
+    """
+    with open(filename, "rb") as f:
+        header = f.read(_HEADER_SIZE)
+        magic, version, codec_id, _, raw_size, block_size, block_count = struct.unpack(
+            _HEADER_FORMAT, header
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("%s is not a block compressed file." % (filename,))
+        block_index = np.frombuffer(f.read(block_count * 16), dtype=np.uint64).reshape(
+            -1, 2
+        )
+    return _CODEC_NAMES[codec_id], raw_size, block_size, block_index
+
+
+def _get_file_list(file_prefix: str, suffix: str):
+    if os.path.isfile(file_prefix + suffix):
+        return [file_prefix + suffix]
+    save_dir, prefix = os.path.split(file_prefix)
+    save_dir = save_dir if save_dir != "" else "."
+    pattern = re.compile(
+        re.escape(prefix) + "_part_(\\d+)_of_(\\d+)" + re.escape(suffix)
+    )
+    part_count = None
+    part_indices = set()
+    for filename in os.listdir(save_dir):
+        matches = pattern.fullmatch(filename)
+        if matches is None:
+            continue
+        idx, count = int(matches.group(1)), int(matches.group(2))
+        if part_count is not None and part_count != count:
+            raise FileExistsError(
+                "prefix %s both count=%d and count=%d exist."
+                % (file_prefix, part_count, count)
+            )
+        part_count = count
+        part_indices.add(idx)
+    if part_count is None:
+        return []
+    if len(part_indices) != part_count:
+        raise FileNotFoundError(
+            "prefix %s count=%d but got only %d files."
+            % (file_prefix, part_count, len(part_indices))
+        )
+    return [
+        "%s_part_%d_of_%d%s" % (file_prefix, i, part_count, suffix)
+        for i in range(part_count)
+    ]
+
+
+def get_compressed_file_list(file_prefix: str):
+    """
+    Get block compressed files of file_prefix in index order.
+    :param file_prefix: file prefix, same as used for raw files.
+    :return: list of compressed file names, empty if no compressed file exists.
+    """
+    return _get_file_list(file_prefix, COMPRESSED_FILE_SUFFIX)
+
+
+def stat_compressed_file_list_element_count(file_list, dtype: torch.dtype):
+    elt_size = torch.tensor([], dtype=dtype).element_size()
+    total_size = 0
+    for filename in file_list:
+        _, raw_size, _, _ = read_compressed_file_header(filename)
+        total_size += raw_size
+    assert total_size % elt_size == 0
+    return total_size // elt_size
+
+
+def compress_part_files(
+    file_prefix: str,
+    codec: str = "zstd",
+    block_size: int = default_block_size,
+    level: int = 0,
+    remove_raw_files: bool = True,
+):
+    """
+    Convert the raw single file or part files of file_prefix into block compressed files.
+    :param file_prefix: file prefix.
+    :param codec: lz4 or zstd.
+    :param block_size: raw byte size of each block.
+    :param level: compression level, 0 for codec default.
+    :param remove_raw_files: whether to remove raw files after compression.
+    :return: None
+    """
+    raw_files = _get_file_list(file_prefix, "")
+    if len(raw_files) == 0:
+        raise FileNotFoundError("no file found for prefix %s." % (file_prefix,))
+    for raw_file in raw_files:
+        data = np.memmap(raw_file, dtype=np.uint8, mode="r")
+        write_compressed_file(
+            data, get_compressed_filename(raw_file), codec, block_size, level
+        )
+        del data
+        if remove_raw_files:
+            os.remove(raw_file)
+
+
+def store_local_tensor_to_compressed_file(
+    lt: torch.Tensor,
+    filename: str,
+    codec: str = "zstd",
+    block_size: int = default_block_size,
+    level: int = 0,
+):
+    """
+    Store local tensor to block compressed file, compressed counterpart of store_local_tensor_to_embedding_file.
+    :param lt: local tensor, e.g. from get_local_tensor.
+    :param filename: file name, COMPRESSED_FILE_SUFFIX is appended.
+    :param codec: lz4 or zstd.
+    :param block_size: raw byte size of each block.
+    :param level: compression level, 0 for codec default.
+    :return: None
+    """
+    data = lt.contiguous().cpu().reshape(-1).view(torch.uint8).numpy()
+    write_compressed_file(
+        data, get_compressed_filename(filename), codec, block_size, level
+    )
+
+
+def load_local_tensor_from_compressed_files(
+    lt: torch.Tensor, file_list, wm_comm, num_threads: int = 16
+):
+    """
+    Load local tensor from block compressed files, compressed counterpart of load_local_tensor_from_embedding_file.
+    Only blocks overlapping the local range are read, they are decompressed in a thread pool and copied
+    straight into the local tensor.
+    :param lt: contiguous local tensor of WholeMemory tensor.
+    :param file_list: compressed files from get_compressed_file_list.
+    :param wm_comm: WholeMemory communicator of the tensor.
+    :param num_threads: number of decompression threads.
+    :return: None
+    """
+    assert lt.is_contiguous()
+    elt_size = lt.element_size()
+    _, local_start = wg.aggregate_size(lt.numel(), wm_comm)
+    local_begin = local_start * elt_size
+    local_end = local_begin + lt.numel() * elt_size
+    lt_bytes = lt.reshape(-1).view(torch.uint8)
+
+    def load_block(filename, codec, offset, size, raw_begin, raw_size):
+        fd = os.open(filename, os.O_RDONLY)
+        try:
+            data = os.pread(fd, size, offset)
+        finally:
+            os.close(fd)
+        raw = _decompress_block(codec, data, raw_size)
+        copy_begin = max(raw_begin, local_begin)
+        copy_end = min(raw_begin + raw_size, local_end)
+        src = bytearray(raw[copy_begin - raw_begin : copy_end - raw_begin])
+        lt_bytes[copy_begin - local_begin : copy_end - local_begin].copy_(
+            torch.frombuffer(src, dtype=torch.uint8)
+        )
+
+    file_begin = 0
+    futures = []
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        for filename in file_list:
+            codec, file_raw_size, block_size, block_index = read_compressed_file_header(
+                filename
+            )
+            file_end = file_begin + file_raw_size
+            if file_begin < local_end and file_end > local_begin:
+                first_block = max(local_begin - file_begin, 0) // block_size
+                last_block = (min(local_end, file_end) - file_begin - 1) // block_size
+                for block_idx in range(first_block, last_block + 1):
+                    raw_begin = file_begin + block_idx * block_size
+                    raw_size = min(block_size, file_end - raw_begin)
+                    futures.append(
+                        executor.submit(
+                            load_block,
+                            filename,
+                            codec,
+                            int(block_index[block_idx][0]),
+                            int(block_index[block_idx][1]),
+                            raw_begin,
+                            raw_size,
+                        )
+                    )
+            file_begin = file_end
+        for future in futures:
+            future.result()
@@ -11,10 +11,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
 from enum import IntEnum
 from typing import Union
 
 import torch
+from wg_torch import comm as comm
 from wg_torch.wm_tensor import *
 
 from wholegraph.torch import wholegraph_pytorch as wg
@@ -38,13 +40,24 @@ class EmbeddingOptimizerTypes(IntEnum):
     OPT_TYPE_RMSPROP = 2
     OPT_TYPE_ADAGRAD = 3
     OPT_TYPE_NONE = 4
+    OPT_TYPE_ROWWISE_ADAGRAD = 5
+    OPT_TYPE_ROWWISE_ADAM = 6
 
 
 class EmbeddingOptimizer(object):
-    def __init__(self):
+    def __init__(self, state_dtype=None, stochastic_rounding=False):
+        """
+        :param state_dtype: dtype of per element states, None for the embedding dtype.
+            torch.float16 or torch.bfloat16 to reduce state memory, torch.int8 for 8 bit
+            row-wise quantized states, supported by Lazy Adam only.
+        :param stochastic_rounding: whether to round reduced precision states
+            stochastically.
+        """
         super(EmbeddingOptimizer, self).__init__()
         self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_NONE
         self.opt_data = []
+        self.state_dtype = state_dtype
+        self.stochastic_rounding = stochastic_rounding
 
     def get_type(self):
         return self.opt_type
@@ -61,36 +74,109 @@ class EmbeddingSGDOptimizer(EmbeddingOptimizer):
 
 
 class EmbeddingLazyAdamOptimizer(EmbeddingOptimizer):
-    def __init__(self, weight_decay=0.0, epsilon=1e-8, beta1=0.9, beta2=0.999):
-        super(EmbeddingLazyAdamOptimizer, self).__init__()
+    def __init__(
+        self,
+        weight_decay=0.0,
+        epsilon=1e-8,
+        beta1=0.9,
+        beta2=0.999,
+        state_dtype=None,
+        stochastic_rounding=False,
+    ):
+        super(EmbeddingLazyAdamOptimizer, self).__init__(
+            state_dtype, stochastic_rounding
+        )
         self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_LAZY_ADAM
         self.opt_data = [weight_decay, epsilon, beta1, beta2]
 
 
 class EmbeddingRMSPropOptimizer(EmbeddingOptimizer):
-    def __init__(self, weight_decay=0.0, epsilon=1e-8, alpha=0.99):
-        super(EmbeddingRMSPropOptimizer, self).__init__()
+    def __init__(
+        self,
+        weight_decay=0.0,
+        epsilon=1e-8,
+        alpha=0.99,
+        state_dtype=None,
+        stochastic_rounding=False,
+    ):
+        assert state_dtype != torch.int8
+        super(EmbeddingRMSPropOptimizer, self).__init__(
+            state_dtype, stochastic_rounding
+        )
         self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_RMSPROP
         self.opt_data = [weight_decay, epsilon, alpha]
 
 
 class EmbeddingAdaGradOptimizer(EmbeddingOptimizer):
-    def __init__(self, weight_decay=0.0, epsilon=1e-8):
-        super(EmbeddingAdaGradOptimizer, self).__init__()
+    def __init__(
+        self,
+        weight_decay=0.0,
+        epsilon=1e-8,
+        state_dtype=None,
+        stochastic_rounding=False,
+    ):
+        assert state_dtype != torch.int8
+        super(EmbeddingAdaGradOptimizer, self).__init__(
+            state_dtype, stochastic_rounding
+        )
         self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_ADAGRAD
         self.opt_data = [weight_decay, epsilon]
 
 
-def get_sizes_for_optimizer(opt_type: EmbeddingOptimizerTypes):
+class EmbeddingRowWiseAdaGradOptimizer(EmbeddingOptimizer):
+    def __init__(self, weight_decay=0.0, epsilon=1e-8):
+        """
+        AdaGrad with one accumulator per embedding row, updated by the mean of squared
+        gradients of the row, so no per element state is kept.
+        """
+        super(EmbeddingRowWiseAdaGradOptimizer, self).__init__()
+        self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD
+        self.opt_data = [weight_decay, epsilon]
+
+
+class EmbeddingRowWiseAdamOptimizer(EmbeddingOptimizer):
+    def __init__(
+        self,
+        weight_decay=0.0,
+        epsilon=1e-8,
+        beta1=0.9,
+        beta2=0.999,
+        state_dtype=None,
+        stochastic_rounding=False,
+    ):
+        """
+        Adam with per element first moment and one second moment per embedding row,
+        updated by the mean of squared gradients of the row.
+        """
+        assert state_dtype != torch.int8
+        super(EmbeddingRowWiseAdamOptimizer, self).__init__(
+            state_dtype, stochastic_rounding
+        )
+        self.opt_type = EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAM
+        self.opt_data = [weight_decay, epsilon, beta1, beta2]
+
+
+def get_sizes_for_optimizer(
+    opt_type: EmbeddingOptimizerTypes, state_dtype: Union[torch.dtype, None] = None
+):
     # returns count of per_element_states, per_embedding_states and bitmaps
     if opt_type == EmbeddingOptimizerTypes.OPT_TYPE_SGD:
         return 0, (0, 0, None), 1
     elif opt_type == EmbeddingOptimizerTypes.OPT_TYPE_LAZY_ADAM:
+        # int8 states also keep quantization scales of m and v per embedding.
+        if state_dtype == torch.int8:
+            return 2, (1, 4, torch.float32), 1
         return 2, (1, 2, torch.float32), 1
     elif opt_type == EmbeddingOptimizerTypes.OPT_TYPE_RMSPROP:
         return 1, (0, 0, None), 1
     elif opt_type == EmbeddingOptimizerTypes.OPT_TYPE_ADAGRAD:
         return 1, (0, 0, None), 1
+    elif opt_type == EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD:
+        # state sum of each row.
+        return 0, (1, 1, torch.float32), 1
+    elif opt_type == EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAM:
+        # beta1t, beta2t and v of each row.
+        return 1, (1, 3, torch.float32), 1
     else:
         raise TypeError("optimizer type can't be none.")
 
@@ -113,7 +199,7 @@ def create_optimizer_states_collective(
         return create_wm_tensor(wm_comm, sizes, strides, tensor_dtype, wm_tensor_type)
 
     per_element_count, per_embedding_data, bit_map_count = get_sizes_for_optimizer(
-        optimizer_type
+        optimizer_type, dtype
     )
     per_embedding_count, per_embedding_elt_count, emb_state_dtype = per_embedding_data
 
@@ -136,6 +222,12 @@ def create_optimizer_states_collective(
         )
         lt = get_local_tensor(per_embedding_states[-1])
         torch.nn.init.constant_(lt, 1.0)
+        # beta powers start from 1, row-wise accumulators of the last column from 0.
+        if optimizer_type in (
+            EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD,
+            EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAM,
+        ):
+            torch.nn.init.constant_(lt[:, per_embedding_elt_count - 1], 0.0)
     return per_element_states, per_embedding_states
 
 
@@ -148,8 +240,12 @@ def apply_embedding_gradients_collective(
     embedding: Union[torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor],
     per_element_states: list,
     per_embedding_states: list,
+    stochastic_rounding: bool = False,
 ):
-    per_element_count, per_embedding_data, _ = get_sizes_for_optimizer(opt_type)
+    state_dtype = per_element_states[0].dtype if len(per_element_states) > 0 else None
+    per_element_count, per_embedding_data, _ = get_sizes_for_optimizer(
+        opt_type, state_dtype
+    )
     per_embedding_count, _, _ = per_embedding_data
 
     assert len(per_element_states) == per_element_count
@@ -168,23 +264,279 @@ def apply_embedding_gradients_collective(
         local_embedding,
         local_per_element_states,
         local_per_per_embedding_states,
+        stochastic_rounding,
+        torch.randint(0, 2**62, (1,)).item() if stochastic_rounding else 0,
     )
 
 
+class TieredEmbedding(object):
+    """
+    Embedding table in host WholeMemory with the most frequently accessed rows also
+    kept in a device slab. A slot map gives the slab slot of each row, or -1 for rows
+    only in host memory. Gathers read hot rows from the slab and count accesses, and
+    every migrate_interval gathers the most accessed rows are promoted and the others
+    demoted. Host rows are always up to date, updates of a TrainableEmbedding over this
+    table are written through to the slab.
+    """
+
+    def __init__(
+        self,
+        backing: torch.Tensor,
+        hot_count: int,
+        chunked: bool = True,
+        migrate_interval: int = 0,
+        count_decay: float = 0.5,
+    ):
+        """
+        :param backing: the whole table, WholeMemory tensor of HOST type.
+        :param hot_count: row count of the device slab.
+        :param chunked: whether to use chunked WholeMemory for the slab and slot map.
+        :param migrate_interval: gathers between migrations, 0 to migrate only by
+            calling migrate. Migration is collective, so all ranks should gather the
+            same number of times.
+        :param count_decay: access counts are multiplied by it after each migration.
+        """
+        assert get_wm_tensor_type(backing) == WmTensorType.HOST
+        assert backing.dim() == 2
+        self.backing = backing
+        self.wm_comm = get_wm_communicator(backing)
+        self.hot_count = min(hot_count, backing.shape[0])
+        self.migrate_interval = migrate_interval
+        self.count_decay = count_decay
+        self.current_step = 0
+        wm_tensor_type = get_intra_node_wm_tensor_type(chunked, False)
+        self.slab = create_wm_tensor(
+            self.wm_comm,
+            [self.hot_count, backing.shape[1]],
+            [],
+            backing.dtype,
+            wm_tensor_type,
+        )
+        self.slot_map = create_wm_tensor(
+            self.wm_comm, [backing.shape[0], 1], [], torch.int32, wm_tensor_type
+        )
+        get_local_tensor(self.slot_map).fill_(-1)
+        # row id of each slot, -1 for empty, same on all ranks.
+        self.hot_ids = torch.full(
+            (self.hot_count,), -1, dtype=torch.int64, device="cuda"
+        )
+        self.access_count = torch.zeros(
+            (backing.shape[0],), dtype=torch.float32, device="cuda"
+        )
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+
+    @property
+    def shape(self):
+        return self.backing.shape
+
+    @property
+    def dtype(self):
+        return self.backing.dtype
+
+    def gather(self, indice: torch.Tensor, dtype: Union[torch.dtype, None] = None):
+        """
+        Gather rows, hot rows from the slab and others from host memory, and migrate
+        after every migrate_interval gathers.
+        :param indice: row ids.
+        :param dtype: output dtype, None for the table dtype.
+        :return: gathered rows.
+        """
+        out_dtype = self.dtype if dtype is None else dtype
+        self.access_count.index_add_(
+            0, indice.long(), torch.ones_like(indice, dtype=torch.float32)
+        )
+        slot = embedding_lookup_nograd_common(self.slot_map, indice).view(-1)
+        out_tensor = torch.empty(
+            (indice.shape[0], self.shape[1]), dtype=out_dtype, device=indice.device
+        )
+        hot_pos = torch.nonzero(slot >= 0).view(-1)
+        cold_pos = torch.nonzero(slot < 0).view(-1)
+        if hot_pos.numel() > 0:
+            out_tensor[hot_pos] = embedding_lookup_nograd_common(
+                self.slab, slot[hot_pos], out_dtype
+            )
+        if cold_pos.numel() > 0:
+            out_tensor[cold_pos] = embedding_lookup_nograd_common(
+                self.backing, indice[cold_pos], out_dtype
+            )
+        self.advance()
+        return out_tensor
+
+    def write_through_local(self, local_indice: torch.Tensor):
+        """
+        Copy updated rows of the local partition of backing to the slab if they are hot.
+        :param local_indice: updated row ids in the local partition.
+        :return: None
+        """
+        local_start, _, _, _ = get_partition_plan(self.backing)
+        indice = local_indice.long() + local_start
+        slot = embedding_lookup_nograd_common(self.slot_map, indice).view(-1)
+        hot_pos = torch.nonzero(slot >= 0).view(-1)
+        if hot_pos.numel() == 0:
+            return
+        scatter_nograd(
+            embedding_lookup_nograd_common(self.backing, indice[hot_pos]),
+            slot[hot_pos],
+            self.slab,
+        )
+
+    def advance(self):
+        self.current_step += 1
+        if self.migrate_interval > 0 and self.current_step % self.migrate_interval == 0:
+            self.migrate()
+
+    def migrate(self):
+        """
+        Promote the most accessed rows to the slab and demote others. Access counts are
+        summed over all ranks, rows staying hot keep their slots, and each rank copies
+        rows of its own range of slots. All ranks should call this function.
+        :return: None
+        """
+        wait_optimizers(force=True)
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+        access_count = self.access_count
+        if comm.get_world_size() > 1:
+            access_count = comm.all_reduce(access_count.clone())
+        # stable sort keeps the same order of equal counts on all ranks.
+        _, order = torch.sort(access_count, descending=True, stable=True)
+        new_hot_ids = order[: self.hot_count]
+        free_slots = torch.nonzero(
+            torch.logical_not(torch.isin(self.hot_ids, new_hot_ids))
+        ).view(-1)
+        leave_slots = free_slots[self.hot_ids[free_slots] >= 0]
+        leave_ids = self.hot_ids[leave_slots]
+        enter_ids = new_hot_ids[
+            torch.logical_not(torch.isin(new_hot_ids, self.hot_ids))
+        ]
+        enter_slots = free_slots[: enter_ids.numel()]
+        self.hot_ids[free_slots] = -1
+        self.hot_ids[enter_slots] = enter_ids
+        slot_start, slot_count, _, _ = get_partition_plan(self.wm_comm, self.hot_count)
+        slot_end = slot_start + slot_count
+        leave_mask = torch.logical_and(
+            leave_slots >= slot_start, leave_slots < slot_end
+        )
+        if leave_mask.any():
+            leave_ids = leave_ids[leave_mask]
+            scatter_nograd(
+                torch.full(
+                    (leave_ids.numel(), 1), -1, dtype=torch.int32, device="cuda"
+                ),
+                leave_ids,
+                self.slot_map,
+            )
+        enter_mask = torch.logical_and(
+            enter_slots >= slot_start, enter_slots < slot_end
+        )
+        if enter_mask.any():
+            enter_ids = enter_ids[enter_mask]
+            enter_slots = enter_slots[enter_mask]
+            scatter_nograd(
+                embedding_lookup_nograd_common(self.backing, enter_ids),
+                enter_slots,
+                self.slab,
+            )
+            scatter_nograd(enter_slots.int().view(-1, 1), enter_ids, self.slot_map)
+        self.access_count *= self.count_decay
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+
+    def refresh(self):
+        """
+        Copy all hot rows from host memory again, after backing is written directly.
+        All ranks should call this function.
+        :return: None
+        """
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+        slot_start, slot_count, _, _ = get_partition_plan(self.wm_comm, self.hot_count)
+        local_slots = torch.arange(
+            slot_start, slot_start + slot_count, dtype=torch.int64, device="cuda"
+        )
+        local_slots = local_slots[self.hot_ids[local_slots] >= 0]
+        if local_slots.numel() > 0:
+            scatter_nograd(
+                embedding_lookup_nograd_common(self.backing, self.hot_ids[local_slots]),
+                local_slots,
+                self.slab,
+            )
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+
+
 embedding_backward_comm = None
 trainable_wholememory_embedding_array = None
 embedding_optimizer = None
+# asynchronous update of trainable embeddings, None for synchronous update.
+embedding_update_stream = None
+embedding_update_thread = None
+embedding_update_allow_stale = False
+# exception of the update thread, raised again by wait_optimizers.
+embedding_update_error = None
+# dtype of embedding gradients sent in exchange, None for the gradient dtype.
+embedding_grad_wire_dtype = None
+embedding_grad_error_feedback = False
+
+
+def get_grad_wire_dtype(grad_dtype: torch.dtype):
+    global embedding_grad_wire_dtype
+    if embedding_grad_wire_dtype is None:
+        return grad_dtype
+    return embedding_grad_wire_dtype
+
+
+def round_grads_for_wire(grads: torch.Tensor, wire_dtype: torch.dtype):
+    """
+    Gradients rounded the same way as sent by exchange in wire_dtype.
+    :param grads: gradients.
+    :param wire_dtype: torch.float16, torch.bfloat16 or torch.int8 with per row scale.
+    :return: rounded gradients in dtype of grads.
+    """
+    if wire_dtype != torch.int8:
+        return grads.to(wire_dtype).to(grads.dtype)
+    absmax = grads.float().abs().amax(dim=1, keepdim=True)
+    inv_scale = torch.where(absmax > 0, 127.0 / absmax, torch.zeros_like(absmax))
+    quantized = torch.clamp(torch.round(grads.float() * inv_scale), -127.0, 127.0)
+    return (quantized * (absmax / 127.0)).to(grads.dtype)
+
+
+def merge_sparse_grads(indice: torch.Tensor, grad: torch.Tensor):
+    """
+    Sum gradients of the same index.
+    :param indice: indices of gradients.
+    :param grad: gradients.
+    :return: unique indices and their summed gradients.
+    """
+    unique_indice, inverse_map = torch.unique(indice, return_inverse=True)
+    unique_grad = torch.zeros(
+        (unique_indice.shape[0], grad.shape[1]),
+        dtype=grad.dtype,
+        device=grad.device,
+    )
+    unique_grad.index_add_(0, inverse_map, grad)
+    return unique_indice, unique_grad
 
 
 class TrainableEmbedding(object):
     def __init__(
         self,
-        embedding: Union[torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor],
+        embedding: Union[
+            torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor, TieredEmbedding
+        ],
         force_dtype: Union[torch.dtype, None] = None,
+        dedup_grads: bool = False,
     ):
         super(TrainableEmbedding, self).__init__()
+        # for TieredEmbedding, optimizer updates its host table.
+        self.tiered = embedding if isinstance(embedding, TieredEmbedding) else None
+        if self.tiered is not None:
+            embedding = self.tiered.backing
         self.embedding = embedding
         self.force_dtype = force_dtype
+        # sum gradients of the same index before exchange, so each index is sent once.
+        self.dedup_grads = dedup_grads
         global embedding_optimizer
         (
             self.per_element_states,
@@ -192,7 +544,11 @@ class TrainableEmbedding(object):
         ) = create_optimizer_states_collective(
             embedding=self.embedding,
             optimizer_type=embedding_optimizer.get_type(),
-            force_dtype=self.force_dtype,
+            force_dtype=(
+                self.force_dtype
+                if self.force_dtype is not None
+                else embedding_optimizer.state_dtype
+            ),
             wm_tensor_type=get_wm_tensor_type(self.embedding),
         )
         global trainable_wholememory_embedding_array
@@ -200,6 +556,9 @@ class TrainableEmbedding(object):
         self.need_backward = False
         self.sparse_indices = []
         self.sparse_grads = []
+        # rounding error of last low precision gradient exchange.
+        self.grad_residual_indice = None
+        self.grad_residual = None
 
     @property
     def shape(self):
@@ -209,16 +568,100 @@ class TrainableEmbedding(object):
     def dtype(self):
         return self.embedding.dtype
 
+    def add_sparse_grads(self, indice: torch.Tensor, grad: torch.Tensor):
+        if not self.dedup_grads:
+            self.sparse_indices.append(indice)
+            self.sparse_grads.append(grad)
+            return
+        # keep one merged chunk with unique indices, accumulated at each backward.
+        if len(self.sparse_indices) > 0:
+            grad_dtype = self.sparse_grads[0].dtype
+            indice = torch.cat([self.sparse_indices[0], indice])
+            grad = torch.cat([self.sparse_grads[0], grad.to(grad_dtype)])
+        unique_indice, unique_grad = merge_sparse_grads(indice, grad)
+        self.sparse_indices = [unique_indice]
+        self.sparse_grads = [unique_grad]
+
+    def pop_sparse_grads(self):
+        """
+        Get all sparse gradients accumulated since last apply and reset them.
+        :return: sparse_indices and sparse_grads.
+        """
+        if len(self.sparse_indices) == 1:
+            sparse_indices = self.sparse_indices[0]
+            sparse_grads = self.sparse_grads[0]
+        else:
+            sparse_indices = torch.cat(self.sparse_indices)
+            sparse_grads = torch.cat(self.sparse_grads)
+        self.sparse_indices = []
+        self.sparse_grads = []
+        wire_dtype = get_grad_wire_dtype(sparse_grads.dtype)
+        global embedding_grad_error_feedback
+        if embedding_grad_error_feedback and wire_dtype != sparse_grads.dtype:
+            sparse_indices, sparse_grads = self.add_grad_residual(
+                sparse_indices, sparse_grads, wire_dtype
+            )
+        return sparse_indices, sparse_grads
+
+    def add_grad_residual(
+        self,
+        sparse_indices: torch.Tensor,
+        sparse_grads: torch.Tensor,
+        wire_dtype: torch.dtype,
+    ):
+        """
+        Error feedback for low precision gradient exchange. Rounding error of the last
+        exchange is added to gradients of the same rows, residual of rows without
+        gradients is dropped, so only rows of this batch are sent. Rows are merged by
+        index and only non-zero residuals are kept.
+        :param sparse_indices: indices of gradients.
+        :param sparse_grads: gradients.
+        :param wire_dtype: dtype of gradients sent in exchange.
+        :return: sparse_indices and sparse_grads to send.
+        """
+        sparse_indices, sparse_grads = merge_sparse_grads(sparse_indices, sparse_grads)
+        if self.grad_residual is not None and sparse_indices.numel() > 0:
+            # both are sorted unique indices.
+            residual_indice = self.grad_residual_indice.to(sparse_indices.dtype)
+            pos = torch.searchsorted(sparse_indices, residual_indice)
+            pos = torch.clamp(pos, max=sparse_indices.numel() - 1)
+            in_batch = sparse_indices[pos] == residual_indice
+            sparse_grads.index_add_(0, pos[in_batch], self.grad_residual[in_batch])
+        grad_residual = sparse_grads - round_grads_for_wire(sparse_grads, wire_dtype)
+        nonzero_rows = torch.any(grad_residual != 0, dim=1)
+        self.grad_residual_indice = sparse_indices[nonzero_rows]
+        self.grad_residual = grad_residual[nonzero_rows]
+        return sparse_indices, sparse_grads
+
     def apply(self, learning_rate: float):
-        sparse_indices = torch.cat(self.sparse_indices)
-        sparse_grads = torch.cat(self.sparse_grads)
+        sparse_indices, sparse_grads = self.pop_sparse_grads()
+        self.apply_sparse_grads(learning_rate, sparse_indices, sparse_grads)
+
+    def apply_sparse_grads(
+        self,
+        learning_rate: float,
+        sparse_indices: torch.Tensor,
+        sparse_grads: torch.Tensor,
+    ):
         bcomm = get_wm_communicator(self.embedding)
         (
             local_sparse_indice,
             local_sparse_grad,
         ) = torch.ops.wholegraph.exchange_embedding_grads(
-            sparse_indices, sparse_grads, self.embedding.shape[0], bcomm
+            sparse_indices,
+            sparse_grads,
+            self.embedding.shape[0],
+            bcomm,
+            get_grad_wire_dtype(sparse_grads.dtype),
         )
+        self.apply_local_grads(learning_rate, local_sparse_indice, local_sparse_grad)
+
+    def apply_local_grads(
+        self,
+        learning_rate: float,
+        local_sparse_indice: torch.Tensor,
+        local_sparse_grad: torch.Tensor,
+    ):
         global embedding_optimizer
         apply_embedding_gradients_collective(
             embedding_optimizer.get_type(),
@@ -229,29 +672,222 @@ class TrainableEmbedding(object):
             embedding=self.embedding,
             per_element_states=self.per_element_states,
             per_embedding_states=self.per_embedding_states,
+            stochastic_rounding=embedding_optimizer.stochastic_rounding,
         )
+        if self.tiered is not None:
+            self.tiered.write_through_local(local_sparse_indice)
 
-        self.sparse_indices = []
-        self.sparse_grads = []
+
+def exchange_grouped_embedding_grads(te_grads: list):
+    """
+    Exchange sparse gradients of several trainable embeddings in one all-to-all.
+    Indices are packed into one virtual table whose partition on each rank is the
+    concatenation of the partitions of all tables, so each entry keeps its owner rank.
+    All tables should have the same communicator, gradient dtype and embedding dim.
+    :param te_grads: list of (TrainableEmbedding, sparse_indices, sparse_grads).
+    :return: list of (local_sparse_indice, local_sparse_grad) of each table.
+    """
+    bcomm = get_wm_communicator(te_grads[0][0].embedding)
+    world_size = wg.get_size(bcomm)
+    table_offsets = [0]
+    packed_indices = []
+    for te, sparse_indices, _ in te_grads:
+        local_entry_count = (te.embedding.shape[0] + world_size - 1) // world_size
+        table_offsets.append(table_offsets[-1] + local_entry_count)
+    group_local_entry_count = table_offsets[-1]
+    for i, (_, sparse_indices, _) in enumerate(te_grads):
+        local_entry_count = table_offsets[i + 1] - table_offsets[i]
+        indice = sparse_indices.long()
+        packed_indices.append(
+            indice // local_entry_count * group_local_entry_count
+            + table_offsets[i]
+            + indice % local_entry_count
+        )
+    packed_grads = torch.cat([sparse_grads for _, _, sparse_grads in te_grads])
+    (
+        local_sparse_indice,
+        local_sparse_grad,
+    ) = torch.ops.wholegraph.exchange_embedding_grads(
+        torch.cat(packed_indices),
+        packed_grads,
+        group_local_entry_count * world_size,
+        bcomm,
+        get_grad_wire_dtype(packed_grads.dtype),
+    )
+    # received indices are sorted, so entries of each table are contiguous.
+    table_starts = torch.searchsorted(
+        local_sparse_indice,
+        torch.tensor(table_offsets, device=local_sparse_indice.device),
+    ).tolist()
+    local_grads = []
+    for i in range(len(te_grads)):
+        start, end = table_starts[i], table_starts[i + 1]
+        local_grads.append(
+            (
+                (local_sparse_indice[start:end] - table_offsets[i]).int(),
+                local_sparse_grad[start:end],
+            )
+        )
+    return local_grads
+
+
+def apply_grouped_sparse_grads(lr, te_grads: list):
+    """
+    Apply sparse gradients of trainable embeddings, tables with the same communicator,
+    gradient dtype and embedding dim share one gradient exchange.
+    :param lr: learning rate.
+    :param te_grads: list of (TrainableEmbedding, sparse_indices, sparse_grads).
+    :return: None
+    """
+    groups = {}
+    for te_grad in te_grads:
+        te, _, sparse_grads = te_grad
+        key = (get_wm_communicator(te.embedding), sparse_grads.dtype, te.shape[1])
+        groups.setdefault(key, []).append(te_grad)
+    for group in groups.values():
+        if len(group) == 1:
+            te, sparse_indices, sparse_grads = group[0]
+            te.apply_sparse_grads(lr, sparse_indices, sparse_grads)
+            continue
+        local_grads = exchange_grouped_embedding_grads(group)
+        for (te, _, _), (local_sparse_indice, local_sparse_grad) in zip(
+            group, local_grads
+        ):
+            if local_sparse_indice.numel() > 0:
+                te.apply_local_grads(lr, local_sparse_indice, local_sparse_grad)
 
 
 def embedding_lookup_nograd_common(
     embedding_table: Union[torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor],
     indice: torch.Tensor,
+    dtype: Union[torch.dtype, None] = None,
 ):
+    out_dtype = embedding_table.dtype if dtype is None else dtype
     if isinstance(embedding_table, torch.Tensor):
-        out_tensor = torch.ops.wholegraph.gather(
-            indice, embedding_table, embedding_table.dtype
-        )
+        out_tensor = torch.ops.wholegraph.gather(indice, embedding_table, out_dtype)
     elif isinstance(embedding_table, wg.ChunkedTensor):
         out_tensor = torch.ops.wholegraph.gather_chunked(
-            indice, embedding_table.get_ptr(), embedding_table.dtype
+            indice, embedding_table.get_ptr(), out_dtype
         )
     else:
         out_tensor = torch.ops.wholegraph.gather_nccl(indice, embedding_table.get_ptr())
+        if out_dtype != embedding_table.dtype:
+            out_tensor = out_tensor.to(out_dtype)
     return out_tensor
 
 
+def get_column_sub_tensor(
+    embedding_table: Union[torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor],
+    column_start: int,
+    column_count: int,
+):
+    """
+    Get a view of columns [column_start, column_start + column_count) of a 2-D table.
+    Gathers from the view only read, and for NCCL tables only send, these columns.
+    :param embedding_table: the table.
+    :param column_start: first column.
+    :param column_count: column count.
+    :return: the sub tensor view.
+    """
+    assert embedding_table.dim() == 2
+    assert column_start >= 0 and column_count > 0
+    assert column_start + column_count <= embedding_table.shape[1]
+    if isinstance(embedding_table, torch.Tensor):
+        return embedding_table[:, column_start : column_start + column_count]
+    elif isinstance(embedding_table, wg.ChunkedTensor):
+        return wg.get_sub_chunked_tensor(
+            embedding_table, [0, column_start], [-1, column_count]
+        )
+    else:
+        assert isinstance(embedding_table, wg.NCCLTensor)
+        return wg.get_sub_nccl_tensor(
+            embedding_table, [0, column_start], [-1, column_count]
+        )
+
+
+def embedding_lookup_columns_nograd_common(
+    embedding_table: Union[torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor],
+    indice: torch.Tensor,
+    columns: Union[torch.Tensor, tuple],
+    dtype: Union[torch.dtype, None] = None,
+):
+    """
+    Gather only some columns of rows.
+    :param embedding_table: the table.
+    :param indice: row ids.
+    :param columns: (column_start, column_count) for a column range, or column ids.
+    :param dtype: output dtype, None for table dtype.
+    :return: gathered tensor of shape [indice_count, column_count].
+    """
+    if isinstance(columns, tuple):
+        column_start, column_count = columns
+        return embedding_lookup_nograd_common(
+            get_column_sub_tensor(embedding_table, column_start, column_count),
+            indice,
+            dtype,
+        )
+    out_dtype = embedding_table.dtype if dtype is None else dtype
+    columns = columns.int().cuda()
+    if isinstance(embedding_table, torch.Tensor):
+        return torch.ops.wholegraph.gather_columns(
+            indice, columns, embedding_table, out_dtype
+        )
+    elif isinstance(embedding_table, wg.ChunkedTensor):
+        return torch.ops.wholegraph.gather_columns_chunked(
+            indice, columns, embedding_table.get_ptr(), out_dtype
+        )
+    else:
+        out_tensor = torch.ops.wholegraph.gather_columns_nccl(
+            indice, columns, embedding_table.get_ptr()
+        )
+        if out_dtype != embedding_table.dtype:
+            out_tensor = out_tensor.to(out_dtype)
+        return out_tensor
+
+
+def embedding_grouped_lookup_nograd_common(
+    embedding_tables: list,
+    indice: torch.Tensor,
+    dtypes: Union[list, None] = None,
+):
+    """
+    Gather the same rows from several tables, e.g. features, labels and masks of the
+    same nodes. Tables may have different dtypes and widths, 1-D tables give 1-D
+    outputs. NCCL tables of the same communicator and entry count are gathered
+    together, so indice are routed once and rows of all of them are exchanged in one
+    all-to-all.
+    :param embedding_tables: list of torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor or
+        TieredEmbedding.
+    :param indice: row ids.
+    :param dtypes: output dtype of each table, None for table dtypes.
+    :return: list of gathered tensors.
+    """
+    if dtypes is None:
+        dtypes = [None] * len(embedding_tables)
+    assert len(dtypes) == len(embedding_tables)
+    outputs = [None] * len(embedding_tables)
+    nccl_groups = {}
+    for i, embedding_table in enumerate(embedding_tables):
+        if isinstance(embedding_table, wg.NCCLTensor):
+            group_key = (get_wm_communicator(embedding_table), embedding_table.shape[0])
+            nccl_groups.setdefault(group_key, []).append(i)
+        elif isinstance(embedding_table, TieredEmbedding):
+            outputs[i] = embedding_table.gather(indice, dtypes[i])
+        else:
+            outputs[i] = embedding_lookup_nograd_common(
+                embedding_table, indice, dtypes[i]
+            )
+    for table_ids in nccl_groups.values():
+        group_outputs = torch.ops.wholegraph.grouped_gather_nccl(
+            indice, [embedding_tables[i].get_ptr() for i in table_ids]
+        )
+        for i, out_tensor in zip(table_ids, group_outputs):
+            if dtypes[i] is not None and dtypes[i] != out_tensor.dtype:
+                out_tensor = out_tensor.to(dtypes[i])
+            outputs[i] = out_tensor
+    return outputs
+
+
 def scatter_nograd(
     input_tensor: torch.Tensor,
     indice: torch.Tensor,
@@ -276,26 +912,43 @@ class EmbeddingLookupFn(torch.autograd.Function):
         ctx,
         indice: torch.Tensor,
         embedding_table: Union[
-            torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor, TrainableEmbedding
+            torch.Tensor,
+            wg.ChunkedTensor,
+            wg.NCCLTensor,
+            TieredEmbedding,
+            TrainableEmbedding,
         ],
         dummy_input: Union[torch.Tensor or None] = None,
         dtype: Union[torch.dtype, None] = None,
+        dedup: bool = False,
     ):
-        real_embedding_table = (
-            embedding_table.embedding
-            if isinstance(embedding_table, TrainableEmbedding)
-            else embedding_table
-        )
+        real_embedding_table = embedding_table
+        if isinstance(embedding_table, TrainableEmbedding):
+            wait_optimizers()
+            real_embedding_table = (
+                embedding_table.embedding
+                if embedding_table.tiered is None
+                else embedding_table.tiered
+            )
         real_dtype = real_embedding_table.dtype
         out_dtype = real_dtype
         if dtype is not None:
             out_dtype = dtype
+        inverse_indice = None
+        if dedup:
+            # gather each distinct row once, then expand by the inverse index.
+            indice, inverse_indice = torch.unique(indice, return_inverse=True)
 
         if isinstance(embedding_table, TrainableEmbedding) and dummy_input is not None:
-            ctx.save_for_backward(indice, dummy_input)
+            if dedup:
+                ctx.save_for_backward(indice, dummy_input, inverse_indice)
+            else:
+                ctx.save_for_backward(indice, dummy_input)
             ctx.et = embedding_table
             embedding_table.need_backward = True
-            if isinstance(real_embedding_table, torch.Tensor):
+            if isinstance(real_embedding_table, TieredEmbedding):
+                out_tensor = real_embedding_table.gather(indice, out_dtype)
+            elif isinstance(real_embedding_table, torch.Tensor):
                 out_tensor = torch.ops.wholegraph.gather_need_grad(
                     indice, real_embedding_table, out_dtype
                 )
@@ -310,7 +963,9 @@ class EmbeddingLookupFn(torch.autograd.Function):
                     indice, real_embedding_table.get_ptr()
                 )
         else:
-            if isinstance(real_embedding_table, torch.Tensor):
+            if isinstance(real_embedding_table, TieredEmbedding):
+                out_tensor = real_embedding_table.gather(indice, out_dtype)
+            elif isinstance(real_embedding_table, torch.Tensor):
                 out_tensor = torch.ops.wholegraph.gather(
                     indice, real_embedding_table, out_dtype
                 )
@@ -324,32 +979,45 @@ class EmbeddingLookupFn(torch.autograd.Function):
                 )
                 if out_dtype != real_dtype:
                     out_tensor = out_tensor.to(out_dtype)
+        if dedup:
+            out_tensor = out_tensor[inverse_indice]
         return out_tensor
 
     @staticmethod
     def backward(ctx, grad_outputs: torch.Tensor):
         if ctx.saved_tensors is None or len(ctx.saved_tensors) == 0:
-            return None, None, None
-        indice, dummy_input = ctx.saved_tensors
+            return None, None, None, None, None
+        indice, dummy_input = ctx.saved_tensors[:2]
         embedding_table = ctx.et
         dummy_input_grad = torch.zeros_like(dummy_input)
         assert isinstance(embedding_table, TrainableEmbedding)
         ctx.et = None
+        if len(ctx.saved_tensors) == 3:
+            # dedup mode, sum gradients of repeated ids into their distinct row.
+            inverse_indice = ctx.saved_tensors[2]
+            assert inverse_indice.shape[0] == grad_outputs.shape[0]
+            unique_grads = torch.zeros(
+                (indice.shape[0], grad_outputs.shape[1]),
+                dtype=grad_outputs.dtype,
+                device=grad_outputs.device,
+            )
+            unique_grads.index_add_(0, inverse_indice, grad_outputs)
+            grad_outputs = unique_grads
         assert (
             indice.dim() == 1
             and grad_outputs.dim() == 2
             and indice.shape[0] == grad_outputs.shape[0]
         )
         assert grad_outputs.shape[1] == embedding_table.embedding.shape[1]
-        embedding_table.sparse_indices.append(indice)
-        embedding_table.sparse_grads.append(grad_outputs)
-        return None, None, dummy_input_grad
+        embedding_table.add_sparse_grads(indice, grad_outputs)
+        return None, None, dummy_input_grad, None, None
 
 
 class EmbeddingLookUpModule(torch.nn.Module):
-    def __init__(self, need_backward=True):
+    def __init__(self, need_backward=True, dedup=False):
         super().__init__()
         self.need_backward = need_backward
+        self.dedup = dedup
         if need_backward:
             self.dummy_weight = torch.nn.Parameter(
                 torch.zeros(1), requires_grad=need_backward
@@ -364,17 +1032,198 @@ class EmbeddingLookUpModule(torch.nn.Module):
         embedding_table: Union[torch.Tensor, wg.ChunkedTensor, TrainableEmbedding],
     ):
         if self.need_backward:
-            return self.embedding_lookup_fn(indice, embedding_table, self.dummy_weight)
+            return self.embedding_lookup_fn(
+                indice, embedding_table, self.dummy_weight, None, self.dedup
+            )
         else:
             with torch.no_grad():
                 return self.embedding_lookup_fn(
-                    indice, embedding_table, self.dummy_weight
+                    indice, embedding_table, self.dummy_weight, None, self.dedup
+                )
+
+
+class EmbeddingPoolingMode(IntEnum):
+    SUM = 0
+    MEAN = 1
+    MAX = 2
+
+
+def embedding_pooled_lookup_nograd_common(
+    embedding_table: Union[
+        torch.Tensor, wg.ChunkedTensor, wg.NCCLTensor, TieredEmbedding
+    ],
+    indice: torch.Tensor,
+    offsets: torch.Tensor,
+    mode: EmbeddingPoolingMode = EmbeddingPoolingMode.SUM,
+    dtype: Union[torch.dtype, None] = None,
+):
+    """
+    Pooled lookup, bag i pools rows indice[offsets[i]:offsets[i + 1]] without
+    materializing the gathered rows.
+    :param embedding_table: the table.
+    :param indice: row ids of all bags.
+    :param offsets: int64 bag offsets into indice, bag_count + 1 elements.
+    :param mode: pooling mode.
+    :param dtype: output dtype, None for table dtype.
+    :return: pooled output of shape [bag_count, dim] and, for MAX mode, int32 position
+        in indice of the max element of each output element, -1 for empty bags.
+    """
+    out_dtype = embedding_table.dtype if dtype is None else dtype
+    offsets = offsets.long()
+    if isinstance(embedding_table, torch.Tensor):
+        return torch.ops.wholegraph.pooled_gather(
+            indice, offsets, embedding_table, int(mode), out_dtype
+        )
+    if isinstance(embedding_table, wg.ChunkedTensor):
+        return torch.ops.wholegraph.pooled_gather_chunked(
+            indice, offsets, embedding_table.get_ptr(), int(mode), out_dtype
+        )
+    # NCCL and tiered tables are not directly addressable, gather each row once
+    # and pool over the gathered rows.
+    unique_indice, inverse_indice = torch.unique(indice, return_inverse=True)
+    if isinstance(embedding_table, TieredEmbedding):
+        rows = embedding_table.gather(unique_indice, out_dtype)
+    else:
+        rows = embedding_lookup_nograd_common(embedding_table, unique_indice, out_dtype)
+    return torch.ops.wholegraph.pooled_gather(
+        inverse_indice, offsets, rows, int(mode), out_dtype
+    )
+
+
+class EmbeddingBagLookupFn(torch.autograd.Function):
+    @staticmethod
+    def forward(
+        ctx,
+        indice: torch.Tensor,
+        offsets: torch.Tensor,
+        embedding_table: Union[
+            torch.Tensor,
+            wg.ChunkedTensor,
+            wg.NCCLTensor,
+            TieredEmbedding,
+            TrainableEmbedding,
+        ],
+        mode: EmbeddingPoolingMode = EmbeddingPoolingMode.SUM,
+        dummy_input: Union[torch.Tensor or None] = None,
+        dtype: Union[torch.dtype, None] = None,
+    ):
+        real_embedding_table = embedding_table
+        if isinstance(embedding_table, TrainableEmbedding):
+            wait_optimizers()
+            real_embedding_table = (
+                embedding_table.embedding
+                if embedding_table.tiered is None
+                else embedding_table.tiered
+            )
+        out_tensor, max_indice_pos = embedding_pooled_lookup_nograd_common(
+            real_embedding_table, indice, offsets, mode, dtype
+        )
+        if isinstance(embedding_table, TrainableEmbedding) and dummy_input is not None:
+            ctx.save_for_backward(indice, offsets.long(), max_indice_pos, dummy_input)
+            ctx.et = embedding_table
+            ctx.mode = mode
+            embedding_table.need_backward = True
+        return out_tensor
+
+    @staticmethod
+    def backward(ctx, grad_outputs: torch.Tensor):
+        if ctx.saved_tensors is None or len(ctx.saved_tensors) == 0:
+            return None, None, None, None, None
+        indice, offsets, max_indice_pos, dummy_input = ctx.saved_tensors
+        embedding_table = ctx.et
+        dummy_input_grad = torch.zeros_like(dummy_input)
+        assert isinstance(embedding_table, TrainableEmbedding)
+        ctx.et = None
+        bag_count = offsets.shape[0] - 1
+        assert grad_outputs.dim() == 2 and grad_outputs.shape[0] == bag_count
+        assert grad_outputs.shape[1] == embedding_table.embedding.shape[1]
+        if ctx.mode == EmbeddingPoolingMode.MAX:
+            # only the max element of each bag and column gets gradient.
+            sparse_grads = torch.zeros(
+                (indice.shape[0], grad_outputs.shape[1]),
+                dtype=grad_outputs.dtype,
+                device=grad_outputs.device,
+            )
+            col_ids = torch.arange(
+                grad_outputs.shape[1], device=grad_outputs.device
+            ).expand_as(max_indice_pos)
+            valid_mask = max_indice_pos >= 0
+            sparse_grads[max_indice_pos[valid_mask].long(), col_ids[valid_mask]] = (
+                grad_outputs[valid_mask]
+            )
+        else:
+            bag_sizes = offsets[1:] - offsets[:-1]
+            bag_ids = torch.repeat_interleave(
+                torch.arange(bag_count, device=offsets.device), bag_sizes
+            )
+            sparse_grads = grad_outputs[bag_ids]
+            if ctx.mode == EmbeddingPoolingMode.MEAN:
+                sparse_grads = sparse_grads / bag_sizes[bag_ids].unsqueeze(1).to(
+                    sparse_grads.dtype
+                )
+        embedding_table.add_sparse_grads(indice, sparse_grads)
+        return None, None, None, None, dummy_input_grad
+
+
+class EmbeddingBagLookUpModule(torch.nn.Module):
+    def __init__(
+        self,
+        mode: EmbeddingPoolingMode = EmbeddingPoolingMode.SUM,
+        need_backward=True,
+    ):
+        super().__init__()
+        self.mode = mode
+        self.need_backward = need_backward
+        if need_backward:
+            self.dummy_weight = torch.nn.Parameter(
+                torch.zeros(1), requires_grad=need_backward
+            )
+        else:
+            self.dummy_weight = None
+        self.embedding_bag_lookup_fn = EmbeddingBagLookupFn.apply
+
+    def forward(
+        self,
+        indice: torch.Tensor,
+        offsets: torch.Tensor,
+        embedding_table: Union[torch.Tensor, wg.ChunkedTensor, TrainableEmbedding],
+    ):
+        if self.need_backward:
+            return self.embedding_bag_lookup_fn(
+                indice, offsets, embedding_table, self.mode, self.dummy_weight
+            )
+        else:
+            with torch.no_grad():
+                return self.embedding_bag_lookup_fn(
+                    indice, offsets, embedding_table, self.mode, self.dummy_weight
                 )
 
 
 def init_embedding_backward_env(
-    barrier_comm: int, optimizer=EmbeddingLazyAdamOptimizer()
+    barrier_comm: int,
+    optimizer=EmbeddingLazyAdamOptimizer(),
+    async_update: bool = False,
+    allow_stale: bool = False,
+    grad_wire_dtype: Union[torch.dtype, None] = None,
+    grad_error_feedback: bool = False,
 ):
+    """
+    Init the environment for trainable embeddings.
+    :param barrier_comm: communicator to sync all ranks after update.
+    :param optimizer: the embedding optimizer.
+    :param async_update: whether run_optimizers returns before the update is done,
+        gradient exchange and update then overlap with the next step until the first
+        lookup of a trainable embedding waits for them, an exception of the update is
+        raised by the wait. NCCL embeddings are still updated synchronously.
+    :param allow_stale: for async_update, whether lookups read embeddings without
+        waiting, so they may see rows one step stale or being updated, the update is
+        waited at the next run_optimizers instead.
+    :param grad_wire_dtype: dtype of gradients sent in exchange, None for gradient
+        dtype, torch.float16, torch.bfloat16 or torch.int8 with per row scale to reduce
+        exchange size, received gradients are summed in float.
+    :param grad_error_feedback: whether add rounding error of last low precision
+        exchange to gradients of the next.
+    """
     global embedding_backward_comm
     assert embedding_backward_comm is None
     embedding_backward_comm = barrier_comm
@@ -384,24 +1233,107 @@ def init_embedding_backward_env(
     global embedding_optimizer
     assert embedding_optimizer is None
     embedding_optimizer = optimizer
+    global embedding_update_stream
+    global embedding_update_allow_stale
+    assert embedding_update_stream is None
+    embedding_update_stream = torch.cuda.Stream() if async_update else None
+    embedding_update_allow_stale = allow_stale
+    global embedding_grad_wire_dtype
+    global embedding_grad_error_feedback
+    embedding_grad_wire_dtype = grad_wire_dtype
+    embedding_grad_error_feedback = grad_error_feedback
+
+
+def apply_sparse_grads_async(lr, grads_ready: torch.cuda.Event, te_grads: list):
+    global embedding_update_stream
+    global embedding_update_error
+    try:
+        with torch.cuda.stream(embedding_update_stream):
+            embedding_update_stream.wait_event(grads_ready)
+            apply_grouped_sparse_grads(lr, te_grads)
+        embedding_update_stream.synchronize()
+    except Exception as e:
+        embedding_update_error = e
 
 
 def run_optimizers(lr):
-    # reading embeddings and writing gradients
+    global embedding_update_stream
     global trainable_wholememory_embedding_array
+    global embedding_backward_comm
+    if embedding_update_stream is None:
+        # reading embeddings and writing gradients
+        te_grads = []
+        for te in trainable_wholememory_embedding_array:
+            if te.need_backward is True:
+                te_grads.append((te, *te.pop_sparse_grads()))
+                te.need_backward = False
+        apply_grouped_sparse_grads(lr, te_grads)
+        # update embeddings and reset gradients
+        wg.barrier(embedding_backward_comm)
+        torch.cuda.synchronize()
+        return
+    # at most one update in flight.
+    wait_optimizers(force=True)
+    # take gradients here, so the next backward does not race with the update.
+    te_grads = []
+    nccl_te_grads = []
     for te in trainable_wholememory_embedding_array:
         if te.need_backward is True:
-            te.apply(learning_rate=lr)
+            sparse_indices, sparse_grads = te.pop_sparse_grads()
             te.need_backward = False
-    # update embeddings and reset gradients
+            # NCCL embeddings share the communicator with gathers of the next step,
+            # so they are updated synchronously.
+            if isinstance(te.embedding, wg.NCCLTensor):
+                nccl_te_grads.append((te, sparse_indices, sparse_grads))
+                continue
+            sparse_indices.record_stream(embedding_update_stream)
+            sparse_grads.record_stream(embedding_update_stream)
+            te_grads.append((te, sparse_indices, sparse_grads))
+    if len(nccl_te_grads) > 0:
+        apply_grouped_sparse_grads(lr, nccl_te_grads)
+        wg.barrier(embedding_backward_comm)
+        torch.cuda.synchronize()
+    grads_ready = torch.cuda.Event()
+    grads_ready.record()
+    global embedding_update_thread
+    embedding_update_thread = threading.Thread(
+        target=apply_sparse_grads_async, args=(lr, grads_ready, te_grads)
+    )
+    embedding_update_thread.start()
+
+
+def wait_optimizers(force: bool = False):
+    """
+    Wait for the asynchronous update of trainable embeddings on all ranks, and raise
+    the exception of the update if it failed.
+    :param force: wait even if stale embeddings are allowed.
+    :return: None
+    """
+    global embedding_update_thread
+    global embedding_update_allow_stale
+    if embedding_update_thread is None:
+        return
+    if embedding_update_allow_stale and not force:
+        return
+    embedding_update_thread.join()
+    embedding_update_thread = None
+    global embedding_update_error
+    if embedding_update_error is not None:
+        update_error = embedding_update_error
+        embedding_update_error = None
+        raise update_error
     global embedding_backward_comm
     wg.barrier(embedding_backward_comm)
-    torch.cuda.synchronize()
 
 
 def finalize_embedding_backward_env():
+    wait_optimizers(force=True)
+    global embedding_update_stream
+    embedding_update_stream = None
     global embedding_backward_comm
     wg.barrier(embedding_backward_comm)
     embedding_backward_comm = None
     global trainable_wholememory_embedding_array
-    trainable_wholememory_embedding_array = []
+    trainable_wholememory_embedding_array = None
+    global embedding_optimizer
+    embedding_optimizer = None
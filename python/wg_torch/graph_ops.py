@@ -102,6 +102,8 @@ def parse_part_file(part_file_name: str, prefix: str):
         return 0, 1
     pattern = re.compile("_part_(\d+)_of_(\d+)")
     matches = pattern.match(part_file_name[len(prefix) :])
+    if matches is None:
+        return None, None
     int_tuple = matches.groups()
     if len(int_tuple) != 2:
         return None, None
@@ -143,6 +145,77 @@ def check_part_files_in_path(save_dir, prefix):
     return None
 
 
+def get_part_file_list(file_prefix: str):
+    """Return the existing files of file_prefix in index order, either the single file or all part files."""
+    if os.path.isfile(file_prefix):
+        return [file_prefix]
+    save_dir, prefix = os.path.split(file_prefix)
+    part_count = check_part_files_in_path(save_dir if save_dir != "" else ".", prefix)
+    if part_count is None or part_count == 0:
+        raise FileNotFoundError("no file found for prefix %s." % (file_prefix,))
+    return [get_part_filename(file_prefix, i, part_count) for i in range(part_count)]
+
+
+def reshard_part_files(
+    file_prefix: str, dtype: np.dtype, world_size: int, entry_elt_count: int = 1
+):
+    """
+    Rewrite the files of file_prefix into world_size rank aligned part files, so that part file
+    i holds exactly the rows rank i owns by get_partition_plan, and each rank loads only its own file.
+    :param file_prefix: file prefix, the single file or part files of it are resharded.
+    :param dtype: numpy dtype of the elements.
+    :param world_size: number of ranks that will load the files.
+    :param entry_elt_count: element count of each row, e.g. embedding dim.
+    :return: None
+    """
+    src_files = get_part_file_list(file_prefix)
+    row_size = np.dtype(dtype).itemsize * entry_elt_count
+    file_entry_counts = []
+    for filename in src_files:
+        file_size = os.path.getsize(filename)
+        assert file_size % row_size == 0
+        file_entry_counts.append(file_size // row_size)
+    total_entry_count = sum(file_entry_counts)
+    entry_per_rank = (total_entry_count + world_size - 1) // world_size
+    save_dir, prefix = os.path.split(file_prefix)
+    tmp_dir = os.path.join(save_dir, "_reshard_tmp_" + prefix)
+    os.makedirs(tmp_dir, exist_ok=True)
+    dst_files = [
+        os.path.join(tmp_dir, get_part_filename(prefix, i, world_size))
+        for i in range(world_size)
+    ]
+    max_batch_entry = max(1, (64 * 1024 * 1024) // row_size)
+    src_idx = 0
+    src_offset = 0
+    src_data = np.memmap(src_files[0], dtype=dtype, mode="r") if src_files else None
+    for rank in range(world_size):
+        rank_count = max(
+            0, min(entry_per_rank, total_entry_count - rank * entry_per_rank)
+        )
+        with open(dst_files[rank], "wb") as f:
+            while rank_count > 0:
+                while src_offset == file_entry_counts[src_idx]:
+                    src_idx += 1
+                    src_offset = 0
+                    src_data = np.memmap(src_files[src_idx], dtype=dtype, mode="r")
+                batch_count = min(
+                    rank_count, file_entry_counts[src_idx] - src_offset, max_batch_entry
+                )
+                src_data[
+                    src_offset
+                    * entry_elt_count : (src_offset + batch_count)
+                    * entry_elt_count
+                ].tofile(f)
+                src_offset += batch_count
+                rank_count -= batch_count
+    del src_data
+    for filename in src_files:
+        os.remove(filename)
+    for rank in range(world_size):
+        os.rename(dst_files[rank], get_part_filename(file_prefix, rank, world_size))
+    os.rmdir(tmp_dir)
+
+
 def check_data_integrity(save_dir, graph_name):
     meta_file_name = graph_name + "_meta.json"
     meta_file_path = os.path.join(save_dir, meta_file_name)
@@ -413,6 +486,179 @@ def extract_subgraph_with_filter(
         )
 
 
+def extract_induced_subgraph(
+    node_ids: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+):
+    """
+    Extract the induced sub graph of node_ids, all edges with both endpoints in node_ids.
+    :param node_ids: node ids, a repeated id maps to the local id of its first
+        occurrence.
+    :param edges_csr_row: CSR row pointer of the graph.
+    :param edges_csr_col: CSR column index of the graph.
+    :return: int64 csr_row_ptr, int32 csr_col_ind of local ids in node_ids and int64
+        edge ids in edges_csr_col of the sub graph.
+    """
+    if isinstance(edges_csr_row, torch.Tensor):
+        return torch.ops.wholegraph.extract_induced_subgraph(
+            node_ids, edges_csr_row, edges_csr_col
+        )
+    else:
+        return torch.ops.wholegraph.extract_induced_subgraph_chunked(
+            node_ids, edges_csr_row.get_ptr(), edges_csr_col.get_ptr()
+        )
+
+
+def get_type_max_sample_count(fanouts, edge_type_count: int):
+    """
+    Convert {edge_type: fanout} dict to fanout tensor of each edge type.
+    Edge types not in the dict are not sampled, negative fanout samples all edges of the type.
+    """
+    if isinstance(fanouts, torch.Tensor):
+        return fanouts.int()
+    type_max_sample_count = [0] * edge_type_count
+    for edge_type, fanout in fanouts.items():
+        assert 0 <= edge_type < edge_type_count
+        type_max_sample_count[edge_type] = fanout
+    return torch.tensor(type_max_sample_count, dtype=torch.int32, device="cuda")
+
+
+def typed_sample_without_replacement_single_layer(
+    target_gid: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_type: Union[torch.Tensor, wg.ChunkedTensor],
+    fanouts,
+    edge_type_count: int,
+):
+    # returns offset, neighbors, center local ids and int8 edge types,
+    # neighbors of each target are grouped by edge type.
+    type_max_sample_count = get_type_max_sample_count(fanouts, edge_type_count)
+    is_chunked = isinstance(edges_csr_row, wg.ChunkedTensor)
+    if is_chunked:
+        return torch.ops.wholegraph.typed_sample_without_replacement_chunked(
+            target_gid,
+            edges_csr_row.get_ptr(),
+            edges_csr_col.get_ptr(),
+            edges_type.get_ptr(),
+            type_max_sample_count,
+        )
+    else:
+        return torch.ops.wholegraph.typed_sample_without_replacement(
+            target_gid,
+            edges_csr_row,
+            edges_csr_col,
+            edges_type,
+            type_max_sample_count,
+        )
+
+
+def sort_csr_by_edge_time(
+    csr_row_ptr: torch.Tensor, csr_col_ind: torch.Tensor, edge_time: torch.Tensor
+):
+    """
+    Sort edges of each row by time in ascending order, offline preparation for temporal_sample.
+    For neighbor timestamps such as node_year, use node_time[csr_col_ind] as edge_time.
+    :param csr_row_ptr: CSR row pointer.
+    :param csr_col_ind: CSR column index.
+    :param edge_time: time of each edge.
+    :return: sorted csr_col_ind, sorted edge_time and the edge permutation, which can be
+        used to reorder other edge data.
+    """
+    row_ids = torch.repeat_interleave(
+        torch.arange(csr_row_ptr.size(0) - 1, device=csr_row_ptr.device),
+        csr_row_ptr[1:] - csr_row_ptr[:-1],
+    )
+    _, time_order = torch.sort(edge_time, stable=True)
+    _, row_order = torch.sort(row_ids[time_order], stable=True)
+    perm = time_order[row_order]
+    return csr_col_ind[perm], edge_time[perm], perm
+
+
+def temporal_sample_single_layer(
+    target_gid: torch.Tensor,
+    query_time: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_time: Union[torch.Tensor, wg.ChunkedTensor],
+    max_neighbor: int,
+    window: float = -1.0,
+    include_query_time: bool = False,
+    most_recent: bool = False,
+):
+    # edges_time should be sorted in each row, see sort_csr_by_edge_time.
+    is_chunked = isinstance(edges_csr_row, wg.ChunkedTensor)
+    if is_chunked:
+        return torch.ops.wholegraph.temporal_sample_chunked(
+            target_gid,
+            query_time,
+            edges_csr_row.get_ptr(),
+            edges_csr_col.get_ptr(),
+            edges_time.get_ptr(),
+            max_neighbor,
+            window,
+            include_query_time,
+            most_recent,
+        )
+    else:
+        return torch.ops.wholegraph.temporal_sample(
+            target_gid,
+            query_time,
+            edges_csr_row,
+            edges_csr_col,
+            edges_time,
+            max_neighbor,
+            window,
+            include_query_time,
+            most_recent,
+        )
+
+
+def append_unique_temporal(
+    target_gid: torch.Tensor,
+    target_time: torch.Tensor,
+    neighbor_gid: torch.Tensor,
+    neighbor_time: torch.Tensor,
+):
+    """
+    Same as append_unique, but on (node, time) pairs, so a node reached at several times
+    is kept once for each time and never takes a time later than its own query.
+    :param target_gid: target node ids, (node, time) pairs of targets should be unique.
+    :param target_time: time of each target.
+    :param neighbor_gid: neighbor node ids.
+    :param neighbor_time: time of each neighbor.
+    :return: unique node ids, unique times, neighbor to unique mapping and neighbor count
+        of each unique pair, targets first.
+    """
+    target_count = target_gid.size(0)
+    all_gid = torch.cat([target_gid, neighbor_gid])
+    all_time = torch.cat([target_time, neighbor_time])
+    _, time_rank = torch.unique(all_time, return_inverse=True)
+    keys, key_idx = torch.unique(
+        torch.stack([all_gid.long(), time_rank]), dim=1, return_inverse=True
+    )
+    # order unique pairs by first appearance, which keeps targets first and in order.
+    position = torch.arange(all_gid.size(0), device=all_gid.device)
+    first_position = torch.full(
+        (keys.size(1),), all_gid.size(0), dtype=torch.int64, device=all_gid.device
+    )
+    first_position.scatter_reduce_(0, key_idx, position, reduce="amin")
+    first_position, unique_order = torch.sort(first_position)
+    unique_idx = torch.empty_like(unique_order)
+    unique_idx[unique_order] = torch.arange(keys.size(1), device=all_gid.device)
+    neighbor_raw_to_unique_mapping = unique_idx[key_idx[target_count:]]
+    unique_output_neighbor_count = torch.bincount(
+        neighbor_raw_to_unique_mapping, minlength=keys.size(1)
+    )
+    return (
+        all_gid[first_position],
+        all_time[first_position],
+        neighbor_raw_to_unique_mapping.int(),
+        unique_output_neighbor_count.int(),
+    )
+
+
 def unweighted_sample_without_replacement_single_layer(
     target_gid: torch.Tensor,
     edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
@@ -439,6 +685,288 @@ def unweighted_sample_without_replacement_single_layer(
     return neighboor_gids_offset, neighboor_gids_vdata, neighboor_src_lids
 
 
+def unweighted_sample_with_replacement_single_layer(
+    target_gid: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+    max_neighbor: int,
+):
+    # output has exactly max_neighbor samples per target, targets without neighbors get none.
+    is_chunked = isinstance(edges_csr_row, wg.ChunkedTensor)
+    if is_chunked:
+        return torch.ops.wholegraph.unweighted_sample_with_replacement_chunked(
+            target_gid, edges_csr_row.get_ptr(), edges_csr_col.get_ptr(), max_neighbor
+        )
+    else:
+        return torch.ops.wholegraph.unweighted_sample_with_replacement(
+            target_gid, edges_csr_row, edges_csr_col, max_neighbor
+        )
+
+
+def layer_wise_importance_sample_single_layer(
+    target_gid: torch.Tensor,
+    neighboor_gids_offset: torch.Tensor,
+    neighboor_gids_vdata: torch.Tensor,
+    neighboor_src_lids: torch.Tensor,
+    layer_size: int,
+):
+    """
+    Layer-wise importance sampling (LADIES style) on all neighbors of target_gid.
+    Each candidate u is sampled with probability proportional to sum of 1 / deg(v)^2 over
+    its edges to targets v, i.e. squared column norm of the row normalized adjacency
+    restricted to the targets. At most layer_size distinct candidates are sampled without
+    replacement by Gumbel top-k and only edges to them are kept.
+    :param target_gid: target node ids of this layer.
+    :param neighboor_gids_offset: CSR offsets of all neighbors of target_gid.
+    :param neighboor_gids_vdata: all neighbors of target_gid.
+    :param neighboor_src_lids: target local id of each neighbor.
+    :param layer_size: number of nodes sampled for this layer.
+    :return: CSR offsets, neighbor ids, target local ids and importance weights
+        1 / (layer_size * q(u)) of kept edges, q(u) being the sample probability of u.
+    """
+    candidates, candidate_idx = torch.unique(neighboor_gids_vdata, return_inverse=True)
+    candidate_count = candidates.size(0)
+    if candidate_count <= layer_size:
+        edge_weight = torch.ones(
+            (neighboor_gids_vdata.size(0),), dtype=torch.float, device=target_gid.device
+        )
+        return (
+            neighboor_gids_offset,
+            neighboor_gids_vdata,
+            neighboor_src_lids,
+            edge_weight,
+        )
+    degree = (neighboor_gids_offset[1:] - neighboor_gids_offset[:-1]).float()
+    edge_importance = 1.0 / (degree[neighboor_src_lids.long()] ** 2)
+    importance = torch.zeros(
+        (candidate_count,), dtype=torch.float, device=target_gid.device
+    )
+    importance.scatter_add_(0, candidate_idx, edge_importance)
+    # log(importance) plus Gumbel noise, its top-k is sampling without replacement.
+    keys = importance.log() - torch.empty_like(importance).exponential_().log()
+    sampled = torch.topk(keys, layer_size, sorted=False).indices
+    is_sampled = torch.zeros(
+        (candidate_count,), dtype=torch.bool, device=target_gid.device
+    )
+    is_sampled[sampled] = True
+    edge_mask = is_sampled[candidate_idx]
+    candidate_weight = importance.sum() / (layer_size * importance)
+    edge_weight = candidate_weight[candidate_idx[edge_mask]]
+    neighboor_src_lids = neighboor_src_lids[edge_mask]
+    neighboor_gids_vdata = neighboor_gids_vdata[edge_mask]
+    neighboor_count = torch.bincount(
+        neighboor_src_lids.long(), minlength=target_gid.size(0)
+    )
+    neighboor_gids_offset = torch.cat(
+        [
+            torch.zeros((1,), dtype=torch.int32, device=target_gid.device),
+            torch.cumsum(neighboor_count, 0).int(),
+        ]
+    )
+    return neighboor_gids_offset, neighboor_gids_vdata, neighboor_src_lids, edge_weight
+
+
+class WeightedSampleMode(IntEnum):
+    TOPK = 0
+    ALIAS_WITH_REPLACEMENT = 1
+    ALIAS_WITHOUT_REPLACEMENT = 2
+
+
+def build_alias_table(
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_weight: Union[torch.Tensor, wg.ChunkedTensor],
+):
+    """
+    Build per row alias tables of edge weights, each rank builds the rows of its partition.
+    :param edges_csr_row: csr row ptr of the graph.
+    :param edges_csr_weight: edge weights, float32 or float64, same layout as csr col.
+    :return: (alias_prob, alias_idx) WholeMemory tensors laid out as edges_csr_weight.
+    """
+    wm_comm = get_wm_communicator(edges_csr_weight)
+    wm_tensor_type = get_wm_tensor_type(edges_csr_weight)
+    edge_count = edges_csr_weight.shape[0]
+    alias_prob = create_wm_tensor(
+        wm_comm, [edge_count], [], edges_csr_weight.dtype, wm_tensor_type
+    )
+    alias_idx = create_wm_tensor(wm_comm, [edge_count], [], torch.int32, wm_tensor_type)
+    start_node, node_count, _, _ = get_partition_plan(
+        wm_comm, edges_csr_row.shape[0] - 1
+    )
+    node_count = max(node_count, 0)
+    if wm_tensor_type == WmTensorType.CHUNKED:
+        torch.ops.wholegraph.build_alias_table_chunked(
+            edges_csr_row.get_ptr(),
+            edges_csr_weight.get_ptr(),
+            alias_prob.get_ptr(),
+            alias_idx.get_ptr(),
+            start_node,
+            node_count,
+        )
+    else:
+        torch.ops.wholegraph.build_alias_table(
+            edges_csr_row,
+            edges_csr_weight,
+            alias_prob,
+            alias_idx,
+            start_node,
+            node_count,
+        )
+    wg.barrier(wm_comm)
+    return alias_prob, alias_idx
+
+
+class NegativeSampleMode(IntEnum):
+    UNIFORM = 0
+    DEGREE = 1
+
+
+DEGREE_ALIAS_BUCKET_SIZE = 1024
+
+
+def get_csr_degree(
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    start_node: int = 0,
+    node_count: Union[int, None] = None,
+):
+    if node_count is None:
+        node_count = edges_csr_row.shape[0] - 1 - start_node
+    if isinstance(edges_csr_row, wg.ChunkedTensor):
+        return torch.ops.wholegraph.get_csr_degree_chunked(
+            edges_csr_row.get_ptr(), start_node, node_count
+        )
+    else:
+        return torch.ops.wholegraph.get_csr_degree(
+            edges_csr_row, start_node, node_count
+        )
+
+
+def build_degree_alias_table(
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor], power: float = 0.75
+):
+    """
+    Build alias table of the degree^power (unigram^0.75 by default) distribution over
+    all nodes, for degree biased negative sampling. The table has two levels, nodes are
+    split into buckets of DEGREE_ALIAS_BUCKET_SIZE, one alias table over bucket weights
+    and one per bucket over node weights, so both are built by the per row alias kernel.
+    Each rank holds its own copy on device.
+    :param edges_csr_row: csr row ptr of the graph.
+    :param power: power of node degree.
+    :return: (bucket_prob, bucket_idx, node_prob, node_idx) tensors.
+    """
+    node_count = edges_csr_row.shape[0] - 1
+    weight = get_csr_degree(edges_csr_row).float().pow(power)
+    bucket_size = DEGREE_ALIAS_BUCKET_SIZE
+    bucket_count = (node_count + bucket_size - 1) // bucket_size
+    node_bucket_ptr = (
+        torch.arange(bucket_count + 1, dtype=torch.int64, device=weight.device)
+        * bucket_size
+    )
+    node_bucket_ptr[-1] = node_count
+    node_prob = torch.empty_like(weight)
+    node_idx = torch.empty(node_count, dtype=torch.int32, device=weight.device)
+    torch.ops.wholegraph.build_alias_table(
+        node_bucket_ptr, weight, node_prob, node_idx, 0, bucket_count
+    )
+    bucket_weight = torch.nn.functional.pad(
+        weight.double(), (0, bucket_count * bucket_size - node_count)
+    )
+    bucket_weight = bucket_weight.view(bucket_count, bucket_size).sum(1)
+    bucket_ptr = torch.tensor(
+        [0, bucket_count], dtype=torch.int64, device=weight.device
+    )
+    bucket_prob = torch.empty_like(bucket_weight)
+    bucket_idx = torch.empty(bucket_count, dtype=torch.int32, device=weight.device)
+    torch.ops.wholegraph.build_alias_table(
+        bucket_ptr, bucket_weight, bucket_prob, bucket_idx, 0, 1
+    )
+    return bucket_prob, bucket_idx, node_prob, node_idx
+
+
+def degree_alias_negative_sample(
+    count: int, degree_alias_table, dtype: torch.dtype = torch.int64
+):
+    """
+    Draw count nodes from the table built by build_degree_alias_table.
+    :param count: number of nodes to draw.
+    :param degree_alias_table: (bucket_prob, bucket_idx, node_prob, node_idx) tensors.
+    :param dtype: node id dtype.
+    :return: node ids on the device of the table.
+    """
+    bucket_prob, bucket_idx, node_prob, node_idx = degree_alias_table
+    device = node_prob.device
+    node_count = node_prob.numel()
+    bucket_count = bucket_prob.numel()
+    bucket = (torch.rand(count, device=device) * bucket_count).long()
+    bucket = bucket.clamp_(max=bucket_count - 1)
+    bucket_coin = torch.rand(count, dtype=bucket_prob.dtype, device=device)
+    bucket = torch.where(
+        bucket_coin < bucket_prob[bucket],
+        bucket,
+        bucket_idx[bucket].long(),
+    )
+    bucket_start = bucket * DEGREE_ALIAS_BUCKET_SIZE
+    bucket_len = (node_count - bucket_start).clamp_(max=DEGREE_ALIAS_BUCKET_SIZE)
+    pos = bucket_start + torch.minimum(
+        (torch.rand(count, device=device) * bucket_len).long(), bucket_len - 1
+    )
+    nodes = torch.where(
+        torch.rand(count, device=device) < node_prob[pos],
+        pos,
+        bucket_start + node_idx[pos].long(),
+    )
+    return nodes.to(dtype)
+
+
+def degree_alias_per_source_negative_sample(
+    src_nodes: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+    negative_sample_count: int,
+    degree_alias_table,
+    try_count: int = 10,
+):
+    """
+    Draw negative_sample_count nodes of each source from the table built by
+    build_degree_alias_table. As in the uniform per source sampler, draws hitting a
+    neighbor of the source are redrawn, at most try_count times in all.
+    :param src_nodes: source node ids.
+    :param edges_csr_row: csr row ptr of the graph.
+    :param edges_csr_col: csr col ind of the graph.
+    :param negative_sample_count: negative count of each source.
+    :param degree_alias_table: (bucket_prob, bucket_idx, node_prob, node_idx) tensors.
+    :param try_count: max draw count of each negative.
+    :return: negative node ids, negative_sample_count consecutive ones for each source.
+    """
+    src_count = src_nodes.numel()
+    node_count = degree_alias_table[2].numel()
+    negatives = degree_alias_negative_sample(
+        src_count * negative_sample_count, degree_alias_table, src_nodes.dtype
+    ).view(src_count, negative_sample_count)
+    _, neighbor_ids, neighbor_src_lids = (
+        unweighted_sample_without_replacement_single_layer(
+            src_nodes, edges_csr_row, edges_csr_col, -1
+        )
+    )
+    if neighbor_ids.numel() == 0:
+        return negatives.view(-1)
+    # (source, neighbor) keys of all positive edges, sorted for lookup.
+    positive_key, _ = torch.sort(
+        neighbor_src_lids.long() * node_count + neighbor_ids.long()
+    )
+    src_key = torch.arange(src_count, device=negatives.device).unsqueeze(1) * node_count
+    for _ in range(try_count - 1):
+        key = src_key + negatives.long()
+        pos = torch.searchsorted(positive_key, key).clamp_(max=positive_key.numel() - 1)
+        is_positive = positive_key[pos] == key
+        positive_count = int(is_positive.sum())
+        if positive_count == 0:
+            break
+        negatives[is_positive] = degree_alias_negative_sample(
+            positive_count, degree_alias_table, src_nodes.dtype
+        )
+    return negatives.view(-1)
+
+
 def weighted_sample_without_replacement_single_layer(
     target_gid: torch.Tensor,
     edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
@@ -446,8 +974,35 @@ def weighted_sample_without_replacement_single_layer(
     edges_csr_weight: Union[torch.Tensor, wg.ChunkedTensor],
     max_neighbor: int,
     edges_csr_local_sorted_map_indices: Union[torch.Tensor, wg.ChunkedTensor] = None,
+    mode: WeightedSampleMode = WeightedSampleMode.TOPK,
+    edges_alias_table=None,
 ):
     is_chunked = isinstance(edges_csr_row, wg.ChunkedTensor)
+    if mode != WeightedSampleMode.TOPK:
+        # edges_alias_table is (alias_prob, alias_idx) from build_alias_table
+        assert edges_alias_table is not None
+        alias_prob, alias_idx = edges_alias_table
+        with_replacement = mode == WeightedSampleMode.ALIAS_WITH_REPLACEMENT
+        if is_chunked:
+            return torch.ops.wholegraph.alias_weighted_sample_chunked(
+                target_gid,
+                edges_csr_row.get_ptr(),
+                edges_csr_col.get_ptr(),
+                alias_prob.get_ptr(),
+                alias_idx.get_ptr(),
+                max_neighbor,
+                with_replacement,
+            )
+        else:
+            return torch.ops.wholegraph.alias_weighted_sample(
+                target_gid,
+                edges_csr_row,
+                edges_csr_col,
+                alias_prob,
+                alias_idx,
+                max_neighbor,
+                with_replacement,
+            )
     if is_chunked:
         edges_csr_local_sorted_map_indices_ptr = (
             None
@@ -482,6 +1037,86 @@ def weighted_sample_without_replacement_single_layer(
     return neighboor_gids_offset, neighboor_gids_vdata, neighboor_src_lids
 
 
+def random_walk(
+    start_nodes: torch.Tensor,
+    edges_csr_row: Union[torch.Tensor, wg.ChunkedTensor],
+    edges_csr_col: Union[torch.Tensor, wg.ChunkedTensor],
+    walk_length: int,
+    p: float = 1.0,
+    q: float = 1.0,
+    edges_alias_table=None,
+):
+    """
+    Batched random walk, one walk from each start node.
+    Uniform if edges_alias_table is None, else weighted by the alias tables from
+    build_alias_table. p and q are node2vec return and in-out parameters, p = q = 1 is a
+    first order walk. Plain CSR on host runs on CPU threads.
+    :param start_nodes: start node of each walk.
+    :param edges_csr_row: CSR row pointer.
+    :param edges_csr_col: CSR column index, sorted in each row for node2vec walks.
+    :param walk_length: step count of each walk.
+    :param p: node2vec return parameter.
+    :param q: node2vec in-out parameter.
+    :param edges_alias_table: None or (alias_prob, alias_idx) from build_alias_table.
+    :return: walks of shape (start_node_count, walk_length + 1), walks reaching a node
+        without neighbors are padded with -1.
+    """
+    is_chunked = isinstance(edges_csr_row, wg.ChunkedTensor)
+    if is_chunked:
+        alias_prob_ptr, alias_idx_ptr = 0, 0
+        if edges_alias_table is not None:
+            alias_prob_ptr = edges_alias_table[0].get_ptr()
+            alias_idx_ptr = edges_alias_table[1].get_ptr()
+        return torch.ops.wholegraph.random_walk_chunked(
+            start_nodes,
+            edges_csr_row.get_ptr(),
+            edges_csr_col.get_ptr(),
+            alias_prob_ptr,
+            alias_idx_ptr,
+            walk_length,
+            p,
+            q,
+        )
+    else:
+        alias_prob, alias_idx = None, None
+        if edges_alias_table is not None:
+            alias_prob, alias_idx = edges_alias_table
+        return torch.ops.wholegraph.random_walk(
+            start_nodes,
+            edges_csr_row,
+            edges_csr_col,
+            alias_prob,
+            alias_idx,
+            walk_length,
+            p,
+            q,
+        )
+
+
+def walks_to_skip_gram_pairs(walks: torch.Tensor, window_size: int):
+    """
+    Generate skip-gram (center, context) pairs in both directions within window_size.
+    Pairs with -1 padding are dropped.
+    :param walks: walks from random_walk.
+    :param window_size: max distance between center and context in a walk.
+    :return: center ids and context ids.
+    """
+    centers = []
+    contexts = []
+    for distance in range(1, min(window_size, walks.size(1) - 1) + 1):
+        left = walks[:, :-distance].reshape(-1)
+        right = walks[:, distance:].reshape(-1)
+        valid = (left >= 0) & (right >= 0)
+        left = left[valid]
+        right = right[valid]
+        centers.extend([left, right])
+        contexts.extend([right, left])
+    if len(centers) == 0:
+        empty = torch.empty((0,), dtype=walks.dtype, device=walks.device)
+        return empty, empty
+    return torch.cat(centers), torch.cat(contexts)
+
+
 def filter_edges(
     src_gids: torch.Tensor,
     neighboor_gids_offset: torch.Tensor,
@@ -494,6 +1129,56 @@ def filter_edges(
     )
 
 
+FEISTEL_ROUNDS = 4
+
+
+def get_feistel_round_keys(seed: int, epoch: int, rounds: int = FEISTEL_ROUNDS):
+    # 32 bit round keys from splitmix64 of (seed, epoch)
+    mask64 = 0xFFFFFFFFFFFFFFFF
+    state = (seed * 0x9E3779B97F4A7C15 + epoch) & mask64
+    round_keys = []
+    for _ in range(rounds):
+        state = (state + 0x9E3779B97F4A7C15) & mask64
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & mask64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & mask64
+        round_keys.append((z ^ (z >> 31)) & 0xFFFFFFFF)
+    return round_keys
+
+
+def feistel_permute(positions: torch.Tensor, count: int, round_keys: list):
+    """
+    Keyed bijection of [0, count), computed element-wise without materializing the
+    permutation. A balanced Feistel network permutes the smallest even bit width domain
+    covering count, and cycle walking maps results out of [0, count) back into it.
+    :param positions: int64 positions in [0, count).
+    :param count: domain size.
+    :param round_keys: round keys from get_feistel_round_keys.
+    :return: permuted ids of positions.
+    """
+    half_bits = max(((count - 1).bit_length() + 1) // 2, 1)
+    half_mask = (1 << half_bits) - 1
+
+    def encrypt(x: torch.Tensor):
+        left = x >> half_bits
+        right = x & half_mask
+        for round_key in round_keys:
+            # values stay below 2^32 before each multiply, so int64 never overflows.
+            h = ((right ^ round_key) * 0x2C1B3C6D) & 0xFFFFFFFF
+            h = h ^ (h >> 15)
+            h = (h * 0x297A2D39) & 0xFFFFFFFF
+            h = h ^ (h >> 12)
+            left, right = right, left ^ (h & half_mask)
+        return (left << half_bits) | right
+
+    ids = encrypt(positions.long())
+    out_of_range = ids >= count
+    while bool(out_of_range.any()):
+        ids[out_of_range] = encrypt(ids[out_of_range])
+        out_of_range = ids >= count
+    return ids
+
+
 class HomoGraph(object):
     def __init__(self):
         self.node_feat = None
@@ -510,6 +1195,7 @@ class HomoGraph(object):
         self.wm_comm = None
         self.wm_nccl_embedding_comm = None
         self.embedding_dim = None
+        self.degree_alias_table = None
 
     def id_type(self):
         return self.id_dtype
@@ -649,8 +1335,13 @@ class HomoGraph(object):
                 self.node_feat, torch.device("cuda", torch.cuda.current_device())
             )
 
-    def unweighted_sample_without_replacement(
-        self, node_ids, max_neighbors, exclude_edge_hashset=None
+    def extract_induced_subgraph(self, node_ids: torch.Tensor):
+        return extract_induced_subgraph(
+            node_ids, self.edges_csr_row, self.edges_csr_col
+        )
+
+    def _unweighted_multilayer_sample(
+        self, node_ids, max_neighbors, single_layer_sample, exclude_edge_hashset=None
     ):
         hops = len(max_neighbors)
         sample_dup_count = [None] * hops
@@ -664,7 +1355,7 @@ class HomoGraph(object):
                 neighboor_gids_offset,
                 neighboor_gids_vdata,
                 neighboor_src_lids,
-            ) = unweighted_sample_without_replacement_single_layer(
+            ) = single_layer_sample(
                 target_gids[i + 1],
                 self.edges_csr_row,
                 self.edges_csr_col,
@@ -712,6 +1403,252 @@ class HomoGraph(object):
             target_gids[i] = unique_gids
         return target_gids, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count
 
+    def unweighted_sample_without_replacement(
+        self, node_ids, max_neighbors, exclude_edge_hashset=None
+    ):
+        return self._unweighted_multilayer_sample(
+            node_ids,
+            max_neighbors,
+            unweighted_sample_without_replacement_single_layer,
+            exclude_edge_hashset,
+        )
+
+    def unweighted_sample_with_replacement(
+        self, node_ids, max_neighbors, exclude_edge_hashset=None
+    ):
+        return self._unweighted_multilayer_sample(
+            node_ids,
+            max_neighbors,
+            unweighted_sample_with_replacement_single_layer,
+            exclude_edge_hashset,
+        )
+
+    def layer_wise_importance_sample(
+        self, node_ids, layer_sizes, exclude_edge_hashset=None
+    ):
+        """
+        Layer-wise importance sampling, each hop samples at most layer_sizes[hop] nodes
+        shared by all targets instead of a fanout per target, so node count grows
+        additively with depth.
+        Return values are the same as unweighted_sample_without_replacement, plus the
+        importance weights of the edges of each hop.
+        :param node_ids: seed node ids.
+        :param layer_sizes: number of sampled nodes of each hop, starting from the seeds.
+        :param exclude_edge_hashset: edges to exclude.
+        :return: target_gids, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count,
+            edge_weight
+        """
+        hops = len(layer_sizes)
+        sample_dup_count = [None] * hops
+        edge_weight = [None] * hops
+        edge_indice = [None] * hops
+        csr_row_ptr = [None] * hops
+        csr_col_ind = [None] * hops
+        target_gids = [None] * (hops + 1)
+        target_gids[hops] = node_ids
+        for i in range(hops - 1, -1, -1):
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+            ) = unweighted_sample_without_replacement_single_layer(
+                target_gids[i + 1], self.edges_csr_row, self.edges_csr_col, -1
+            )
+            if exclude_edge_hashset is not None:
+                (
+                    neighboor_gids_offset,
+                    neighboor_gids_vdata,
+                    neighboor_src_lids,
+                ) = filter_edges(
+                    target_gids[i + 1],
+                    neighboor_gids_offset,
+                    neighboor_gids_vdata,
+                    exclude_edge_hashset,
+                )
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+                edge_weight[i],
+            ) = layer_wise_importance_sample_single_layer(
+                target_gids[i + 1],
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+                layer_sizes[hops - i - 1],
+            )
+            (
+                unique_gids,
+                neighbor_raw_to_unique_mapping,
+                unique_output_neighbor_count,
+            ) = torch.ops.wholegraph.append_unique(
+                target_gids[i + 1], neighboor_gids_vdata
+            )
+            csr_row_ptr[i] = neighboor_gids_offset
+            csr_col_ind[i] = neighbor_raw_to_unique_mapping
+            sample_dup_count[i] = unique_output_neighbor_count
+            neighboor_count = neighboor_gids_vdata.size()[0]
+            edge_indice[i] = torch.cat(
+                [
+                    torch.reshape(neighbor_raw_to_unique_mapping, (1, neighboor_count)),
+                    torch.reshape(neighboor_src_lids, (1, neighboor_count)),
+                ]
+            )
+            target_gids[i] = unique_gids
+        return (
+            target_gids,
+            edge_indice,
+            csr_row_ptr,
+            csr_col_ind,
+            sample_dup_count,
+            edge_weight,
+        )
+
+    def typed_sample_without_replacement(
+        self, node_ids, max_neighbors, csr_edge_type, edge_type_count: int
+    ):
+        """
+        Multi-hop sampling with a fanout for each edge type.
+        :param node_ids: seed node ids.
+        :param max_neighbors: list of {edge_type: fanout} of each hop, starting from the seeds.
+        :param csr_edge_type: int8 edge type with same layout as edges_csr_col.
+        :param edge_type_count: edge type count.
+        :return: target_gids, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count as
+            unweighted_sample_without_replacement, and edge_types of each layer.
+        """
+        hops = len(max_neighbors)
+        sample_dup_count = [None] * hops
+        edge_indice = [None] * hops
+        csr_row_ptr = [None] * hops
+        csr_col_ind = [None] * hops
+        edge_types = [None] * hops
+        target_gids = [None] * (hops + 1)
+        target_gids[hops] = node_ids
+        for i in range(hops - 1, -1, -1):
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+                neighboor_edge_types,
+            ) = typed_sample_without_replacement_single_layer(
+                target_gids[i + 1],
+                self.edges_csr_row,
+                self.edges_csr_col,
+                csr_edge_type,
+                max_neighbors[hops - i - 1],
+                edge_type_count,
+            )
+            (
+                unique_gids,
+                neighbor_raw_to_unique_mapping,
+                unique_output_neighbor_count,
+            ) = torch.ops.wholegraph.append_unique(
+                target_gids[i + 1], neighboor_gids_vdata
+            )
+            csr_row_ptr[i] = neighboor_gids_offset
+            csr_col_ind[i] = neighbor_raw_to_unique_mapping
+            sample_dup_count[i] = unique_output_neighbor_count
+            edge_types[i] = neighboor_edge_types
+            neighboor_count = neighboor_gids_vdata.size()[0]
+            edge_indice[i] = torch.cat(
+                [
+                    torch.reshape(neighbor_raw_to_unique_mapping, (1, neighboor_count)),
+                    torch.reshape(neighboor_src_lids, (1, neighboor_count)),
+                ]
+            )
+            target_gids[i] = unique_gids
+        return (
+            target_gids,
+            edge_indice,
+            csr_row_ptr,
+            csr_col_ind,
+            sample_dup_count,
+            edge_types,
+        )
+
+    def temporal_sample(
+        self,
+        node_ids,
+        query_time,
+        max_neighbors,
+        csr_time,
+        window: float = -1.0,
+        include_query_time: bool = False,
+        most_recent: bool = False,
+    ):
+        """
+        Multi-hop temporal sampling, each hop samples up to max_neighbors[hop] neighbors
+        whose edge time is inside the window before the query time.
+        Sampled nodes inherit the query time of their target, a node reached at several
+        times is kept once for each time, see append_unique_temporal.
+        :param node_ids: seed node ids.
+        :param query_time: query time of each seed.
+        :param max_neighbors: fanout of each hop, starting from the seeds.
+        :param csr_time: edge time with same layout as edges_csr_col, sorted in each row.
+        :param window: window length, negative for no lower bound.
+        :param include_query_time: whether edges at query time are candidates.
+        :param most_recent: sample latest edges instead of uniformly.
+        :return: target_gids, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count as
+            unweighted_sample_without_replacement, and target_times of each layer.
+        """
+        hops = len(max_neighbors)
+        sample_dup_count = [None] * hops
+        edge_indice = [None] * hops
+        csr_row_ptr = [None] * hops
+        csr_col_ind = [None] * hops
+        target_gids = [None] * (hops + 1)
+        target_times = [None] * (hops + 1)
+        target_gids[hops] = node_ids
+        target_times[hops] = query_time
+        for i in range(hops - 1, -1, -1):
+            (
+                neighboor_gids_offset,
+                neighboor_gids_vdata,
+                neighboor_src_lids,
+                _,
+            ) = temporal_sample_single_layer(
+                target_gids[i + 1],
+                target_times[i + 1],
+                self.edges_csr_row,
+                self.edges_csr_col,
+                csr_time,
+                max_neighbors[hops - i - 1],
+                window,
+                include_query_time,
+                most_recent,
+            )
+            (
+                unique_gids,
+                unique_times,
+                neighbor_raw_to_unique_mapping,
+                unique_output_neighbor_count,
+            ) = append_unique_temporal(
+                target_gids[i + 1],
+                target_times[i + 1],
+                neighboor_gids_vdata,
+                target_times[i + 1][neighboor_src_lids.long()],
+            )
+            csr_row_ptr[i] = neighboor_gids_offset
+            csr_col_ind[i] = neighbor_raw_to_unique_mapping
+            sample_dup_count[i] = unique_output_neighbor_count
+            neighboor_count = neighboor_gids_vdata.size()[0]
+            edge_indice[i] = torch.cat(
+                [
+                    torch.reshape(neighbor_raw_to_unique_mapping, (1, neighboor_count)),
+                    torch.reshape(neighboor_src_lids, (1, neighboor_count)),
+                ]
+            )
+            target_gids[i] = unique_gids
+            target_times[i] = unique_times
+        return (
+            target_gids,
+            edge_indice,
+            csr_row_ptr,
+            csr_col_ind,
+            sample_dup_count,
+            target_times,
+        )
+
     def weighted_sample_without_replacement(
         self,
         node_ids,
@@ -719,6 +1656,8 @@ class HomoGraph(object):
         csr_weight: Union[torch.Tensor, wg.ChunkedTensor],
         csr_local_sorted_map_indices: Union[torch.Tensor, wg.ChunkedTensor] = None,
         exclude_edge_hashset=None,
+        mode: WeightedSampleMode = WeightedSampleMode.TOPK,
+        csr_alias_table=None,
     ):
         if type(csr_weight) != type(self.edges_csr_col):
             raise TypeError(
@@ -745,6 +1684,8 @@ class HomoGraph(object):
                 csr_weight,
                 max_neighbors[hops - i - 1],
                 csr_local_sorted_map_indices,
+                mode,
+                csr_alias_table,
             )
             if exclude_edge_hashset is not None:
                 (
@@ -777,9 +1718,43 @@ class HomoGraph(object):
             target_gids[i] = unique_gids
         return target_gids, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count
 
+    def random_walk(
+        self,
+        node_ids: torch.Tensor,
+        walk_length: int,
+        p: float = 1.0,
+        q: float = 1.0,
+        csr_alias_table=None,
+    ):
+        return random_walk(
+            node_ids,
+            self.edges_csr_row,
+            self.edges_csr_col,
+            walk_length,
+            p,
+            q,
+            csr_alias_table,
+        )
+
+    def build_degree_alias_table(self, power: float = 0.75):
+        self.degree_alias_table = build_degree_alias_table(self.edges_csr_row, power)
+
     def per_source_negative_sample(
-        self, src_nodes: torch.Tensor, negative_sample_count=1
+        self,
+        src_nodes: torch.Tensor,
+        negative_sample_count=1,
+        mode: NegativeSampleMode = NegativeSampleMode.UNIFORM,
     ):
+        if mode == NegativeSampleMode.DEGREE:
+            if self.degree_alias_table is None:
+                self.build_degree_alias_table()
+            return degree_alias_per_source_negative_sample(
+                src_nodes,
+                self.edges_csr_row,
+                self.edges_csr_col,
+                negative_sample_count,
+                self.degree_alias_table,
+            )
         is_chunked = isinstance(self.edges_csr_row, wg.ChunkedTensor)
         if is_chunked:
             return torch.ops.wholegraph.per_source_uniform_negative_sample_chunked(
@@ -798,6 +1773,33 @@ class HomoGraph(object):
                 negative_sample_count,
             )
 
+    def batch_shared_negative_sample(
+        self,
+        negative_sample_count: int,
+        mode: NegativeSampleMode = NegativeSampleMode.UNIFORM,
+    ):
+        """
+        Draw one pool of negatives shared by all sources of a batch, so only
+        negative_sample_count rows are gathered instead of one set per source, each
+        source should be scored against all of them.
+        :param negative_sample_count: pool size.
+        :param mode: distribution of negatives.
+        :return: node ids of the pool.
+        """
+        if mode == NegativeSampleMode.DEGREE:
+            if self.degree_alias_table is None:
+                self.build_degree_alias_table()
+            return degree_alias_negative_sample(
+                negative_sample_count, self.degree_alias_table, self.id_type()
+            )
+        return torch.randint(
+            0,
+            self.node_count,
+            (negative_sample_count,),
+            dtype=self.id_type(),
+            device="cuda",
+        )
+
     def create_edges_jump_coo_row(self):
         # jump coo is tensor of ((edge_count)//jump_size, ), each is a src nodeid of edge jump_size * idx
         if self.is_chunked:
@@ -815,41 +1817,39 @@ class HomoGraph(object):
             self.edge_count * (comm.get_rank() + 1) // comm.get_world_size()
         )
         self.truncate_count = self.edge_count // comm.get_world_size()
-
-    def start_iter(self, batch_size):
-        backup = torch.random.get_rng_state()
-        torch.random.manual_seed(0x76540123)
+        self.train_epoch = 0
+
+    def start_iter(self, batch_size, epoch: Union[int, None] = None):
+        """
+        Start one epoch over train edges. The edge order is a keyed permutation of all
+        edges, each rank iterates its own range of it, and edge ids of each batch are
+        computed on demand by get_train_edge_batch, so no permutation is stored.
+        :param batch_size: edge count of each batch.
+        :param epoch: epoch id keying the edge order, default is the count of calls.
+        :return: batch count of this rank.
+        """
+        if epoch is None:
+            epoch = self.train_epoch
+        self.train_epoch = epoch + 1
         self.batch_size = batch_size
-        local_edge_count = self.end_edge_idx - self.start_edge_idx
+        self.train_edge_round_keys = get_feistel_round_keys(0x76540123, epoch)
         selected_count = self.truncate_count // batch_size * batch_size
-        if os.path.exists(self.save_dir + "/global_train_edge_idx_rand"):
-            print("loading train edge idx from disk")
-            self.train_edge_idx_list = torch.load(self.save_dir + "/global_train_edge_idx_rand", map_location=torch.device('cpu'))
-            print("loading train edge idx from disk done")
-            print(self.train_edge_idx_list[0:100])
-        else:
-            print("generating train edge idx")
-            self.train_edge_idx_list = (
-                torch.randperm(
-                    self.edge_count, dtype=torch.int64, device="cpu", pin_memory=True
-                )
-            )
-            print("generating train edge idx done, saving to disk")
-            torch.save(self.train_edge_idx_list, self.save_dir + "/global_train_edge_idx_rand")
-            print("saved train edge idx to disk")
-        torch.random.set_rng_state(backup)
-        self.train_edge_idx_list = self.train_edge_idx_list[self.start_edge_idx:self.end_edge_idx].pin_memory()
         return selected_count // batch_size
 
     def get_train_edge_batch(self, iter_id):
-        start_idx = iter_id * self.batch_size
-        end_idx = (iter_id + 1) * self.batch_size
+        start_idx = self.start_edge_idx + iter_id * self.batch_size
+        end_idx = start_idx + self.batch_size
+        train_edge_idx = feistel_permute(
+            torch.arange(start_idx, end_idx, dtype=torch.int64, device="cuda"),
+            self.edge_count,
+            self.train_edge_round_keys,
+        )
         if self.is_chunked:
             src_nid, dst_nid = wg.get_edge_src_dst_from_eid_chunked(
                 self.edges_csr_row,
                 self.edges_csr_col,
                 self.edges_jump_coo_row,
-                self.train_edge_idx_list[start_idx:end_idx].cuda(),
+                train_edge_idx,
                 True,
                 True,
             )
@@ -858,18 +1858,20 @@ class HomoGraph(object):
                 self.edges_csr_row,
                 self.edges_csr_col,
                 self.edges_jump_coo_row,
-                self.train_edge_idx_list[start_idx:end_idx].cuda(),
+                train_edge_idx,
                 True,
                 True,
             )
         return src_nid, dst_nid
 
-    def gather(self, node_ids, dtype: Union[torch.dtype, None] = None):
-        if dtype is None:
+    def gather(
+        self, node_ids, dtype: Union[torch.dtype, None] = None, dedup: bool = False
+    ):
+        if dtype is None and not dedup:
             return embedding_ops.EmbeddingLookupFn.apply(node_ids, self.node_feat)
         else:
             return embedding_ops.EmbeddingLookupFn.apply(
-                node_ids, self.node_feat, None, dtype
+                node_ids, self.node_feat, None, dtype, dedup
             )
 
 
@@ -1086,6 +2088,8 @@ def load_homo_graph_model_state(
             part_count,
             graph.wm_comm,
         )
+    if graph.node_feat.tiered is not None:
+        graph.node_feat.tiered.refresh()
     torch.distributed.barrier()
 
 
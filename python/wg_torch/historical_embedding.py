@@ -0,0 +1,180 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# historical embeddings of hidden layers for sampled training
+
+import torch
+from wg_torch import embedding_ops as embedding_ops
+from wg_torch import graph_ops as graph_ops
+from wg_torch import inference as inference
+from wg_torch.wm_tensor import *
+
+from wholegraph.torch import wholegraph_pytorch as wg
+
+
+class HistoricalEmbedding(object):
+    """
+    Historical embeddings of hidden layers stored in WholeMemory.
+    Output of hidden layer i for in-batch nodes is pushed after each forward, and read
+    back for out-of-batch neighbors instead of recomputing them from raw features, so
+    only the inner hop needs to be expanded.
+    Each row records the step it was written at. Rows older than max_staleness steps,
+    or never written, are not fresh. All rows are recomputed by layer-wise full graph
+    inference before the first step and every refresh_interval steps.
+    """
+
+    def __init__(
+        self,
+        wm_comm,
+        node_count: int,
+        layer_dims: list,
+        dtype: torch.dtype = torch.float32,
+        chunked: bool = True,
+        use_host_memory: bool = False,
+        max_staleness: int = -1,
+        refresh_interval: int = 0,
+    ):
+        """
+        :param wm_comm: WholeMemory communicator.
+        :param node_count: node count of the graph.
+        :param layer_dims: output dim of each hidden layer.
+        :param dtype: data type of stored embeddings.
+        :param chunked: whether to use chunked WholeMemory.
+        :param use_host_memory: whether to use host memory, only for non-chunked.
+        :param max_staleness: max steps a row is used after written, -1 for no bound.
+        :param refresh_interval: steps between full refreshes, 0 to only refresh once
+            before the first step.
+        """
+        self.wm_comm = wm_comm
+        self.node_count = node_count
+        self.layer_dims = layer_dims
+        self.dtype = dtype
+        self.max_staleness = max_staleness
+        self.refresh_interval = refresh_interval
+        self.current_step = 0
+        self.last_refresh_step = -1
+        wm_tensor_type = get_intra_node_wm_tensor_type(chunked, use_host_memory)
+        self.embeddings = []
+        self.versions = []
+        for layer_dim in layer_dims:
+            self.embeddings.append(
+                create_wm_tensor(
+                    wm_comm, [node_count, layer_dim], [], dtype, wm_tensor_type
+                )
+            )
+            version = create_wm_tensor(
+                wm_comm, [node_count, 1], [], torch.int32, wm_tensor_type
+            )
+            get_local_tensor(version).fill_(-1)
+            self.versions.append(version)
+        torch.cuda.synchronize()
+        wg.barrier(wm_comm)
+
+    def advance(self):
+        self.current_step += 1
+
+    def pull(self, layer: int, ids: torch.Tensor):
+        """
+        Read historical output of hidden layer of ids.
+        :param layer: hidden layer index.
+        :param ids: node ids.
+        :return: embeddings and bool mask of fresh rows.
+        """
+        emb = embedding_ops.embedding_lookup_nograd_common(self.embeddings[layer], ids)
+        version = embedding_ops.embedding_lookup_nograd_common(
+            self.versions[layer], ids
+        ).view(-1)
+        fresh_mask = version >= 0
+        if self.max_staleness >= 0:
+            fresh_mask = torch.logical_and(
+                fresh_mask, self.current_step - version <= self.max_staleness
+            )
+        return emb, fresh_mask
+
+    def push(self, layer: int, ids: torch.Tensor, emb: torch.Tensor):
+        """
+        Write output of hidden layer of ids, ids should be unique.
+        :param layer: hidden layer index.
+        :param ids: node ids.
+        :param emb: embeddings of ids.
+        """
+        embedding_ops.scatter_nograd(
+            emb.detach().to(self.dtype), ids, self.embeddings[layer]
+        )
+        version = torch.full(
+            (ids.numel(), 1), self.current_step, dtype=torch.int32, device=ids.device
+        )
+        embedding_ops.scatter_nograd(version, ids, self.versions[layer])
+
+    def need_refresh(self):
+        # refresh once before the first step, so out-of-batch neighbors are fresh.
+        if self.last_refresh_step < 0:
+            return True
+        if self.refresh_interval <= 0:
+            return False
+        return self.current_step - self.last_refresh_step >= self.refresh_interval
+
+    def refresh(
+        self,
+        graph: graph_ops.HomoGraph,
+        layer_fn,
+        batch_size: int = 1024,
+    ):
+        """
+        Recompute all hidden layers of all nodes by layer-wise full graph inference.
+        All ranks in wm_comm should call this function.
+        :param graph: the graph
+        :param layer_fn: forward function of one layer, same as layerwise_inference.
+        :param batch_size: target node count of each batch.
+        """
+        inference.layerwise_inference(
+            graph,
+            layer_fn,
+            self.layer_dims,
+            batch_size=batch_size,
+            output_feats=self.embeddings,
+        )
+        for version in self.versions:
+            get_local_tensor(version).fill_(self.current_step)
+        torch.cuda.synchronize()
+        wg.barrier(self.wm_comm)
+        self.last_refresh_step = self.current_step
+
+
+def drop_stale_neighbor_edges(
+    edge_indice: torch.Tensor,
+    csr_row_ptr: torch.Tensor,
+    csr_col_ind: torch.Tensor,
+    fresh_mask: torch.Tensor,
+):
+    """
+    Remove edges from neighbors whose historical embeddings are not fresh.
+    :param edge_indice: edge indice of the sub graph.
+    :param csr_row_ptr: CSR row pointer of the sub graph.
+    :param csr_col_ind: CSR column index of the sub graph, local ids of neighbors.
+    :param fresh_mask: bool mask of each local id, targets should be fresh.
+    :return: edge_indice, csr_row_ptr, csr_col_ind and sample_dup_count of kept edges.
+    """
+    keep_mask = fresh_mask[csr_col_ind.long()]
+    keep_count = torch.cat(
+        [
+            torch.zeros(1, dtype=torch.int64, device=keep_mask.device),
+            torch.cumsum(keep_mask, 0),
+        ]
+    )
+    csr_row_ptr = keep_count[csr_row_ptr.long()].to(csr_row_ptr.dtype)
+    csr_col_ind = csr_col_ind[keep_mask]
+    sample_dup_count = torch.bincount(
+        csr_col_ind.long(), minlength=fresh_mask.numel()
+    ).to(torch.int32)
+    return edge_indice[:, keep_mask], csr_row_ptr, csr_col_ind, sample_dup_count
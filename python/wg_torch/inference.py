@@ -0,0 +1,172 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# offline layer-wise full graph inference
+
+from typing import Union
+
+import torch
+from wg_torch import embedding_ops as embedding_ops
+from wg_torch import graph_ops as graph_ops
+from wg_torch.wm_tensor import *
+
+from wholegraph.torch import wholegraph_pytorch as wg
+
+
+def get_rank_node_range(graph: graph_ops.HomoGraph):
+    """
+    Get the node range [start, end) this rank computes in full graph inference.
+    """
+    rank = wg.get_rank(graph.wm_comm)
+    size = wg.get_size(graph.wm_comm)
+    start_node_id = graph.node_count * rank // size
+    end_node_id = graph.node_count * (rank + 1) // size
+    return start_node_id, end_node_id
+
+
+def full_neighbor_sub_graph(graph: graph_ops.HomoGraph, target_ids: torch.Tensor):
+    """
+    Build the one hop sub graph of target_ids with all their neighbors.
+    :param graph: the graph
+    :param target_ids: target node ids
+    :return: target_gid, edge_indice, csr_row_ptr, csr_col_ind, sample_dup_count, in
+        the same layout as one layer of HomoGraph sampling outputs. target_gid starts
+        with target_ids followed by their unique neighbors.
+    """
+    (
+        neighboor_gids_offset,
+        neighboor_gids_vdata,
+        neighboor_src_lids,
+    ) = graph_ops.unweighted_sample_without_replacement_single_layer(
+        target_ids, graph.edges_csr_row, graph.edges_csr_col, -1
+    )
+    (
+        unique_gids,
+        neighbor_raw_to_unique_mapping,
+        unique_output_neighbor_count,
+    ) = torch.ops.wholegraph.append_unique(target_ids, neighboor_gids_vdata)
+    neighboor_count = neighboor_gids_vdata.size()[0]
+    edge_indice = torch.cat(
+        [
+            torch.reshape(neighbor_raw_to_unique_mapping, (1, neighboor_count)),
+            torch.reshape(neighboor_src_lids, (1, neighboor_count)),
+        ]
+    )
+    return (
+        unique_gids,
+        edge_indice,
+        neighboor_gids_offset,
+        neighbor_raw_to_unique_mapping,
+        unique_output_neighbor_count,
+    )
+
+
+@torch.no_grad()
+def layerwise_inference(
+    graph: graph_ops.HomoGraph,
+    layer_fn,
+    layer_dims: list,
+    input_feat: Union[
+        torch.Tensor, wg.ChunkedTensor, embedding_ops.TrainableEmbedding, None
+    ] = None,
+    batch_size: int = 1024,
+    dtype: Union[torch.dtype, None] = None,
+    chunked: Union[bool, None] = None,
+    use_host_memory: Union[bool, None] = None,
+    output_feats: Union[list, None] = None,
+):
+    """
+    Offline full graph inference, computed layer by layer instead of sample by sample.
+    Layer i is computed for all nodes of the graph using all neighbors, in batches of
+    batch_size target nodes, and stored into a WholeMemory tensor which is the input of
+    layer i + 1. So each node embedding of each layer is computed exactly once, and no
+    neighborhood explosion happens. Each rank computes its own node range, all ranks
+    in graph.wm_comm should call this function.
+    :param graph: the graph
+    :param layer_fn: forward function of one layer, called as
+        layer_fn(i, x_feat, x_target_feat, target_gid, target_gid_1, edge_indice,
+        csr_row_ptr, csr_col_ind, sample_dup_count), and should return the 2D output
+        of layer i for target_gid_1, including the activation if any.
+    :param layer_dims: output dim of each layer.
+    :param input_feat: input of layer 0, default is graph.node_feat.
+    :param batch_size: target node count of each batch.
+    :param dtype: data type of layer outputs, default is the dtype of input_feat.
+    :param chunked: whether to use chunked WholeMemory for layer outputs, default is
+        the same as graph.
+    :param use_host_memory: whether to use host memory for layer outputs, default is
+        the same as graph.
+    :param output_feats: optional WholeMemory tensors to store the output of each layer
+        in, None or None elements to create new ones.
+    :return: WholeMemory tensor of last layer output of all nodes.
+    """
+    if input_feat is None:
+        input_feat = graph.node_feat
+    if dtype is None:
+        dtype = input_feat.dtype
+    if chunked is None:
+        chunked = graph.is_chunked
+    if use_host_memory is None:
+        use_host_memory = graph.use_host_memory
+    wm_tensor_type = get_intra_node_wm_tensor_type(chunked, use_host_memory)
+    start_node_id, end_node_id = get_rank_node_range(graph)
+    embedding_lookup_fn = embedding_ops.EmbeddingLookupFn.apply
+    for i in range(len(layer_dims)):
+        if output_feats is not None and output_feats[i] is not None:
+            output_feat = output_feats[i]
+            assert output_feat.shape[1] == layer_dims[i]
+        else:
+            output_feat = create_wm_tensor(
+                graph.wm_comm,
+                [graph.node_count, layer_dims[i]],
+                [],
+                dtype,
+                wm_tensor_type,
+            )
+        for batch_start_node_id in range(start_node_id, end_node_id, batch_size):
+            batch_end_node_id = min(batch_start_node_id + batch_size, end_node_id)
+            target_ids = torch.arange(
+                batch_start_node_id,
+                batch_end_node_id,
+                dtype=graph.edges_csr_col.dtype,
+                device="cuda",
+            )
+            (
+                target_gid,
+                edge_indice,
+                csr_row_ptr,
+                csr_col_ind,
+                sample_dup_count,
+            ) = full_neighbor_sub_graph(graph, target_ids)
+            x_feat = embedding_lookup_fn(target_gid, input_feat)
+            x_target_feat = x_feat[: target_ids.numel()]
+            x_feat = layer_fn(
+                i,
+                x_feat,
+                x_target_feat,
+                target_gid,
+                target_ids,
+                edge_indice,
+                csr_row_ptr,
+                csr_col_ind,
+                sample_dup_count,
+            )
+            assert x_feat.dim() == 2 and x_feat.shape[1] == layer_dims[i]
+            embedding_ops.embedding_2d_sub_tensor_assign(
+                x_feat.to(output_feat.dtype), output_feat, batch_start_node_id
+            )
+        torch.cuda.synchronize()
+        wg.barrier(graph.wm_comm)
+        # output of layer i - 1 is no longer referenced and freed here.
+        input_feat = output_feat
+        del output_feat
+    return input_feat
@@ -11,11 +11,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 from enum import Enum
 from typing import Union
 
+import numpy as np
 import torch
 import torch.distributed as dist
+from wg_torch.compressed_file import (
+    get_compressed_file_list,
+    load_local_tensor_from_compressed_files,
+    stat_compressed_file_list_element_count,
+)
 
 from wholegraph.torch import wholegraph_pytorch as wg
 
@@ -195,6 +202,27 @@ def create_wm_tensor_from_file(
     wm_tensor_type: WmTensorType = WmTensorType.CHUNKED,
     part_count: int = 0,
 ):
+    compressed_file_list = get_compressed_file_list(filename)
+    if len(compressed_file_list) > 0:
+        file_elt_count = stat_compressed_file_list_element_count(
+            compressed_file_list, dtype
+        )
+        if len(shape) != 0:
+            assert np.prod(shape) == file_elt_count
+        else:
+            shape = (file_elt_count,)
+        wmt = create_wm_tensor(wm_comm, shape, [], dtype, wm_tensor_type)
+        load_local_tensor_from_compressed_files(
+            get_local_tensor(wmt), compressed_file_list, wm_comm
+        )
+        return wmt
+    world_size = wg.get_size(wm_comm)
+    if all(
+        os.path.isfile("%s_part_%d_of_%d" % (filename, i, world_size))
+        for i in range(world_size)
+    ):
+        # rank aligned part files, each rank reads only its own file if local sizes match.
+        part_count = world_size
     file_elt_count = wg.stat_filelist_element_count(filename, dtype)
     if len(shape) != 0:
         shape_count = 1
@@ -0,0 +1,76 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import torch
+from wg_torch import cluster_sampler as cluster_sampler
+
+
+def create_random_symmetric_csr_graph(num_nodes: int, num_edges: int):
+    src = torch.randint(0, num_nodes, (num_edges,))
+    dst = torch.randint(0, num_nodes, (num_edges,))
+    key = torch.unique(
+        torch.cat([src * num_nodes + dst, dst * num_nodes + src]), sorted=True
+    )
+    row_ids, csr_col_ind = key // num_nodes, key % num_nodes
+    csr_row_ptr = torch.zeros(num_nodes + 1, dtype=torch.int64)
+    csr_row_ptr[1:] = torch.cumsum(torch.bincount(row_ids, minlength=num_nodes), 0)
+    return csr_row_ptr, csr_col_ind
+
+
+def get_sorted_edge_keys(csr_row_ptr: torch.Tensor, csr_col_ind: torch.Tensor):
+    node_count = csr_row_ptr.numel() - 1
+    row_ids = cluster_sampler.get_csr_row_ids(csr_row_ptr)
+    key, _ = torch.sort(row_ids * node_count + csr_col_ind.long())
+    return key
+
+
+def test_cluster_reorder(
+    num_nodes: int, num_edges: int, cluster_count: int, imbalance: float
+):
+    csr_row_ptr, csr_col_ind = create_random_symmetric_csr_graph(num_nodes, num_edges)
+    labels = cluster_sampler.label_propagation_partition(
+        csr_row_ptr, csr_col_ind, cluster_count, imbalance=imbalance
+    )
+    assert labels.shape == (num_nodes,)
+    assert labels.min() >= 0 and labels.max() < cluster_count
+    max_cluster_size = int((1.0 + imbalance) * num_nodes / cluster_count) + 1
+    assert torch.bincount(labels, minlength=cluster_count).max() <= max_cluster_size
+
+    perm, cluster_ptr = cluster_sampler.get_cluster_permutation(labels, cluster_count)
+    # perm is a permutation that places each cluster in its id range.
+    assert torch.equal(torch.sort(perm)[0], torch.arange(num_nodes))
+    assert cluster_ptr[0] == 0 and cluster_ptr[-1] == num_nodes
+    for c in range(cluster_count):
+        assert torch.all(labels[perm[cluster_ptr[c] : cluster_ptr[c + 1]]] == c)
+
+    new_csr_row_ptr, new_csr_col_ind, edge_perm = cluster_sampler.reorder_csr(
+        csr_row_ptr, csr_col_ind, perm
+    )
+    assert new_csr_col_ind.dtype == csr_col_ind.dtype
+    assert torch.equal(torch.sort(edge_perm)[0], torch.arange(csr_col_ind.numel()))
+    # mapping new ids back through perm gives exactly the original edges.
+    new_row_ids = cluster_sampler.get_csr_row_ids(new_csr_row_ptr)
+    assert torch.equal(
+        perm[new_row_ids], cluster_sampler.get_csr_row_ids(csr_row_ptr)[edge_perm]
+    )
+    assert torch.equal(perm[new_csr_col_ind], csr_col_ind[edge_perm])
+    old_key, _ = torch.sort(
+        perm[new_row_ids] * num_nodes + perm[new_csr_col_ind].long()
+    )
+    assert torch.equal(old_key, get_sorted_edge_keys(csr_row_ptr, csr_col_ind))
+
+
+if __name__ == "__main__":
+    print("test_cluster_reorder : ")
+    test_cluster_reorder(1000, 5000, 16, 0.1)
+    test_cluster_reorder(777, 3000, 10, 0.5)
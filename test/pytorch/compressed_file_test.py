@@ -0,0 +1,117 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+import os
+import tempfile
+
+import numpy as np
+import torch
+from mpi4py import MPI
+from wg_torch import compressed_file as compressed_file
+from wg_torch.wm_tensor import *
+
+from wholegraph.torch import wholegraph_pytorch as wg
+
+
+def decode_compressed_file(filename: str):
+    codec, raw_size, block_size, block_index = (
+        compressed_file.read_compressed_file_header(filename)
+    )
+    raw = bytearray()
+    with open(filename, "rb") as f:
+        for block_idx, (offset, size) in enumerate(block_index.tolist()):
+            f.seek(offset)
+            block_raw_size = min(block_size, raw_size - block_idx * block_size)
+            raw += compressed_file._decompress_block(
+                codec, f.read(size), block_raw_size
+            )
+    assert len(raw) == raw_size
+    return codec, block_size, block_index, bytes(raw)
+
+
+def test_file_round_trip(save_dir: str, codec: str, block_size: int):
+    data = np.random.randint(0, 16, size=(1237, 7)).astype(np.float32)
+    filename = os.path.join(save_dir, "round_trip_%s.wgz" % (codec,))
+    compressed_file.write_compressed_file(data, filename, codec, block_size)
+    file_codec, file_block_size, block_index, raw = decode_compressed_file(filename)
+    assert file_codec == codec
+    assert file_block_size == block_size
+    assert block_index.shape[0] == (data.nbytes + block_size - 1) // block_size
+    # blocks are stored back to back after header and index.
+    offsets, sizes = block_index[:, 0], block_index[:, 1]
+    assert np.all(offsets[1:] == offsets[:-1] + sizes[:-1])
+    assert offsets[-1] + sizes[-1] == os.path.getsize(filename)
+    assert raw == data.tobytes()
+
+
+def test_load_part_files(save_dir: str, wm_comm, codec: str, block_size: int):
+    embedding_dim = 13
+    part_count = 3
+    data = np.arange(1001 * embedding_dim, dtype=np.float32).reshape(-1, embedding_dim)
+    file_prefix = os.path.join(save_dir, "load_%s" % (codec,))
+    part_rows = np.array_split(np.arange(data.shape[0]), part_count)
+    if wg.get_rank(wm_comm) == 0:
+        for i, rows in enumerate(part_rows):
+            compressed_file.write_compressed_file(
+                data[rows],
+                compressed_file.get_compressed_filename(
+                    "%s_part_%d_of_%d" % (file_prefix, i, part_count)
+                ),
+                codec,
+                block_size,
+            )
+    wg.barrier(wm_comm)
+    assert len(compressed_file.get_compressed_file_list(file_prefix)) == part_count
+    wmt = create_wm_tensor_from_file(
+        [data.shape[0], embedding_dim],
+        torch.float32,
+        wm_comm,
+        file_prefix,
+        WmTensorType.HOST,
+    )
+    local_tensor = get_local_tensor(wmt)
+    _, local_start = wg.aggregate_size(local_tensor.numel(), wm_comm)
+    expected = torch.from_numpy(data.reshape(-1))[
+        local_start : local_start + local_tensor.numel()
+    ]
+    assert torch.equal(local_tensor.cpu().reshape(-1), expected)
+    wg.barrier(wm_comm)
+    del wmt
+
+
+if __name__ == "__main__":
+    wg.init_lib()
+    comma = MPI.COMM_WORLD
+    os.environ["RANK"] = str(comma.Get_rank())
+    os.environ["WORLD_SIZE"] = str(comma.Get_size())
+    if "MASTER_ADDR" not in os.environ:
+        os.environ["MASTER_ADDR"] = "localhost"
+    if "MASTER_PORT" not in os.environ:
+        os.environ["MASTER_PORT"] = "12335"
+    torch.cuda.set_device(comma.Get_rank() % torch.cuda.device_count())
+    torch.distributed.init_process_group(backend="nccl", init_method="env://")
+    wm_comm = create_global_communicator(comma.Get_rank(), comma.Get_size())
+    codecs = [
+        codec
+        for codec, module in [("zstd", "zstandard"), ("lz4", "lz4")]
+        if importlib.util.find_spec(module) is not None
+    ]
+    save_dir = comma.bcast(tempfile.mkdtemp() if comma.Get_rank() == 0 else None)
+    for codec in codecs:
+        print("test_compressed_file %s : " % (codec,))
+        if comma.Get_rank() == 0:
+            test_file_round_trip(save_dir, codec, 1000)
+            test_file_round_trip(save_dir, codec, 1 << 20)
+        test_load_part_files(save_dir, wm_comm, codec, 1000)
+    wg.finalize_lib()
@@ -0,0 +1,46 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import torch
+from wg_torch import graph_ops as graph_ops
+
+
+def test_feistel_permute(count: int, seed: int, epoch: int):
+    round_keys = graph_ops.get_feistel_round_keys(seed, epoch)
+    positions = torch.arange(count, dtype=torch.int64)
+    ids = graph_ops.feistel_permute(positions, count, round_keys)
+    # bijection over range(count).
+    assert ids.dtype == torch.int64
+    assert torch.equal(torch.sort(ids)[0], positions)
+    # same seed and epoch give the same permutation, also for part of the positions.
+    assert torch.equal(
+        graph_ops.feistel_permute(
+            positions, count, graph_ops.get_feistel_round_keys(seed, epoch)
+        ),
+        ids,
+    )
+    part = torch.randperm(count)[: (count + 1) // 2]
+    assert torch.equal(graph_ops.feistel_permute(part, count, round_keys), ids[part])
+    if count >= 100:
+        # another epoch gives another order.
+        other_ids = graph_ops.feistel_permute(
+            positions, count, graph_ops.get_feistel_round_keys(seed, epoch + 1)
+        )
+        assert not torch.equal(other_ids, ids)
+
+
+if __name__ == "__main__":
+    print("test_feistel_permute : ")
+    for count in [1, 2, 3, 7, 100, 1000, 4097, 12345, 65537]:
+        test_feistel_permute(count, 12345, 0)
+        test_feistel_permute(count, 7, 3)
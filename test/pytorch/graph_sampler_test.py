@@ -16,6 +16,8 @@ from typing import Tuple
 
 import numpy as np
 import torch
+from wg_torch import graph_ops as graph_ops
+
 from wholegraph.torch import wholegraph_pytorch as wg
 
 
@@ -62,6 +64,14 @@ def gen_hist_with_lambda(max_iter, neighbor_count, sample_fun):
     return hist
 
 
+def gen_hist_with_replacement_with_lambda(max_iter, neighbor_count, sample_fun):
+    hist = torch.zeros(neighbor_count).cuda()
+    for iter in range(max_iter):
+        sample = sample_fun()
+        hist += torch.bincount(sample, minlength=neighbor_count)
+    return hist
+
+
 def cal_cdf_from_hist(hist: torch.Tensor) -> torch.Tensor:
     prefix_sum: torch.Tensor = hist.cumsum(dim=0)
     cdf = prefix_sum / prefix_sum[-1]
@@ -141,6 +151,97 @@ def test_single_weighted_sample_without_replacement_with_random_weight(
     check_two_sample_hist(max_iter, expect_hist, actual_hist)
 
 
+def test_single_alias_weighted_sample_with_random_weight(
+    max_sample_count, neighbor_count, max_iter, with_replacement
+):
+    (
+        input_nodes,
+        csr_row_ptr,
+        csr_col_ind,
+        csr_weight_ptr,
+    ) = gen_input_of_single_weighted_sampler_instance_with_random_weight(neighbor_count)
+    alias_prob = torch.empty_like(csr_weight_ptr)
+    alias_idx = torch.empty(neighbor_count, dtype=torch.int32).cuda()
+    torch.ops.wholegraph.build_alias_table(
+        csr_row_ptr, csr_weight_ptr, alias_prob, alias_idx, 0, 1
+    )
+    expect_fun = lambda: torch.multinomial(
+        csr_weight_ptr, num_samples=max_sample_count, replacement=with_replacement
+    )
+    actual_fun = lambda: torch.ops.wholegraph.alias_weighted_sample(
+        input_nodes,
+        csr_row_ptr,
+        csr_col_ind,
+        alias_prob,
+        alias_idx,
+        max_sample_count,
+        with_replacement,
+    )[1]
+    gen_hist = (
+        gen_hist_with_replacement_with_lambda
+        if with_replacement
+        else gen_hist_with_lambda
+    )
+    expect_hist = gen_hist(max_iter, neighbor_count, expect_fun)
+    actual_hist = gen_hist(max_iter, neighbor_count, actual_fun)
+    check_two_sample_hist(max_iter, expect_hist, actual_hist)
+
+
+def test_unweighted_sample_with_replacement(max_sample_count, neighbor_count, max_iter):
+    (
+        input_nodes,
+        csr_row_ptr,
+        csr_col_ind,
+    ) = gen_input_of_single_unweighted_sampler_instance(neighbor_count)
+    expect_fun = lambda: torch.randint(
+        0, neighbor_count, (max_sample_count,), device="cuda"
+    )
+    actual_fun = lambda: torch.ops.wholegraph.unweighted_sample_with_replacement(
+        input_nodes, csr_row_ptr, csr_col_ind, max_sample_count
+    )[1]
+    expect_hist = gen_hist_with_replacement_with_lambda(
+        max_iter, neighbor_count, expect_fun
+    )
+    actual_hist = gen_hist_with_replacement_with_lambda(
+        max_iter, neighbor_count, actual_fun
+    )
+    check_two_sample_hist(max_iter, expect_hist, actual_hist)
+
+
+def test_random_node_csr_unweighted_sample_with_replacement(
+    max_sample_count, num_nodes: int, num_edges: int
+):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        target_nodes,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, num_nodes)
+    degree = csr_row_ptr[1:] - csr_row_ptr[:-1]
+    # sparse enough that some targets have no neighbors.
+    assert torch.any(degree[target_nodes] == 0)
+    (
+        sample_offset,
+        sample_output,
+        center_localid,
+    ) = torch.ops.wholegraph.unweighted_sample_with_replacement(
+        target_nodes, csr_row_ptr, csr_col_ind, max_sample_count
+    )
+    expected_count = torch.where(degree[target_nodes] > 0, max_sample_count, 0)
+    assert torch.equal((sample_offset[1:] - sample_offset[:-1]).long(), expected_count)
+    assert sample_output.size(0) == sample_offset[-1].item()
+    assert torch.equal(
+        center_localid.long(),
+        torch.repeat_interleave(
+            torch.arange(target_nodes.size(0), device="cuda"), expected_count
+        ),
+    )
+    adj = torch.zeros((num_nodes, num_nodes), dtype=torch.bool, device="cuda")
+    row_ids = torch.repeat_interleave(torch.arange(num_nodes, device="cuda"), degree)
+    adj[row_ids, csr_col_ind] = True
+    assert torch.all(adj[target_nodes[center_localid.long()], sample_output])
+
+
 def create_random_csr_graph_and_target_nodes(
     num_nodes: int, num_edges: int, target_nodes_num: int
 ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
@@ -258,6 +359,286 @@ def test_random_node_csr_weighted_sample(
     )
 
 
+def test_layer_wise_importance_sample(
+    num_nodes: int, num_edges: int, target_nodes_num: int, layer_size: int, max_iter
+):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        target_nodes,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, target_nodes_num)
+    (
+        neighbor_offset,
+        neighbor_ids,
+        neighbor_src_lids,
+    ) = torch.ops.wholegraph.unweighted_sample_without_replacement(
+        target_nodes, csr_row_ptr, csr_col_ind, -1
+    )
+    candidates, candidate_idx = torch.unique(neighbor_ids, return_inverse=True)
+    assert candidates.size(0) > layer_size
+    degree = (neighbor_offset[1:] - neighbor_offset[:-1]).float()
+    importance = torch.zeros(candidates.size(0), device="cuda")
+    importance.scatter_add_(
+        0, candidate_idx, 1.0 / degree[neighbor_src_lids.long()] ** 2
+    )
+    q = importance / importance.sum()
+
+    def actual_fun():
+        (
+            sample_offset,
+            sample_ids,
+            sample_src_lids,
+            edge_weight,
+        ) = graph_ops.layer_wise_importance_sample_single_layer(
+            target_nodes, neighbor_offset, neighbor_ids, neighbor_src_lids, layer_size
+        )
+        sampled = torch.unique(sample_ids)
+        assert sampled.size(0) == layer_size
+        # all edges to sampled candidates are kept, in the original order.
+        kept = torch.isin(neighbor_ids, sampled)
+        assert torch.equal(sample_ids, neighbor_ids[kept])
+        assert torch.equal(sample_src_lids, neighbor_src_lids[kept])
+        assert sample_offset[-1].item() == sample_ids.size(0)
+        assert torch.allclose(edge_weight, 1.0 / (layer_size * q[candidate_idx[kept]]))
+        return torch.searchsorted(candidates, sampled)
+
+    expect_fun = lambda: torch.multinomial(importance, layer_size, replacement=False)
+    expect_hist = gen_hist_with_lambda(max_iter, candidates.size(0), expect_fun)
+    actual_hist = gen_hist_with_lambda(max_iter, candidates.size(0), actual_fun)
+    check_two_sample_hist(max_iter, expect_hist, actual_hist)
+
+
+def test_typed_sample_without_replacement(num_nodes: int, num_edges: int):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        target_nodes,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, num_nodes // 2)
+    edge_type_count = 4
+    fanouts = {0: 3, 1: -1, 3: 5}
+    edge_type = torch.randint(
+        0, edge_type_count, (csr_col_ind.size(0),), dtype=torch.int8, device="cuda"
+    )
+    (
+        sample_offset,
+        sample_output,
+        center_localid,
+        sample_edge_type,
+    ) = graph_ops.typed_sample_without_replacement_single_layer(
+        target_nodes, csr_row_ptr, csr_col_ind, edge_type, fanouts, edge_type_count
+    )
+    # every sampled edge exists and has the reported type.
+    type_matrix = torch.full(
+        (num_nodes, num_nodes), -1, dtype=torch.int8, device="cuda"
+    )
+    row_ids = torch.repeat_interleave(
+        torch.arange(num_nodes, device="cuda"), csr_row_ptr[1:] - csr_row_ptr[:-1]
+    )
+    type_matrix[row_ids, csr_col_ind] = edge_type
+    assert torch.equal(
+        type_matrix[target_nodes[center_localid.long()], sample_output],
+        sample_edge_type,
+    )
+    for i in range(target_nodes.size(0)):
+        start = csr_row_ptr[target_nodes[i]].item()
+        end = csr_row_ptr[target_nodes[i] + 1].item()
+        begin, stop = sample_offset[i].item(), sample_offset[i + 1].item()
+        assert torch.all(center_localid[begin:stop] == i)
+        types = sample_edge_type[begin:stop]
+        # samples are grouped by type, and neighbors are not repeated.
+        assert torch.all(types[1:] >= types[:-1])
+        assert sample_output[begin:stop].unique().size(0) == stop - begin
+        type_count = torch.bincount(
+            edge_type[start:end].long(), minlength=edge_type_count
+        )
+        sample_type_count = torch.bincount(types.long(), minlength=edge_type_count)
+        for t in range(edge_type_count):
+            fanout = fanouts.get(t, 0)
+            expected = type_count[t] if fanout < 0 else min(type_count[t], fanout)
+            assert sample_type_count[t] == expected
+
+
+def test_random_walk(num_nodes: int, num_edges: int, walk_length: int, p, q):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        csr_weight,
+        start_nodes,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, num_nodes)
+    adj = torch.zeros((num_nodes, num_nodes), dtype=torch.bool)
+    row_ids = torch.repeat_interleave(
+        torch.arange(num_nodes), (csr_row_ptr[1:] - csr_row_ptr[:-1]).cpu()
+    )
+    adj[row_ids, csr_col_ind.cpu()] = True
+    alias_prob = torch.empty_like(csr_weight)
+    alias_idx = torch.empty(csr_col_ind.size(0), dtype=torch.int32).cuda()
+    torch.ops.wholegraph.build_alias_table(
+        csr_row_ptr, csr_weight, alias_prob, alias_idx, 0, num_nodes
+    )
+    for alias_prob_t, alias_idx_t in [(None, None), (alias_prob, alias_idx)]:
+        for device in ["cuda", "cpu"]:
+            walks = torch.ops.wholegraph.random_walk(
+                start_nodes.to(device),
+                csr_row_ptr.to(device),
+                csr_col_ind.to(device),
+                None if alias_prob_t is None else alias_prob_t.to(device),
+                None if alias_idx_t is None else alias_idx_t.to(device),
+                walk_length,
+                p,
+                q,
+            ).cpu()
+            assert walks.shape == (start_nodes.size(0), walk_length + 1)
+            assert torch.equal(walks[:, 0], start_nodes.cpu())
+            src = walks[:, :-1].reshape(-1)
+            dst = walks[:, 1:].reshape(-1)
+            valid = dst >= 0
+            assert torch.all(adj[src[valid], dst[valid]])
+            # walks only stop at nodes without neighbors
+            stop = (src >= 0) & (dst < 0)
+            assert torch.all(~adj[src[stop]].any(dim=1))
+
+
+def test_temporal_sample(num_nodes: int, num_edges: int, max_sample_count, window):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        target_nodes,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, num_nodes // 2)
+    edge_time = torch.randint(0, 100, (csr_col_ind.size(0),), device="cuda")
+    row_ids = torch.repeat_interleave(
+        torch.arange(num_nodes, device="cuda"), csr_row_ptr[1:] - csr_row_ptr[:-1]
+    )
+    _, time_order = torch.sort(edge_time, stable=True)
+    _, row_order = torch.sort(row_ids[time_order], stable=True)
+    perm = time_order[row_order]
+    csr_col_ind, edge_time = csr_col_ind[perm], edge_time[perm]
+    query_time = torch.randint(0, 100, (target_nodes.size(0),), device="cuda")
+    for most_recent in [False, True]:
+        (
+            sample_offset,
+            sample_output,
+            center_localid,
+            sample_time,
+        ) = torch.ops.wholegraph.temporal_sample(
+            target_nodes,
+            query_time,
+            csr_row_ptr,
+            csr_col_ind,
+            edge_time,
+            max_sample_count,
+            float(window),
+            False,
+            most_recent,
+        )
+        for i in range(target_nodes.size(0)):
+            start = csr_row_ptr[target_nodes[i]].item()
+            end = csr_row_ptr[target_nodes[i] + 1].item()
+            t = edge_time[start:end]
+            in_window = (t < query_time[i]) & (t >= query_time[i] - window)
+            expected_count = min(in_window.sum().item(), max_sample_count)
+            begin, stop = sample_offset[i].item(), sample_offset[i + 1].item()
+            assert stop - begin == expected_count
+            assert torch.all(center_localid[begin:stop] == i)
+            times = sample_time[begin:stop]
+            assert torch.all(
+                (times < query_time[i]) & (times >= query_time[i] - window)
+            )
+            if most_recent and expected_count > 0:
+                assert torch.equal(times, t[in_window][-expected_count:])
+
+
+def test_temporal_sample_repeated_node(num_nodes: int, num_edges: int):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        _,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, 1)
+    edge_time = torch.randint(0, 100, (csr_col_ind.size(0),), device="cuda")
+    csr_col_ind, edge_time, _ = graph_ops.sort_csr_by_edge_time(
+        csr_row_ptr, csr_col_ind, edge_time
+    )
+    # the same node queried at an early and a late time.
+    node = torch.argmax(csr_row_ptr[1:] - csr_row_ptr[:-1])
+    target_nodes = torch.stack([node, node])
+    query_time = torch.tensor([30, 70], device="cuda")
+    (
+        sample_offset,
+        sample_output,
+        center_localid,
+        _,
+    ) = torch.ops.wholegraph.temporal_sample(
+        target_nodes,
+        query_time,
+        csr_row_ptr,
+        csr_col_ind,
+        edge_time,
+        -1,
+        -1.0,
+        False,
+        False,
+    )
+    neighbor_time = query_time[center_localid.long()]
+    (
+        unique_gids,
+        unique_times,
+        neighbor_raw_to_unique_mapping,
+        unique_output_neighbor_count,
+    ) = graph_ops.append_unique_temporal(
+        target_nodes, query_time, sample_output, neighbor_time
+    )
+    # both queries stay targets, and each neighbor keeps the time of its own query.
+    assert torch.equal(unique_gids[:2], target_nodes)
+    assert torch.equal(unique_times[:2], query_time)
+    mapping = neighbor_raw_to_unique_mapping.long()
+    assert torch.equal(unique_gids[mapping], sample_output)
+    assert torch.equal(unique_times[mapping], neighbor_time)
+    pairs = torch.stack([sample_output, neighbor_time])
+    expected_new_count = torch.unique(pairs, dim=1).size(1)
+    is_target = (sample_output == node) & (
+        (neighbor_time == query_time[0]) | (neighbor_time == query_time[1])
+    )
+    expected_new_count -= torch.unique(pairs[:, is_target], dim=1).size(1)
+    assert unique_gids.size(0) == 2 + expected_new_count
+    assert torch.equal(
+        unique_output_neighbor_count.long(),
+        torch.bincount(mapping, minlength=unique_gids.size(0)),
+    )
+
+
+def test_induced_subgraph(num_nodes: int, num_edges: int, node_count: int):
+    (
+        csr_row_ptr,
+        csr_col_ind,
+        _,
+        node_ids,
+    ) = create_random_csr_graph_and_target_nodes(num_nodes, num_edges, node_count)
+    node_ids = node_ids[torch.randperm(node_ids.size(0), device="cuda")]
+    (
+        sub_csr_row_ptr,
+        sub_csr_col_ind,
+        sub_edge_ids,
+    ) = torch.ops.wholegraph.extract_induced_subgraph(
+        node_ids, csr_row_ptr, csr_col_ind
+    )
+    local_id = torch.full((num_nodes,), -1, dtype=torch.int64, device="cuda")
+    local_id[node_ids] = torch.arange(node_ids.size(0), device="cuda")
+    for i in range(node_ids.size(0)):
+        start = csr_row_ptr[node_ids[i]].item()
+        end = csr_row_ptr[node_ids[i] + 1].item()
+        neighbor_local_id = local_id[csr_col_ind[start:end]]
+        in_set = neighbor_local_id >= 0
+        begin, stop = sub_csr_row_ptr[i].item(), sub_csr_row_ptr[i + 1].item()
+        assert torch.equal(
+            sub_csr_col_ind[begin:stop].long(), neighbor_local_id[in_set]
+        )
+        expected_edge_ids = torch.arange(start, end, device="cuda")[in_set]
+        assert torch.equal(sub_edge_ids[begin:stop], expected_edge_ids)
+
+
 if __name__ == "__main__":
     max_sample_count = 30
     neighbor_count = 1000
@@ -272,6 +653,35 @@ if __name__ == "__main__":
         max_sample_count, neighbor_count, max_iter
     )
 
+    print("test_alias_weighted_sample_with_random_weight : ")
+    test_single_alias_weighted_sample_with_random_weight(
+        max_sample_count, neighbor_count, max_iter, True
+    )
+    test_single_alias_weighted_sample_with_random_weight(
+        max_sample_count, neighbor_count, max_iter, False
+    )
+
+    print("test_unweighted_sample_with_replacement : ")
+    test_unweighted_sample_with_replacement(max_sample_count, neighbor_count, max_iter)
+    test_random_node_csr_unweighted_sample_with_replacement(max_sample_count, 1000, 500)
+
+    print("test_layer_wise_importance_sample : ")
+    test_layer_wise_importance_sample(1000, 20000, 64, 100, 1000)
+
+    print("test_typed_sample_without_replacement : ")
+    test_typed_sample_without_replacement(500, 20000)
+
+    print("test_temporal_sample : ")
+    test_temporal_sample(200, 8000, 10, 30)
+    test_temporal_sample_repeated_node(200, 8000)
+
+    print("test_induced_subgraph : ")
+    test_induced_subgraph(1000, 50000, 300)
+
+    print("test_random_walk : ")
+    test_random_walk(1000, 5000, 20, 1.0, 1.0)
+    test_random_walk(1000, 5000, 20, 0.5, 2.0)
+
     graph_num_nodes = 1000
     graph_num_edge = 200000
     target_nodes_num = 512
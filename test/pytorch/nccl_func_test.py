@@ -97,6 +97,32 @@ def test_gather_one_case(
         print("Not all close")
         raise AssertionError()
 
+    dedup_result = embedding_ops.EmbeddingLookupFn.apply(
+        sparse_indices, nccl_embedding, None, None, True
+    )
+    if not torch.allclose(target_gather_value, dedup_result):
+        print("Dedup not all close")
+        raise AssertionError()
+
+    column_range = (embedding_dim // 4, embedding_dim // 2)
+    range_result = embedding_ops.embedding_lookup_columns_nograd_common(
+        nccl_embedding, sparse_indices, column_range
+    )
+    target_range_value = target_gather_value[
+        :, column_range[0] : column_range[0] + column_range[1]
+    ]
+    if not torch.allclose(target_range_value, range_result):
+        print("Column range not all close")
+        raise AssertionError()
+
+    columns = torch.randperm(embedding_dim, device="cuda")[: embedding_dim // 3]
+    columns_result = embedding_ops.embedding_lookup_columns_nograd_common(
+        nccl_embedding, sparse_indices, columns
+    )
+    if not torch.allclose(target_gather_value[:, columns], columns_result):
+        print("Columns not all close")
+        raise AssertionError()
+
     wg.barrier(wm_comm)
 
     del nccl_embedding
@@ -209,12 +235,16 @@ def test_scatter(wm_comm):
 
 
 def test_exchange_embedding_grads_one_case(
-    wm_comm, entry_count: int, embedding_dim: int, grad_count: int
+    wm_comm,
+    entry_count: int,
+    embedding_dim: int,
+    grad_count: int,
+    wire_dtype=torch.float32,
 ):
     if comm.get_rank() == 0:
         print(
-            "  Testing Update Embedding (%d, %d) with gradient (%d, %d)..."
-            % (entry_count, embedding_dim, grad_count, embedding_dim)
+            "  Testing Update Embedding (%d, %d) with gradient (%d, %d) in %s..."
+            % (entry_count, embedding_dim, grad_count, embedding_dim, wire_dtype)
         )
     sparse_indices = torch.randint(0, entry_count, (grad_count,), device="cuda")
     sparse_grads = torch.randint(
@@ -224,8 +254,10 @@ def test_exchange_embedding_grads_one_case(
         local_sparse_indice,
         local_sparse_grad,
     ) = torch.ops.wholegraph.exchange_embedding_grads(
-        sparse_indices.int(), sparse_grads, entry_count, wm_comm
+        sparse_indices.int(), sparse_grads, entry_count, wm_comm, wire_dtype
     )
+    # small integers are exact in float16 and bfloat16, int8 is rounded by row scale.
+    sparse_grads = embedding_ops.round_grads_for_wire(sparse_grads, wire_dtype)
     sparse_indices_list = [
         torch.zeros_like(sparse_indices) for _ in range(comm.get_world_size())
     ]
@@ -264,7 +296,7 @@ def test_exchange_embedding_grads_one_case(
             % (ref_local_indice, local_sparse_indice)
         )
         raise AssertionError()
-    if not torch.allclose(local_sparse_grad, ref_local_grad):
+    if not torch.allclose(local_sparse_grad, ref_local_grad, atol=1e-3):
         print("Not all close")
         raise AssertionError()
     comm.synchronize()
@@ -282,10 +314,80 @@ def test_exchange_embedding_grads(wm_comm):
     test_exchange_embedding_grads_one_case(wm_comm, 100000, 127, 1234)
     test_exchange_embedding_grads_one_case(wm_comm, 100000, 129, 12345)
     test_exchange_embedding_grads_one_case(wm_comm, 1000000, 128, 32432)
+    test_exchange_embedding_grads_one_case(wm_comm, 100000, 127, 1234, torch.float16)
+    test_exchange_embedding_grads_one_case(wm_comm, 100000, 129, 1234, torch.bfloat16)
+    test_exchange_embedding_grads_one_case(wm_comm, 100000, 129, 12345, torch.int8)
+
+
+def test_grouped_gather_one_case(
+    wm_comm: int, entry_count: int, embedding_dim: int, gather_count: int
+):
+    if comm.get_rank() == 0:
+        print(
+            "  Testing Grouped Gathering %d vectors from Embedding (%d, %d)..."
+            % (gather_count, entry_count, embedding_dim)
+        )
+    table_specs = [
+        ([entry_count, embedding_dim], torch.float32),
+        ([entry_count], torch.int64),
+        ([entry_count, 3], torch.int8),
+        ([entry_count, embedding_dim + 1], torch.float16),
+    ]
+    nccl_tables = []
+    for shape, dtype in table_specs:
+        nccl_table = create_wm_tensor(
+            wm_comm,
+            shape,
+            strides=[],
+            tensor_dtype=dtype,
+            wm_tensor_type=WmTensorType.NCCL,
+        )
+        local_start, local_count, _, _ = get_partition_plan(wm_comm, entry_count)
+        local_table = get_local_tensor(nccl_table)
+        local_ids = torch.arange(local_start, local_start + local_count, device="cuda")
+        local_value = local_ids % 101 if dtype == torch.int8 else local_ids
+        if len(shape) == 2:
+            local_value = local_value.view(local_count, 1).expand(local_count, shape[1])
+        local_table.copy_(local_value.to(dtype))
+        nccl_tables.append(nccl_table)
+    torch.cuda.synchronize()
+
+    sparse_indices = torch.randint(
+        0, entry_count, (gather_count,), device="cuda", dtype=torch.int32
+    )
+    wg.barrier(wm_comm)
+    gather_results = embedding_ops.embedding_grouped_lookup_nograd_common(
+        nccl_tables, sparse_indices
+    )
+    for nccl_table, gather_result in zip(nccl_tables, gather_results):
+        target_value = torch.ops.wholegraph.gather_nccl(
+            sparse_indices, nccl_table.get_ptr()
+        )
+        if not torch.equal(target_value, gather_result):
+            print("Grouped gather of %s not equal" % (nccl_table.dtype,))
+            raise AssertionError()
+
+    wg.barrier(wm_comm)
+
+    del nccl_tables
+
+    if comm.get_rank() == 0:
+        print(
+            "  => Grouped Gathering %d vectors from Embedding (%d, %d) test passed."
+            % (gather_count, entry_count, embedding_dim)
+        )
+
+
+def test_grouped_gather(wm_comm):
+    if comm.get_rank() == 0:
+        print("Grouped gather testing...")
+    test_grouped_gather_one_case(wm_comm, 1000, 32, 100)
+    test_grouped_gather_one_case(wm_comm, 1000000, 127, 32432)
 
 
 def test_all(wm_comm):
     test_gather(wm_comm)
+    test_grouped_gather(wm_comm)
     test_scatter(wm_comm)
     test_exchange_embedding_grads(wm_comm)
 
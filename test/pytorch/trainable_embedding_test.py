@@ -0,0 +1,549 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import torch
+from mpi4py import MPI
+from wg_torch import comm as comm
+from wg_torch import embedding_ops as embedding_ops
+from wg_torch.wm_tensor import *
+
+from wholegraph.torch import wholegraph_pytorch as wg
+
+# all ranks draw the same ids and gradients, so the gradient of the whole table is
+# world_size times the local one.
+
+
+def create_trainable_embedding(
+    wm_comm,
+    ref_embedding: torch.Tensor,
+    wm_tensor_type: WmTensorType = WmTensorType.CHUNKED,
+    **kwargs
+):
+    embedding = create_wm_tensor(
+        wm_comm,
+        list(ref_embedding.shape),
+        [],
+        ref_embedding.dtype,
+        wm_tensor_type,
+    )
+    local_start, local_count, _, _ = get_partition_plan(embedding)
+    get_local_tensor(embedding).copy_(
+        ref_embedding[local_start : local_start + local_count]
+    )
+    torch.cuda.synchronize()
+    wg.barrier(wm_comm)
+    return embedding_ops.TrainableEmbedding(embedding, **kwargs)
+
+
+def get_whole_embedding(wm_comm, te: embedding_ops.TrainableEmbedding):
+    torch.cuda.synchronize()
+    wg.barrier(wm_comm)
+    return embedding_ops.embedding_lookup_nograd_common(
+        te.embedding, torch.arange(te.shape[0], dtype=torch.int32, device="cuda")
+    )
+
+
+def lookup_and_backward(
+    te: embedding_ops.TrainableEmbedding,
+    indice: torch.Tensor,
+    out_grad: torch.Tensor,
+    dedup: bool = False,
+):
+    lookup_module = embedding_ops.EmbeddingLookUpModule(need_backward=True, dedup=dedup)
+    lookup_module(indice, te).backward(out_grad)
+
+
+def test_dedup_grads(wm_comm, entry_count: int, embedding_dim: int, grad_count: int):
+    torch.manual_seed(0)
+    lr = 0.1
+    embedding_ops.init_embedding_backward_env(
+        wm_comm, embedding_ops.EmbeddingSGDOptimizer()
+    )
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    te = create_trainable_embedding(wm_comm, ref_embedding, dedup_grads=True)
+    dense_grad = torch.zeros_like(ref_embedding)
+    all_indice = []
+    for dedup in [False, True]:
+        # ids repeat within and across backwards.
+        indice = torch.randint(
+            0, entry_count // 4 + 1, (grad_count,), device="cuda", dtype=torch.int32
+        )
+        out_grad = torch.randn((grad_count, embedding_dim), device="cuda")
+        lookup_and_backward(te, indice, out_grad, dedup)
+        dense_grad.index_add_(0, indice.long(), out_grad)
+        all_indice.append(indice)
+    # one merged chunk with unique ids.
+    assert len(te.sparse_indices) == 1 and len(te.sparse_grads) == 1
+    ref_indice = torch.unique(torch.cat(all_indice)).long()
+    assert torch.equal(te.sparse_indices[0].long(), ref_indice)
+    assert torch.allclose(te.sparse_grads[0], dense_grad[ref_indice], atol=1e-4)
+
+    embedding_ops.run_optimizers(lr)
+    assert len(te.sparse_indices) == 0
+    ref_embedding -= lr * comm.get_world_size() * dense_grad
+    assert torch.allclose(get_whole_embedding(wm_comm, te), ref_embedding, atol=1e-4)
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_state_quantization(
+    wm_comm, state_dtype: torch.dtype, stochastic_rounding: bool
+):
+    torch.manual_seed(0)
+    entry_count, embedding_dim = 4096, 64
+    lr, beta1, beta2 = 0.01, 0.9, 0.999
+    embedding_ops.init_embedding_backward_env(
+        wm_comm,
+        embedding_ops.EmbeddingLazyAdamOptimizer(
+            beta1=beta1,
+            beta2=beta2,
+            state_dtype=state_dtype,
+            stochastic_rounding=stochastic_rounding,
+        ),
+    )
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    te = create_trainable_embedding(wm_comm, ref_embedding)
+    # all rows get the same gradient, so their states only differ by rounding.
+    grad = torch.randn((1, embedding_dim), device="cuda")
+    all_ids = torch.arange(entry_count, dtype=torch.int32, device="cuda")
+    lookup_and_backward(te, all_ids, grad.expand(entry_count, -1).contiguous())
+    embedding_ops.run_optimizers(lr)
+    whole_grad = comm.get_world_size() * grad
+    ref_m = (1 - beta1) * whole_grad
+    ref_v = (1 - beta2) * whole_grad * whole_grad
+    # the first step uses states before rounding.
+    ref_embedding -= lr * whole_grad / (whole_grad.abs() + 1e-8)
+    assert torch.allclose(get_whole_embedding(wm_comm, te), ref_embedding, atol=1e-5)
+
+    m, v = [
+        embedding_ops.embedding_lookup_nograd_common(state, all_ids, torch.float32)
+        for state in te.per_element_states
+    ]
+    if state_dtype == torch.int8:
+        # m and sqrt(v) are scaled to [-127, 127] by their row absmax.
+        scales = embedding_ops.embedding_lookup_nograd_common(
+            te.per_embedding_states[0], all_ids
+        )
+        m_step = ref_m.abs().amax() / 127.0
+        v_step = ref_v.sqrt().amax() / 127.0
+        assert torch.allclose(scales[:, 2], m_step.expand(entry_count), rtol=1e-4)
+        assert torch.allclose(scales[:, 3], v_step.expand(entry_count), rtol=1e-4)
+        m = m * scales[:, 2:3]
+        v = v * scales[:, 3:4]
+        ref_v = ref_v.sqrt()
+    else:
+        m_step = torch.finfo(state_dtype).eps * ref_m.abs()
+        v_step = torch.finfo(state_dtype).eps * ref_v
+    # round to nearest is off by at most half a step, stochastic rounding by a step.
+    max_error = 1.0 if stochastic_rounding else 0.5
+    for state, ref_state, step in [(m, ref_m, m_step), (v, ref_v, v_step)]:
+        tolerance = 1e-4 * ref_state.abs() + 1e-12
+        assert torch.all((state - ref_state).abs() <= max_error * step + tolerance)
+        if stochastic_rounding:
+            # rows are rounded independently, and the mean is unbiased.
+            assert not torch.all(state == state[0])
+            mean_error = (state.mean(dim=0, keepdim=True) - ref_state).abs()
+            assert torch.all(mean_error <= 0.05 * step + tolerance)
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_row_wise_optimizer(
+    wm_comm,
+    opt_type: embedding_ops.EmbeddingOptimizerTypes,
+    entry_count: int,
+    embedding_dim: int,
+    grad_count: int,
+    step_count: int = 3,
+):
+    torch.manual_seed(0)
+    lr, weight_decay, epsilon, beta1, beta2 = 0.01, 0.01, 1e-8, 0.9, 0.999
+    if opt_type == embedding_ops.EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD:
+        optimizer = embedding_ops.EmbeddingRowWiseAdaGradOptimizer(
+            weight_decay, epsilon
+        )
+    else:
+        assert opt_type == embedding_ops.EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAM
+        optimizer = embedding_ops.EmbeddingRowWiseAdamOptimizer(
+            weight_decay, epsilon, beta1, beta2
+        )
+    embedding_ops.init_embedding_backward_env(wm_comm, optimizer)
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    te = create_trainable_embedding(wm_comm, ref_embedding)
+    ref_m = torch.zeros_like(ref_embedding)
+    ref_v = torch.zeros((entry_count, 1), device="cuda")
+    ref_beta1t = torch.ones((entry_count, 1), device="cuda")
+    ref_beta2t = torch.ones((entry_count, 1), device="cuda")
+    for _ in range(step_count):
+        indice = torch.randint(
+            0, entry_count, (grad_count,), device="cuda", dtype=torch.int32
+        )
+        out_grad = torch.randn((grad_count, embedding_dim), device="cuda")
+        lookup_and_backward(te, indice, out_grad)
+        embedding_ops.run_optimizers(lr)
+        # only rows with gradients are updated.
+        dense_grad = torch.zeros_like(ref_embedding)
+        dense_grad.index_add_(0, indice.long(), out_grad)
+        rows = torch.unique(indice.long())
+        grad = comm.get_world_size() * dense_grad[rows]
+        grad += weight_decay * ref_embedding[rows]
+        grad_square_mean = (grad * grad).mean(dim=1, keepdim=True)
+        if opt_type == embedding_ops.EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD:
+            ref_v[rows] += grad_square_mean
+            ref_embedding[rows] -= lr * grad / (ref_v[rows].sqrt() + epsilon)
+        else:
+            ref_beta1t[rows] *= beta1
+            ref_beta2t[rows] *= beta2
+            ref_m[rows] = beta1 * ref_m[rows] + (1 - beta1) * grad
+            ref_v[rows] = beta2 * ref_v[rows] + (1 - beta2) * grad_square_mean
+            vhat = ref_v[rows] / (1 - ref_beta2t[rows])
+            mhat = ref_m[rows] / (1 - ref_beta1t[rows])
+            ref_embedding[rows] -= lr * mhat / (vhat.sqrt() + epsilon)
+        assert torch.allclose(
+            get_whole_embedding(wm_comm, te), ref_embedding, atol=1e-4
+        )
+    # the row accumulator is the last per embedding state.
+    row_states = embedding_ops.embedding_lookup_nograd_common(
+        te.per_embedding_states[0],
+        torch.arange(entry_count, dtype=torch.int32, device="cuda"),
+    )
+    assert torch.allclose(row_states[:, -1:], ref_v, rtol=1e-4, atol=1e-6)
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_grouped_grad_exchange(
+    wm_comm, entry_counts: list, embedding_dim: int, grad_count: int
+):
+    torch.manual_seed(0)
+    lr = 0.1
+    embedding_ops.init_embedding_backward_env(
+        wm_comm, embedding_ops.EmbeddingSGDOptimizer()
+    )
+    ref_embeddings = [
+        torch.rand((entry_count, embedding_dim), device="cuda")
+        for entry_count in entry_counts
+    ]
+    tes = [create_trainable_embedding(wm_comm, ref) for ref in ref_embeddings]
+    te_grads = []
+    dense_grads = []
+    for te, ref_embedding in zip(tes, ref_embeddings):
+        indice = torch.randint(
+            0, te.shape[0], (grad_count,), device="cuda", dtype=torch.int32
+        )
+        grad = torch.randn((grad_count, embedding_dim), device="cuda")
+        te_grads.append((te, indice, grad))
+        dense_grad = torch.zeros_like(ref_embedding)
+        dense_grad.index_add_(0, indice.long(), grad)
+        dense_grads.append(comm.get_world_size() * dense_grad)
+    # each table gets the summed gradients of its own local rows.
+    local_grads = embedding_ops.exchange_grouped_embedding_grads(te_grads)
+    assert len(local_grads) == len(tes)
+    for (te, indice, _), dense_grad, (local_indice, local_grad) in zip(
+        te_grads, dense_grads, local_grads
+    ):
+        local_start, local_count, _, _ = get_partition_plan(te.embedding)
+        rows = torch.unique(indice.long())
+        rows = rows[(rows >= local_start) & (rows < local_start + local_count)]
+        assert torch.equal(local_indice.long(), rows - local_start)
+        assert torch.allclose(local_grad, dense_grad[rows], atol=1e-4)
+
+    embedding_ops.apply_grouped_sparse_grads(lr, te_grads)
+    for te, ref_embedding, dense_grad in zip(tes, ref_embeddings, dense_grads):
+        assert torch.allclose(
+            get_whole_embedding(wm_comm, te), ref_embedding - lr * dense_grad, atol=1e-4
+        )
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_grad_residual(wm_comm, embedding_dim: int, grad_count: int):
+    torch.manual_seed(0)
+    batch_rows, step_count = 100, 4
+    embedding_ops.init_embedding_backward_env(
+        wm_comm,
+        embedding_ops.EmbeddingSGDOptimizer(),
+        grad_wire_dtype=torch.bfloat16,
+        grad_error_feedback=True,
+    )
+    entry_count = batch_rows * step_count
+    te = create_trainable_embedding(
+        wm_comm, torch.rand((entry_count, embedding_dim), device="cuda")
+    )
+    residual = torch.zeros((entry_count, embedding_dim), device="cuda")
+    # disjoint ids in each step, then the ids of the last step again.
+    for step in list(range(step_count)) + [step_count - 1]:
+        indice = torch.randint(
+            step * batch_rows,
+            (step + 1) * batch_rows,
+            (grad_count,),
+            device="cuda",
+            dtype=torch.int32,
+        )
+        grad = torch.randn((grad_count, embedding_dim), device="cuda")
+        lookup_and_backward(te, indice, grad)
+        sparse_indices, sparse_grads = te.pop_sparse_grads()
+        # only rows of this batch are sent, with their residual of the last step.
+        rows = torch.unique(indice.long())
+        dense_grad = residual.clone()
+        dense_grad.index_add_(0, indice.long(), grad)
+        assert torch.equal(sparse_indices.long(), rows)
+        assert torch.allclose(sparse_grads, dense_grad[rows], atol=1e-5)
+        # the residual doesn't grow, it only keeps non-zero rows of this batch.
+        residual_indice = te.grad_residual_indice.long()
+        assert residual_indice.numel() <= rows.numel()
+        assert torch.all(torch.isin(residual_indice, rows))
+        assert torch.all(torch.any(te.grad_residual != 0, dim=1))
+        rounded_grads = embedding_ops.round_grads_for_wire(sparse_grads, torch.bfloat16)
+        residual.zero_()
+        residual[rows] = sparse_grads - rounded_grads
+        assert torch.equal(residual[residual_indice], te.grad_residual)
+        assert torch.any(residual != 0, dim=1).sum() == residual_indice.numel()
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_tiered_embedding(
+    wm_comm, entry_count: int, embedding_dim: int, hot_count: int
+):
+    torch.manual_seed(0)
+    lr = 0.1
+    embedding_ops.init_embedding_backward_env(
+        wm_comm, embedding_ops.EmbeddingSGDOptimizer()
+    )
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    backing = create_wm_tensor(
+        wm_comm, [entry_count, embedding_dim], [], torch.float32, WmTensorType.HOST
+    )
+    local_start, local_count, _, _ = get_partition_plan(backing)
+    get_local_tensor(backing).copy_(
+        ref_embedding[local_start : local_start + local_count]
+    )
+    tiered = embedding_ops.TieredEmbedding(backing, hot_count, migrate_interval=2)
+    all_ids = torch.arange(entry_count, dtype=torch.int32, device="cuda")
+    # hot rows are gathered 3 times, others once.
+    hot_rows = torch.randperm(entry_count, device="cuda")[:hot_count]
+    indice = torch.cat([hot_rows, hot_rows, hot_rows, all_ids.long()]).int()
+    indice = indice[torch.randperm(indice.numel(), device="cuda")]
+    for _ in range(2):
+        assert torch.equal(tiered.gather(indice), ref_embedding[indice.long()])
+    # the second gather migrates, hot rows are promoted.
+    assert torch.equal(torch.sort(tiered.hot_ids)[0], torch.sort(hot_rows)[0])
+    slot = embedding_ops.embedding_lookup_nograd_common(tiered.slot_map, all_ids)
+    slot = slot.view(-1).long()
+    assert torch.equal(torch.nonzero(slot >= 0).view(-1), torch.sort(hot_rows)[0])
+    assert torch.equal(tiered.hot_ids[slot[hot_rows]], hot_rows)
+    slab_rows = embedding_ops.embedding_lookup_nograd_common(
+        tiered.slab, slot[hot_rows]
+    )
+    assert torch.equal(slab_rows, ref_embedding[hot_rows])
+
+    # updates are written to host memory and through to the slab.
+    te = embedding_ops.TrainableEmbedding(tiered)
+    grad_indice = torch.cat([hot_rows[: hot_count // 2], all_ids[:100].long()]).int()
+    out_grad = torch.randn((grad_indice.numel(), embedding_dim), device="cuda")
+    lookup_and_backward(te, grad_indice, out_grad)
+    embedding_ops.run_optimizers(lr)
+    ref_embedding.index_add_(
+        0, grad_indice.long(), out_grad, alpha=-lr * comm.get_world_size()
+    )
+    torch.cuda.synchronize()
+    wg.barrier(wm_comm)
+    backing_rows = embedding_ops.embedding_lookup_nograd_common(backing, all_ids)
+    assert torch.allclose(backing_rows, ref_embedding, atol=1e-4)
+    slab_rows = embedding_ops.embedding_lookup_nograd_common(
+        tiered.slab, slot[hot_rows]
+    )
+    assert torch.allclose(slab_rows, ref_embedding[hot_rows], atol=1e-4)
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_pooled_lookup(
+    wm_comm,
+    mode: embedding_ops.EmbeddingPoolingMode,
+    entry_count: int,
+    embedding_dim: int,
+    bag_count: int,
+):
+    torch.manual_seed(0)
+    embedding_ops.init_embedding_backward_env(
+        wm_comm, embedding_ops.EmbeddingSGDOptimizer()
+    )
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    te = create_trainable_embedding(wm_comm, ref_embedding)
+    # some bags are empty and ids may repeat within a bag.
+    bag_sizes = torch.randint(0, 6, (bag_count,), device="cuda")
+    offsets = torch.zeros((bag_count + 1,), dtype=torch.int64, device="cuda")
+    offsets[1:] = torch.cumsum(bag_sizes, 0)
+    indice = torch.randint(
+        0, entry_count, (int(offsets[-1]),), device="cuda", dtype=torch.int32
+    )
+    out_grad = torch.randn((bag_count, embedding_dim), device="cuda")
+    ref_weight = ref_embedding.clone().requires_grad_()
+    ref_out = torch.nn.functional.embedding_bag(
+        indice.long(),
+        ref_weight,
+        offsets,
+        mode=mode.name.lower(),
+        include_last_offset=True,
+    )
+    ref_out.backward(out_grad)
+
+    lookup_module = embedding_ops.EmbeddingBagLookUpModule(mode)
+    out_tensor = lookup_module(indice, offsets, te)
+    assert torch.allclose(out_tensor, ref_out, atol=1e-5)
+    out_tensor.backward(out_grad)
+    sparse_indices, sparse_grads = te.pop_sparse_grads()
+    dense_grad = torch.zeros_like(ref_embedding)
+    dense_grad.index_add_(0, sparse_indices.long(), sparse_grads)
+    assert torch.allclose(dense_grad, ref_weight.grad, atol=1e-5)
+
+    # NCCL tables pool over rows gathered once.
+    nccl_embedding = create_wm_tensor(
+        wm_comm, [entry_count, embedding_dim], [], torch.float32, WmTensorType.NCCL
+    )
+    local_start, local_count, _, _ = get_partition_plan(nccl_embedding)
+    get_local_tensor(nccl_embedding).copy_(
+        ref_embedding[local_start : local_start + local_count]
+    )
+    torch.cuda.synchronize()
+    wg.barrier(wm_comm)
+    nccl_out, _ = embedding_ops.embedding_pooled_lookup_nograd_common(
+        nccl_embedding, indice, offsets, mode
+    )
+    assert torch.allclose(nccl_out, ref_out, atol=1e-5)
+    wg.barrier(wm_comm)
+    del nccl_embedding
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_async_update(
+    wm_comm,
+    allow_stale: bool,
+    entry_count: int,
+    embedding_dim: int,
+    grad_count: int,
+    wm_tensor_type: WmTensorType = WmTensorType.CHUNKED,
+    step_count: int = 3,
+):
+    torch.manual_seed(0)
+    lr = 0.1
+    embedding_ops.init_embedding_backward_env(
+        wm_comm,
+        embedding_ops.EmbeddingSGDOptimizer(),
+        async_update=True,
+        allow_stale=allow_stale,
+    )
+    ref_embedding = torch.rand((entry_count, embedding_dim), device="cuda")
+    # NCCL tables are updated synchronously.
+    te = create_trainable_embedding(wm_comm, ref_embedding, wm_tensor_type)
+    lookup_module = embedding_ops.EmbeddingLookUpModule(need_backward=True)
+    for _ in range(step_count):
+        indice = torch.randint(
+            0, entry_count, (grad_count,), device="cuda", dtype=torch.int32
+        )
+        out_grad = torch.randn((grad_count, embedding_dim), device="cuda")
+        out_tensor = lookup_module(indice, te)
+        if not allow_stale:
+            # the lookup waits for the update of the last step.
+            assert torch.allclose(out_tensor, ref_embedding[indice.long()], atol=1e-4)
+        out_tensor.backward(out_grad)
+        embedding_ops.run_optimizers(lr)
+        ref_embedding.index_add_(
+            0, indice.long(), out_grad, alpha=-lr * comm.get_world_size()
+        )
+    # SGD updates don't depend on the embeddings, so stale reads change nothing.
+    embedding_ops.wait_optimizers(force=True)
+    assert torch.allclose(get_whole_embedding(wm_comm, te), ref_embedding, atol=1e-4)
+    embedding_ops.finalize_embedding_backward_env()
+
+
+def test_async_update_error(wm_comm, allow_stale: bool):
+    torch.manual_seed(0)
+    embedding_ops.init_embedding_backward_env(
+        wm_comm,
+        embedding_ops.EmbeddingSGDOptimizer(),
+        async_update=True,
+        allow_stale=allow_stale,
+    )
+    te = create_trainable_embedding(wm_comm, torch.rand((1000, 32), device="cuda"))
+    indice = torch.randint(0, 1000, (100,), device="cuda", dtype=torch.int32)
+    lookup_and_backward(te, indice, torch.randn((100, 32), device="cuda"))
+
+    def apply_grouped_sparse_grads_with_error(lr, te_grads: list):
+        raise ValueError("update failed.")
+
+    apply_grouped_sparse_grads = embedding_ops.apply_grouped_sparse_grads
+    embedding_ops.apply_grouped_sparse_grads = apply_grouped_sparse_grads_with_error
+    # the error of the update thread is raised by the first wait.
+    raised_by = None
+    try:
+        embedding_ops.run_optimizers(0.1)
+        raised_by = "wait_optimizers"
+        embedding_ops.wait_optimizers()
+        raised_by = "run_optimizers"
+        embedding_ops.run_optimizers(0.1)
+        raised_by = None
+    except ValueError:
+        pass
+    finally:
+        embedding_ops.apply_grouped_sparse_grads = apply_grouped_sparse_grads
+    assert raised_by == ("run_optimizers" if allow_stale else "wait_optimizers")
+    # the error is raised once, finalize doesn't raise it again.
+    embedding_ops.finalize_embedding_backward_env()
+
+
+if __name__ == "__main__":
+    wg.init_lib()
+    comma = MPI.COMM_WORLD
+    shared_comma = comma.Split_type(MPI.COMM_TYPE_SHARED)
+    os.environ["RANK"] = str(comma.Get_rank())
+    os.environ["WORLD_SIZE"] = str(comma.Get_size())
+    if "MASTER_ADDR" not in os.environ:
+        os.environ["MASTER_ADDR"] = "localhost"
+    if "MASTER_PORT" not in os.environ:
+        os.environ["MASTER_PORT"] = "12335"
+    torch.cuda.set_device(shared_comma.Get_rank())
+    torch.distributed.init_process_group(backend="nccl", init_method="env://")
+    wm_comm = create_global_communicator(comma.Get_rank(), comma.Get_size())
+    print("test_dedup_grads : ")
+    test_dedup_grads(wm_comm, 1000, 32, 2000)
+    test_dedup_grads(wm_comm, 100000, 129, 12345)
+    print("test_state_quantization : ")
+    for state_dtype in [torch.bfloat16, torch.int8]:
+        for stochastic_rounding in [False, True]:
+            test_state_quantization(wm_comm, state_dtype, stochastic_rounding)
+    print("test_row_wise_optimizer : ")
+    for opt_type in [
+        embedding_ops.EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAGRAD,
+        embedding_ops.EmbeddingOptimizerTypes.OPT_TYPE_ROWWISE_ADAM,
+    ]:
+        test_row_wise_optimizer(wm_comm, opt_type, 1000, 32, 500)
+        test_row_wise_optimizer(wm_comm, opt_type, 100000, 129, 12345)
+    print("test_grouped_grad_exchange : ")
+    test_grouped_grad_exchange(wm_comm, [1000, 777, 4099], 32, 500)
+    test_grouped_grad_exchange(wm_comm, [100000, 12345], 129, 12345)
+    print("test_grad_residual : ")
+    test_grad_residual(wm_comm, 32, 500)
+    test_grad_residual(wm_comm, 129, 2000)
+    print("test_tiered_embedding : ")
+    test_tiered_embedding(wm_comm, 1000, 32, 100)
+    test_tiered_embedding(wm_comm, 100000, 129, 5000)
+    print("test_pooled_lookup : ")
+    for mode in embedding_ops.EmbeddingPoolingMode:
+        test_pooled_lookup(wm_comm, mode, 1000, 32, 100)
+        test_pooled_lookup(wm_comm, mode, 100000, 129, 3000)
+    print("test_async_update : ")
+    for allow_stale in [False, True]:
+        test_async_update(wm_comm, allow_stale, 1000, 32, 500)
+        test_async_update(wm_comm, allow_stale, 100000, 129, 12345)
+        test_async_update(wm_comm, allow_stale, 1000, 32, 500, WmTensorType.NCCL)
+        test_async_update_error(wm_comm, allow_stale)
+    wg.finalize_lib()
@@ -19,6 +19,7 @@ import torch
 from mpi4py import MPI
 
 from wholegraph.torch import wholegraph_pytorch as wg
+from wg_torch import graph_ops as graph_ops
 from wg_torch.wm_tensor import *
 
 comma = MPI.COMM_WORLD
@@ -130,3 +131,35 @@ comma.barrier()
 end_time = time()
 time_second = end_time - start_time
 print("rank=%d, time=%f s" % (rank, time_second))
+
+# degree biased negative sample, compare frequency to degree^0.75 distribution
+degree_sample_count = 1000000
+degree_alias_table = graph_ops.build_degree_alias_table(csr_row_ptr)
+degree_negative_nodes = graph_ops.degree_alias_negative_sample(
+    degree_sample_count, degree_alias_table
+)
+expected_prob = (csr_row_ptr[1:] - csr_row_ptr[:-1]).double().pow(0.75)
+expected_prob = expected_prob / expected_prob.sum()
+sample_prob = (
+    torch.bincount(degree_negative_nodes, minlength=graph_num_nodes).double()
+    / degree_sample_count
+)
+max_prob_error = (sample_prob - expected_prob).abs().max().item()
+print("rank=%d, degree negative max prob error=%f" % (rank, max_prob_error))
+assert max_prob_error < 2e-4
+print("Right degree result.")
+
+# degree biased negatives of each source reject neighbors of the source
+degree_per_source_negative_nodes = graph_ops.degree_alias_per_source_negative_sample(
+    target_node_tensor,
+    csr_row_ptr,
+    csr_col_ind,
+    negative_sample_count,
+    degree_alias_table,
+).view(-1, negative_sample_count)
+for i, src_node in enumerate(target_node_tensor):
+    neighbor_nodes = csr_col_ind[csr_row_ptr[src_node] : csr_row_ptr[src_node + 1]]
+    assert not torch.any(
+        torch.isin(degree_per_source_negative_nodes[i], neighbor_nodes.cuda())
+    )
+print("Right degree per source result.")
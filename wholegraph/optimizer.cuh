@@ -16,6 +16,7 @@
 #include "whole_graph_optimizers.h"
 
 #include "data_type.h"
+#include "random.cuh"
 #include "whole_chunked_memory.cuh"
 
 namespace whole_graph {
@@ -191,6 +192,42 @@ struct AdaGradEmbOptimizer {
   }
 };
 
+__device__ __forceinline__ bool StochasticRoundUp(float value, float down, float up, RandomNumGen &rng) {
+  if (value == down) return false;
+  return rng.RandomUniformFloat() < (value - down) / (up - down);
+}
+
+// Converts optimizer state to its storage type. With stochastic rounding, value is rounded away from
+// zero with probability of its distance to the truncated value, so small updates are not lost in expectation.
+template<typename StateType>
+__device__ __forceinline__ StateType RoundState(float value, const OptimizerInfo &opt_info, RandomNumGen &rng) {
+  return (StateType) value;
+}
+
+template<>
+__device__ __forceinline__ __half RoundState<__half>(float value, const OptimizerInfo &opt_info, RandomNumGen &rng) {
+  if (!opt_info.stochastic_rounding) return __float2half(value);
+  __half down = __float2half_rz(value);
+  __half up = __ushort_as_half(__half_as_ushort(down) + 1);
+  return StochasticRoundUp(value, __half2float(down), __half2float(up), rng) ? up : down;
+}
+
+template<>
+__device__ __forceinline__ __nv_bfloat16 RoundState<__nv_bfloat16>(float value,
+                                                                   const OptimizerInfo &opt_info,
+                                                                   RandomNumGen &rng) {
+  if (!opt_info.stochastic_rounding) return __float2bfloat16(value);
+  __nv_bfloat16 down = __float2bfloat16_rz(value);
+  __nv_bfloat16 up = __ushort_as_bfloat16(__bfloat16_as_ushort(down) + 1);
+  return StochasticRoundUp(value, __bfloat162float(down), __bfloat162float(up), rng) ? up : down;
+}
+
+// Quantizes value already scaled to [-127, 127] to int8.
+__device__ __forceinline__ int8_t QuantizeState(float value, const OptimizerInfo &opt_info, RandomNumGen &rng) {
+  value = opt_info.stochastic_rounding ? floorf(value + rng.RandomUniformFloat()) : rintf(value);
+  return (int8_t) fminf(fmaxf(value, -127.0f), 127.0f);
+}
+
 template<typename EmbGradType, typename StateType>
 struct SGDSparseEmbOptimizer {
   __device__ __forceinline__ SGDSparseEmbOptimizer() = default;
@@ -237,6 +274,7 @@ struct LazyAdamSparseEmbOptimizer {
     float beta2 = opt_info.private_info.lazy_adam_info.beta2;
     lazy_adam_data.beta1t *= beta1;
     lazy_adam_data.beta2t *= beta2;
+    RandomNumGen rng(blockIdx.x * blockDim.x + threadIdx.x, opt_info.random_seed);
     for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
       float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
       float param = (float) embedding[embedding_entry_id * embedding_stride + i];
@@ -249,8 +287,8 @@ struct LazyAdamSparseEmbOptimizer {
       float vhat = v / (1 - lazy_adam_data.beta2t);
       param = param - opt_info.lr * mhat / (sqrtf(vhat) + opt_info.private_info.lazy_adam_info.epsilon);
       embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
-      m_ptr[embedding_entry_id * grad_per_element_state_stride + i] = (StateType) m;
-      v_ptr[embedding_entry_id * grad_per_element_state_stride + i] = (StateType) v;
+      m_ptr[embedding_entry_id * grad_per_element_state_stride + i] = RoundState<StateType>(m, opt_info, rng);
+      v_ptr[embedding_entry_id * grad_per_element_state_stride + i] = RoundState<StateType>(v, opt_info, rng);
     }
     __syncthreads();
     if (threadIdx.x == 0) {
@@ -275,6 +313,7 @@ struct RMSPropSparseEmbOptimizer {
                                       int grad_per_element_state_stride) {
     StateType *v_ptr = per_element_state_0;
     float alpha = opt_info.private_info.rms_prop_info.alpha;
+    RandomNumGen rng(blockIdx.x * blockDim.x + threadIdx.x, opt_info.random_seed);
     for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
       float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
       float param = (float) embedding[embedding_entry_id * embedding_stride + i];
@@ -284,7 +323,7 @@ struct RMSPropSparseEmbOptimizer {
       float vhat = v;
       param = param - opt_info.lr * grad / (sqrtf(vhat) + opt_info.private_info.rms_prop_info.epsilon);
       embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
-      v_ptr[embedding_entry_id * grad_per_element_state_stride + i] = (StateType) v;
+      v_ptr[embedding_entry_id * grad_per_element_state_stride + i] = RoundState<StateType>(v, opt_info, rng);
     }
   }
 };
@@ -304,6 +343,7 @@ struct AdaGradSparseEmbOptimizer {
                                       int embedding_stride,
                                       int grad_per_element_state_stride) {
     StateType *state_sum_ptr = per_element_state_0;
+    RandomNumGen rng(blockIdx.x * blockDim.x + threadIdx.x, opt_info.random_seed);
     for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
       float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
       float param = (float) embedding[embedding_entry_id * embedding_stride + i];
@@ -312,7 +352,220 @@ struct AdaGradSparseEmbOptimizer {
       state_sum = state_sum + grad * grad;
       param = param - opt_info.lr * grad / (sqrtf(state_sum) + opt_info.private_info.ada_grad_info.epsilon);
       embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
-      state_sum_ptr[embedding_entry_id * grad_per_element_state_stride + i] = (StateType) state_sum;
+      state_sum_ptr[embedding_entry_id * grad_per_element_state_stride + i] =
+          RoundState<StateType>(state_sum, opt_info, rng);
+    }
+  }
+};
+
+// Sum of squares of weight decayed gradient of the row, reduced over the thread block.
+template<typename EmbGradType>
+__device__ __forceinline__ float RowGradSquareSum(float weight_decay,
+                                                  int64_t embedding_entry_id,
+                                                  int64_t gradient_entry_id,
+                                                  const EmbGradType *embedding,
+                                                  const EmbGradType *grad_ptr,
+                                                  int embedding_dim,
+                                                  int embedding_stride,
+                                                  int grad_per_element_state_stride) {
+  __shared__ float grad_square_sum;
+  if (threadIdx.x == 0) grad_square_sum = 0.0f;
+  __syncthreads();
+  float local_grad_square_sum = 0.0f;
+  for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+    float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
+    float param = (float) embedding[embedding_entry_id * embedding_stride + i];
+    grad = grad + weight_decay * param;
+    local_grad_square_sum += grad * grad;
+  }
+  atomicAdd(&grad_square_sum, local_grad_square_sum);
+  __syncthreads();
+  return grad_square_sum;
+}
+
+// AdaGrad with one accumulator per row, the mean of squared gradients of the row.
+template<typename EmbGradType, typename StateType>
+struct RowWiseAdaGradSparseEmbOptimizer {
+  __device__ __forceinline__ RowWiseAdaGradSparseEmbOptimizer() = default;
+  __device__ __forceinline__ void run(OptimizerInfo opt_info,
+                                      int64_t embedding_entry_id,
+                                      int64_t gradient_entry_id,
+                                      EmbGradType *embedding,
+                                      const EmbGradType *grad_ptr,
+                                      StateType *per_element_state_0,
+                                      StateType *per_element_state_1,
+                                      StateType *per_embedding_state,
+                                      int embedding_dim,
+                                      int embedding_stride,
+                                      int grad_per_element_state_stride) {
+    auto *state_sum_ptr = (float *) per_embedding_state;
+    float weight_decay = opt_info.private_info.ada_grad_info.weight_decay;
+    float grad_square_sum = RowGradSquareSum(weight_decay,
+                                             embedding_entry_id,
+                                             gradient_entry_id,
+                                             embedding,
+                                             grad_ptr,
+                                             embedding_dim,
+                                             embedding_stride,
+                                             grad_per_element_state_stride);
+    float state_sum = state_sum_ptr[embedding_entry_id] + grad_square_sum / embedding_dim;
+    float step = opt_info.lr / (sqrtf(state_sum) + opt_info.private_info.ada_grad_info.epsilon);
+    for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+      float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
+      float param = (float) embedding[embedding_entry_id * embedding_stride + i];
+      grad = grad + weight_decay * param;
+      param = param - step * grad;
+      embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
+    }
+    __syncthreads();
+    if (threadIdx.x == 0) {
+      state_sum_ptr[embedding_entry_id] = state_sum;
+    }
+  }
+};
+
+// Adam with m per element and v per row, v is updated by the mean of squared gradients of the row.
+template<typename EmbGradType, typename StateType>
+struct RowWiseAdamSparseEmbOptimizer {
+  __device__ __forceinline__ RowWiseAdamSparseEmbOptimizer() = default;
+  __device__ __forceinline__ void run(OptimizerInfo opt_info,
+                                      int64_t embedding_entry_id,
+                                      int64_t gradient_entry_id,
+                                      EmbGradType *embedding,
+                                      const EmbGradType *grad_ptr,
+                                      StateType *per_element_state_0,
+                                      StateType *per_element_state_1,
+                                      StateType *per_embedding_state,
+                                      int embedding_dim,
+                                      int embedding_stride,
+                                      int grad_per_element_state_stride) {
+    auto *m_ptr = (StateType *) per_element_state_0;
+    auto *adam_data = (RowWiseAdamData *) per_embedding_state;
+    RowWiseAdamData row_wise_adam_data = adam_data[embedding_entry_id];
+    float weight_decay = opt_info.private_info.lazy_adam_info.weight_decay;
+    float beta1 = opt_info.private_info.lazy_adam_info.beta1;
+    float beta2 = opt_info.private_info.lazy_adam_info.beta2;
+    float grad_square_sum = RowGradSquareSum(weight_decay,
+                                             embedding_entry_id,
+                                             gradient_entry_id,
+                                             embedding,
+                                             grad_ptr,
+                                             embedding_dim,
+                                             embedding_stride,
+                                             grad_per_element_state_stride);
+    row_wise_adam_data.beta1t *= beta1;
+    row_wise_adam_data.beta2t *= beta2;
+    row_wise_adam_data.v = beta2 * row_wise_adam_data.v + (1 - beta2) * grad_square_sum / embedding_dim;
+    float vhat = row_wise_adam_data.v / (1 - row_wise_adam_data.beta2t);
+    float step = opt_info.lr / (sqrtf(vhat) + opt_info.private_info.lazy_adam_info.epsilon);
+    RandomNumGen rng(blockIdx.x * blockDim.x + threadIdx.x, opt_info.random_seed);
+    for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+      float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
+      float param = (float) embedding[embedding_entry_id * embedding_stride + i];
+      float m = (float) m_ptr[embedding_entry_id * grad_per_element_state_stride + i];
+      grad = grad + weight_decay * param;
+      m = beta1 * m + (1 - beta1) * grad;
+      float mhat = m / (1 - row_wise_adam_data.beta1t);
+      param = param - step * mhat;
+      embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
+      m_ptr[embedding_entry_id * grad_per_element_state_stride + i] = RoundState<StateType>(m, opt_info, rng);
+    }
+    __syncthreads();
+    if (threadIdx.x == 0) {
+      adam_data[embedding_entry_id] = row_wise_adam_data;
+    }
+  }
+};
+
+// Lazy Adam with int8 m and v. Each row is one quantization block: m and sqrt(v) are scaled by their
+// row absmax to [-127, 127], scales are kept in LazyAdamInt8Data. New states are computed twice, first
+// to get the absmax, then to write, so nothing is staged in shared memory.
+template<typename EmbGradType, typename StateType>
+struct LazyAdamInt8SparseEmbOptimizer {
+  __device__ __forceinline__ LazyAdamInt8SparseEmbOptimizer() = default;
+  __device__ __forceinline__ void update(OptimizerInfo opt_info,
+                                         const LazyAdamInt8Data &lazy_adam_data,
+                                         float old_m_scale,
+                                         float old_v_scale,
+                                         int64_t embedding_entry_id,
+                                         int64_t gradient_entry_id,
+                                         const EmbGradType *embedding,
+                                         const EmbGradType *grad_ptr,
+                                         const int8_t *m_ptr,
+                                         const int8_t *v_ptr,
+                                         int i,
+                                         int embedding_stride,
+                                         int grad_per_element_state_stride,
+                                         float *param,
+                                         float *m,
+                                         float *v) {
+    float beta1 = opt_info.private_info.lazy_adam_info.beta1;
+    float beta2 = opt_info.private_info.lazy_adam_info.beta2;
+    float grad = (float) grad_ptr[gradient_entry_id * grad_per_element_state_stride + i];
+    *param = (float) embedding[embedding_entry_id * embedding_stride + i];
+    *m = (float) m_ptr[embedding_entry_id * grad_per_element_state_stride + i] * old_m_scale;
+    float sqrt_v = (float) v_ptr[embedding_entry_id * grad_per_element_state_stride + i] * old_v_scale;
+    grad = grad + opt_info.private_info.lazy_adam_info.weight_decay * *param;
+    *m = beta1 * *m + (1 - beta1) * grad;
+    *v = beta2 * sqrt_v * sqrt_v + (1 - beta2) * grad * grad;
+    float mhat = *m / (1 - lazy_adam_data.beta1t);
+    float vhat = *v / (1 - lazy_adam_data.beta2t);
+    *param = *param - opt_info.lr * mhat / (sqrtf(vhat) + opt_info.private_info.lazy_adam_info.epsilon);
+  }
+  __device__ __forceinline__ void run(OptimizerInfo opt_info,
+                                      int64_t embedding_entry_id,
+                                      int64_t gradient_entry_id,
+                                      EmbGradType *embedding,
+                                      const EmbGradType *grad_ptr,
+                                      StateType *per_element_state_0,
+                                      StateType *per_element_state_1,
+                                      StateType *per_embedding_state,
+                                      int embedding_dim,
+                                      int embedding_stride,
+                                      int grad_per_element_state_stride) {
+    __shared__ float m_absmax, v_absmax;
+    auto *m_ptr = (int8_t *) per_element_state_0;
+    auto *v_ptr = (int8_t *) per_element_state_1;
+    auto *adam_data = (LazyAdamInt8Data *) per_embedding_state;
+    LazyAdamInt8Data lazy_adam_data = adam_data[embedding_entry_id];
+    float old_m_scale = lazy_adam_data.m_scale;
+    float old_v_scale = lazy_adam_data.v_scale;
+    lazy_adam_data.beta1t *= opt_info.private_info.lazy_adam_info.beta1;
+    lazy_adam_data.beta2t *= opt_info.private_info.lazy_adam_info.beta2;
+    if (threadIdx.x == 0) {
+      m_absmax = 0.0f;
+      v_absmax = 0.0f;
+    }
+    __syncthreads();
+    float param, m, v;
+    float local_m_absmax = 0.0f, local_v_absmax = 0.0f;
+    for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+      update(opt_info, lazy_adam_data, old_m_scale, old_v_scale, embedding_entry_id, gradient_entry_id, embedding,
+             grad_ptr, m_ptr, v_ptr, i, embedding_stride, grad_per_element_state_stride, &param, &m, &v);
+      local_m_absmax = fmaxf(local_m_absmax, fabsf(m));
+      local_v_absmax = fmaxf(local_v_absmax, sqrtf(v));
+    }
+    // int compare is order preserving for non-negative floats.
+    atomicMax((int *) &m_absmax, __float_as_int(local_m_absmax));
+    atomicMax((int *) &v_absmax, __float_as_int(local_v_absmax));
+    __syncthreads();
+    float m_scale = m_absmax / 127.0f;
+    float v_scale = v_absmax / 127.0f;
+    RandomNumGen rng(blockIdx.x * blockDim.x + threadIdx.x, opt_info.random_seed);
+    for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+      update(opt_info, lazy_adam_data, old_m_scale, old_v_scale, embedding_entry_id, gradient_entry_id, embedding,
+             grad_ptr, m_ptr, v_ptr, i, embedding_stride, grad_per_element_state_stride, &param, &m, &v);
+      embedding[embedding_entry_id * embedding_stride + i] = (EmbGradType) param;
+      m_ptr[embedding_entry_id * grad_per_element_state_stride + i] =
+          QuantizeState(m_scale > 0.0f ? m / m_scale : 0.0f, opt_info, rng);
+      v_ptr[embedding_entry_id * grad_per_element_state_stride + i] =
+          QuantizeState(v_scale > 0.0f ? sqrtf(v) / v_scale : 0.0f, opt_info, rng);
+    }
+    __syncthreads();
+    if (threadIdx.x == 0) {
+      lazy_adam_data.m_scale = m_scale;
+      lazy_adam_data.v_scale = v_scale;
+      adam_data[embedding_entry_id] = lazy_adam_data;
     }
   }
 };
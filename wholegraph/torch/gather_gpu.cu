@@ -187,6 +187,262 @@ torch::Tensor WholeMemoryGatherNCCLCUDAGrad(const torch::Tensor &indice,
   return WholeMemoryGatherNCCLCUDA<true>(indice, pparameter);
 }
 
+torch::autograd::variable_list WholeMemoryGroupedGatherNCCLCUDA(const torch::Tensor &indice,
+                                                                const std::vector<int64_t> &pparameters) {
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  TORCH_CHECK(indice.dim() == 1, "WholeMemoryGroupedGatherNCCLCUDA indice dim should be 1");
+  TORCH_CHECK(indice.dtype() == torch::kInt32 || indice.dtype() == torch::kInt64,
+              "WholeMemoryGroupedGatherNCCLCUDA indice dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(!pparameters.empty(), "WholeMemoryGroupedGatherNCCLCUDA should have at least one parameter");
+  int64_t indice_count = indice.size(0);
+  torch::Device d = indice.device();
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  torch::autograd::variable_list output_tensors;
+  std::vector<whole_graph::WMType> param_ts;
+  std::vector<void *> outputs;
+  std::vector<whole_graph::WholeNCCLMemory_t> wnmts;
+  std::vector<size_t> storage_offsets;
+  std::vector<int64_t> embedding_dims, embedding_strides;
+  for (auto pparameter : pparameters) {
+    NCCLTensor &parameter = *((NCCLTensor *) pparameter);
+    TORCH_CHECK(parameter.dim() == 2 || parameter.dim() == 1, "WholeMemoryGroupedGatherNCCLCUDA parameter dim should be 1 or 2")
+    TORCH_CHECK(parameter.dtype() == torch::kInt8 || parameter.dtype() == torch::kInt16 || parameter.dtype() == torch::kInt32 || parameter.dtype() == torch::kInt64 || parameter.dtype() == torch::kFloat16 || parameter.dtype() == torch::kBFloat16 || parameter.dtype() == torch::kFloat32 || parameter.dtype() == torch::kFloat64,
+                "WholeMemoryGroupedGatherNCCLCUDA parameter dtype not supported");
+    int64_t embedding_dim = parameter.dim() == 2 ? parameter.size(1) : 1;
+    auto to = torch::TensorOptions().device(d).dtype(parameter.dtype());
+    std::vector<int64_t> output_shape({indice_count, embedding_dim});
+    if (parameter.dim() == 1) output_shape.pop_back();
+    output_tensors.push_back(torch::empty(output_shape, to));
+    param_ts.push_back(whole_graph::pytorch::C10ScalarToWMType(parameter.dtype().toScalarType()));
+    outputs.push_back(output_tensors.back().data_ptr());
+    wnmts.push_back(parameter.GetNCCLMemory());
+    storage_offsets.push_back(parameter.storage_offset());
+    embedding_dims.push_back(embedding_dim);
+    embedding_strides.push_back(parameter.stride(0));
+  }
+  auto cuda_fns = GetCUDAEnvFns(d);
+  whole_graph::WholeMemoryNCCLGroupedGather(param_ts,
+                                            whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                            outputs,
+                                            wnmts,
+                                            indice.data_ptr(),
+                                            storage_offsets,
+                                            indice_count,
+                                            embedding_dims,
+                                            embedding_strides,
+                                            cuda_fns,
+                                            stream);
+  return output_tensors;
+}
+
+static void CheckGatherColumnsArgs(const torch::Tensor &indice,
+                                   const torch::Tensor &columns,
+                                   int64_t param_dim,
+                                   c10::ScalarType param_type) {
+  TORCH_CHECK(indice.dim() == 1, "WholeMemoryGatherColumnsCUDA indice dim should be 1");
+  TORCH_CHECK(indice.dtype() == torch::kInt32 || indice.dtype() == torch::kInt64,
+              "WholeMemoryGatherColumnsCUDA indice dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(columns.dim() == 1, "WholeMemoryGatherColumnsCUDA columns dim should be 1");
+  TORCH_CHECK(columns.dtype() == torch::kInt32, "WholeMemoryGatherColumnsCUDA columns dtype should be kInt32(kInt)");
+  TORCH_CHECK(columns.is_contiguous(), "WholeMemoryGatherColumnsCUDA columns should be contiguous");
+  TORCH_CHECK(indice.device() == columns.device(), "indice and columns should have same device.");
+  TORCH_CHECK(param_dim == 2, "WholeMemoryGatherColumnsCUDA parameter dim should be 2")
+  TORCH_CHECK(param_type == torch::kInt8 || param_type == torch::kInt16 || param_type == torch::kInt32 || param_type == torch::kInt64 || param_type == torch::kFloat16 || param_type == torch::kBFloat16 || param_type == torch::kFloat32 || param_type == torch::kFloat64,
+              "WholeMemoryGatherColumnsCUDA parameter dtype not supported");
+}
+
+torch::Tensor WholeMemoryGatherColumnsCUDA(const torch::Tensor &indice,
+                                           const torch::Tensor &columns,
+                                           const torch::Tensor &parameter,
+                                           torch::ScalarType output_scalar_type) {
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  c10::ScalarType param_type = parameter.dtype().toScalarType();
+  CheckGatherColumnsArgs(indice, columns, parameter.dim(), param_type);
+  TORCH_CHECK(indice.device() == parameter.device(), "indice and parameter should have same device.");
+  int64_t indice_count = indice.size(0);
+  int64_t column_count = columns.size(0);
+  int64_t embedding_stride = parameter.stride(0);
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  auto to = torch::TensorOptions().device(indice.device()).dtype(output_scalar_type);
+  torch::Tensor output_tensor = torch::empty({indice_count, column_count}, to);
+  whole_graph::WholeMemoryGatherColumns(whole_graph::pytorch::C10ScalarToWMType(output_scalar_type),
+                                        whole_graph::pytorch::C10ScalarToWMType(param_type),
+                                        whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                        output_tensor.data_ptr(),
+                                        parameter.data_ptr(),
+                                        indice.data_ptr(),
+                                        columns.data_ptr<int>(),
+                                        0,
+                                        indice_count,
+                                        column_count,
+                                        embedding_stride,
+                                        column_count,
+                                        stream);
+  return output_tensor;
+}
+
+torch::Tensor WholeMemoryGatherColumnsChunkedCUDA(const torch::Tensor &indice,
+                                                  const torch::Tensor &columns,
+                                                  int64_t pparameter,
+                                                  torch::ScalarType output_scalar_type) {
+  ChunkedTensor &parameter = *((ChunkedTensor *) pparameter);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  c10::ScalarType param_type = parameter.dtype().toScalarType();
+  CheckGatherColumnsArgs(indice, columns, parameter.dim(), param_type);
+  int64_t indice_count = indice.size(0);
+  int64_t column_count = columns.size(0);
+  int64_t embedding_stride = parameter.stride(0);
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  auto to = torch::TensorOptions().device(indice.device()).dtype(output_scalar_type);
+  torch::Tensor output_tensor = torch::empty({indice_count, column_count}, to);
+  whole_graph::WholeChunkedMemory_t wcmt = parameter.GetChunkedMemory();
+  whole_graph::WholeMemoryChunkedGatherColumns(whole_graph::pytorch::C10ScalarToWMType(output_scalar_type),
+                                               whole_graph::pytorch::C10ScalarToWMType(param_type),
+                                               whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                               output_tensor.data_ptr(),
+                                               wcmt,
+                                               indice.data_ptr(),
+                                               columns.data_ptr<int>(),
+                                               parameter.storage_offset(),
+                                               indice_count,
+                                               column_count,
+                                               embedding_stride,
+                                               column_count,
+                                               stream);
+  return output_tensor;
+}
+
+torch::Tensor WholeMemoryGatherColumnsNCCLCUDA(const torch::Tensor &indice,
+                                               const torch::Tensor &columns,
+                                               int64_t pparameter) {
+  NCCLTensor &parameter = *((NCCLTensor *) pparameter);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  c10::ScalarType param_type = parameter.dtype().toScalarType();
+  CheckGatherColumnsArgs(indice, columns, parameter.dim(), param_type);
+  int64_t indice_count = indice.size(0);
+  int64_t column_count = columns.size(0);
+  int64_t embedding_stride = parameter.stride(0);
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  torch::Device d = indice.device();
+  auto to = torch::TensorOptions().device(d).dtype(parameter.dtype());
+  torch::Tensor output_tensor = torch::empty({indice_count, column_count}, to);
+  whole_graph::WholeNCCLMemory_t wnmt = parameter.GetNCCLMemory();
+  auto cuda_fns = GetCUDAEnvFns(d);
+  whole_graph::WholeMemoryNCCLGatherColumns(whole_graph::pytorch::C10ScalarToWMType(param_type),
+                                            whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                            output_tensor.data_ptr(),
+                                            wnmt,
+                                            indice.data_ptr(),
+                                            columns.data_ptr<int>(),
+                                            parameter.storage_offset(),
+                                            indice_count,
+                                            column_count,
+                                            embedding_stride,
+                                            column_count,
+                                            cuda_fns,
+                                            stream);
+  return output_tensor;
+}
+
+static void CheckPooledGatherArgs(const torch::Tensor &indice,
+                                  const torch::Tensor &offsets,
+                                  int64_t param_dim,
+                                  c10::ScalarType param_type,
+                                  torch::ScalarType output_scalar_type,
+                                  int64_t pooling_mode) {
+  TORCH_CHECK(indice.dim() == 1, "WholeMemoryPooledGatherCUDA indice dim should be 1");
+  TORCH_CHECK(indice.dtype() == torch::kInt32 || indice.dtype() == torch::kInt64,
+              "WholeMemoryPooledGatherCUDA indice dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(offsets.dim() == 1 && offsets.size(0) >= 1, "WholeMemoryPooledGatherCUDA offsets should be 1-D with bag_count + 1 elements");
+  TORCH_CHECK(offsets.dtype() == torch::kInt64, "WholeMemoryPooledGatherCUDA offsets dtype should be kInt64(kLong)");
+  TORCH_CHECK(offsets.is_contiguous(), "WholeMemoryPooledGatherCUDA offsets should be contiguous");
+  TORCH_CHECK(indice.device() == offsets.device(), "indice and offsets should have same device.");
+  TORCH_CHECK(param_dim == 2, "WholeMemoryPooledGatherCUDA parameter dim should be 2")
+  TORCH_CHECK(param_type == torch::kFloat16 || param_type == torch::kFloat32 || param_type == torch::kFloat64,
+              "WholeMemoryPooledGatherCUDA parameter dtype should be half float or double");
+  TORCH_CHECK(output_scalar_type == torch::kFloat16 || output_scalar_type == torch::kFloat32
+                  || output_scalar_type == torch::kFloat64,
+              "WholeMemoryPooledGatherCUDA output type should be half float or double");
+  TORCH_CHECK(pooling_mode == POOLING_SUM || pooling_mode == POOLING_MEAN || pooling_mode == POOLING_MAX,
+              "WholeMemoryPooledGatherCUDA pooling_mode should be 0(sum), 1(mean) or 2(max)");
+}
+
+static torch::autograd::variable_list CreatePooledGatherOutputs(torch::Device d,
+                                                                int64_t bag_count,
+                                                                int64_t embedding_dim,
+                                                                torch::ScalarType output_scalar_type,
+                                                                int64_t pooling_mode) {
+  auto to = torch::TensorOptions().device(d).dtype(output_scalar_type);
+  torch::Tensor output_tensor = torch::empty({bag_count, embedding_dim}, to);
+  auto pos_to = torch::TensorOptions().device(d).dtype(torch::kInt32);
+  torch::Tensor max_pos_tensor = pooling_mode == POOLING_MAX ? torch::empty({bag_count, embedding_dim}, pos_to)
+                                                             : torch::empty({0}, pos_to);
+  return {output_tensor, max_pos_tensor};
+}
+
+torch::autograd::variable_list WholeMemoryPooledGatherCUDA(const torch::Tensor &indice,
+                                                           const torch::Tensor &offsets,
+                                                           const torch::Tensor &parameter,
+                                                           int64_t pooling_mode,
+                                                           torch::ScalarType output_scalar_type) {
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  c10::ScalarType param_type = parameter.dtype().toScalarType();
+  CheckPooledGatherArgs(indice, offsets, parameter.dim(), param_type, output_scalar_type, pooling_mode);
+  TORCH_CHECK(indice.device() == parameter.device(), "indice and parameter should have same device.");
+  int64_t bag_count = offsets.size(0) - 1;
+  int64_t embedding_dim = parameter.size(1);
+  int64_t embedding_stride = parameter.stride(0);
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  auto outputs = CreatePooledGatherOutputs(indice.device(), bag_count, embedding_dim, output_scalar_type, pooling_mode);
+  whole_graph::WholeMemoryPooledGather(whole_graph::pytorch::C10ScalarToWMType(output_scalar_type),
+                                       whole_graph::pytorch::C10ScalarToWMType(param_type),
+                                       whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                       outputs[0].data_ptr(),
+                                       pooling_mode == POOLING_MAX ? outputs[1].data_ptr<int>() : nullptr,
+                                       parameter.data_ptr(),
+                                       indice.data_ptr(),
+                                       offsets.data_ptr<int64_t>(),
+                                       0,
+                                       bag_count,
+                                       embedding_dim,
+                                       embedding_stride,
+                                       (int) pooling_mode,
+                                       stream);
+  return outputs;
+}
+
+torch::autograd::variable_list WholeMemoryPooledGatherChunkedCUDA(const torch::Tensor &indice,
+                                                                  const torch::Tensor &offsets,
+                                                                  int64_t pparameter,
+                                                                  int64_t pooling_mode,
+                                                                  torch::ScalarType output_scalar_type) {
+  ChunkedTensor &parameter = *((ChunkedTensor *) pparameter);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  c10::ScalarType param_type = parameter.dtype().toScalarType();
+  CheckPooledGatherArgs(indice, offsets, parameter.dim(), param_type, output_scalar_type, pooling_mode);
+  int64_t bag_count = offsets.size(0) - 1;
+  int64_t embedding_dim = parameter.size(1);
+  int64_t embedding_stride = parameter.stride(0);
+  c10::ScalarType index_type = indice.dtype().toScalarType();
+  auto outputs = CreatePooledGatherOutputs(indice.device(), bag_count, embedding_dim, output_scalar_type, pooling_mode);
+  whole_graph::WholeChunkedMemory_t wcmt = parameter.GetChunkedMemory();
+  whole_graph::WholeMemoryChunkedPooledGather(whole_graph::pytorch::C10ScalarToWMType(output_scalar_type),
+                                              whole_graph::pytorch::C10ScalarToWMType(param_type),
+                                              whole_graph::pytorch::C10ScalarToWMType(index_type),
+                                              outputs[0].data_ptr(),
+                                              pooling_mode == POOLING_MAX ? outputs[1].data_ptr<int>() : nullptr,
+                                              wcmt,
+                                              indice.data_ptr(),
+                                              offsets.data_ptr<int64_t>(),
+                                              parameter.storage_offset(),
+                                              bag_count,
+                                              embedding_dim,
+                                              embedding_stride,
+                                              (int) pooling_mode,
+                                              stream);
+  return outputs;
+}
+
 void WholeMemoryScatterCUDA(const torch::Tensor &input,
                             const torch::Tensor &indice,
                             const torch::Tensor &parameter) {
@@ -312,7 +568,8 @@ void WholeMemoryScatterNCCLCUDA(const torch::Tensor &input,
 torch::autograd::variable_list WholeMemoryExchangeEmbeddingGrads(const torch::Tensor &sparse_indices,
                                                                  const torch::Tensor &sparse_grads,
                                                                  int64_t total_entry_count,
-                                                                 int64_t comm_ptr) {
+                                                                 int64_t comm_ptr,
+                                                                 torch::ScalarType wire_scalar_type) {
   cudaStream_t stream = at::cuda::getCurrentCUDAStream();
   auto *bcomm = (whole_graph::BootstrapCommunicator *) comm_ptr;
   TORCH_CHECK(sparse_indices.dim() == 1, "WholeMemoryExchangeEmbeddingGrads indice dim should be 1");
@@ -325,6 +582,9 @@ torch::autograd::variable_list WholeMemoryExchangeEmbeddingGrads(const torch::Te
       sparse_grads.dtype() == torch::kFloat16 || sparse_grads.dtype() == torch::kFloat32
           || sparse_grads.dtype() == torch::kFloat64,
       "WholeMemoryExchangeEmbeddingGrads sparse_grads dtype not supported");
+  TORCH_CHECK(wire_scalar_type == sparse_grads.dtype().toScalarType() || wire_scalar_type == torch::kFloat16
+                  || wire_scalar_type == torch::kBFloat16 || wire_scalar_type == torch::kInt8,
+              "WholeMemoryExchangeEmbeddingGrads wire_scalar_type should be sparse_grads dtype, kFloat16, kBFloat16 or kInt8");
   TORCH_CHECK(sparse_indices.device() == sparse_grads.device(), "sparse_indices and sparse_grads should have same device.");
   int64_t embedding_dim = sparse_grads.size(1);
   int64_t embedding_stride = sparse_grads.stride(0);
@@ -337,6 +597,7 @@ torch::autograd::variable_list WholeMemoryExchangeEmbeddingGrads(const torch::Te
   auto local_grad_allocator = GetAllocatorForTensor<void>(local_grad_tensor, d, grad_type, false);
   whole_graph::WholeMemoryExchangeEmbeddingGrads(whole_graph::pytorch::C10ScalarToWMType(index_type),
                                                  whole_graph::pytorch::C10ScalarToWMType(grad_type),
+                                                 whole_graph::pytorch::C10ScalarToWMType(wire_scalar_type),
                                                  local_indice_allocator,
                                                  local_grad_allocator,
                                                  sparse_indices.data_ptr(),
@@ -362,6 +623,12 @@ static auto registry = torch::RegisterOperators()
                            .op("wholegraph::gather_chunked_need_grad", &whole_graph::pytorch::WholeMemoryGatherChunkedCUDAGrad)
                            .op("wholegraph::gather_nccl", &whole_graph::pytorch::WholeMemoryGatherNCCLCUDANoGrad)
                            .op("wholegraph::gather_nccl_need_grad", &whole_graph::pytorch::WholeMemoryGatherNCCLCUDAGrad)
+                           .op("wholegraph::grouped_gather_nccl", &whole_graph::pytorch::WholeMemoryGroupedGatherNCCLCUDA)
+                           .op("wholegraph::gather_columns", &whole_graph::pytorch::WholeMemoryGatherColumnsCUDA)
+                           .op("wholegraph::gather_columns_chunked", &whole_graph::pytorch::WholeMemoryGatherColumnsChunkedCUDA)
+                           .op("wholegraph::gather_columns_nccl", &whole_graph::pytorch::WholeMemoryGatherColumnsNCCLCUDA)
+                           .op("wholegraph::pooled_gather", &whole_graph::pytorch::WholeMemoryPooledGatherCUDA)
+                           .op("wholegraph::pooled_gather_chunked", &whole_graph::pytorch::WholeMemoryPooledGatherChunkedCUDA)
                            .op("wholegraph::scatter", &whole_graph::pytorch::WholeMemoryScatterCUDA)
                            .op("wholegraph::scatter_chunked", &whole_graph::pytorch::WholeMemoryScatterChunkedCUDA)
                            .op("wholegraph::scatter_nccl", &whole_graph::pytorch::WholeMemoryScatterNCCLCUDA)
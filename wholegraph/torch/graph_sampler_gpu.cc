@@ -115,6 +115,85 @@ variable_list UnweightedSampleWithoutReplacementChunkedCUDA(torch::Tensor input_
   return {sample_offset_tensor, sample_output, center_localid};
 }
 
+variable_list UnweightedSampleWithReplacementCUDA(torch::Tensor input_nodes,
+                                                  torch::Tensor csr_row_ptr,
+                                                  torch::Tensor csr_col_ind,
+                                                  int64_t max_sample_count) {
+  TORCH_CHECK(input_nodes.dim() == 1, "UnweightedSampleWithReplacementCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "UnweightedSampleWithReplacementCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "UnweightedSampleWithReplacementCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "UnweightedSampleWithReplacementCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "UnweightedSampleWithReplacementCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "UnweightedSampleWithReplacementCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(max_sample_count > 0, "UnweightedSampleWithReplacementCUDA max_sample_count should be larger than 0");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  WmmpUnweightedSampleWithReplacement(sample_output_allocator,
+                                      center_localid_allocator,
+                                      sample_offset_tensor.data_ptr<int>(),
+                                      csr_row_ptr.data_ptr(),
+                                      csr_col_ind.data_ptr(),
+                                      C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                                      input_nodes.data_ptr(),
+                                      input_node_count,
+                                      max_sample_count,
+                                      GetCUDAEnvFns(d),
+                                      stream);
+  return {sample_offset_tensor, sample_output, center_localid};
+}
+
+variable_list UnweightedSampleWithReplacementChunkedCUDA(torch::Tensor input_nodes,
+                                                         int64_t pcsr_row_ptr,
+                                                         int64_t pcsr_col_ind,
+                                                         int64_t max_sample_count) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  TORCH_CHECK(input_nodes.dim() == 1, "UnweightedSampleWithReplacementChunkedCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "UnweightedSampleWithReplacementChunkedCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "UnweightedSampleWithReplacementChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "UnweightedSampleWithReplacementChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "UnweightedSampleWithReplacementChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "UnweightedSampleWithReplacementChunkedCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0,
+              "UnweightedSampleWithReplacementChunkedCUDA tensor should have 0 storage_offset.");
+  TORCH_CHECK(max_sample_count > 0,
+              "UnweightedSampleWithReplacementChunkedCUDA max_sample_count should be larger than 0");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  WmmpChunkedUnweightedSampleWithReplacement(sample_output_allocator,
+                                             center_localid_allocator,
+                                             sample_offset_tensor.data_ptr<int>(),
+                                             csr_row_ptr.GetChunkedMemory(),
+                                             csr_col_ind.GetChunkedMemory(),
+                                             C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                                             input_nodes.data_ptr(),
+                                             input_node_count,
+                                             max_sample_count,
+                                             GetCUDAEnvFns(d),
+                                             stream);
+  return {sample_offset_tensor, sample_output, center_localid};
+}
+
 // Input:
 //      target and neighbor
 // Output:
@@ -349,6 +428,34 @@ torch::Tensor PerSourceUniformNegativeSampleChunked(torch::Tensor input_nodes,
   return negative_sample_output;
 }
 
+torch::Tensor GetCSRDegreeCUDA(torch::Tensor csr_row_ptr, int64_t start_node, int64_t node_count) {
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "GetCSRDegreeCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "GetCSRDegreeCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(start_node >= 0 && node_count >= 0 && start_node + node_count < csr_row_ptr.size(0),
+              "GetCSRDegreeCUDA node range out of csr_row_ptr");
+  torch::Device d = csr_row_ptr.device();
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt64).requires_grad(false);
+  torch::Tensor degree = torch::empty({(long) node_count}, to);
+  WmmpGetCSRDegree(degree.data_ptr<int64_t>(), csr_row_ptr.data_ptr(), start_node, node_count, stream);
+  return degree;
+}
+
+torch::Tensor GetCSRDegreeChunkedCUDA(int64_t pcsr_row_ptr, int64_t start_node, int64_t node_count) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "GetCSRDegreeChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "GetCSRDegreeChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(start_node >= 0 && node_count >= 0 && start_node + node_count < csr_row_ptr.size(0),
+              "GetCSRDegreeChunkedCUDA node range out of csr_row_ptr");
+  torch::Device d(torch::kCUDA, c10::cuda::current_device());
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt64).requires_grad(false);
+  torch::Tensor degree = torch::empty({(long) node_count}, to);
+  WmmpChunkedGetCSRDegree(degree.data_ptr<int64_t>(), csr_row_ptr.GetChunkedMemory(), start_node, node_count, stream);
+  return degree;
+}
+
 torch::Tensor GetCSRMixedSubGraphEdgeTypes(const torch::Tensor &src_mixid,
                                            const torch::Tensor &sub_graph_csr_row_ptr,
                                            const torch::Tensor &sub_graph_csr_col_mixid,
@@ -655,6 +762,560 @@ variable_list WeightedSampleWithoutReplacementChunkedCUDA(torch::Tensor input_no
   return {sample_offset_tensor, sample_output, center_localid};
 }
 
+void BuildAliasTableCUDA(torch::Tensor csr_row_ptr,
+                         torch::Tensor csr_weight_ptr,
+                         torch::Tensor alias_prob,
+                         torch::Tensor alias_idx,
+                         int64_t start_node,
+                         int64_t node_count) {
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "BuildAliasTableCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "BuildAliasTableCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_weight_ptr.dim() == 1, "BuildAliasTableCUDA csr_weight_ptr dim should be 1");
+  TORCH_CHECK(csr_weight_ptr.dtype() == torch::kFloat32 || csr_weight_ptr.dtype() == torch::kFloat64,
+              "BuildAliasTableCUDA csr_weight_ptr dtype should be kFloat32(kFloat) or kFloat64(kDouble)");
+  TORCH_CHECK(alias_prob.dim() == 1 && alias_prob.dtype() == csr_weight_ptr.dtype(),
+              "BuildAliasTableCUDA alias_prob should be 1D tensor of same dtype as csr_weight_ptr");
+  TORCH_CHECK(alias_idx.dim() == 1 && alias_idx.dtype() == torch::kInt32,
+              "BuildAliasTableCUDA alias_idx should be 1D kInt32 tensor");
+  TORCH_CHECK(alias_prob.size(0) == csr_weight_ptr.size(0) && alias_idx.size(0) == csr_weight_ptr.size(0),
+              "BuildAliasTableCUDA alias_prob and alias_idx size should be equal to csr_weight_ptr size");
+  TORCH_CHECK(start_node >= 0 && start_node + node_count < csr_row_ptr.size(0),
+              "BuildAliasTableCUDA node range out of csr_row_ptr");
+  torch::Device d = csr_row_ptr.device();
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  WmmpBuildAliasTable(csr_row_ptr.data_ptr(),
+                      csr_weight_ptr.data_ptr(),
+                      alias_prob.data_ptr(),
+                      alias_idx.data_ptr(),
+                      C10ScalarToWMType(csr_weight_ptr.dtype().toScalarType()),
+                      start_node,
+                      node_count,
+                      GetCUDAEnvFns(d),
+                      stream);
+}
+
+void BuildAliasTableChunkedCUDA(int64_t pcsr_row_ptr,
+                                int64_t pcsr_weight_ptr,
+                                int64_t palias_prob,
+                                int64_t palias_idx,
+                                int64_t start_node,
+                                int64_t node_count) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_weight_ptr = *((ChunkedTensor *) pcsr_weight_ptr);
+  ChunkedTensor &alias_prob = *((ChunkedTensor *) palias_prob);
+  ChunkedTensor &alias_idx = *((ChunkedTensor *) palias_idx);
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "BuildAliasTableChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "BuildAliasTableChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_weight_ptr.dim() == 1, "BuildAliasTableChunkedCUDA csr_weight_ptr dim should be 1");
+  TORCH_CHECK(csr_weight_ptr.dtype() == torch::kFloat32 || csr_weight_ptr.dtype() == torch::kFloat64,
+              "BuildAliasTableChunkedCUDA csr_weight_ptr dtype should be kFloat32(kFloat) or kFloat64(kDouble)");
+  TORCH_CHECK(alias_prob.dim() == 1 && alias_prob.dtype() == csr_weight_ptr.dtype(),
+              "BuildAliasTableChunkedCUDA alias_prob should be 1D tensor of same dtype as csr_weight_ptr");
+  TORCH_CHECK(alias_idx.dim() == 1 && alias_idx.dtype() == torch::kInt32,
+              "BuildAliasTableChunkedCUDA alias_idx should be 1D kInt32 tensor");
+  TORCH_CHECK(alias_prob.size(0) == csr_weight_ptr.size(0) && alias_idx.size(0) == csr_weight_ptr.size(0),
+              "BuildAliasTableChunkedCUDA alias_prob and alias_idx size should be equal to csr_weight_ptr size");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_weight_ptr.storage_offset() == 0
+                  && alias_prob.storage_offset() == 0 && alias_idx.storage_offset() == 0,
+              "BuildAliasTableChunkedCUDA tensor should have 0 storage_offset.");
+  TORCH_CHECK(start_node >= 0 && start_node + node_count < csr_row_ptr.size(0),
+              "BuildAliasTableChunkedCUDA node range out of csr_row_ptr");
+  torch::Device d(torch::kCUDA, c10::cuda::current_device());
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  WmmpChunkedBuildAliasTable(csr_row_ptr.GetChunkedMemory(),
+                             csr_weight_ptr.GetChunkedMemory(),
+                             alias_prob.GetChunkedMemory(),
+                             alias_idx.GetChunkedMemory(),
+                             C10ScalarToWMType(csr_weight_ptr.dtype().toScalarType()),
+                             start_node,
+                             node_count,
+                             GetCUDAEnvFns(d),
+                             stream);
+}
+
+variable_list AliasWeightedSampleCUDA(torch::Tensor input_nodes,
+                                      torch::Tensor csr_row_ptr,
+                                      torch::Tensor csr_col_ind,
+                                      torch::Tensor alias_prob,
+                                      torch::Tensor alias_idx,
+                                      int64_t max_sample_count,
+                                      bool with_replacement) {
+  TORCH_CHECK(input_nodes.dim() == 1, "AliasWeightedSampleCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "AliasWeightedSampleCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "AliasWeightedSampleCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "AliasWeightedSampleCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "AliasWeightedSampleCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "AliasWeightedSampleCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(alias_prob.dim() == 1
+                  && (alias_prob.dtype() == torch::kFloat32 || alias_prob.dtype() == torch::kFloat64),
+              "AliasWeightedSampleCUDA alias_prob should be 1D kFloat32(kFloat) or kFloat64(kDouble) tensor");
+  TORCH_CHECK(alias_idx.dim() == 1 && alias_idx.dtype() == torch::kInt32,
+              "AliasWeightedSampleCUDA alias_idx should be 1D kInt32 tensor");
+  TORCH_CHECK(alias_prob.size(0) == csr_col_ind.size(0) && alias_idx.size(0) == csr_col_ind.size(0),
+              "AliasWeightedSampleCUDA alias_prob and alias_idx size should be equal to csr_col_ind size");
+  TORCH_CHECK(max_sample_count > 0, "AliasWeightedSampleCUDA max_sample_count should be larger than 0");
+  TORCH_CHECK(with_replacement || max_sample_count <= 64,
+              "AliasWeightedSampleCUDA max_sample_count should be no larger than 64 for sampling without replacement");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  WmmpAliasWeightedSample(sample_output_allocator,
+                          center_localid_allocator,
+                          sample_offset_tensor.data_ptr<int>(),
+                          csr_row_ptr.data_ptr(),
+                          csr_col_ind.data_ptr(),
+                          alias_prob.data_ptr(),
+                          alias_idx.data_ptr(),
+                          C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                          C10ScalarToWMType(alias_prob.dtype().toScalarType()),
+                          input_nodes.data_ptr(),
+                          input_node_count,
+                          max_sample_count,
+                          with_replacement,
+                          GetCUDAEnvFns(d),
+                          stream);
+  return {sample_offset_tensor, sample_output, center_localid};
+}
+
+variable_list AliasWeightedSampleChunkedCUDA(torch::Tensor input_nodes,
+                                             int64_t pcsr_row_ptr,
+                                             int64_t pcsr_col_ind,
+                                             int64_t palias_prob,
+                                             int64_t palias_idx,
+                                             int64_t max_sample_count,
+                                             bool with_replacement) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  ChunkedTensor &alias_prob = *((ChunkedTensor *) palias_prob);
+  ChunkedTensor &alias_idx = *((ChunkedTensor *) palias_idx);
+  TORCH_CHECK(input_nodes.dim() == 1, "AliasWeightedSampleChunkedCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "AliasWeightedSampleChunkedCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "AliasWeightedSampleChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "AliasWeightedSampleChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "AliasWeightedSampleChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "AliasWeightedSampleChunkedCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(alias_prob.dim() == 1
+                  && (alias_prob.dtype() == torch::kFloat32 || alias_prob.dtype() == torch::kFloat64),
+              "AliasWeightedSampleChunkedCUDA alias_prob should be 1D kFloat32(kFloat) or kFloat64(kDouble) tensor");
+  TORCH_CHECK(alias_idx.dim() == 1 && alias_idx.dtype() == torch::kInt32,
+              "AliasWeightedSampleChunkedCUDA alias_idx should be 1D kInt32 tensor");
+  TORCH_CHECK(alias_prob.size(0) == csr_col_ind.size(0) && alias_idx.size(0) == csr_col_ind.size(0),
+              "AliasWeightedSampleChunkedCUDA alias_prob and alias_idx size should be equal to csr_col_ind size");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0
+                  && alias_prob.storage_offset() == 0 && alias_idx.storage_offset() == 0,
+              "AliasWeightedSampleChunkedCUDA tensor should have 0 storage_offset.");
+  TORCH_CHECK(max_sample_count > 0, "AliasWeightedSampleChunkedCUDA max_sample_count should be larger than 0");
+  TORCH_CHECK(with_replacement || max_sample_count <= 64,
+              "AliasWeightedSampleChunkedCUDA max_sample_count should be no larger than 64 for sampling without replacement");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  WmmpChunkedAliasWeightedSample(sample_output_allocator,
+                                 center_localid_allocator,
+                                 sample_offset_tensor.data_ptr<int>(),
+                                 csr_row_ptr.GetChunkedMemory(),
+                                 csr_col_ind.GetChunkedMemory(),
+                                 alias_prob.GetChunkedMemory(),
+                                 alias_idx.GetChunkedMemory(),
+                                 C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                                 C10ScalarToWMType(alias_prob.dtype().toScalarType()),
+                                 input_nodes.data_ptr(),
+                                 input_node_count,
+                                 max_sample_count,
+                                 with_replacement,
+                                 GetCUDAEnvFns(d),
+                                 stream);
+  return {sample_offset_tensor, sample_output, center_localid};
+}
+
+variable_list TypedSampleWithoutReplacementCUDA(torch::Tensor input_nodes,
+                                                torch::Tensor csr_row_ptr,
+                                                torch::Tensor csr_col_ind,
+                                                torch::Tensor csr_edge_type,
+                                                torch::Tensor type_max_sample_count) {
+  TORCH_CHECK(input_nodes.dim() == 1, "TypedSampleWithoutReplacementCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "TypedSampleWithoutReplacementCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "TypedSampleWithoutReplacementCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "TypedSampleWithoutReplacementCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "TypedSampleWithoutReplacementCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "TypedSampleWithoutReplacementCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(csr_edge_type.dim() == 1 && csr_edge_type.dtype() == torch::kInt8,
+              "TypedSampleWithoutReplacementCUDA csr_edge_type should be 1D kInt8 tensor");
+  TORCH_CHECK(csr_edge_type.size(0) == csr_col_ind.size(0),
+              "TypedSampleWithoutReplacementCUDA csr_edge_type should be same length as csr_col_ind");
+  TORCH_CHECK(type_max_sample_count.dim() == 1 && type_max_sample_count.dtype() == torch::kInt32,
+              "TypedSampleWithoutReplacementCUDA type_max_sample_count should be 1D kInt32 tensor");
+  TORCH_CHECK(type_max_sample_count.size(0) > 0 && type_max_sample_count.size(0) <= 64,
+              "TypedSampleWithoutReplacementCUDA edge type count should be in [1, 64]");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor type_max_sample_count_d = type_max_sample_count.to(d).contiguous();
+  torch::Tensor sample_output, center_localid, sample_edge_type;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  auto sample_edge_type_allocator = GetAllocatorForTensor<void>(sample_edge_type, d, torch::kInt8, false);
+  WmmpTypedSampleWithoutReplacement(sample_output_allocator,
+                                    center_localid_allocator,
+                                    sample_edge_type_allocator,
+                                    sample_offset_tensor.data_ptr<int>(),
+                                    csr_row_ptr.data_ptr(),
+                                    csr_col_ind.data_ptr(),
+                                    csr_edge_type.data_ptr(),
+                                    C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                                    input_nodes.data_ptr(),
+                                    input_node_count,
+                                    type_max_sample_count_d.data_ptr<int>(),
+                                    type_max_sample_count_d.size(0),
+                                    GetCUDAEnvFns(d),
+                                    stream);
+  return {sample_offset_tensor, sample_output, center_localid, sample_edge_type};
+}
+
+variable_list TypedSampleWithoutReplacementChunkedCUDA(torch::Tensor input_nodes,
+                                                       int64_t pcsr_row_ptr,
+                                                       int64_t pcsr_col_ind,
+                                                       int64_t pcsr_edge_type,
+                                                       torch::Tensor type_max_sample_count) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  ChunkedTensor &csr_edge_type = *((ChunkedTensor *) pcsr_edge_type);
+  TORCH_CHECK(input_nodes.dim() == 1, "TypedSampleWithoutReplacementChunkedCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "TypedSampleWithoutReplacementChunkedCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "TypedSampleWithoutReplacementChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "TypedSampleWithoutReplacementChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "TypedSampleWithoutReplacementChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "TypedSampleWithoutReplacementChunkedCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(csr_edge_type.dim() == 1 && csr_edge_type.dtype() == torch::kInt8,
+              "TypedSampleWithoutReplacementChunkedCUDA csr_edge_type should be 1D kInt8 tensor");
+  TORCH_CHECK(csr_edge_type.size(0) == csr_col_ind.size(0),
+              "TypedSampleWithoutReplacementChunkedCUDA csr_edge_type should be same length as csr_col_ind");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0
+                  && csr_edge_type.storage_offset() == 0,
+              "TypedSampleWithoutReplacementChunkedCUDA tensor should have 0 storage_offset.");
+  TORCH_CHECK(type_max_sample_count.dim() == 1 && type_max_sample_count.dtype() == torch::kInt32,
+              "TypedSampleWithoutReplacementChunkedCUDA type_max_sample_count should be 1D kInt32 tensor");
+  TORCH_CHECK(type_max_sample_count.size(0) > 0 && type_max_sample_count.size(0) <= 64,
+              "TypedSampleWithoutReplacementChunkedCUDA edge type count should be in [1, 64]");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor type_max_sample_count_d = type_max_sample_count.to(d).contiguous();
+  torch::Tensor sample_output, center_localid, sample_edge_type;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  auto sample_edge_type_allocator = GetAllocatorForTensor<void>(sample_edge_type, d, torch::kInt8, false);
+  WmmpChunkedTypedSampleWithoutReplacement(sample_output_allocator,
+                                           center_localid_allocator,
+                                           sample_edge_type_allocator,
+                                           sample_offset_tensor.data_ptr<int>(),
+                                           csr_row_ptr.GetChunkedMemory(),
+                                           csr_col_ind.GetChunkedMemory(),
+                                           csr_edge_type.GetChunkedMemory(),
+                                           C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                                           input_nodes.data_ptr(),
+                                           input_node_count,
+                                           type_max_sample_count_d.data_ptr<int>(),
+                                           type_max_sample_count_d.size(0),
+                                           GetCUDAEnvFns(d),
+                                           stream);
+  return {sample_offset_tensor, sample_output, center_localid, sample_edge_type};
+}
+
+variable_list TemporalSampleCUDA(torch::Tensor input_nodes,
+                                 torch::Tensor query_time,
+                                 torch::Tensor csr_row_ptr,
+                                 torch::Tensor csr_col_ind,
+                                 torch::Tensor edge_time,
+                                 int64_t max_sample_count,
+                                 double window,
+                                 bool include_query_time,
+                                 bool most_recent) {
+  TORCH_CHECK(input_nodes.dim() == 1, "TemporalSampleCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "TemporalSampleCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(query_time.dim() == 1 && query_time.size(0) == input_nodes.size(0),
+              "TemporalSampleCUDA query_time should be 1D and same length as input_nodes");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "TemporalSampleCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "TemporalSampleCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "TemporalSampleCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "TemporalSampleCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(edge_time.dim() == 1 && edge_time.size(0) == csr_col_ind.size(0),
+              "TemporalSampleCUDA edge_time should be 1D and same length as csr_col_ind");
+  TORCH_CHECK(edge_time.dtype() == torch::kInt32 || edge_time.dtype() == torch::kInt64
+                  || edge_time.dtype() == torch::kFloat32 || edge_time.dtype() == torch::kFloat64,
+              "TemporalSampleCUDA edge_time dtype should be kInt32, kInt64, kFloat32 or kFloat64");
+  TORCH_CHECK(query_time.dtype() == edge_time.dtype(),
+              "TemporalSampleCUDA query_time and edge_time should have same type");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid, sample_time;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  auto sample_time_allocator = GetAllocatorForTensor<void>(sample_time, d, edge_time.dtype().toScalarType(), false);
+  WmmpTemporalSample(sample_output_allocator,
+                     center_localid_allocator,
+                     sample_time_allocator,
+                     sample_offset_tensor.data_ptr<int>(),
+                     csr_row_ptr.data_ptr(),
+                     csr_col_ind.data_ptr(),
+                     edge_time.data_ptr(),
+                     C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                     C10ScalarToWMType(edge_time.dtype().toScalarType()),
+                     input_nodes.data_ptr(),
+                     query_time.data_ptr(),
+                     input_node_count,
+                     window,
+                     include_query_time,
+                     max_sample_count,
+                     most_recent,
+                     GetCUDAEnvFns(d),
+                     stream);
+  return {sample_offset_tensor, sample_output, center_localid, sample_time};
+}
+
+variable_list TemporalSampleChunkedCUDA(torch::Tensor input_nodes,
+                                        torch::Tensor query_time,
+                                        int64_t pcsr_row_ptr,
+                                        int64_t pcsr_col_ind,
+                                        int64_t pedge_time,
+                                        int64_t max_sample_count,
+                                        double window,
+                                        bool include_query_time,
+                                        bool most_recent) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  ChunkedTensor &edge_time = *((ChunkedTensor *) pedge_time);
+  TORCH_CHECK(input_nodes.dim() == 1, "TemporalSampleChunkedCUDA input_nodes dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == torch::kInt32 || input_nodes.dtype() == torch::kInt64,
+              "TemporalSampleChunkedCUDA input_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(query_time.dim() == 1 && query_time.size(0) == input_nodes.size(0),
+              "TemporalSampleChunkedCUDA query_time should be 1D and same length as input_nodes");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "TemporalSampleChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "TemporalSampleChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "TemporalSampleChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(input_nodes.dtype() == csr_col_ind.dtype(),
+              "TemporalSampleChunkedCUDA input_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(edge_time.dim() == 1 && edge_time.size(0) == csr_col_ind.size(0),
+              "TemporalSampleChunkedCUDA edge_time should be 1D and same length as csr_col_ind");
+  TORCH_CHECK(edge_time.dtype() == torch::kInt32 || edge_time.dtype() == torch::kInt64
+                  || edge_time.dtype() == torch::kFloat32 || edge_time.dtype() == torch::kFloat64,
+              "TemporalSampleChunkedCUDA edge_time dtype should be kInt32, kInt64, kFloat32 or kFloat64");
+  TORCH_CHECK(query_time.dtype() == edge_time.dtype(),
+              "TemporalSampleChunkedCUDA query_time and edge_time should have same type");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0
+                  && edge_time.storage_offset() == 0,
+              "TemporalSampleChunkedCUDA tensor should have 0 storage_offset.");
+  int64_t input_node_count = input_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = input_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kInt).requires_grad(false);
+  torch::Tensor sample_offset_tensor = torch::empty({(long) (input_node_count + 1)}, to);
+  torch::Tensor sample_output, center_localid, sample_time;
+  auto sample_output_allocator =
+      GetAllocatorForTensor<void>(sample_output, d, input_nodes.dtype().toScalarType(), false);
+  auto center_localid_allocator = GetAllocatorForTensor<void>(center_localid, d, torch::kInt32, false);
+  auto sample_time_allocator = GetAllocatorForTensor<void>(sample_time, d, edge_time.dtype().toScalarType(), false);
+  WmmpChunkedTemporalSample(sample_output_allocator,
+                            center_localid_allocator,
+                            sample_time_allocator,
+                            sample_offset_tensor.data_ptr<int>(),
+                            csr_row_ptr.GetChunkedMemory(),
+                            csr_col_ind.GetChunkedMemory(),
+                            edge_time.GetChunkedMemory(),
+                            C10ScalarToWMType(input_nodes.dtype().toScalarType()),
+                            C10ScalarToWMType(edge_time.dtype().toScalarType()),
+                            input_nodes.data_ptr(),
+                            query_time.data_ptr(),
+                            input_node_count,
+                            window,
+                            include_query_time,
+                            max_sample_count,
+                            most_recent,
+                            GetCUDAEnvFns(d),
+                            stream);
+  return {sample_offset_tensor, sample_output, center_localid, sample_time};
+}
+
+torch::Tensor RandomWalk(torch::Tensor start_nodes,
+                         torch::Tensor csr_row_ptr,
+                         torch::Tensor csr_col_ind,
+                         const c10::optional<torch::Tensor> &alias_prob,
+                         const c10::optional<torch::Tensor> &alias_idx,
+                         int64_t walk_length,
+                         double p,
+                         double q) {
+  TORCH_CHECK(start_nodes.dim() == 1, "RandomWalk start_nodes dim should be 1");
+  TORCH_CHECK(start_nodes.dtype() == torch::kInt32 || start_nodes.dtype() == torch::kInt64,
+              "RandomWalk start_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "RandomWalk csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "RandomWalk csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "RandomWalk csr_col_ind dim should be 1");
+  TORCH_CHECK(start_nodes.dtype() == csr_col_ind.dtype(),
+              "RandomWalk start_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(alias_prob.has_value() == alias_idx.has_value(),
+              "RandomWalk alias_prob and alias_idx should be both given or both None");
+  TORCH_CHECK(walk_length > 0, "RandomWalk walk_length should be larger than 0");
+  TORCH_CHECK(p > 0 && q > 0, "RandomWalk p and q should be larger than 0");
+  bool is_host = start_nodes.device().is_cpu();
+  TORCH_CHECK(csr_row_ptr.device().is_cpu() == is_host && csr_col_ind.device().is_cpu() == is_host,
+              "RandomWalk start_nodes and CSR should be all on host or all on device");
+  void *alias_prob_ptr = nullptr;
+  void *alias_idx_ptr = nullptr;
+  auto weight_type = WMT_Float;
+  if (alias_prob.has_value()) {
+    TORCH_CHECK(alias_prob->dim() == 1
+                    && (alias_prob->dtype() == torch::kFloat32 || alias_prob->dtype() == torch::kFloat64),
+                "RandomWalk alias_prob should be 1D kFloat32(kFloat) or kFloat64(kDouble) tensor");
+    TORCH_CHECK(alias_idx->dim() == 1 && alias_idx->dtype() == torch::kInt32,
+                "RandomWalk alias_idx should be 1D kInt32 tensor");
+    TORCH_CHECK(alias_prob->size(0) == csr_col_ind.size(0) && alias_idx->size(0) == csr_col_ind.size(0),
+                "RandomWalk alias_prob and alias_idx size should be equal to csr_col_ind size");
+    TORCH_CHECK(alias_prob->device().is_cpu() == is_host && alias_idx->device().is_cpu() == is_host,
+                "RandomWalk alias table should be on the same side as CSR");
+    alias_prob_ptr = alias_prob->data_ptr();
+    alias_idx_ptr = alias_idx->data_ptr();
+    weight_type = C10ScalarToWMType(alias_prob->dtype().toScalarType());
+  }
+  int64_t start_node_count = start_nodes.size(0);
+  torch::Device d = start_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(start_nodes.dtype()).requires_grad(false);
+  torch::Tensor walk_output = torch::empty({(long) start_node_count, (long) (walk_length + 1)}, to);
+  if (is_host) {
+    WmmpHostRandomWalk(walk_output.data_ptr(),
+                       csr_row_ptr.data_ptr(),
+                       csr_col_ind.data_ptr(),
+                       alias_prob_ptr,
+                       alias_idx_ptr,
+                       C10ScalarToWMType(start_nodes.dtype().toScalarType()),
+                       weight_type,
+                       start_nodes.data_ptr(),
+                       start_node_count,
+                       walk_length,
+                       (float) p,
+                       (float) q,
+                       0);
+  } else {
+    cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+    WmmpRandomWalk(walk_output.data_ptr(),
+                   csr_row_ptr.data_ptr(),
+                   csr_col_ind.data_ptr(),
+                   alias_prob_ptr,
+                   alias_idx_ptr,
+                   C10ScalarToWMType(start_nodes.dtype().toScalarType()),
+                   weight_type,
+                   start_nodes.data_ptr(),
+                   start_node_count,
+                   walk_length,
+                   (float) p,
+                   (float) q,
+                   GetCUDAEnvFns(d),
+                   stream);
+  }
+  return walk_output;
+}
+
+torch::Tensor RandomWalkChunkedCUDA(torch::Tensor start_nodes,
+                                    int64_t pcsr_row_ptr,
+                                    int64_t pcsr_col_ind,
+                                    int64_t palias_prob,
+                                    int64_t palias_idx,
+                                    int64_t walk_length,
+                                    double p,
+                                    double q) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  TORCH_CHECK(start_nodes.dim() == 1, "RandomWalkChunkedCUDA start_nodes dim should be 1");
+  TORCH_CHECK(start_nodes.dtype() == torch::kInt32 || start_nodes.dtype() == torch::kInt64,
+              "RandomWalkChunkedCUDA start_nodes dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "RandomWalkChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64, "RandomWalkChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "RandomWalkChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(start_nodes.dtype() == csr_col_ind.dtype(),
+              "RandomWalkChunkedCUDA start_nodes and csr_col_ind should have same type");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0,
+              "RandomWalkChunkedCUDA tensor should have 0 storage_offset.");
+  TORCH_CHECK((palias_prob == 0) == (palias_idx == 0),
+              "RandomWalkChunkedCUDA alias_prob and alias_idx should be both given or both None");
+  TORCH_CHECK(walk_length > 0, "RandomWalkChunkedCUDA walk_length should be larger than 0");
+  TORCH_CHECK(p > 0 && q > 0, "RandomWalkChunkedCUDA p and q should be larger than 0");
+  void *alias_prob_ptr = nullptr;
+  void *alias_idx_ptr = nullptr;
+  auto weight_type = WMT_Float;
+  if (palias_prob != 0) {
+    ChunkedTensor &alias_prob = *((ChunkedTensor *) palias_prob);
+    ChunkedTensor &alias_idx = *((ChunkedTensor *) palias_idx);
+    TORCH_CHECK(alias_prob.dim() == 1
+                    && (alias_prob.dtype() == torch::kFloat32 || alias_prob.dtype() == torch::kFloat64),
+                "RandomWalkChunkedCUDA alias_prob should be 1D kFloat32(kFloat) or kFloat64(kDouble) tensor");
+    TORCH_CHECK(alias_idx.dim() == 1 && alias_idx.dtype() == torch::kInt32,
+                "RandomWalkChunkedCUDA alias_idx should be 1D kInt32 tensor");
+    TORCH_CHECK(alias_prob.size(0) == csr_col_ind.size(0) && alias_idx.size(0) == csr_col_ind.size(0),
+                "RandomWalkChunkedCUDA alias_prob and alias_idx size should be equal to csr_col_ind size");
+    TORCH_CHECK(alias_prob.storage_offset() == 0 && alias_idx.storage_offset() == 0,
+                "RandomWalkChunkedCUDA tensor should have 0 storage_offset.");
+    alias_prob_ptr = alias_prob.GetChunkedMemory();
+    alias_idx_ptr = alias_idx.GetChunkedMemory();
+    weight_type = C10ScalarToWMType(alias_prob.dtype().toScalarType());
+  }
+  int64_t start_node_count = start_nodes.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = start_nodes.device();
+  auto to = torch::TensorOptions().device(d).dtype(start_nodes.dtype()).requires_grad(false);
+  torch::Tensor walk_output = torch::empty({(long) start_node_count, (long) (walk_length + 1)}, to);
+  WmmpChunkedRandomWalk(walk_output.data_ptr(),
+                        csr_row_ptr.GetChunkedMemory(),
+                        csr_col_ind.GetChunkedMemory(),
+                        alias_prob_ptr,
+                        alias_idx_ptr,
+                        C10ScalarToWMType(start_nodes.dtype().toScalarType()),
+                        weight_type,
+                        start_nodes.data_ptr(),
+                        start_node_count,
+                        walk_length,
+                        (float) p,
+                        (float) q,
+                        GetCUDAEnvFns(d),
+                        stream);
+  return walk_output;
+}
+
 variable_list ExtractSubGraphWithFilter(const torch::Tensor &target_gid,
                                         const torch::Tensor &filter_target_value,
                                         const torch::Tensor &edges_csr_row,
@@ -790,6 +1451,76 @@ variable_list ExtractSubGraphWithFilterChunked(torch::Tensor target_gid,
   }
 }
 
+variable_list ExtractInducedSubGraphCUDA(const torch::Tensor &node_ids,
+                                         const torch::Tensor &csr_row_ptr,
+                                         const torch::Tensor &csr_col_ind) {
+  TORCH_CHECK(node_ids.dim() == 1, "ExtractInducedSubGraphCUDA node_ids dim should be 1");
+  TORCH_CHECK(node_ids.dtype() == torch::kInt32 || node_ids.dtype() == torch::kInt64,
+              "ExtractInducedSubGraphCUDA node_ids dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "ExtractInducedSubGraphCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "ExtractInducedSubGraphCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "ExtractInducedSubGraphCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(node_ids.dtype() == csr_col_ind.dtype(),
+              "ExtractInducedSubGraphCUDA node_ids and csr_col_ind should have same type");
+  int64_t node_count = node_ids.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = node_ids.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kLong).requires_grad(false);
+  torch::Tensor subgraph_row_tensor = torch::empty({(long) (node_count + 1)}, to);
+  torch::Tensor subgraph_col_tensor, subgraph_edge_id_tensor;
+  auto subgraph_col_allocator = GetAllocatorForTensor<void>(subgraph_col_tensor, d, torch::kInt32, false);
+  auto subgraph_edge_id_allocator = GetAllocatorForTensor<void>(subgraph_edge_id_tensor, d, torch::kInt64, false);
+  WmmpExtractInducedSubGraph(subgraph_row_tensor.data_ptr<int64_t>(),
+                             subgraph_col_allocator,
+                             subgraph_edge_id_allocator,
+                             csr_row_ptr.data_ptr(),
+                             csr_col_ind.data_ptr(),
+                             C10ScalarToWMType(node_ids.dtype().toScalarType()),
+                             node_ids.data_ptr(),
+                             node_count,
+                             GetCUDAEnvFns(d),
+                             stream);
+  return {subgraph_row_tensor, subgraph_col_tensor, subgraph_edge_id_tensor};
+}
+
+variable_list ExtractInducedSubGraphChunkedCUDA(const torch::Tensor &node_ids,
+                                                int64_t pcsr_row_ptr,
+                                                int64_t pcsr_col_ind) {
+  ChunkedTensor &csr_row_ptr = *((ChunkedTensor *) pcsr_row_ptr);
+  ChunkedTensor &csr_col_ind = *((ChunkedTensor *) pcsr_col_ind);
+  TORCH_CHECK(node_ids.dim() == 1, "ExtractInducedSubGraphChunkedCUDA node_ids dim should be 1");
+  TORCH_CHECK(node_ids.dtype() == torch::kInt32 || node_ids.dtype() == torch::kInt64,
+              "ExtractInducedSubGraphChunkedCUDA node_ids dtype should be kInt32(kInt) or kInt64(kLong)");
+  TORCH_CHECK(csr_row_ptr.dim() == 1, "ExtractInducedSubGraphChunkedCUDA csr_row_ptr dim should be 1");
+  TORCH_CHECK(csr_row_ptr.dtype() == torch::kInt64,
+              "ExtractInducedSubGraphChunkedCUDA csr_row_ptr dtype should be kInt64(kLong)");
+  TORCH_CHECK(csr_col_ind.dim() == 1, "ExtractInducedSubGraphChunkedCUDA csr_col_ind dim should be 1");
+  TORCH_CHECK(node_ids.dtype() == csr_col_ind.dtype(),
+              "ExtractInducedSubGraphChunkedCUDA node_ids and csr_col_ind should have same type");
+  TORCH_CHECK(csr_row_ptr.storage_offset() == 0 && csr_col_ind.storage_offset() == 0,
+              "ExtractInducedSubGraphChunkedCUDA tensor should have 0 storage_offset.");
+  int64_t node_count = node_ids.size(0);
+  cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  torch::Device d = node_ids.device();
+  auto to = torch::TensorOptions().device(d).dtype(torch::kLong).requires_grad(false);
+  torch::Tensor subgraph_row_tensor = torch::empty({(long) (node_count + 1)}, to);
+  torch::Tensor subgraph_col_tensor, subgraph_edge_id_tensor;
+  auto subgraph_col_allocator = GetAllocatorForTensor<void>(subgraph_col_tensor, d, torch::kInt32, false);
+  auto subgraph_edge_id_allocator = GetAllocatorForTensor<void>(subgraph_edge_id_tensor, d, torch::kInt64, false);
+  WmmpChunkedExtractInducedSubGraph(subgraph_row_tensor.data_ptr<int64_t>(),
+                                    subgraph_col_allocator,
+                                    subgraph_edge_id_allocator,
+                                    csr_row_ptr.GetChunkedMemory(),
+                                    csr_col_ind.GetChunkedMemory(),
+                                    C10ScalarToWMType(node_ids.dtype().toScalarType()),
+                                    node_ids.data_ptr(),
+                                    node_count,
+                                    GetCUDAEnvFns(d),
+                                    stream);
+  return {subgraph_row_tensor, subgraph_col_tensor, subgraph_edge_id_tensor};
+}
+
 }// namespace pytorch
 
 }// namespace whole_graph
@@ -799,6 +1530,18 @@ static auto registry = torch::RegisterOperators()
                                &whole_graph::pytorch::UnweightedSampleWithoutReplacementCUDA)
                            .op("wholegraph::unweighted_sample_without_replacement_chunked",
                                &whole_graph::pytorch::UnweightedSampleWithoutReplacementChunkedCUDA)
+                           .op("wholegraph::unweighted_sample_with_replacement",
+                               &whole_graph::pytorch::UnweightedSampleWithReplacementCUDA)
+                           .op("wholegraph::unweighted_sample_with_replacement_chunked",
+                               &whole_graph::pytorch::UnweightedSampleWithReplacementChunkedCUDA)
+                           .op("wholegraph::typed_sample_without_replacement",
+                               &whole_graph::pytorch::TypedSampleWithoutReplacementCUDA)
+                           .op("wholegraph::typed_sample_without_replacement_chunked",
+                               &whole_graph::pytorch::TypedSampleWithoutReplacementChunkedCUDA)
+                           .op("wholegraph::temporal_sample", &whole_graph::pytorch::TemporalSampleCUDA)
+                           .op("wholegraph::temporal_sample_chunked", &whole_graph::pytorch::TemporalSampleChunkedCUDA)
+                           .op("wholegraph::random_walk", &whole_graph::pytorch::RandomWalk)
+                           .op("wholegraph::random_walk_chunked", &whole_graph::pytorch::RandomWalkChunkedCUDA)
                            .op("wholegraph::append_unique", &whole_graph::pytorch::AppendUniqueGPU)
                            .op("wholegraph::create_edge_hashset", &whole_graph::pytorch::PyTorchCreateEdgeHashSet)
                            .op("wholegraph::retrieve_coo_edges", &whole_graph::pytorch::PyTorchRetrieveCOOEdges)
@@ -806,6 +1549,8 @@ static auto registry = torch::RegisterOperators()
                            .op("wholegraph::per_source_uniform_negative_sample", &whole_graph::pytorch::PerSourceUniformNegativeSample)
                            .op("wholegraph::per_source_uniform_negative_sample_chunked",
                                &whole_graph::pytorch::PerSourceUniformNegativeSampleChunked)
+                           .op("wholegraph::get_csr_degree", &whole_graph::pytorch::GetCSRDegreeCUDA)
+                           .op("wholegraph::get_csr_degree_chunked", &whole_graph::pytorch::GetCSRDegreeChunkedCUDA)
                            .op("wholegraph::get_csr_mixed_sub_graph_edge_types", &whole_graph::pytorch::GetCSRMixedSubGraphEdgeTypes)
                            .op("wholegraph::get_csr_mixed_sub_graph_edge_types_chunked",
                                &whole_graph::pytorch::GetCSRMixedSubGraphEdgeTypesChunked)
@@ -819,7 +1564,16 @@ static auto registry = torch::RegisterOperators()
                                &whole_graph::pytorch::WeightedSampleWithoutReplacementCUDA)
                            .op("wholegraph::weighted_sample_without_replacement_chunked",
                                &whole_graph::pytorch::WeightedSampleWithoutReplacementChunkedCUDA)
+                           .op("wholegraph::build_alias_table", &whole_graph::pytorch::BuildAliasTableCUDA)
+                           .op("wholegraph::build_alias_table_chunked",
+                               &whole_graph::pytorch::BuildAliasTableChunkedCUDA)
+                           .op("wholegraph::alias_weighted_sample", &whole_graph::pytorch::AliasWeightedSampleCUDA)
+                           .op("wholegraph::alias_weighted_sample_chunked",
+                               &whole_graph::pytorch::AliasWeightedSampleChunkedCUDA)
                            .op("wholegraph::extract_subgraph_with_filter",
                                &whole_graph::pytorch::ExtractSubGraphWithFilter)
                            .op("wholegraph::extract_subgraph_with_filter_chunked",
-                               &whole_graph::pytorch::ExtractSubGraphWithFilterChunked);
+                               &whole_graph::pytorch::ExtractSubGraphWithFilterChunked)
+                           .op("wholegraph::extract_induced_subgraph", &whole_graph::pytorch::ExtractInducedSubGraphCUDA)
+                           .op("wholegraph::extract_induced_subgraph_chunked",
+                               &whole_graph::pytorch::ExtractInducedSubGraphChunkedCUDA);
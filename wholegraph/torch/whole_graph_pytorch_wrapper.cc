@@ -891,7 +891,9 @@ void PytorchWholeMemoryEmbeddingLocalApplyGradients(
     const torch::Tensor &grad,
     const torch::Tensor &emb,
     const std::vector<torch::Tensor> &per_element_states,
-    const std::vector<torch::Tensor> &per_embedding_states) {
+    const std::vector<torch::Tensor> &per_embedding_states,
+    bool stochastic_rounding,
+    int64_t random_seed) {
   WM_CHECK(local_sparse_indice.dim() == 1);
   WM_CHECK(emb.dim() == 2);
   WM_CHECK(grad.dim() == 2);
@@ -944,6 +946,8 @@ void PytorchWholeMemoryEmbeddingLocalApplyGradients(
   whole_graph::OptimizerInfo optimizer_info{};
   optimizer_info.type = optimizer_type_enum;
   optimizer_info.lr = learning_rate;
+  optimizer_info.stochastic_rounding = stochastic_rounding ? 1 : 0;
+  optimizer_info.random_seed = (unsigned long long) random_seed;
   WM_CHECK(optimizer_data.size() * sizeof(float) <= sizeof(optimizer_info.private_info));
   memcpy(&optimizer_info.private_info, optimizer_data.data(), optimizer_data.size() * sizeof(float));
 
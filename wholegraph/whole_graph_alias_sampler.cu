@@ -0,0 +1,595 @@
+/*
+ * Copyright (c) 2019-2022, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#include "whole_memory_graph.h"
+
+#include <thrust/scan.h>
+
+#include <random>
+
+#include "data_type.h"
+#include "macros.h"
+#include "random.cuh"
+#include "whole_chunked_memory.cuh"
+#include "whole_memory.h"
+
+namespace whole_graph {
+
+// Per row alias tables (Walker / Vose) stored alongside the CSR, one prob and one alias entry per edge.
+// Alias entries are indices local to the row. Each row is built by one warp: the warp computes the
+// scaled probabilities, then lane 0 pairs small and large buckets with two forward scans, which needs
+// no extra memory.
+template<typename WeightType, typename WMOffsetType, typename WMWeightType, typename WMAliasType>
+__global__ void BuildAliasTableKernel(WMOffsetType *wm_csr_row_ptr,
+                                      WMWeightType *wm_csr_weight_ptr,
+                                      WMWeightType *wm_alias_prob_ptr,
+                                      WMAliasType *wm_alias_idx_ptr,
+                                      int64_t start_node,
+                                      int64_t node_count) {
+  int64_t node_idx = (blockIdx.x * (int64_t) blockDim.x + threadIdx.x) / 32;
+  int lane_id = threadIdx.x % 32;
+  if (node_idx >= node_count) return;
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMWeightType, WeightType> csr_weight_ptr_gen(wm_csr_weight_ptr);
+  PtrGen<WMWeightType, WeightType> alias_prob_ptr_gen(wm_alias_prob_ptr);
+  PtrGen<WMAliasType, int> alias_idx_ptr_gen(wm_alias_idx_ptr);
+  int64_t start = *csr_row_ptr_gen.At(start_node + node_idx);
+  int64_t end = *csr_row_ptr_gen.At(start_node + node_idx + 1);
+  int neighbor_count = (int) (end - start);
+  WeightType weight_sum = 0;
+  for (int i = lane_id; i < neighbor_count; i += 32) {
+    weight_sum += *csr_weight_ptr_gen.At(start + i);
+  }
+  for (int offset = 16; offset > 0; offset /= 2) {
+    weight_sum += __shfl_xor_sync(0xffffffff, weight_sum, offset);
+  }
+  for (int i = lane_id; i < neighbor_count; i += 32) {
+    WeightType weight = *csr_weight_ptr_gen.At(start + i);
+    *alias_prob_ptr_gen.At(start + i) = weight_sum > 0 ? weight * neighbor_count / weight_sum : (WeightType) 1;
+    *alias_idx_ptr_gen.At(start + i) = i;
+  }
+  __syncwarp();
+  if (lane_id == 0) {
+    auto next_small = [&](int idx) {
+      while (idx < neighbor_count && *alias_prob_ptr_gen.At(start + idx) >= 1) idx++;
+      return idx;
+    };
+    auto next_large = [&](int idx) {
+      while (idx < neighbor_count && *alias_prob_ptr_gen.At(start + idx) < 1) idx++;
+      return idx;
+    };
+    int small_scan = next_small(0);
+    int small = small_scan;
+    small_scan = next_small(small_scan + 1);
+    int large = next_large(0);
+    while (small < neighbor_count && large < neighbor_count) {
+      *alias_idx_ptr_gen.At(start + small) = large;
+      WeightType large_prob = *alias_prob_ptr_gen.At(start + large) - (1 - *alias_prob_ptr_gen.At(start + small));
+      *alias_prob_ptr_gen.At(start + large) = large_prob;
+      if (large_prob < 1) {
+        int old_large = large;
+        large = next_large(large + 1);
+        // the small scan has already passed it, so pair it right now.
+        if (old_large < small_scan) {
+          small = old_large;
+          continue;
+        }
+      }
+      small = small_scan;
+      small_scan = next_small(small_scan + 1);
+    }
+  }
+  __syncwarp();
+  // buckets left unpaired are full, up to rounding error.
+  for (int i = lane_id; i < neighbor_count; i += 32) {
+    if (*alias_idx_ptr_gen.At(start + i) == i) *alias_prob_ptr_gen.At(start + i) = 1;
+  }
+}
+
+template<typename WeightType, typename WMOffsetType, typename WMWeightType, typename WMAliasType>
+void BuildAliasTableCommon(void *wm_csr_row_ptr,
+                           void *wm_csr_weight_ptr,
+                           void *wm_alias_prob_ptr,
+                           void *wm_alias_idx_ptr,
+                           int64_t start_node,
+                           int64_t node_count,
+                           const CUDAEnvFns &cuda_env_fns,
+                           cudaStream_t stream) {
+  if (node_count <= 0) return;
+  const int block_size = 256;
+  BuildAliasTableKernel<WeightType, WMOffsetType, WMWeightType, WMAliasType>
+      <<<DivUp(node_count * 32, block_size), block_size, 0, stream>>>((WMOffsetType *) wm_csr_row_ptr,
+                                                                      (WMWeightType *) wm_csr_weight_ptr,
+                                                                      (WMWeightType *) wm_alias_prob_ptr,
+                                                                      (WMAliasType *) wm_alias_idx_ptr,
+                                                                      start_node,
+                                                                      node_count);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+}
+
+template<typename WeightType>
+void BuildAliasTable(void *wm_csr_row_ptr,
+                     void *wm_csr_weight_ptr,
+                     void *wm_alias_prob_ptr,
+                     void *wm_alias_idx_ptr,
+                     int64_t start_node,
+                     int64_t node_count,
+                     const CUDAEnvFns &cuda_env_fns,
+                     cudaStream_t stream) {
+  BuildAliasTableCommon<WeightType, int64_t, WeightType, int>(wm_csr_row_ptr,
+                                                              wm_csr_weight_ptr,
+                                                              wm_alias_prob_ptr,
+                                                              wm_alias_idx_ptr,
+                                                              start_node,
+                                                              node_count,
+                                                              cuda_env_fns,
+                                                              stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(BuildAliasTable, BuildAliasTable, FLOAT_DOUBLE)
+
+void WmmpBuildAliasTable(void *wm_csr_row_ptr,
+                         void *wm_csr_weight_ptr,
+                         void *wm_alias_prob_ptr,
+                         void *wm_alias_idx_ptr,
+                         WMType weight_type,
+                         int64_t start_node,
+                         int64_t node_count,
+                         const CUDAEnvFns &cuda_env_fns,
+                         cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(weight_type,
+                    BuildAliasTable,
+                    wm_csr_row_ptr,
+                    wm_csr_weight_ptr,
+                    wm_alias_prob_ptr,
+                    wm_alias_idx_ptr,
+                    start_node,
+                    node_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+template<typename WeightType>
+void ChunkedBuildAliasTable(void *wm_csr_row_ptr,
+                            void *wm_csr_weight_ptr,
+                            void *wm_alias_prob_ptr,
+                            void *wm_alias_idx_ptr,
+                            int64_t start_node,
+                            int64_t node_count,
+                            const CUDAEnvFns &cuda_env_fns,
+                            cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle
+      *wm_csr_weight_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_weight_ptr, dev_id);
+  WholeChunkedMemoryHandle
+      *wm_alias_prob_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_prob_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_alias_idx_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_idx_ptr, dev_id);
+  BuildAliasTableCommon<WeightType,
+                        const whole_graph::WholeChunkedMemoryHandle,
+                        const whole_graph::WholeChunkedMemoryHandle,
+                        const whole_graph::WholeChunkedMemoryHandle>(wm_csr_row_handle,
+                                                                     wm_csr_weight_handle,
+                                                                     wm_alias_prob_handle,
+                                                                     wm_alias_idx_handle,
+                                                                     start_node,
+                                                                     node_count,
+                                                                     cuda_env_fns,
+                                                                     stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(ChunkedBuildAliasTable, ChunkedBuildAliasTable, FLOAT_DOUBLE)
+
+void WmmpChunkedBuildAliasTable(void *wm_csr_row_ptr,
+                                void *wm_csr_weight_ptr,
+                                void *wm_alias_prob_ptr,
+                                void *wm_alias_idx_ptr,
+                                WMType weight_type,
+                                int64_t start_node,
+                                int64_t node_count,
+                                const CUDAEnvFns &cuda_env_fns,
+                                cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(weight_type,
+                    ChunkedBuildAliasTable,
+                    wm_csr_row_ptr,
+                    wm_csr_weight_ptr,
+                    wm_alias_prob_ptr,
+                    wm_alias_idx_ptr,
+                    start_node,
+                    node_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+template<typename IdType, typename WMOffsetType>
+__global__ void GetAliasSampleCountKernel(int *sample_count,
+                                          const IdType *input_nodes,
+                                          int input_node_count,
+                                          WMOffsetType *wm_csr_row_ptr,
+                                          int max_sample_count,
+                                          bool with_replacement) {
+  int input_idx = threadIdx.x + blockIdx.x * blockDim.x;
+  if (input_idx >= input_node_count) return;
+  IdType nid = input_nodes[input_idx];
+  whole_graph::PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int neighbor_count = (int) (end - start);
+  if (with_replacement) {
+    sample_count[input_idx] = neighbor_count > 0 ? max_sample_count : 0;
+  } else {
+    sample_count[input_idx] = min(neighbor_count, max_sample_count);
+  }
+}
+
+template<typename WeightType, typename WMWeightType, typename WMAliasType>
+__device__ __forceinline__ int AliasDraw(PtrGen<WMWeightType, WeightType> &alias_prob_ptr_gen,
+                                         PtrGen<WMAliasType, int> &alias_idx_ptr_gen,
+                                         int64_t start,
+                                         int neighbor_count,
+                                         RandomNumGen &rng) {
+  int bucket = rng.RandomMod(neighbor_count);
+  float u = rng.RandomUniformFloat();
+  return u < (float) *alias_prob_ptr_gen.At(start + bucket) ? bucket : *alias_idx_ptr_gen.At(start + bucket);
+}
+
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+__global__ void AliasSampleWithReplacementKernel(IdType *output,
+                                                 int *src_lid,
+                                                 const int *sample_offset,
+                                                 const IdType *input_nodes,
+                                                 int input_node_count,
+                                                 WMOffsetType *wm_csr_row_ptr,
+                                                 WMIdType *wm_csr_col_ptr,
+                                                 WMWeightType *wm_alias_prob_ptr,
+                                                 WMAliasType *wm_alias_idx_ptr,
+                                                 int max_sample_count,
+                                                 unsigned long long random_seed) {
+  int input_idx = blockIdx.x;
+  if (input_idx >= input_node_count) return;
+  int gidx = threadIdx.x + blockIdx.x * blockDim.x;
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  PtrGen<WMWeightType, WeightType> alias_prob_ptr_gen(wm_alias_prob_ptr);
+  PtrGen<WMAliasType, int> alias_idx_ptr_gen(wm_alias_idx_ptr);
+  IdType nid = input_nodes[input_idx];
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int neighbor_count = (int) (end - start);
+  if (neighbor_count <= 0) return;
+  int offset = sample_offset[input_idx];
+  RandomNumGen rng(gidx, random_seed);
+  rng.NextValue();
+  for (int sample_id = threadIdx.x; sample_id < max_sample_count; sample_id += blockDim.x) {
+    int neighbor_idx = AliasDraw(alias_prob_ptr_gen, alias_idx_ptr_gen, start, neighbor_count, rng);
+    output[offset + sample_id] = *csr_col_ptr_gen.At(start + neighbor_idx);
+    if (src_lid) src_lid[offset + sample_id] = input_idx;
+  }
+}
+
+static constexpr int kAliasRejectionMaxSampleCount = 64;
+
+// Draws from the alias table and rejects neighbors already picked, which follows the same successive
+// sampling distribution as the top-k path. Only suitable for small max_sample_count.
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+__global__ void AliasSampleWithoutReplacementKernel(IdType *output,
+                                                    int *src_lid,
+                                                    const int *sample_offset,
+                                                    const IdType *input_nodes,
+                                                    int input_node_count,
+                                                    WMOffsetType *wm_csr_row_ptr,
+                                                    WMIdType *wm_csr_col_ptr,
+                                                    WMWeightType *wm_alias_prob_ptr,
+                                                    WMAliasType *wm_alias_idx_ptr,
+                                                    int max_sample_count,
+                                                    unsigned long long random_seed) {
+  int input_idx = threadIdx.x + blockIdx.x * blockDim.x;
+  if (input_idx >= input_node_count) return;
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  PtrGen<WMWeightType, WeightType> alias_prob_ptr_gen(wm_alias_prob_ptr);
+  PtrGen<WMAliasType, int> alias_idx_ptr_gen(wm_alias_idx_ptr);
+  IdType nid = input_nodes[input_idx];
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int neighbor_count = (int) (end - start);
+  int offset = sample_offset[input_idx];
+  if (neighbor_count <= max_sample_count) {
+    for (int sample_id = 0; sample_id < neighbor_count; sample_id++) {
+      output[offset + sample_id] = *csr_col_ptr_gen.At(start + sample_id);
+      if (src_lid) src_lid[offset + sample_id] = input_idx;
+    }
+    return;
+  }
+  RandomNumGen rng(input_idx, random_seed);
+  rng.NextValue();
+  int picked[kAliasRejectionMaxSampleCount];
+  int picked_count = 0;
+  auto is_picked = [&](int neighbor_idx) {
+    for (int i = 0; i < picked_count; i++) {
+      if (picked[i] == neighbor_idx) return true;
+    }
+    return false;
+  };
+  auto try_pick = [&](int neighbor_idx) {
+    if (!is_picked(neighbor_idx)) picked[picked_count++] = neighbor_idx;
+  };
+  const int max_attempt_count = 32 * max_sample_count;
+  for (int attempt = 0; attempt < max_attempt_count && picked_count < max_sample_count; attempt++) {
+    try_pick(AliasDraw(alias_prob_ptr_gen, alias_idx_ptr_gen, start, neighbor_count, rng));
+  }
+  // Rejection stalls when the neighbors left hold little weight, finish with exact draws over them.
+  // Each bucket holds two pieces, prob owned by itself and 1 - prob owned by its alias, and a piece
+  // is drawn by its mass among the pieces owned by neighbors not picked yet.
+  while (picked_count < max_sample_count) {
+    WeightType mass_sum = 0;
+    for (int i = 0; i < neighbor_count; i++) {
+      WeightType prob = *alias_prob_ptr_gen.At(start + i);
+      int alias = *alias_idx_ptr_gen.At(start + i);
+      if (!is_picked(i)) mass_sum += prob;
+      if (alias != i && !is_picked(alias)) mass_sum += 1 - prob;
+    }
+    if (mass_sum <= 0) break;
+    WeightType target = rng.RandomUniformFloat() * mass_sum;
+    int neighbor_idx = -1;
+    for (int i = 0; i < neighbor_count; i++) {
+      WeightType prob = *alias_prob_ptr_gen.At(start + i);
+      int alias = *alias_idx_ptr_gen.At(start + i);
+      if (!is_picked(i) && prob > 0) {
+        neighbor_idx = i;
+        target -= prob;
+        if (target < 0) break;
+      }
+      if (alias != i && !is_picked(alias) && prob < 1) {
+        neighbor_idx = alias;
+        target -= 1 - prob;
+        if (target < 0) break;
+      }
+    }
+    picked[picked_count++] = neighbor_idx;
+  }
+  // only neighbors of zero weight are left, fill with them as the top-k path does.
+  for (int neighbor_idx = 0; picked_count < max_sample_count; neighbor_idx++) {
+    try_pick(neighbor_idx);
+  }
+  for (int sample_id = 0; sample_id < max_sample_count; sample_id++) {
+    output[offset + sample_id] = *csr_col_ptr_gen.At(start + picked[sample_id]);
+    if (src_lid) src_lid[offset + sample_id] = input_idx;
+  }
+}
+
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+void AliasWeightedSampleCommon(const std::function<void *(size_t)> &sample_output_allocator,
+                               const std::function<void *(size_t)> &center_localid_allocator,
+                               int *sample_offset,
+                               void *wm_csr_row_ptr,
+                               void *wm_csr_col_ptr,
+                               void *wm_alias_prob_ptr,
+                               void *wm_alias_idx_ptr,
+                               const void *center_nodes,
+                               int center_node_count,
+                               int max_sample_count,
+                               bool with_replacement,
+                               const CUDAEnvFns &cuda_env_fns,
+                               cudaStream_t stream) {
+  WM_CHECK(max_sample_count > 0);
+  WM_CHECK(with_replacement || max_sample_count <= kAliasRejectionMaxSampleCount);
+  thread_local std::random_device rd;
+  thread_local std::mt19937 gen(rd());
+  thread_local std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+
+  whole_graph::TempMemoryHandle tmh;
+  cuda_env_fns.allocate_temp_fn(sizeof(int) * (center_node_count + 1), &tmh);
+  int *sample_count = (int *) tmh.ptr;
+  GetAliasSampleCountKernel<IdType, WMOffsetType><<<DivUp(center_node_count, 128), 128, 0, stream>>>(
+      sample_count,
+      (const IdType *) center_nodes,
+      center_node_count,
+      (WMOffsetType *) wm_csr_row_ptr,
+      max_sample_count,
+      with_replacement);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  WMThrustAllocator allocator(cuda_env_fns);
+  thrust::exclusive_scan(thrust::cuda::par(allocator).on(stream),
+                         sample_count,
+                         sample_count + center_node_count + 1,
+                         sample_offset);
+  int count;
+  WM_CUDA_CHECK(cudaMemcpyAsync(&count,
+                                sample_offset + center_node_count,
+                                sizeof(int),
+                                cudaMemcpyDeviceToHost,
+                                stream));
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&tmh);
+  allocator.deallocate_all();
+  auto *sample_output = (IdType *) sample_output_allocator(count);
+  auto *src_lid = (int *) center_localid_allocator(count);
+  if (center_node_count == 0) return;
+  if (with_replacement) {
+    AliasSampleWithReplacementKernel<IdType, WeightType, WMIdType, WMOffsetType, WMWeightType, WMAliasType>
+        <<<center_node_count, 64, 0, stream>>>(sample_output,
+                                               src_lid,
+                                               sample_offset,
+                                               (const IdType *) center_nodes,
+                                               center_node_count,
+                                               (WMOffsetType *) wm_csr_row_ptr,
+                                               (WMIdType *) wm_csr_col_ptr,
+                                               (WMWeightType *) wm_alias_prob_ptr,
+                                               (WMAliasType *) wm_alias_idx_ptr,
+                                               max_sample_count,
+                                               random_seed);
+  } else {
+    AliasSampleWithoutReplacementKernel<IdType, WeightType, WMIdType, WMOffsetType, WMWeightType, WMAliasType>
+        <<<DivUp(center_node_count, 128), 128, 0, stream>>>(sample_output,
+                                                            src_lid,
+                                                            sample_offset,
+                                                            (const IdType *) center_nodes,
+                                                            center_node_count,
+                                                            (WMOffsetType *) wm_csr_row_ptr,
+                                                            (WMIdType *) wm_csr_col_ptr,
+                                                            (WMWeightType *) wm_alias_prob_ptr,
+                                                            (WMAliasType *) wm_alias_idx_ptr,
+                                                            max_sample_count,
+                                                            random_seed);
+  }
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+}
+
+template<typename IdType, typename WeightType>
+void AliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                         const std::function<void *(size_t)> &center_localid_allocator,
+                         int *sample_offset,
+                         void *wm_csr_row_ptr,
+                         void *wm_csr_col_ptr,
+                         void *wm_alias_prob_ptr,
+                         void *wm_alias_idx_ptr,
+                         const void *center_nodes,
+                         int center_node_count,
+                         int max_sample_count,
+                         bool with_replacement,
+                         const CUDAEnvFns &cuda_env_fns,
+                         cudaStream_t stream) {
+  AliasWeightedSampleCommon<IdType, WeightType, IdType, int64_t, WeightType, int>(sample_output_allocator,
+                                                                                  center_localid_allocator,
+                                                                                  sample_offset,
+                                                                                  wm_csr_row_ptr,
+                                                                                  wm_csr_col_ptr,
+                                                                                  wm_alias_prob_ptr,
+                                                                                  wm_alias_idx_ptr,
+                                                                                  center_nodes,
+                                                                                  center_node_count,
+                                                                                  max_sample_count,
+                                                                                  with_replacement,
+                                                                                  cuda_env_fns,
+                                                                                  stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(AliasWeightedSample, AliasWeightedSample, SINT3264, FLOAT_DOUBLE)
+
+void WmmpAliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                             const std::function<void *(size_t)> &center_localid_allocator,
+                             int *sample_offset,
+                             void *wm_csr_row_ptr,
+                             void *wm_csr_col_ptr,
+                             void *wm_alias_prob_ptr,
+                             void *wm_alias_idx_ptr,
+                             WMType id_type,
+                             WMType weight_type,
+                             const void *center_nodes,
+                             int center_node_count,
+                             int max_sample_count,
+                             bool with_replacement,
+                             const CUDAEnvFns &cuda_env_fns,
+                             cudaStream_t stream) {
+  DISPATCH_TWO_TYPES(id_type,
+                     weight_type,
+                     AliasWeightedSample,
+                     sample_output_allocator,
+                     center_localid_allocator,
+                     sample_offset,
+                     wm_csr_row_ptr,
+                     wm_csr_col_ptr,
+                     wm_alias_prob_ptr,
+                     wm_alias_idx_ptr,
+                     center_nodes,
+                     center_node_count,
+                     max_sample_count,
+                     with_replacement,
+                     cuda_env_fns,
+                     stream);
+}
+
+template<typename IdType, typename WeightType>
+void ChunkedAliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                                const std::function<void *(size_t)> &center_localid_allocator,
+                                int *sample_offset,
+                                void *wm_csr_row_ptr,
+                                void *wm_csr_col_ptr,
+                                void *wm_alias_prob_ptr,
+                                void *wm_alias_idx_ptr,
+                                const void *center_nodes,
+                                int center_node_count,
+                                int max_sample_count,
+                                bool with_replacement,
+                                const CUDAEnvFns &cuda_env_fns,
+                                cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  WholeChunkedMemoryHandle
+      *wm_alias_prob_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_prob_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_alias_idx_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_idx_ptr, dev_id);
+  AliasWeightedSampleCommon<IdType,
+                            WeightType,
+                            const whole_graph::WholeChunkedMemoryHandle,
+                            const whole_graph::WholeChunkedMemoryHandle,
+                            const whole_graph::WholeChunkedMemoryHandle,
+                            const whole_graph::WholeChunkedMemoryHandle>(sample_output_allocator,
+                                                                         center_localid_allocator,
+                                                                         sample_offset,
+                                                                         wm_csr_row_handle,
+                                                                         wm_csr_col_handle,
+                                                                         wm_alias_prob_handle,
+                                                                         wm_alias_idx_handle,
+                                                                         center_nodes,
+                                                                         center_node_count,
+                                                                         max_sample_count,
+                                                                         with_replacement,
+                                                                         cuda_env_fns,
+                                                                         stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(ChunkedAliasWeightedSample, ChunkedAliasWeightedSample, SINT3264, FLOAT_DOUBLE)
+
+void WmmpChunkedAliasWeightedSample(const std::function<void *(size_t)> &sample_output_allocator,
+                                    const std::function<void *(size_t)> &center_localid_allocator,
+                                    int *sample_offset,
+                                    void *wm_csr_row_ptr,
+                                    void *wm_csr_col_ptr,
+                                    void *wm_alias_prob_ptr,
+                                    void *wm_alias_idx_ptr,
+                                    WMType id_type,
+                                    WMType weight_type,
+                                    const void *center_nodes,
+                                    int center_node_count,
+                                    int max_sample_count,
+                                    bool with_replacement,
+                                    const CUDAEnvFns &cuda_env_fns,
+                                    cudaStream_t stream) {
+  DISPATCH_TWO_TYPES(id_type,
+                     weight_type,
+                     ChunkedAliasWeightedSample,
+                     sample_output_allocator,
+                     center_localid_allocator,
+                     sample_offset,
+                     wm_csr_row_ptr,
+                     wm_csr_col_ptr,
+                     wm_alias_prob_ptr,
+                     wm_alias_idx_ptr,
+                     center_nodes,
+                     center_node_count,
+                     max_sample_count,
+                     with_replacement,
+                     cuda_env_fns,
+                     stream);
+}
+
+}// namespace whole_graph
@@ -0,0 +1,322 @@
+/*
+ * Copyright (c) 2019-2022, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#include "whole_memory_graph.h"
+
+#include <cuda.h>
+#include <cuda_runtime_api.h>
+#include <thrust/fill.h>
+#include <thrust/scan.h>
+
+#include <climits>
+
+#include "data_type.h"
+#include "macros.h"
+#include "whole_chunked_memory.cuh"
+#include "whole_memory.h"
+
+namespace whole_graph {
+
+// Open addressing hash table from node id to local id, empty slots have key -1 and value INT_MAX.
+static constexpr int kInducedHashLoadFactorInverse = 2;
+
+__device__ __forceinline__ uint64_t InducedNodeHash(uint64_t key) {
+  key ^= key >> 33;
+  key *= 0xff51afd7ed558ccdULL;
+  key ^= key >> 33;
+  return key;
+}
+
+__device__ __forceinline__ int AtomicCASNodeId(int *address, int compare, int val) {
+  return atomicCAS(address, compare, val);
+}
+
+__device__ __forceinline__ int64_t AtomicCASNodeId(int64_t *address, int64_t compare, int64_t val) {
+  return (int64_t) atomicCAS((unsigned long long *) address, (unsigned long long) compare, (unsigned long long) val);
+}
+
+template<typename IdType>
+__global__ void InsertInducedNodeKernel(IdType *hash_keys,
+                                        int *hash_values,
+                                        int64_t hash_mask,
+                                        const IdType *node_ids,
+                                        int node_count) {
+  int idx = blockIdx.x * blockDim.x + threadIdx.x;
+  if (idx >= node_count) return;
+  IdType key = node_ids[idx];
+  int64_t slot = InducedNodeHash((uint64_t) key) & hash_mask;
+  while (true) {
+    IdType old_key = AtomicCASNodeId(&hash_keys[slot], (IdType) -1, key);
+    if (old_key == (IdType) -1 || old_key == key) {
+      // duplicated node ids keep the smallest index as local id, whichever thread inserts the key.
+      atomicMin(&hash_values[slot], idx);
+      return;
+    }
+    slot = (slot + 1) & hash_mask;
+  }
+}
+
+template<typename IdType>
+__device__ __forceinline__ int LookupInducedNode(const IdType *hash_keys,
+                                                 const int *hash_values,
+                                                 int64_t hash_mask,
+                                                 IdType key) {
+  int64_t slot = InducedNodeHash((uint64_t) key) & hash_mask;
+  while (true) {
+    IdType slot_key = hash_keys[slot];
+    if (slot_key == key) return hash_values[slot];
+    if (slot_key == (IdType) -1) return -1;
+    slot = (slot + 1) & hash_mask;
+  }
+}
+
+// One warp per node, count edges whose destination is in the node set.
+template<typename IdType, typename WMIdType, typename WMOffsetType>
+__global__ void CountInducedEdgeKernel(int64_t *edge_count,
+                                       const IdType *hash_keys,
+                                       const int *hash_values,
+                                       int64_t hash_mask,
+                                       WMOffsetType *wm_csr_row_ptr,
+                                       WMIdType *wm_csr_col_ptr,
+                                       const IdType *node_ids,
+                                       int node_count) {
+  int row_idx = blockIdx.x * (blockDim.x / 32) + threadIdx.x / 32;
+  int lane_id = threadIdx.x % 32;
+  if (row_idx >= node_count) return;
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  IdType nid = node_ids[row_idx];
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int64_t count = 0;
+  for (int64_t edge_idx = start + lane_id; edge_idx < end; edge_idx += 32) {
+    IdType dst_nid = *csr_col_ptr_gen.At(edge_idx);
+    if (LookupInducedNode(hash_keys, hash_values, hash_mask, dst_nid) >= 0) count++;
+  }
+  for (int offset = 16; offset > 0; offset /= 2) {
+    count += __shfl_down_sync(0xffffffff, count, offset);
+  }
+  if (lane_id == 0) edge_count[row_idx] = count;
+}
+
+// One warp per node, write kept edges in their original order.
+template<typename IdType, typename WMIdType, typename WMOffsetType>
+__global__ void ExtractInducedEdgeKernel(int *subgraph_col_ptr,
+                                         int64_t *subgraph_edge_id_ptr,
+                                         const int64_t *subgraph_row_ptr,
+                                         const IdType *hash_keys,
+                                         const int *hash_values,
+                                         int64_t hash_mask,
+                                         WMOffsetType *wm_csr_row_ptr,
+                                         WMIdType *wm_csr_col_ptr,
+                                         const IdType *node_ids,
+                                         int node_count) {
+  int row_idx = blockIdx.x * (blockDim.x / 32) + threadIdx.x / 32;
+  int lane_id = threadIdx.x % 32;
+  if (row_idx >= node_count) return;
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  IdType nid = node_ids[row_idx];
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int64_t output_idx = subgraph_row_ptr[row_idx];
+  unsigned lower_lane_mask = (1U << lane_id) - 1U;
+  for (int64_t warp_start = start; warp_start < end; warp_start += 32) {
+    int64_t edge_idx = warp_start + lane_id;
+    int local_id = -1;
+    if (edge_idx < end) {
+      IdType dst_nid = *csr_col_ptr_gen.At(edge_idx);
+      local_id = LookupInducedNode(hash_keys, hash_values, hash_mask, dst_nid);
+    }
+    unsigned keep_mask = __ballot_sync(0xffffffff, local_id >= 0);
+    if (local_id >= 0) {
+      int64_t save_idx = output_idx + __popc(keep_mask & lower_lane_mask);
+      subgraph_col_ptr[save_idx] = local_id;
+      if (subgraph_edge_id_ptr != nullptr) subgraph_edge_id_ptr[save_idx] = edge_idx;
+    }
+    output_idx += __popc(keep_mask);
+  }
+}
+
+template<typename IdType, typename WMIdType, typename WMOffsetType>
+void ExtractInducedSubGraphCommon(int64_t *subgraph_row_ptr,
+                                  const std::function<void *(size_t)> &subgraph_col_allocator,
+                                  const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                  WMOffsetType *wm_csr_row_ptr,
+                                  WMIdType *wm_csr_col_ptr,
+                                  const void *node_ids,
+                                  int node_count,
+                                  const CUDAEnvFns &cuda_env_fns,
+                                  cudaStream_t stream) {
+  int64_t hash_size = 1;
+  while (hash_size < (int64_t) node_count * kInducedHashLoadFactorInverse) hash_size *= 2;
+  whole_graph::TempMemoryHandle hash_keys_tmh, hash_values_tmh, edge_count_tmh;
+  auto *hash_keys = (IdType *) cuda_env_fns.allocate_temp_fn(sizeof(IdType) * hash_size, &hash_keys_tmh);
+  auto *hash_values = (int *) cuda_env_fns.allocate_temp_fn(sizeof(int) * hash_size, &hash_values_tmh);
+  WM_CUDA_CHECK(cudaMemsetAsync(hash_keys, 0xff, sizeof(IdType) * hash_size, stream));
+  thrust::fill(thrust::cuda::par.on(stream), hash_values, hash_values + hash_size, INT_MAX);
+  const int block_size = 256;
+  if (node_count > 0) {
+    InsertInducedNodeKernel<IdType><<<DivUp(node_count, block_size), block_size, 0, stream>>>(
+        hash_keys, hash_values, hash_size - 1, (const IdType *) node_ids, node_count);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
+  auto *edge_count =
+      (int64_t *) cuda_env_fns.allocate_temp_fn(sizeof(int64_t) * (node_count + 1), &edge_count_tmh);
+  const int rows_per_block = block_size / 32;
+  if (node_count > 0) {
+    CountInducedEdgeKernel<IdType, WMIdType, WMOffsetType>
+        <<<DivUp(node_count, rows_per_block), block_size, 0, stream>>>(edge_count,
+                                                                       hash_keys,
+                                                                       hash_values,
+                                                                       hash_size - 1,
+                                                                       wm_csr_row_ptr,
+                                                                       wm_csr_col_ptr,
+                                                                       (const IdType *) node_ids,
+                                                                       node_count);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
+  WMThrustAllocator allocator(cuda_env_fns);
+  thrust::exclusive_scan(thrust::cuda::par(allocator).on(stream),
+                         edge_count,
+                         edge_count + node_count + 1,
+                         subgraph_row_ptr);
+  int64_t count;
+  WM_CUDA_CHECK(cudaMemcpyAsync(&count,
+                                subgraph_row_ptr + node_count,
+                                sizeof(int64_t),
+                                cudaMemcpyDeviceToHost,
+                                stream));
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&edge_count_tmh);
+  allocator.deallocate_all();
+  auto *subgraph_col_ptr = (int *) subgraph_col_allocator(count);
+  auto *subgraph_edge_id_ptr = (int64_t *) subgraph_edge_id_allocator(count);
+  if (node_count > 0) {
+    ExtractInducedEdgeKernel<IdType, WMIdType, WMOffsetType>
+        <<<DivUp(node_count, rows_per_block), block_size, 0, stream>>>(subgraph_col_ptr,
+                                                                       subgraph_edge_id_ptr,
+                                                                       subgraph_row_ptr,
+                                                                       hash_keys,
+                                                                       hash_values,
+                                                                       hash_size - 1,
+                                                                       wm_csr_row_ptr,
+                                                                       wm_csr_col_ptr,
+                                                                       (const IdType *) node_ids,
+                                                                       node_count);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&hash_keys_tmh);
+  cuda_env_fns.free_temp_fn(&hash_values_tmh);
+}
+
+template<typename IdType>
+void ExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                            const std::function<void *(size_t)> &subgraph_col_allocator,
+                            const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                            void *wm_csr_row_ptr,
+                            void *wm_csr_col_ptr,
+                            const void *node_ids,
+                            int node_count,
+                            const CUDAEnvFns &cuda_env_fns,
+                            cudaStream_t stream) {
+  ExtractInducedSubGraphCommon<IdType, const IdType, const int64_t>(subgraph_row_ptr,
+                                                                    subgraph_col_allocator,
+                                                                    subgraph_edge_id_allocator,
+                                                                    (const int64_t *) wm_csr_row_ptr,
+                                                                    (const IdType *) wm_csr_col_ptr,
+                                                                    node_ids,
+                                                                    node_count,
+                                                                    cuda_env_fns,
+                                                                    stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(ExtractInducedSubGraph, ExtractInducedSubGraph, SINT3264)
+
+void WmmpExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                                const std::function<void *(size_t)> &subgraph_col_allocator,
+                                const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                void *wm_csr_row_ptr,
+                                void *wm_csr_col_ptr,
+                                WMType id_type,
+                                const void *node_ids,
+                                int node_count,
+                                const CUDAEnvFns &cuda_env_fns,
+                                cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    ExtractInducedSubGraph,
+                    subgraph_row_ptr,
+                    subgraph_col_allocator,
+                    subgraph_edge_id_allocator,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    node_ids,
+                    node_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+template<typename IdType>
+void ChunkedExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                                   const std::function<void *(size_t)> &subgraph_col_allocator,
+                                   const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                   void *wm_csr_row_ptr,
+                                   void *wm_csr_col_ptr,
+                                   const void *node_ids,
+                                   int node_count,
+                                   const CUDAEnvFns &cuda_env_fns,
+                                   cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  ExtractInducedSubGraphCommon<IdType,
+                               const whole_graph::WholeChunkedMemoryHandle,
+                               const whole_graph::WholeChunkedMemoryHandle>(subgraph_row_ptr,
+                                                                            subgraph_col_allocator,
+                                                                            subgraph_edge_id_allocator,
+                                                                            wm_csr_row_handle,
+                                                                            wm_csr_col_handle,
+                                                                            node_ids,
+                                                                            node_count,
+                                                                            cuda_env_fns,
+                                                                            stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(ChunkedExtractInducedSubGraph, ChunkedExtractInducedSubGraph, SINT3264)
+
+void WmmpChunkedExtractInducedSubGraph(int64_t *subgraph_row_ptr,
+                                       const std::function<void *(size_t)> &subgraph_col_allocator,
+                                       const std::function<void *(size_t)> &subgraph_edge_id_allocator,
+                                       void *wm_csr_row_ptr,
+                                       void *wm_csr_col_ptr,
+                                       WMType id_type,
+                                       const void *node_ids,
+                                       int node_count,
+                                       const CUDAEnvFns &cuda_env_fns,
+                                       cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    ChunkedExtractInducedSubGraph,
+                    subgraph_row_ptr,
+                    subgraph_col_allocator,
+                    subgraph_edge_id_allocator,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    node_ids,
+                    node_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+}// namespace whole_graph
@@ -423,4 +423,44 @@ void WmmpChunkedPerNodeUniformNegativeSample(const std::function<void *(size_t)>
                     stream);
 }
 
+// Degree of nodes in [start_node, start_node + node_count), used to build the degree biased
+// negative sampling distribution.
+template<typename WMOffsetType>
+__global__ void GetCSRDegreeKernel(int64_t *degree,
+                                   WMOffsetType *wm_csr_row_ptr,
+                                   int64_t start_node,
+                                   int64_t node_count) {
+  int64_t idx = blockIdx.x * (int64_t) blockDim.x + threadIdx.x;
+  if (idx >= node_count) return;
+  whole_graph::PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  degree[idx] = *csr_row_ptr_gen.At(start_node + idx + 1) - *csr_row_ptr_gen.At(start_node + idx);
+}
+
+void WmmpGetCSRDegree(int64_t *degree,
+                      void *wm_csr_row_ptr,
+                      int64_t start_node,
+                      int64_t node_count,
+                      cudaStream_t stream) {
+  if (node_count <= 0) return;
+  const int block_size = 256;
+  GetCSRDegreeKernel<int64_t><<<DivUp(node_count, block_size), block_size, 0, stream>>>(
+      degree, (int64_t *) wm_csr_row_ptr, start_node, node_count);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+void WmmpChunkedGetCSRDegree(int64_t *degree,
+                             void *wm_csr_row_ptr,
+                             int64_t start_node,
+                             int64_t node_count,
+                             cudaStream_t stream) {
+  if (node_count <= 0) return;
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  const int block_size = 256;
+  GetCSRDegreeKernel<const whole_graph::WholeChunkedMemoryHandle>
+      <<<DivUp(node_count, block_size), block_size, 0, stream>>>(degree, wm_csr_row_handle, start_node, node_count);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
 }// namespace whole_graph
@@ -0,0 +1,395 @@
+/*
+ * Copyright (c) 2019-2022, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#include "whole_memory_graph.h"
+
+#include <algorithm>
+#include <random>
+#include <thread>
+#include <vector>
+
+#include "data_type.h"
+#include "macros.h"
+#include "random.cuh"
+#include "whole_chunked_memory.cuh"
+#include "whole_memory.h"
+
+namespace whole_graph {
+
+static constexpr int kNode2VecMaxAttemptCount = 64;
+
+// One step proposal: uniform if there is no alias table, else weighted by the alias table.
+template<typename WeightType, typename WMWeightType, typename WMAliasType>
+__host__ __device__ __forceinline__ int64_t RandomWalkDraw(const PtrGen<WMWeightType, WeightType> &alias_prob_ptr_gen,
+                                                           const PtrGen<WMAliasType, int> &alias_idx_ptr_gen,
+                                                           bool weighted,
+                                                           int64_t start,
+                                                           int neighbor_count,
+                                                           RandomNumGen &rng) {
+  int bucket = rng.RandomMod(neighbor_count);
+  if (!weighted) return start + bucket;
+  float u = rng.RandomUniformFloat();
+  return u < (float) *alias_prob_ptr_gen.At(start + bucket) ? start + bucket
+                                                             : start + *alias_idx_ptr_gen.At(start + bucket);
+}
+
+// Walks one path starting from start_node, output has walk_length + 1 entries, start node included.
+// Walks reaching a node without neighbors stop there and the rest of the path is filled with -1.
+// Second order (node2vec) walks use rejection sampling on the first order proposal: a neighbor x of
+// cur is accepted with weight 1/p if x is prev, 1 if x is a neighbor of prev and 1/q otherwise, scaled
+// by the largest of the three, so no per edge transition table is needed.
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+__host__ __device__ __forceinline__ void RandomWalkOne(IdType *output,
+                                                       IdType start_node,
+                                                       int walk_length,
+                                                       WMOffsetType *wm_csr_row_ptr,
+                                                       WMIdType *wm_csr_col_ptr,
+                                                       WMWeightType *wm_alias_prob_ptr,
+                                                       WMAliasType *wm_alias_idx_ptr,
+                                                       float p,
+                                                       float q,
+                                                       RandomNumGen &rng) {
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  PtrGen<WMWeightType, WeightType> alias_prob_ptr_gen(wm_alias_prob_ptr);
+  PtrGen<WMAliasType, int> alias_idx_ptr_gen(wm_alias_idx_ptr);
+  bool weighted = wm_alias_prob_ptr != nullptr;
+  bool second_order = p != 1.0f || q != 1.0f;
+  float return_weight = 1.0f / p;
+  float in_out_weight = 1.0f / q;
+  float max_weight = return_weight > 1.0f ? return_weight : 1.0f;
+  max_weight = in_out_weight > max_weight ? in_out_weight : max_weight;
+  IdType cur = start_node;
+  IdType prev = -1;
+  int64_t prev_start = 0, prev_end = 0;
+  output[0] = cur;
+  int step = 1;
+  for (; step <= walk_length; step++) {
+    int64_t start = *csr_row_ptr_gen.At(cur);
+    int64_t end = *csr_row_ptr_gen.At(cur + 1);
+    int neighbor_count = (int) (end - start);
+    if (neighbor_count <= 0) break;
+    int64_t edge_idx = RandomWalkDraw(alias_prob_ptr_gen, alias_idx_ptr_gen, weighted, start, neighbor_count, rng);
+    IdType next = *csr_col_ptr_gen.At(edge_idx);
+    if (second_order && prev >= 0) {
+      for (int attempt = 0; attempt < kNode2VecMaxAttemptCount; attempt++) {
+        float weight = in_out_weight;
+        if (next == prev) {
+          weight = return_weight;
+        } else {
+          // neighbors in a CSR row are sorted, binary search next in the row of prev.
+          int64_t lo = prev_start, hi = prev_end;
+          while (lo < hi) {
+            int64_t mid = lo + (hi - lo) / 2;
+            if (*csr_col_ptr_gen.At(mid) < next) {
+              lo = mid + 1;
+            } else {
+              hi = mid;
+            }
+          }
+          if (lo < prev_end && *csr_col_ptr_gen.At(lo) == next) weight = 1.0f;
+        }
+        if (rng.RandomUniformFloat(max_weight) < weight) break;
+        edge_idx = RandomWalkDraw(alias_prob_ptr_gen, alias_idx_ptr_gen, weighted, start, neighbor_count, rng);
+        next = *csr_col_ptr_gen.At(edge_idx);
+      }
+    }
+    prev = cur;
+    prev_start = start;
+    prev_end = end;
+    cur = next;
+    output[step] = cur;
+  }
+  for (; step <= walk_length; step++) output[step] = -1;
+}
+
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+__global__ void RandomWalkKernel(IdType *output,
+                                 const IdType *start_nodes,
+                                 int start_node_count,
+                                 int walk_length,
+                                 WMOffsetType *wm_csr_row_ptr,
+                                 WMIdType *wm_csr_col_ptr,
+                                 WMWeightType *wm_alias_prob_ptr,
+                                 WMAliasType *wm_alias_idx_ptr,
+                                 float p,
+                                 float q,
+                                 unsigned long long random_seed) {
+  int walk_idx = threadIdx.x + blockIdx.x * blockDim.x;
+  if (walk_idx >= start_node_count) return;
+  RandomNumGen rng(walk_idx, random_seed);
+  rng.NextValue();
+  RandomWalkOne<IdType, WeightType, WMIdType, WMOffsetType, WMWeightType, WMAliasType>(
+      output + (int64_t) walk_idx * (walk_length + 1),
+      start_nodes[walk_idx],
+      walk_length,
+      wm_csr_row_ptr,
+      wm_csr_col_ptr,
+      wm_alias_prob_ptr,
+      wm_alias_idx_ptr,
+      p,
+      q,
+      rng);
+}
+
+template<typename IdType, typename WeightType, typename WMIdType, typename WMOffsetType, typename WMWeightType,
+         typename WMAliasType>
+void RandomWalkCommon(void *walk_output,
+                      void *wm_csr_row_ptr,
+                      void *wm_csr_col_ptr,
+                      void *wm_alias_prob_ptr,
+                      void *wm_alias_idx_ptr,
+                      const void *start_nodes,
+                      int start_node_count,
+                      int walk_length,
+                      float p,
+                      float q,
+                      const CUDAEnvFns &cuda_env_fns,
+                      cudaStream_t stream) {
+  WM_CHECK(walk_length > 0);
+  WM_CHECK(p > 0 && q > 0);
+  if (start_node_count == 0) return;
+  thread_local std::random_device rd;
+  thread_local std::mt19937 gen(rd());
+  thread_local std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+  RandomWalkKernel<IdType, WeightType, WMIdType, WMOffsetType, WMWeightType, WMAliasType>
+      <<<DivUp(start_node_count, 128), 128, 0, stream>>>((IdType *) walk_output,
+                                                         (const IdType *) start_nodes,
+                                                         start_node_count,
+                                                         walk_length,
+                                                         (WMOffsetType *) wm_csr_row_ptr,
+                                                         (WMIdType *) wm_csr_col_ptr,
+                                                         (WMWeightType *) wm_alias_prob_ptr,
+                                                         (WMAliasType *) wm_alias_idx_ptr,
+                                                         p,
+                                                         q,
+                                                         random_seed);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+}
+
+template<typename IdType, typename WeightType>
+void RandomWalk(void *walk_output,
+                void *wm_csr_row_ptr,
+                void *wm_csr_col_ptr,
+                void *wm_alias_prob_ptr,
+                void *wm_alias_idx_ptr,
+                const void *start_nodes,
+                int start_node_count,
+                int walk_length,
+                float p,
+                float q,
+                const CUDAEnvFns &cuda_env_fns,
+                cudaStream_t stream) {
+  RandomWalkCommon<IdType, WeightType, IdType, int64_t, WeightType, int>(walk_output,
+                                                                         wm_csr_row_ptr,
+                                                                         wm_csr_col_ptr,
+                                                                         wm_alias_prob_ptr,
+                                                                         wm_alias_idx_ptr,
+                                                                         start_nodes,
+                                                                         start_node_count,
+                                                                         walk_length,
+                                                                         p,
+                                                                         q,
+                                                                         cuda_env_fns,
+                                                                         stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(RandomWalk, RandomWalk, SINT3264, FLOAT_DOUBLE)
+
+void WmmpRandomWalk(void *walk_output,
+                    void *wm_csr_row_ptr,
+                    void *wm_csr_col_ptr,
+                    void *wm_alias_prob_ptr,
+                    void *wm_alias_idx_ptr,
+                    WMType id_type,
+                    WMType weight_type,
+                    const void *start_nodes,
+                    int start_node_count,
+                    int walk_length,
+                    float p,
+                    float q,
+                    const CUDAEnvFns &cuda_env_fns,
+                    cudaStream_t stream) {
+  DISPATCH_TWO_TYPES(id_type,
+                     weight_type,
+                     RandomWalk,
+                     walk_output,
+                     wm_csr_row_ptr,
+                     wm_csr_col_ptr,
+                     wm_alias_prob_ptr,
+                     wm_alias_idx_ptr,
+                     start_nodes,
+                     start_node_count,
+                     walk_length,
+                     p,
+                     q,
+                     cuda_env_fns,
+                     stream);
+}
+
+template<typename IdType, typename WeightType>
+void ChunkedRandomWalk(void *walk_output,
+                       void *wm_csr_row_ptr,
+                       void *wm_csr_col_ptr,
+                       void *wm_alias_prob_ptr,
+                       void *wm_alias_idx_ptr,
+                       const void *start_nodes,
+                       int start_node_count,
+                       int walk_length,
+                       float p,
+                       float q,
+                       const CUDAEnvFns &cuda_env_fns,
+                       cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_alias_prob_handle = nullptr;
+  WholeChunkedMemoryHandle *wm_alias_idx_handle = nullptr;
+  if (wm_alias_prob_ptr != nullptr) {
+    wm_alias_prob_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_prob_ptr, dev_id);
+    wm_alias_idx_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_alias_idx_ptr, dev_id);
+  }
+  RandomWalkCommon<IdType,
+                   WeightType,
+                   const whole_graph::WholeChunkedMemoryHandle,
+                   const whole_graph::WholeChunkedMemoryHandle,
+                   const whole_graph::WholeChunkedMemoryHandle,
+                   const whole_graph::WholeChunkedMemoryHandle>(walk_output,
+                                                                wm_csr_row_handle,
+                                                                wm_csr_col_handle,
+                                                                wm_alias_prob_handle,
+                                                                wm_alias_idx_handle,
+                                                                start_nodes,
+                                                                start_node_count,
+                                                                walk_length,
+                                                                p,
+                                                                q,
+                                                                cuda_env_fns,
+                                                                stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(ChunkedRandomWalk, ChunkedRandomWalk, SINT3264, FLOAT_DOUBLE)
+
+void WmmpChunkedRandomWalk(void *walk_output,
+                           void *wm_csr_row_ptr,
+                           void *wm_csr_col_ptr,
+                           void *wm_alias_prob_ptr,
+                           void *wm_alias_idx_ptr,
+                           WMType id_type,
+                           WMType weight_type,
+                           const void *start_nodes,
+                           int start_node_count,
+                           int walk_length,
+                           float p,
+                           float q,
+                           const CUDAEnvFns &cuda_env_fns,
+                           cudaStream_t stream) {
+  DISPATCH_TWO_TYPES(id_type,
+                     weight_type,
+                     ChunkedRandomWalk,
+                     walk_output,
+                     wm_csr_row_ptr,
+                     wm_csr_col_ptr,
+                     wm_alias_prob_ptr,
+                     wm_alias_idx_ptr,
+                     start_nodes,
+                     start_node_count,
+                     walk_length,
+                     p,
+                     q,
+                     cuda_env_fns,
+                     stream);
+}
+
+template<typename IdType, typename WeightType>
+void HostRandomWalk(void *walk_output,
+                    void *csr_row_ptr,
+                    void *csr_col_ptr,
+                    void *alias_prob_ptr,
+                    void *alias_idx_ptr,
+                    const void *start_nodes,
+                    int start_node_count,
+                    int walk_length,
+                    float p,
+                    float q,
+                    int thread_count) {
+  WM_CHECK(walk_length > 0);
+  WM_CHECK(p > 0 && q > 0);
+  if (start_node_count == 0) return;
+  if (thread_count <= 0) thread_count = (int) std::max(std::thread::hardware_concurrency(), 1U);
+  thread_count = std::min(thread_count, start_node_count);
+  std::random_device rd;
+  std::mt19937 gen(rd());
+  std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+  std::vector<std::thread> threads;
+  for (int thread_idx = 0; thread_idx < thread_count; thread_idx++) {
+    threads.emplace_back([=]() {
+      int walk_start = (int) ((int64_t) start_node_count * thread_idx / thread_count);
+      int walk_end = (int) ((int64_t) start_node_count * (thread_idx + 1) / thread_count);
+      for (int walk_idx = walk_start; walk_idx < walk_end; walk_idx++) {
+        RandomNumGen rng(walk_idx, random_seed);
+        rng.NextValue();
+        RandomWalkOne<IdType, WeightType, IdType, int64_t, WeightType, int>(
+            (IdType *) walk_output + (int64_t) walk_idx * (walk_length + 1),
+            ((const IdType *) start_nodes)[walk_idx],
+            walk_length,
+            (int64_t *) csr_row_ptr,
+            (IdType *) csr_col_ptr,
+            (WeightType *) alias_prob_ptr,
+            (int *) alias_idx_ptr,
+            p,
+            q,
+            rng);
+      }
+    });
+  }
+  for (auto &t : threads) t.join();
+}
+REGISTER_DISPATCH_TWO_TYPES(HostRandomWalk, HostRandomWalk, SINT3264, FLOAT_DOUBLE)
+
+void WmmpHostRandomWalk(void *walk_output,
+                        void *csr_row_ptr,
+                        void *csr_col_ptr,
+                        void *alias_prob_ptr,
+                        void *alias_idx_ptr,
+                        WMType id_type,
+                        WMType weight_type,
+                        const void *start_nodes,
+                        int start_node_count,
+                        int walk_length,
+                        float p,
+                        float q,
+                        int thread_count) {
+  DISPATCH_TWO_TYPES(id_type,
+                     weight_type,
+                     HostRandomWalk,
+                     walk_output,
+                     csr_row_ptr,
+                     csr_col_ptr,
+                     alias_prob_ptr,
+                     alias_idx_ptr,
+                     start_nodes,
+                     start_node_count,
+                     walk_length,
+                     p,
+                     q,
+                     thread_count);
+}
+
+}// namespace whole_graph
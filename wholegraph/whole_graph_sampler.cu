@@ -504,6 +504,217 @@ void WmmpChunkedUnweightedSampleWithoutReplacement(const std::function<void *(si
                     stream);
 }
 
+template<typename IdType, typename WMOffsetType>
+__global__ void GetSampleCountWithReplacementKernel(int *sample_count,
+                                                    const IdType *input_nodes,
+                                                    int input_node_count,
+                                                    WMOffsetType *wm_csr_row_ptr,
+                                                    int max_sample_count) {
+  int input_idx = threadIdx.x + blockIdx.x * blockDim.x;
+  if (input_idx >= input_node_count) return;
+  IdType nid = input_nodes[input_idx];
+  whole_graph::PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  // center nodes without neighbors get no samples.
+  sample_count[input_idx] = end > start ? max_sample_count : 0;
+}
+
+template<typename IdType, typename WMIdType, typename WMOffsetType>
+__global__ void UnWeightedSampleWithReplacementKernel(IdType *output,
+                                                      int *src_lid,
+                                                      const int *sample_offset,
+                                                      const IdType *input_nodes,
+                                                      int input_node_count,
+                                                      WMOffsetType *wm_csr_row_ptr,
+                                                      WMIdType *wm_csr_col_ptr,
+                                                      int max_sample_count,
+                                                      unsigned long long random_seed) {
+  int input_idx = blockIdx.x;
+  if (input_idx >= input_node_count) return;
+  int gidx = threadIdx.x + blockIdx.x * blockDim.x;
+  whole_graph::PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  whole_graph::PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  IdType nid = input_nodes[input_idx];
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int neighbor_count = (int) (end - start);
+  if (neighbor_count <= 0) return;
+  int offset = sample_offset[input_idx];
+  RandomNumGen rng(gidx, random_seed);
+  rng.NextValue();
+  for (int sample_id = threadIdx.x; sample_id < max_sample_count; sample_id += blockDim.x) {
+    output[offset + sample_id] = *csr_col_ptr_gen.At(start + rng.RandomMod(neighbor_count));
+    if (src_lid) src_lid[offset + sample_id] = input_idx;
+  }
+}
+
+template<typename IdType, typename WMIdType, typename WMOffsetType>
+void UnweightedSampleWithReplacementCommon(const std::function<void *(size_t)> &sample_output_allocator,
+                                           const std::function<void *(size_t)> &center_localid_allocator,
+                                           int *sample_offset,
+                                           void *wm_csr_row_ptr,
+                                           void *wm_csr_col_ptr,
+                                           const void *center_nodes,
+                                           int center_node_count,
+                                           int max_sample_count,
+                                           const CUDAEnvFns &cuda_env_fns,
+                                           cudaStream_t stream) {
+  WM_CHECK(max_sample_count > 0);
+  thread_local std::random_device rd;
+  thread_local std::mt19937 gen(rd());
+  thread_local std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+  whole_graph::TempMemoryHandle tmh;
+  cuda_env_fns.allocate_temp_fn(sizeof(int) * (center_node_count + 1), &tmh);
+  int *sample_count = (int *) tmh.ptr;
+  GetSampleCountWithReplacementKernel<IdType, WMOffsetType><<<DivUp(center_node_count, 128), 128, 0, stream>>>(
+      sample_count,
+      (const IdType *) center_nodes,
+      center_node_count,
+      (WMOffsetType *) wm_csr_row_ptr,
+      max_sample_count);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  WMThrustAllocator allocator(cuda_env_fns);
+  thrust::exclusive_scan(thrust::cuda::par(allocator).on(stream),
+                         sample_count,
+                         sample_count + center_node_count + 1,
+                         sample_offset);
+  int count;
+  WM_CUDA_CHECK(cudaMemcpyAsync(&count,
+                                sample_offset + center_node_count,
+                                sizeof(int),
+                                cudaMemcpyDeviceToHost,
+                                stream));
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&tmh);
+  allocator.deallocate_all();
+  auto *sample_output = (IdType *) sample_output_allocator(count);
+  auto *src_lid = (int *) center_localid_allocator(count);
+  if (center_node_count == 0) return;
+  UnWeightedSampleWithReplacementKernel<IdType, WMIdType, WMOffsetType>
+      <<<center_node_count, 64, 0, stream>>>(sample_output,
+                                             src_lid,
+                                             sample_offset,
+                                             (const IdType *) center_nodes,
+                                             center_node_count,
+                                             (WMOffsetType *) wm_csr_row_ptr,
+                                             (WMIdType *) wm_csr_col_ptr,
+                                             max_sample_count,
+                                             random_seed);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+}
+
+template<typename IdType>
+void UnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                     const std::function<void *(size_t)> &center_localid_allocator,
+                                     int *sample_offset,
+                                     void *wm_csr_row_ptr,
+                                     void *wm_csr_col_ptr,
+                                     const void *center_nodes,
+                                     int center_node_count,
+                                     int max_sample_count,
+                                     const CUDAEnvFns &cuda_env_fns,
+                                     cudaStream_t stream) {
+  UnweightedSampleWithReplacementCommon<IdType, IdType, int64_t>(sample_output_allocator,
+                                                                 center_localid_allocator,
+                                                                 sample_offset,
+                                                                 wm_csr_row_ptr,
+                                                                 wm_csr_col_ptr,
+                                                                 center_nodes,
+                                                                 center_node_count,
+                                                                 max_sample_count,
+                                                                 cuda_env_fns,
+                                                                 stream);
+}
+
+REGISTER_DISPATCH_ONE_TYPE(UnweightedSampleWithReplacement, UnweightedSampleWithReplacement, SINT3264)
+
+void WmmpUnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                         const std::function<void *(size_t)> &center_localid_allocator,
+                                         int *sample_offset,
+                                         void *wm_csr_row_ptr,
+                                         void *wm_csr_col_ptr,
+                                         WMType id_type,
+                                         const void *center_nodes,
+                                         int center_node_count,
+                                         int max_sample_count,
+                                         const CUDAEnvFns &cuda_env_fns,
+                                         cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    UnweightedSampleWithReplacement,
+                    sample_output_allocator,
+                    center_localid_allocator,
+                    sample_offset,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    center_nodes,
+                    center_node_count,
+                    max_sample_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+template<typename IdType>
+void ChunkedUnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                            const std::function<void *(size_t)> &center_localid_allocator,
+                                            int *sample_offset,
+                                            void *wm_csr_row_ptr,
+                                            void *wm_csr_col_ptr,
+                                            const void *center_nodes,
+                                            int center_node_count,
+                                            int max_sample_count,
+                                            const CUDAEnvFns &cuda_env_fns,
+                                            cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  UnweightedSampleWithReplacementCommon<IdType,
+                                        const whole_graph::WholeChunkedMemoryHandle,
+                                        const whole_graph::WholeChunkedMemoryHandle>(sample_output_allocator,
+                                                                                     center_localid_allocator,
+                                                                                     sample_offset,
+                                                                                     wm_csr_row_handle,
+                                                                                     wm_csr_col_handle,
+                                                                                     center_nodes,
+                                                                                     center_node_count,
+                                                                                     max_sample_count,
+                                                                                     cuda_env_fns,
+                                                                                     stream);
+}
+
+REGISTER_DISPATCH_ONE_TYPE(ChunkedUnweightedSampleWithReplacement,
+                           ChunkedUnweightedSampleWithReplacement,
+                           SINT3264)
+
+void WmmpChunkedUnweightedSampleWithReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                                const std::function<void *(size_t)> &center_localid_allocator,
+                                                int *sample_offset,
+                                                void *wm_csr_row_ptr,
+                                                void *wm_csr_col_ptr,
+                                                WMType id_type,
+                                                const void *center_nodes,
+                                                int center_node_count,
+                                                int max_sample_count,
+                                                const CUDAEnvFns &cuda_env_fns,
+                                                cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    ChunkedUnweightedSampleWithReplacement,
+                    sample_output_allocator,
+                    center_localid_allocator,
+                    sample_offset,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    center_nodes,
+                    center_node_count,
+                    max_sample_count,
+                    cuda_env_fns,
+                    stream);
+}
+
 template<typename KeyT, int BucketSize>
 class AppendUniqueHash;
 
@@ -0,0 +1,452 @@
+/*
+ * Copyright (c) 2019-2022, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#include "whole_memory_graph.h"
+
+#include <thrust/scan.h>
+
+#include <random>
+
+#include "data_type.h"
+#include "macros.h"
+#include "random.cuh"
+#include "whole_chunked_memory.cuh"
+#include "whole_memory.h"
+
+namespace whole_graph {
+
+// Edges of each row are sorted by time in ascending order, so edges within the window of a query
+// are one contiguous range found by two binary searches, no edge outside the range is read.
+template<typename TimeType, typename WMTimeType>
+__device__ __forceinline__ int64_t TimeLowerBound(const PtrGen<WMTimeType, TimeType> &edge_time_ptr_gen,
+                                                  int64_t start,
+                                                  int64_t end,
+                                                  TimeType value,
+                                                  bool upper) {
+  while (start < end) {
+    int64_t mid = start + (end - start) / 2;
+    TimeType t = *edge_time_ptr_gen.At(mid);
+    if (t < value || (upper && t == value)) {
+      start = mid + 1;
+    } else {
+      end = mid;
+    }
+  }
+  return start;
+}
+
+template<typename IdType, typename TimeType, typename WMOffsetType, typename WMTimeType>
+__device__ __forceinline__ void GetTemporalRange(int64_t *range_start,
+                                                 int64_t *range_end,
+                                                 IdType nid,
+                                                 TimeType query_time,
+                                                 WMOffsetType *wm_csr_row_ptr,
+                                                 WMTimeType *wm_edge_time_ptr,
+                                                 TimeType window,
+                                                 bool has_window,
+                                                 bool include_query_time) {
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMTimeType, TimeType> edge_time_ptr_gen(wm_edge_time_ptr);
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  *range_end = TimeLowerBound(edge_time_ptr_gen, start, end, query_time, include_query_time);
+  *range_start = has_window ? TimeLowerBound(edge_time_ptr_gen, start, *range_end, (TimeType) (query_time - window), false)
+                            : start;
+}
+
+template<typename IdType, typename TimeType, typename WMOffsetType, typename WMTimeType>
+__global__ void GetTemporalSampleCountKernel(int *sample_count,
+                                             const IdType *input_nodes,
+                                             const TimeType *query_time,
+                                             int input_node_count,
+                                             WMOffsetType *wm_csr_row_ptr,
+                                             WMTimeType *wm_edge_time_ptr,
+                                             TimeType window,
+                                             bool has_window,
+                                             bool include_query_time,
+                                             int max_sample_count) {
+  int input_idx = threadIdx.x + blockIdx.x * blockDim.x;
+  if (input_idx >= input_node_count) return;
+  int64_t range_start, range_end;
+  GetTemporalRange<IdType, TimeType, WMOffsetType, WMTimeType>(&range_start,
+                                                               &range_end,
+                                                               input_nodes[input_idx],
+                                                               query_time[input_idx],
+                                                               wm_csr_row_ptr,
+                                                               wm_edge_time_ptr,
+                                                               window,
+                                                               has_window,
+                                                               include_query_time);
+  int neighbor_count = (int) (range_end - range_start);
+  if (max_sample_count > 0) neighbor_count = min(neighbor_count, max_sample_count);
+  sample_count[input_idx] = neighbor_count;
+}
+
+template<typename IdType, typename TimeType, typename WMIdType, typename WMOffsetType, typename WMTimeType>
+__global__ void TemporalSampleKernel(IdType *output,
+                                     int *src_lid,
+                                     TimeType *sample_time,
+                                     const int *sample_offset,
+                                     const IdType *input_nodes,
+                                     const TimeType *query_time,
+                                     int input_node_count,
+                                     WMOffsetType *wm_csr_row_ptr,
+                                     WMIdType *wm_csr_col_ptr,
+                                     WMTimeType *wm_edge_time_ptr,
+                                     TimeType window,
+                                     bool has_window,
+                                     bool include_query_time,
+                                     int max_sample_count,
+                                     bool most_recent,
+                                     unsigned long long random_seed) {
+  int input_idx = blockIdx.x;
+  if (input_idx >= input_node_count) return;
+  int gidx = threadIdx.x + blockIdx.x * blockDim.x;
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  PtrGen<WMTimeType, TimeType> edge_time_ptr_gen(wm_edge_time_ptr);
+  int64_t start, end;
+  GetTemporalRange<IdType, TimeType, WMOffsetType, WMTimeType>(&start,
+                                                               &end,
+                                                               input_nodes[input_idx],
+                                                               query_time[input_idx],
+                                                               wm_csr_row_ptr,
+                                                               wm_edge_time_ptr,
+                                                               window,
+                                                               has_window,
+                                                               include_query_time);
+  int neighbor_count = (int) (end - start);
+  int offset = sample_offset[input_idx];
+  int sample_count = sample_offset[input_idx + 1] - offset;
+  if (neighbor_count <= sample_count || most_recent) {
+    // all neighbors in window, or the latest sample_count of them.
+    for (int sample_id = threadIdx.x; sample_id < sample_count; sample_id += blockDim.x) {
+      int64_t edge_idx = end - sample_count + sample_id;
+      output[offset + sample_id] = *csr_col_ptr_gen.At(edge_idx);
+      if (sample_time) sample_time[offset + sample_id] = *edge_time_ptr_gen.At(edge_idx);
+      src_lid[offset + sample_id] = input_idx;
+    }
+    return;
+  }
+  // uniform sampling without replacement inside the window, same reservoir scheme as LargeSampleKernel,
+  // src_lid is used as scratch for the picked indices.
+  RandomNumGen rng(gidx, random_seed);
+  rng.NextValue();
+  for (int sample_id = threadIdx.x; sample_id < sample_count; sample_id += blockDim.x) {
+    src_lid[offset + sample_id] = sample_id;
+  }
+  __syncthreads();
+  for (int idx = sample_count + threadIdx.x; idx < neighbor_count; idx += blockDim.x) {
+    const int rand_num = rng.RandomMod(idx + 1);
+    if (rand_num < sample_count) {
+      atomicMax(src_lid + offset + rand_num, idx);
+    }
+  }
+  __syncthreads();
+  for (int sample_id = threadIdx.x; sample_id < sample_count; sample_id += blockDim.x) {
+    int64_t edge_idx = start + src_lid[offset + sample_id];
+    output[offset + sample_id] = *csr_col_ptr_gen.At(edge_idx);
+    if (sample_time) sample_time[offset + sample_id] = *edge_time_ptr_gen.At(edge_idx);
+    src_lid[offset + sample_id] = input_idx;
+  }
+}
+
+template<typename IdType, typename TimeType, typename WMIdType, typename WMOffsetType, typename WMTimeType>
+void TemporalSampleCommon(const std::function<void *(size_t)> &sample_output_allocator,
+                          const std::function<void *(size_t)> &center_localid_allocator,
+                          const std::function<void *(size_t)> &sample_time_allocator,
+                          int *sample_offset,
+                          void *wm_csr_row_ptr,
+                          void *wm_csr_col_ptr,
+                          void *wm_edge_time_ptr,
+                          const void *center_nodes,
+                          const void *query_time,
+                          int center_node_count,
+                          double window,
+                          bool include_query_time,
+                          int max_sample_count,
+                          bool most_recent,
+                          const CUDAEnvFns &cuda_env_fns,
+                          cudaStream_t stream) {
+  thread_local std::random_device rd;
+  thread_local std::mt19937 gen(rd());
+  thread_local std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+  bool has_window = window >= 0;
+  whole_graph::TempMemoryHandle tmh;
+  cuda_env_fns.allocate_temp_fn(sizeof(int) * (center_node_count + 1), &tmh);
+  int *sample_count = (int *) tmh.ptr;
+  GetTemporalSampleCountKernel<IdType, TimeType, WMOffsetType, WMTimeType>
+      <<<DivUp(center_node_count, 128), 128, 0, stream>>>(sample_count,
+                                                          (const IdType *) center_nodes,
+                                                          (const TimeType *) query_time,
+                                                          center_node_count,
+                                                          (WMOffsetType *) wm_csr_row_ptr,
+                                                          (WMTimeType *) wm_edge_time_ptr,
+                                                          (TimeType) window,
+                                                          has_window,
+                                                          include_query_time,
+                                                          max_sample_count);
+  WM_CUDA_CHECK(cudaGetLastError());
+  WMThrustAllocator allocator(cuda_env_fns);
+  thrust::exclusive_scan(thrust::cuda::par(allocator).on(stream),
+                         sample_count,
+                         sample_count + center_node_count + 1,
+                         sample_offset);
+  int count;
+  WM_CUDA_CHECK(cudaMemcpyAsync(&count,
+                                sample_offset + center_node_count,
+                                sizeof(int),
+                                cudaMemcpyDeviceToHost,
+                                stream));
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&tmh);
+  allocator.deallocate_all();
+  auto *sample_output = (IdType *) sample_output_allocator(count);
+  auto *src_lid = (int *) center_localid_allocator(count);
+  auto *sample_time = (TimeType *) sample_time_allocator(count);
+  if (center_node_count == 0) return;
+  TemporalSampleKernel<IdType, TimeType, WMIdType, WMOffsetType, WMTimeType>
+      <<<center_node_count, 32, 0, stream>>>(sample_output,
+                                             src_lid,
+                                             sample_time,
+                                             sample_offset,
+                                             (const IdType *) center_nodes,
+                                             (const TimeType *) query_time,
+                                             center_node_count,
+                                             (WMOffsetType *) wm_csr_row_ptr,
+                                             (WMIdType *) wm_csr_col_ptr,
+                                             (WMTimeType *) wm_edge_time_ptr,
+                                             (TimeType) window,
+                                             has_window,
+                                             include_query_time,
+                                             max_sample_count,
+                                             most_recent,
+                                             random_seed);
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+}
+
+template<typename IdType, typename TimeType>
+void TemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                    const std::function<void *(size_t)> &center_localid_allocator,
+                    const std::function<void *(size_t)> &sample_time_allocator,
+                    int *sample_offset,
+                    void *wm_csr_row_ptr,
+                    void *wm_csr_col_ptr,
+                    void *wm_edge_time_ptr,
+                    const void *center_nodes,
+                    const void *query_time,
+                    int center_node_count,
+                    double window,
+                    bool include_query_time,
+                    int max_sample_count,
+                    bool most_recent,
+                    const CUDAEnvFns &cuda_env_fns,
+                    cudaStream_t stream) {
+  TemporalSampleCommon<IdType, TimeType, IdType, int64_t, TimeType>(sample_output_allocator,
+                                                                    center_localid_allocator,
+                                                                    sample_time_allocator,
+                                                                    sample_offset,
+                                                                    wm_csr_row_ptr,
+                                                                    wm_csr_col_ptr,
+                                                                    wm_edge_time_ptr,
+                                                                    center_nodes,
+                                                                    query_time,
+                                                                    center_node_count,
+                                                                    window,
+                                                                    include_query_time,
+                                                                    max_sample_count,
+                                                                    most_recent,
+                                                                    cuda_env_fns,
+                                                                    stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(TemporalSampleInt, TemporalSample, SINT3264, SINT3264)
+REGISTER_DISPATCH_TWO_TYPES(TemporalSampleFloat, TemporalSample, SINT3264, FLOAT_DOUBLE)
+
+void WmmpTemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                        const std::function<void *(size_t)> &center_localid_allocator,
+                        const std::function<void *(size_t)> &sample_time_allocator,
+                        int *sample_offset,
+                        void *wm_csr_row_ptr,
+                        void *wm_csr_col_ptr,
+                        void *wm_edge_time_ptr,
+                        WMType id_type,
+                        WMType time_type,
+                        const void *center_nodes,
+                        const void *query_time,
+                        int center_node_count,
+                        double window,
+                        bool include_query_time,
+                        int max_sample_count,
+                        bool most_recent,
+                        const CUDAEnvFns &cuda_env_fns,
+                        cudaStream_t stream) {
+  bool is_time_int = time_type == WMT_Int32 || time_type == WMT_Int64;
+  bool is_time_float = time_type == WMT_Float || time_type == WMT_Double;
+  WM_CHECK(is_time_int || is_time_float);
+  if (is_time_int) {
+    DISPATCH_TWO_TYPES(id_type,
+                       time_type,
+                       TemporalSampleInt,
+                       sample_output_allocator,
+                       center_localid_allocator,
+                       sample_time_allocator,
+                       sample_offset,
+                       wm_csr_row_ptr,
+                       wm_csr_col_ptr,
+                       wm_edge_time_ptr,
+                       center_nodes,
+                       query_time,
+                       center_node_count,
+                       window,
+                       include_query_time,
+                       max_sample_count,
+                       most_recent,
+                       cuda_env_fns,
+                       stream);
+  } else {
+    DISPATCH_TWO_TYPES(id_type,
+                       time_type,
+                       TemporalSampleFloat,
+                       sample_output_allocator,
+                       center_localid_allocator,
+                       sample_time_allocator,
+                       sample_offset,
+                       wm_csr_row_ptr,
+                       wm_csr_col_ptr,
+                       wm_edge_time_ptr,
+                       center_nodes,
+                       query_time,
+                       center_node_count,
+                       window,
+                       include_query_time,
+                       max_sample_count,
+                       most_recent,
+                       cuda_env_fns,
+                       stream);
+  }
+}
+
+template<typename IdType, typename TimeType>
+void ChunkedTemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                           const std::function<void *(size_t)> &center_localid_allocator,
+                           const std::function<void *(size_t)> &sample_time_allocator,
+                           int *sample_offset,
+                           void *wm_csr_row_ptr,
+                           void *wm_csr_col_ptr,
+                           void *wm_edge_time_ptr,
+                           const void *center_nodes,
+                           const void *query_time,
+                           int center_node_count,
+                           double window,
+                           bool include_query_time,
+                           int max_sample_count,
+                           bool most_recent,
+                           const CUDAEnvFns &cuda_env_fns,
+                           cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_edge_time_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_edge_time_ptr, dev_id);
+  TemporalSampleCommon<IdType,
+                       TimeType,
+                       const whole_graph::WholeChunkedMemoryHandle,
+                       const whole_graph::WholeChunkedMemoryHandle,
+                       const whole_graph::WholeChunkedMemoryHandle>(sample_output_allocator,
+                                                                    center_localid_allocator,
+                                                                    sample_time_allocator,
+                                                                    sample_offset,
+                                                                    wm_csr_row_handle,
+                                                                    wm_csr_col_handle,
+                                                                    wm_edge_time_handle,
+                                                                    center_nodes,
+                                                                    query_time,
+                                                                    center_node_count,
+                                                                    window,
+                                                                    include_query_time,
+                                                                    max_sample_count,
+                                                                    most_recent,
+                                                                    cuda_env_fns,
+                                                                    stream);
+}
+REGISTER_DISPATCH_TWO_TYPES(ChunkedTemporalSampleInt, ChunkedTemporalSample, SINT3264, SINT3264)
+REGISTER_DISPATCH_TWO_TYPES(ChunkedTemporalSampleFloat, ChunkedTemporalSample, SINT3264, FLOAT_DOUBLE)
+
+void WmmpChunkedTemporalSample(const std::function<void *(size_t)> &sample_output_allocator,
+                               const std::function<void *(size_t)> &center_localid_allocator,
+                               const std::function<void *(size_t)> &sample_time_allocator,
+                               int *sample_offset,
+                               void *wm_csr_row_ptr,
+                               void *wm_csr_col_ptr,
+                               void *wm_edge_time_ptr,
+                               WMType id_type,
+                               WMType time_type,
+                               const void *center_nodes,
+                               const void *query_time,
+                               int center_node_count,
+                               double window,
+                               bool include_query_time,
+                               int max_sample_count,
+                               bool most_recent,
+                               const CUDAEnvFns &cuda_env_fns,
+                               cudaStream_t stream) {
+  bool is_time_int = time_type == WMT_Int32 || time_type == WMT_Int64;
+  bool is_time_float = time_type == WMT_Float || time_type == WMT_Double;
+  WM_CHECK(is_time_int || is_time_float);
+  if (is_time_int) {
+    DISPATCH_TWO_TYPES(id_type,
+                       time_type,
+                       ChunkedTemporalSampleInt,
+                       sample_output_allocator,
+                       center_localid_allocator,
+                       sample_time_allocator,
+                       sample_offset,
+                       wm_csr_row_ptr,
+                       wm_csr_col_ptr,
+                       wm_edge_time_ptr,
+                       center_nodes,
+                       query_time,
+                       center_node_count,
+                       window,
+                       include_query_time,
+                       max_sample_count,
+                       most_recent,
+                       cuda_env_fns,
+                       stream);
+  } else {
+    DISPATCH_TWO_TYPES(id_type,
+                       time_type,
+                       ChunkedTemporalSampleFloat,
+                       sample_output_allocator,
+                       center_localid_allocator,
+                       sample_time_allocator,
+                       sample_offset,
+                       wm_csr_row_ptr,
+                       wm_csr_col_ptr,
+                       wm_edge_time_ptr,
+                       center_nodes,
+                       query_time,
+                       center_node_count,
+                       window,
+                       include_query_time,
+                       max_sample_count,
+                       most_recent,
+                       cuda_env_fns,
+                       stream);
+  }
+}
+
+}// namespace whole_graph
@@ -0,0 +1,369 @@
+/*
+ * Copyright (c) 2019-2022, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#include "whole_memory_graph.h"
+
+#include <thrust/scan.h>
+
+#include <algorithm>
+#include <random>
+
+#include "data_type.h"
+#include "macros.h"
+#include "random.cuh"
+#include "whole_chunked_memory.cuh"
+#include "whole_memory.h"
+
+namespace whole_graph {
+
+static constexpr int kTypedSampleMaxEdgeTypeCount = 64;
+
+// One warp per center node. Edges are visited 32 at a time, lanes with the same edge type are grouped by
+// __match_any_sync, so each edge gets its rank among edges of its type in a single pass.
+template<typename WMOffsetType, typename WMEdgeTypeType, typename RankFunc>
+__device__ __forceinline__ void ForEachTypedEdge(PtrGen<WMOffsetType, int64_t> &csr_row_ptr_gen,
+                                                 PtrGen<WMEdgeTypeType, int8_t> &edge_type_ptr_gen,
+                                                 int64_t nid,
+                                                 int edge_type_count,
+                                                 int *type_count,
+                                                 RankFunc rank_func) {
+  int lane_id = threadIdx.x % 32;
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  int64_t end = *csr_row_ptr_gen.At(nid + 1);
+  int neighbor_count = (int) (end - start);
+  for (int chunk_start = 0; chunk_start < neighbor_count; chunk_start += 32) {
+    int neighbor_idx = chunk_start + lane_id;
+    int edge_type = -1;
+    if (neighbor_idx < neighbor_count) {
+      edge_type = *edge_type_ptr_gen.At(start + neighbor_idx);
+      if (edge_type >= edge_type_count) edge_type = -1;
+    }
+    unsigned int match_mask = __match_any_sync(0xffffffff, edge_type);
+    int rank_in_chunk = __popc(match_mask & ((1U << lane_id) - 1U));
+    int rank = edge_type >= 0 ? type_count[edge_type] + rank_in_chunk : -1;
+    __syncwarp();
+    if (edge_type >= 0 && rank_in_chunk == 0) type_count[edge_type] += __popc(match_mask);
+    __syncwarp();
+    if (edge_type >= 0) rank_func(edge_type, rank, neighbor_idx);
+  }
+}
+
+template<typename IdType, typename WMOffsetType, typename WMEdgeTypeType>
+__global__ void GetTypedSampleCountKernel(int *sample_count,
+                                          int *type_sample_count,
+                                          const IdType *input_nodes,
+                                          int input_node_count,
+                                          WMOffsetType *wm_csr_row_ptr,
+                                          WMEdgeTypeType *wm_edge_type_ptr,
+                                          const int *type_max_sample_count,
+                                          int edge_type_count) {
+  __shared__ int type_count[kTypedSampleMaxEdgeTypeCount];
+  int input_idx = blockIdx.x;
+  if (input_idx >= input_node_count) return;
+  for (int i = threadIdx.x; i < edge_type_count; i += 32) type_count[i] = 0;
+  __syncwarp();
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMEdgeTypeType, int8_t> edge_type_ptr_gen(wm_edge_type_ptr);
+  ForEachTypedEdge(csr_row_ptr_gen,
+                   edge_type_ptr_gen,
+                   input_nodes[input_idx],
+                   edge_type_count,
+                   type_count,
+                   [](int, int, int) {});
+  int count = 0;
+  for (int i = threadIdx.x; i < edge_type_count; i += 32) {
+    int max_count = type_max_sample_count[i];
+    int type_sample = max_count >= 0 ? min(type_count[i], max_count) : type_count[i];
+    type_sample_count[(int64_t) input_idx * edge_type_count + i] = type_sample;
+    count += type_sample;
+  }
+  for (int offset = 16; offset > 0; offset /= 2) {
+    count += __shfl_down_sync(0xffffffff, count, offset);
+  }
+  if (threadIdx.x == 0) sample_count[input_idx] = count;
+}
+
+// Reservoir sampling of each edge type: the first k edges of a type fill the k slots, the edge of rank j > k
+// replaces slot rand(j + 1) if it is less than k. Slots keep edge positions, which grow with rank, so atomicMax
+// keeps the latest replacement as sequential reservoir sampling would.
+template<typename IdType, typename WMIdType, typename WMOffsetType, typename WMEdgeTypeType>
+__global__ void TypedSampleKernel(IdType *output,
+                                  int *src_lid,
+                                  int8_t *sample_edge_type,
+                                  const int *sample_offset,
+                                  const int *type_sample_count,
+                                  const IdType *input_nodes,
+                                  int input_node_count,
+                                  WMOffsetType *wm_csr_row_ptr,
+                                  WMIdType *wm_csr_col_ptr,
+                                  WMEdgeTypeType *wm_edge_type_ptr,
+                                  int edge_type_count,
+                                  unsigned long long random_seed) {
+  __shared__ int type_count[kTypedSampleMaxEdgeTypeCount];
+  __shared__ int type_offset[kTypedSampleMaxEdgeTypeCount];
+  __shared__ int type_sample[kTypedSampleMaxEdgeTypeCount];
+  int input_idx = blockIdx.x;
+  if (input_idx >= input_node_count) return;
+  int gidx = threadIdx.x + blockIdx.x * blockDim.x;
+  RandomNumGen rng(gidx, random_seed);
+  rng.NextValue();
+  int offset = sample_offset[input_idx];
+  int count = sample_offset[input_idx + 1] - offset;
+  if (count == 0) return;
+  if (threadIdx.x == 0) {
+    int type_start = 0;
+    for (int i = 0; i < edge_type_count; i++) {
+      type_count[i] = 0;
+      type_offset[i] = type_start;
+      type_sample[i] = type_sample_count[(int64_t) input_idx * edge_type_count + i];
+      type_start += type_sample[i];
+    }
+  }
+  for (int i = threadIdx.x; i < count; i += 32) src_lid[offset + i] = -1;
+  __syncwarp();
+  PtrGen<WMOffsetType, int64_t> csr_row_ptr_gen(wm_csr_row_ptr);
+  PtrGen<WMIdType, IdType> csr_col_ptr_gen(wm_csr_col_ptr);
+  PtrGen<WMEdgeTypeType, int8_t> edge_type_ptr_gen(wm_edge_type_ptr);
+  IdType nid = input_nodes[input_idx];
+  int *slots = src_lid + offset;
+  ForEachTypedEdge(csr_row_ptr_gen,
+                   edge_type_ptr_gen,
+                   nid,
+                   edge_type_count,
+                   type_count,
+                   [&](int edge_type, int rank, int neighbor_idx) {
+                     int k = type_sample[edge_type];
+                     if (k <= 0) return;
+                     int slot = rank < k ? rank : rng.RandomMod(rank + 1);
+                     if (slot < k) atomicMax(slots + type_offset[edge_type] + slot, neighbor_idx);
+                   });
+  __syncwarp();
+  int64_t start = *csr_row_ptr_gen.At(nid);
+  for (int edge_type = 0; edge_type < edge_type_count; edge_type++) {
+    for (int i = threadIdx.x; i < type_sample[edge_type]; i += 32) {
+      int sample_id = type_offset[edge_type] + i;
+      output[offset + sample_id] = *csr_col_ptr_gen.At(start + slots[sample_id]);
+      sample_edge_type[offset + sample_id] = (int8_t) edge_type;
+    }
+  }
+  __syncwarp();
+  for (int i = threadIdx.x; i < count; i += 32) src_lid[offset + i] = input_idx;
+}
+
+template<typename IdType, typename WMIdType, typename WMOffsetType, typename WMEdgeTypeType>
+void TypedSampleWithoutReplacementCommon(const std::function<void *(size_t)> &sample_output_allocator,
+                                         const std::function<void *(size_t)> &center_localid_allocator,
+                                         const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                         int *sample_offset,
+                                         void *wm_csr_row_ptr,
+                                         void *wm_csr_col_ptr,
+                                         void *wm_edge_type_ptr,
+                                         const void *center_nodes,
+                                         int center_node_count,
+                                         const int *type_max_sample_count,
+                                         int edge_type_count,
+                                         const CUDAEnvFns &cuda_env_fns,
+                                         cudaStream_t stream) {
+  WM_CHECK(edge_type_count > 0 && edge_type_count <= kTypedSampleMaxEdgeTypeCount);
+  thread_local std::random_device rd;
+  thread_local std::mt19937 gen(rd());
+  thread_local std::uniform_int_distribution<unsigned long long> distrib;
+  unsigned long long random_seed = distrib(gen);
+  whole_graph::TempMemoryHandle tmh, type_tmh;
+  cuda_env_fns.allocate_temp_fn(sizeof(int) * (center_node_count + 1), &tmh);
+  cuda_env_fns.allocate_temp_fn(sizeof(int) * std::max<int64_t>((int64_t) center_node_count * edge_type_count, 1),
+                                &type_tmh);
+  int *sample_count = (int *) tmh.ptr;
+  int *type_sample_count = (int *) type_tmh.ptr;
+  if (center_node_count > 0) {
+    GetTypedSampleCountKernel<IdType, WMOffsetType, WMEdgeTypeType>
+        <<<center_node_count, 32, 0, stream>>>(sample_count,
+                                               type_sample_count,
+                                               (const IdType *) center_nodes,
+                                               center_node_count,
+                                               (WMOffsetType *) wm_csr_row_ptr,
+                                               (WMEdgeTypeType *) wm_edge_type_ptr,
+                                               type_max_sample_count,
+                                               edge_type_count);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
+  WMThrustAllocator allocator(cuda_env_fns);
+  thrust::exclusive_scan(thrust::cuda::par(allocator).on(stream),
+                         sample_count,
+                         sample_count + center_node_count + 1,
+                         sample_offset);
+  int count;
+  WM_CUDA_CHECK(cudaMemcpyAsync(&count,
+                                sample_offset + center_node_count,
+                                sizeof(int),
+                                cudaMemcpyDeviceToHost,
+                                stream));
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&tmh);
+  allocator.deallocate_all();
+  auto *sample_output = (IdType *) sample_output_allocator(count);
+  auto *src_lid = (int *) center_localid_allocator(count);
+  auto *sample_edge_type = (int8_t *) sample_edge_type_allocator(count);
+  if (center_node_count > 0) {
+    TypedSampleKernel<IdType, WMIdType, WMOffsetType, WMEdgeTypeType>
+        <<<center_node_count, 32, 0, stream>>>(sample_output,
+                                               src_lid,
+                                               sample_edge_type,
+                                               sample_offset,
+                                               type_sample_count,
+                                               (const IdType *) center_nodes,
+                                               center_node_count,
+                                               (WMOffsetType *) wm_csr_row_ptr,
+                                               (WMIdType *) wm_csr_col_ptr,
+                                               (WMEdgeTypeType *) wm_edge_type_ptr,
+                                               edge_type_count,
+                                               random_seed);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&type_tmh);
+}
+
+template<typename IdType>
+void TypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                   const std::function<void *(size_t)> &center_localid_allocator,
+                                   const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                   int *sample_offset,
+                                   void *wm_csr_row_ptr,
+                                   void *wm_csr_col_ptr,
+                                   void *wm_edge_type_ptr,
+                                   const void *center_nodes,
+                                   int center_node_count,
+                                   const int *type_max_sample_count,
+                                   int edge_type_count,
+                                   const CUDAEnvFns &cuda_env_fns,
+                                   cudaStream_t stream) {
+  TypedSampleWithoutReplacementCommon<IdType, IdType, int64_t, int8_t>(sample_output_allocator,
+                                                                       center_localid_allocator,
+                                                                       sample_edge_type_allocator,
+                                                                       sample_offset,
+                                                                       wm_csr_row_ptr,
+                                                                       wm_csr_col_ptr,
+                                                                       wm_edge_type_ptr,
+                                                                       center_nodes,
+                                                                       center_node_count,
+                                                                       type_max_sample_count,
+                                                                       edge_type_count,
+                                                                       cuda_env_fns,
+                                                                       stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(TypedSampleWithoutReplacement, TypedSampleWithoutReplacement, SINT3264)
+
+void WmmpTypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                       const std::function<void *(size_t)> &center_localid_allocator,
+                                       const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                       int *sample_offset,
+                                       void *wm_csr_row_ptr,
+                                       void *wm_csr_col_ptr,
+                                       void *wm_edge_type_ptr,
+                                       WMType id_type,
+                                       const void *center_nodes,
+                                       int center_node_count,
+                                       const int *type_max_sample_count,
+                                       int edge_type_count,
+                                       const CUDAEnvFns &cuda_env_fns,
+                                       cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    TypedSampleWithoutReplacement,
+                    sample_output_allocator,
+                    center_localid_allocator,
+                    sample_edge_type_allocator,
+                    sample_offset,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    wm_edge_type_ptr,
+                    center_nodes,
+                    center_node_count,
+                    type_max_sample_count,
+                    edge_type_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+template<typename IdType>
+void ChunkedTypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                          const std::function<void *(size_t)> &center_localid_allocator,
+                                          const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                          int *sample_offset,
+                                          void *wm_csr_row_ptr,
+                                          void *wm_csr_col_ptr,
+                                          void *wm_edge_type_ptr,
+                                          const void *center_nodes,
+                                          int center_node_count,
+                                          const int *type_max_sample_count,
+                                          int edge_type_count,
+                                          const CUDAEnvFns &cuda_env_fns,
+                                          cudaStream_t stream) {
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *wm_csr_row_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_row_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_csr_col_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_csr_col_ptr, dev_id);
+  WholeChunkedMemoryHandle *wm_edge_type_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) wm_edge_type_ptr, dev_id);
+  TypedSampleWithoutReplacementCommon<IdType,
+                                      const whole_graph::WholeChunkedMemoryHandle,
+                                      const whole_graph::WholeChunkedMemoryHandle,
+                                      const whole_graph::WholeChunkedMemoryHandle>(sample_output_allocator,
+                                                                                   center_localid_allocator,
+                                                                                   sample_edge_type_allocator,
+                                                                                   sample_offset,
+                                                                                   wm_csr_row_handle,
+                                                                                   wm_csr_col_handle,
+                                                                                   wm_edge_type_handle,
+                                                                                   center_nodes,
+                                                                                   center_node_count,
+                                                                                   type_max_sample_count,
+                                                                                   edge_type_count,
+                                                                                   cuda_env_fns,
+                                                                                   stream);
+}
+REGISTER_DISPATCH_ONE_TYPE(ChunkedTypedSampleWithoutReplacement, ChunkedTypedSampleWithoutReplacement, SINT3264)
+
+void WmmpChunkedTypedSampleWithoutReplacement(const std::function<void *(size_t)> &sample_output_allocator,
+                                              const std::function<void *(size_t)> &center_localid_allocator,
+                                              const std::function<void *(size_t)> &sample_edge_type_allocator,
+                                              int *sample_offset,
+                                              void *wm_csr_row_ptr,
+                                              void *wm_csr_col_ptr,
+                                              void *wm_edge_type_ptr,
+                                              WMType id_type,
+                                              const void *center_nodes,
+                                              int center_node_count,
+                                              const int *type_max_sample_count,
+                                              int edge_type_count,
+                                              const CUDAEnvFns &cuda_env_fns,
+                                              cudaStream_t stream) {
+  DISPATCH_ONE_TYPE(id_type,
+                    ChunkedTypedSampleWithoutReplacement,
+                    sample_output_allocator,
+                    center_localid_allocator,
+                    sample_edge_type_allocator,
+                    sample_offset,
+                    wm_csr_row_ptr,
+                    wm_csr_col_ptr,
+                    wm_edge_type_ptr,
+                    center_nodes,
+                    center_node_count,
+                    type_max_sample_count,
+                    edge_type_count,
+                    cuda_env_fns,
+                    stream);
+}
+
+}// namespace whole_graph
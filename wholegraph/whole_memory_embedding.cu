@@ -16,10 +16,13 @@
 #include "whole_memory_embedding.h"
 
 #include <cuda_runtime_api.h>
+#include <fcntl.h>
 #include <thrust/execution_policy.h>
 #include <thrust/scan.h>
 
 #include <functional>
+#include <thread>
+#include <type_traits>
 #include <utility>
 
 #include "cuda_env_fns.h"
@@ -207,6 +210,66 @@ void WmmpStoreLocalEmbeddingToFile(WMType emb_type,
   WM_CUDA_CHECK(cudaFreeHost(host_buffer));
 }
 
+static void LoadLocalEmbeddingFromRankAlignedFile(void *emb_ptr,
+                                                  int64_t embedding_count,
+                                                  int64_t embedding_dim,
+                                                  int64_t embedding_stride,
+                                                  size_t elt_size,
+                                                  const std::string &filename,
+                                                  int rank) {
+  // The part file holds exactly the rows of this rank, so read it front to back with large
+  // sequential reads, overlapping the read of the next batch with the copy of the current one.
+  const size_t kBufferSize = 64 * 1024 * 1024;
+  size_t row_size = embedding_dim * elt_size;
+  WM_CHECK(kBufferSize > row_size);
+  int64_t max_batch_size = kBufferSize / row_size;
+  int64_t batch_count = DivUp(embedding_count, max_batch_size);
+  void *host_buffers[2];
+  for (auto &host_buffer : host_buffers) {
+    WM_CUDA_CHECK(cudaMallocHost(&host_buffer, kBufferSize));
+  }
+  FILE *fp = fopen(filename.c_str(), "rb");
+  if (fp == nullptr) {
+    fprintf(stderr, "Open file %s failed.\n", filename.c_str());
+    abort();
+  }
+  posix_fadvise(fileno(fp), 0, 0, POSIX_FADV_SEQUENTIAL);
+  auto batch_size_of = [=](int64_t batch_idx) {
+    return std::min(max_batch_size, embedding_count - batch_idx * max_batch_size);
+  };
+  auto read_batch = [&](int64_t batch_idx) {
+    int64_t batch_size = batch_size_of(batch_idx);
+    size_t ret = fread(host_buffers[batch_idx % 2], row_size, batch_size, fp);
+    if (ret != (size_t) batch_size) {
+      fprintf(stderr, "reading from file %s, batchsize=%ld, embedding_dim=%ld, returned %ld, error=%s\n",
+              filename.c_str(), batch_size, embedding_dim, ret, strerror(errno));
+    }
+    WM_CHECK(ret == (size_t) batch_size);
+  };
+  std::thread reader;
+  if (batch_count > 0) reader = std::thread(read_batch, 0);
+  for (int64_t batch_idx = 0; batch_idx < batch_count; batch_idx++) {
+    reader.join();
+    if (batch_idx + 1 < batch_count) reader = std::thread(read_batch, batch_idx + 1);
+    WM_CUDA_CHECK(cudaMemcpy2D((char *) emb_ptr + batch_idx * max_batch_size * embedding_stride * elt_size,
+                               embedding_stride * elt_size,
+                               host_buffers[batch_idx % 2],
+                               row_size,
+                               row_size,
+                               batch_size_of(batch_idx),
+                               cudaMemcpyHostToDevice));
+  }
+  fclose(fp);
+  for (auto &host_buffer : host_buffers) {
+    WM_CUDA_CHECK(cudaFreeHost(host_buffer));
+  }
+  fprintf(stderr,
+          "Rank=%d done reading %ld embedding vectors from rank aligned file %s\n",
+          rank,
+          embedding_count,
+          filename.c_str());
+}
+
 void WmmpLoadLocalEmbeddingFromFile(WMType emb_type,
                                     void *emb_ptr,
                                     int64_t embedding_count,
@@ -219,11 +282,6 @@ void WmmpLoadLocalEmbeddingFromFile(WMType emb_type,
   if (part_count == 0) part_count = 1;
   int rank = bootstrap_communicator->Rank();
   size_t elt_size = GetWMTSize(emb_type);
-  const int kBufferSize = 8 * 1024 * 1024;
-  WM_CHECK(kBufferSize > embedding_dim * elt_size);
-  void *host_buffer;
-  WM_CUDA_CHECK(cudaMallocHost(&host_buffer, kBufferSize));
-  int64_t max_batch_size = kBufferSize / (embedding_dim * elt_size);
   std::vector<int64_t> emb_count_vec(bootstrap_communicator->Size());
   CollAllGather(embedding_count, &emb_count_vec, bootstrap_communicator);
   WM_CHECK(emb_count_vec[rank] == embedding_count);
@@ -248,6 +306,25 @@ void WmmpLoadLocalEmbeddingFromFile(WMType emb_type,
   }
   int64_t total_file_vec_count = embedding_start_idx;
   WM_CHECK(total_vec_count == total_file_vec_count);
+  bool is_rank_aligned = use_part_file && part_count == bootstrap_communicator->Size();
+  for (int i = 0; is_rank_aligned && i < part_count; i++) {
+    is_rank_aligned = file_emb_start_vec[i] == emb_start_vec[i] && file_emb_count_vec[i] == emb_count_vec[i];
+  }
+  if (is_rank_aligned) {
+    LoadLocalEmbeddingFromRankAlignedFile(emb_ptr,
+                                          embedding_count,
+                                          embedding_dim,
+                                          embedding_stride,
+                                          elt_size,
+                                          GetPartFileName(file_prefix, rank, part_count),
+                                          rank);
+    return;
+  }
+  const int kBufferSize = 8 * 1024 * 1024;
+  WM_CHECK(kBufferSize > embedding_dim * elt_size);
+  void *host_buffer;
+  WM_CUDA_CHECK(cudaMallocHost(&host_buffer, kBufferSize));
+  int64_t max_batch_size = kBufferSize / (embedding_dim * elt_size);
   int64_t rank_start_idx = emb_start_vec[rank];
   int64_t rank_end_idx = rank_start_idx + embedding_count;
   for (int i = 0; i < part_count; i++) {
@@ -271,7 +348,7 @@ void WmmpLoadLocalEmbeddingFromFile(WMType emb_type,
     WM_CHECK(fseeko(fp, file_idx_offset * embedding_dim * elt_size, SEEK_SET) == 0);
 
     for (int64_t start_embedding = 0; start_embedding < intersect_count; start_embedding += max_batch_size) {
-      int64_t batch_size = embedding_count - start_embedding;
+      int64_t batch_size = intersect_count - start_embedding;
       if (batch_size > max_batch_size) batch_size = max_batch_size;
       int ret = fread(host_buffer, embedding_dim * elt_size, batch_size, fp);
       if (ret != batch_size) {
@@ -397,8 +474,9 @@ void WholeMemoryGatherFunc(void *output,
                            int64_t start_indice,
                            cudaStream_t stream) {
   if (indice_count == 0) return;
+  // parameter may be a column sliced view, so its address also counts in alignment.
   int alignment = DetermineAlignmentEltCount<OutputT, ParamT>(output,
-                                                              storage_offset,
+                                                              storage_offset + (uintptr_t) parameter / sizeof(ParamT),
                                                               embedding_dim,
                                                               embedding_stride,
                                                               output_stride);
@@ -602,6 +680,385 @@ void WholeMemoryChunkedGather(WMType output_t,
   }
 }
 
+template<typename OutputT, typename ParamT, typename IdxT, typename ParamHandleT>
+__global__ void WholeMemoryPooledGatherKernel(OutputT *__restrict__ output,
+                                              int *__restrict__ max_indice_pos,
+                                              const ParamHandleT *__restrict__ parameter,
+                                              const IdxT *__restrict__ indice,
+                                              const int64_t *__restrict__ offsets,
+                                              size_t storage_offset,
+                                              int64_t embedding_dim,
+                                              int64_t embedding_stride,
+                                              int pooling_mode) {
+  int64_t bag_idx = blockIdx.x;
+  int64_t start = offsets[bag_idx];
+  int64_t end = offsets[bag_idx + 1];
+  whole_graph::PtrGen<const ParamHandleT, ParamT> ptr_gen(parameter, storage_offset);
+  OutputT *output_ptr = output + bag_idx * embedding_dim;
+  for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+    float acc = 0.0f;
+    int max_pos = -1;
+    for (int64_t j = start; j < end; j++) {
+      IdxT idx = indice[j];
+      assert(idx >= 0);
+      float value = (float) ptr_gen.At((size_t) idx * embedding_stride)[i];
+      if (pooling_mode == POOLING_MAX) {
+        if (max_pos == -1 || value > acc) {
+          acc = value;
+          max_pos = (int) j;
+        }
+      } else {
+        acc += value;
+      }
+    }
+    if (pooling_mode == POOLING_MEAN && end > start) acc /= (float) (end - start);
+    if (pooling_mode == POOLING_MAX) max_indice_pos[bag_idx * embedding_dim + i] = max_pos;
+    output_ptr[i] = (OutputT) acc;
+  }
+}
+
+template<typename OutputT, typename ParamT, typename IdxT>
+void WholeMemoryPooledGatherFunc(void *output,
+                                 int *max_indice_pos,
+                                 const void *parameter,
+                                 const void *indice,
+                                 const int64_t *offsets,
+                                 size_t storage_offset,
+                                 int64_t bag_count,
+                                 int64_t embedding_dim,
+                                 int64_t embedding_stride,
+                                 int pooling_mode,
+                                 cudaStream_t stream) {
+  if (bag_count == 0) return;
+  int thread_count = embedding_dim > 256 ? 256 : embedding_dim;
+  WholeMemoryPooledGatherKernel<OutputT, ParamT, IdxT, ParamT><<<bag_count, thread_count, 0, stream>>>(
+      (OutputT *) output,
+      max_indice_pos,
+      (const ParamT *) parameter,
+      (const IdxT *) indice,
+      offsets,
+      storage_offset,
+      embedding_dim,
+      embedding_stride,
+      pooling_mode);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryPooledGatherFunc,
+                              WholeMemoryPooledGatherFunc,
+                              HALF_FLOAT_DOUBLE,
+                              HALF_FLOAT_DOUBLE,
+                              SINT3264)
+
+template<typename OutputT, typename ParamT, typename IdxT>
+void WholeMemoryChunkedPooledGatherFunc(void *output,
+                                        int *max_indice_pos,
+                                        const void *parameter,
+                                        const void *indice,
+                                        const int64_t *offsets,
+                                        size_t storage_offset,
+                                        int64_t bag_count,
+                                        int64_t embedding_dim,
+                                        int64_t embedding_stride,
+                                        int pooling_mode,
+                                        cudaStream_t stream) {
+  if (bag_count == 0) return;
+  int thread_count = embedding_dim > 256 ? 256 : embedding_dim;
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *parameter_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) parameter, dev_id);
+  WholeMemoryPooledGatherKernel<OutputT, ParamT, IdxT, WholeChunkedMemoryHandle>
+      <<<bag_count, thread_count, 0, stream>>>((OutputT *) output,
+                                               max_indice_pos,
+                                               (const WholeChunkedMemoryHandle *) parameter_handle,
+                                               (const IdxT *) indice,
+                                               offsets,
+                                               storage_offset,
+                                               embedding_dim,
+                                               embedding_stride,
+                                               pooling_mode);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryChunkedPooledGatherFunc,
+                              WholeMemoryChunkedPooledGatherFunc,
+                              HALF_FLOAT_DOUBLE,
+                              HALF_FLOAT_DOUBLE,
+                              SINT3264)
+
+void WholeMemoryPooledGather(WMType output_t,
+                             WMType param_t,
+                             WMType index_t,
+                             void *output,
+                             int *max_indice_pos,
+                             const void *parameter,
+                             const void *indice,
+                             const int64_t *offsets,
+                             size_t storage_offset,
+                             int64_t bag_count,
+                             int64_t embedding_dim,
+                             int64_t embedding_stride,
+                             int pooling_mode,
+                             cudaStream_t stream) {
+  WM_CHECK(pooling_mode == POOLING_SUM || pooling_mode == POOLING_MEAN || pooling_mode == POOLING_MAX);
+  WM_CHECK(pooling_mode != POOLING_MAX || max_indice_pos != nullptr);
+  DISPATCH_THREE_TYPES(output_t,
+                       param_t,
+                       index_t,
+                       WholeMemoryPooledGatherFunc,
+                       output,
+                       max_indice_pos,
+                       parameter,
+                       indice,
+                       offsets,
+                       storage_offset,
+                       bag_count,
+                       embedding_dim,
+                       embedding_stride,
+                       pooling_mode,
+                       stream);
+}
+
+void WholeMemoryChunkedPooledGather(WMType output_t,
+                                    WMType param_t,
+                                    WMType index_t,
+                                    void *output,
+                                    int *max_indice_pos,
+                                    const void *parameter,
+                                    const void *indice,
+                                    const int64_t *offsets,
+                                    size_t storage_offset,
+                                    int64_t bag_count,
+                                    int64_t embedding_dim,
+                                    int64_t embedding_stride,
+                                    int pooling_mode,
+                                    cudaStream_t stream) {
+  WM_CHECK(pooling_mode == POOLING_SUM || pooling_mode == POOLING_MEAN || pooling_mode == POOLING_MAX);
+  WM_CHECK(pooling_mode != POOLING_MAX || max_indice_pos != nullptr);
+  DISPATCH_THREE_TYPES(output_t,
+                       param_t,
+                       index_t,
+                       WholeMemoryChunkedPooledGatherFunc,
+                       output,
+                       max_indice_pos,
+                       parameter,
+                       indice,
+                       offsets,
+                       storage_offset,
+                       bag_count,
+                       embedding_dim,
+                       embedding_stride,
+                       pooling_mode,
+                       stream);
+}
+
+template<typename OutputT, typename ParamT, typename IdxT, typename ParamHandleT>
+__global__ void WholeMemoryGatherColumnsKernel(OutputT *__restrict__ output,
+                                               const ParamHandleT *__restrict__ parameter,
+                                               const IdxT *__restrict__ indice,
+                                               const int *__restrict__ columns,
+                                               size_t storage_offset,
+                                               int64_t column_count,
+                                               int64_t embedding_stride,
+                                               int64_t output_stride,
+                                               int64_t start_indice) {
+  IdxT idx = indice[blockIdx.x] - start_indice;
+  assert(idx >= 0);
+  whole_graph::PtrGen<const ParamHandleT, ParamT> ptr_gen(parameter, storage_offset);
+  const ParamT *param_ptr = ptr_gen.At((size_t) idx * embedding_stride);
+  OutputT *output_ptr = output + (size_t) blockIdx.x * output_stride;
+  for (int i = threadIdx.x; i < column_count; i += blockDim.x) {
+    output_ptr[i] = (OutputT) param_ptr[columns[i]];
+  }
+}
+
+template<typename OutputT, typename ParamT, typename IdxT>
+void WholeMemoryGatherColumnsFunc(void *output,
+                                  const void *parameter,
+                                  const void *indice,
+                                  const int *columns,
+                                  size_t storage_offset,
+                                  int64_t indice_count,
+                                  int64_t column_count,
+                                  int64_t embedding_stride,
+                                  int64_t output_stride,
+                                  int64_t start_indice,
+                                  cudaStream_t stream) {
+  if (indice_count == 0 || column_count == 0) return;
+  int thread_count = column_count > 256 ? 256 : column_count;
+  WholeMemoryGatherColumnsKernel<OutputT, ParamT, IdxT, ParamT><<<indice_count, thread_count, 0, stream>>>(
+      (OutputT *) output,
+      (const ParamT *) parameter,
+      (const IdxT *) indice,
+      columns,
+      storage_offset,
+      column_count,
+      embedding_stride,
+      output_stride,
+      start_indice);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryGatherColumnsFunc,
+                              WholeMemoryGatherColumnsFunc,
+                              HALF_FLOAT_DOUBLE,
+                              HALF_FLOAT_DOUBLE,
+                              SINT3264)
+
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryGatherColumnsIntFunc,
+                              WholeMemoryGatherColumnsFunc,
+                              SINT,
+                              SINT,
+                              SINT3264)
+
+template<typename OutputT, typename ParamT, typename IdxT>
+void WholeMemoryChunkedGatherColumnsFunc(void *output,
+                                         const void *parameter,
+                                         const void *indice,
+                                         const int *columns,
+                                         size_t storage_offset,
+                                         int64_t indice_count,
+                                         int64_t column_count,
+                                         int64_t embedding_stride,
+                                         int64_t output_stride,
+                                         cudaStream_t stream) {
+  if (indice_count == 0 || column_count == 0) return;
+  int thread_count = column_count > 256 ? 256 : column_count;
+  int dev_id = -1;
+  WM_CUDA_CHECK(cudaGetDevice(&dev_id));
+  WholeChunkedMemoryHandle *parameter_handle = GetDeviceChunkedHandle((WholeChunkedMemory_t) parameter, dev_id);
+  WholeMemoryGatherColumnsKernel<OutputT, ParamT, IdxT, WholeChunkedMemoryHandle>
+      <<<indice_count, thread_count, 0, stream>>>((OutputT *) output,
+                                                  (const WholeChunkedMemoryHandle *) parameter_handle,
+                                                  (const IdxT *) indice,
+                                                  columns,
+                                                  storage_offset,
+                                                  column_count,
+                                                  embedding_stride,
+                                                  output_stride,
+                                                  0);
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryChunkedGatherColumnsFunc,
+                              WholeMemoryChunkedGatherColumnsFunc,
+                              HALF_FLOAT_DOUBLE,
+                              HALF_FLOAT_DOUBLE,
+                              SINT3264)
+REGISTER_DISPATCH_THREE_TYPES(WholeMemoryChunkedGatherColumnsIntFunc,
+                              WholeMemoryChunkedGatherColumnsFunc,
+                              SINT,
+                              SINT,
+                              SINT3264)
+
+void WholeMemoryGatherColumns(WMType output_t,
+                              WMType param_t,
+                              WMType index_t,
+                              void *output,
+                              const void *parameter,
+                              const void *indice,
+                              const int *columns,
+                              size_t storage_offset,
+                              int64_t indice_count,
+                              int64_t column_count,
+                              int64_t embedding_stride,
+                              int64_t output_stride,
+                              cudaStream_t stream) {
+  bool param_is_int = param_t == WMT_Int8 || param_t == WMT_Int16 || param_t == WMT_Int32 || param_t == WMT_Int64;
+  bool param_is_float = param_t == WMT_Half || param_t == WMT_Float || param_t == WMT_Double;
+  bool output_is_int = output_t == WMT_Int8 || output_t == WMT_Int16 || output_t == WMT_Int32 || output_t == WMT_Int64;
+  bool output_is_float = output_t == WMT_Half || output_t == WMT_Float || output_t == WMT_Double;
+  WM_CHECK(param_is_int || param_is_float);
+  WM_CHECK(output_is_int || output_is_float);
+  WM_CHECK(param_is_int == output_is_int && param_is_float == output_is_float);
+  if (param_is_int) {
+    DISPATCH_THREE_TYPES(output_t,
+                         param_t,
+                         index_t,
+                         WholeMemoryGatherColumnsIntFunc,
+                         output,
+                         parameter,
+                         indice,
+                         columns,
+                         storage_offset,
+                         indice_count,
+                         column_count,
+                         embedding_stride,
+                         output_stride,
+                         0,
+                         stream);
+  } else {
+    DISPATCH_THREE_TYPES(output_t,
+                         param_t,
+                         index_t,
+                         WholeMemoryGatherColumnsFunc,
+                         output,
+                         parameter,
+                         indice,
+                         columns,
+                         storage_offset,
+                         indice_count,
+                         column_count,
+                         embedding_stride,
+                         output_stride,
+                         0,
+                         stream);
+  }
+}
+
+void WholeMemoryChunkedGatherColumns(WMType output_t,
+                                     WMType param_t,
+                                     WMType index_t,
+                                     void *output,
+                                     const void *parameter,
+                                     const void *indice,
+                                     const int *columns,
+                                     size_t storage_offset,
+                                     int64_t indice_count,
+                                     int64_t column_count,
+                                     int64_t embedding_stride,
+                                     int64_t output_stride,
+                                     cudaStream_t stream) {
+  bool param_is_int = param_t == WMT_Int8 || param_t == WMT_Int16 || param_t == WMT_Int32 || param_t == WMT_Int64;
+  bool param_is_float = param_t == WMT_Half || param_t == WMT_Float || param_t == WMT_Double;
+  bool output_is_int = output_t == WMT_Int8 || output_t == WMT_Int16 || output_t == WMT_Int32 || output_t == WMT_Int64;
+  bool output_is_float = output_t == WMT_Half || output_t == WMT_Float || output_t == WMT_Double;
+  WM_CHECK(param_is_int || param_is_float);
+  WM_CHECK(output_is_int || output_is_float);
+  WM_CHECK(param_is_int == output_is_int && param_is_float == output_is_float);
+  if (param_is_int) {
+    DISPATCH_THREE_TYPES(output_t,
+                         param_t,
+                         index_t,
+                         WholeMemoryChunkedGatherColumnsIntFunc,
+                         output,
+                         parameter,
+                         indice,
+                         columns,
+                         storage_offset,
+                         indice_count,
+                         column_count,
+                         embedding_stride,
+                         output_stride,
+                         stream);
+  } else {
+    DISPATCH_THREE_TYPES(output_t,
+                         param_t,
+                         index_t,
+                         WholeMemoryChunkedGatherColumnsFunc,
+                         output,
+                         parameter,
+                         indice,
+                         columns,
+                         storage_offset,
+                         indice_count,
+                         column_count,
+                         embedding_stride,
+                         output_stride,
+                         stream);
+  }
+}
+
 template<typename IdxT>
 __global__ void WholeMemoryNCCLNodeCountForRanksKernel(const IdxT *indices,
                                                        int *rank_count,
@@ -906,6 +1363,7 @@ template<typename ParamT, typename IdxT>
 void WholeMemoryNCCLGatherFunc(void *output,
                                whole_graph::WholeNCCLMemory_t parameter_wnmt,
                                const void *indice,
+                               const int *columns,
                                size_t storage_offset,
                                int64_t indice_count,
                                int64_t embedding_dim,
@@ -972,17 +1430,31 @@ void WholeMemoryNCCLGatherFunc(void *output,
   bcomm->AllToAllV((const void **) send_ptrs.data(), send_sizes.data(), recv_ptrs.data(), recv_sizes.data());
   bcomm->RecordEvent();
   bcomm->Synchronize();
-  // Local Gather
-  WholeMemoryGatherFunc<ParamT, ParamT, IdxT>(local_output,
-                                              parameter_local_ptr,
-                                              recv_indice,
-                                              storage_offset,
-                                              total_recv_count,
-                                              embedding_dim,
-                                              embedding_stride,
-                                              embedding_dim,
-                                              bcomm->Rank() * local_node_count,
-                                              stream);
+  // Local Gather, with columns only the selected embedding_dim columns are sent back.
+  if (columns != nullptr) {
+    WholeMemoryGatherColumnsFunc<ParamT, ParamT, IdxT>(local_output,
+                                                       parameter_local_ptr,
+                                                       recv_indice,
+                                                       columns,
+                                                       storage_offset,
+                                                       total_recv_count,
+                                                       embedding_dim,
+                                                       embedding_stride,
+                                                       embedding_dim,
+                                                       bcomm->Rank() * local_node_count,
+                                                       stream);
+  } else {
+    WholeMemoryGatherFunc<ParamT, ParamT, IdxT>(local_output,
+                                                parameter_local_ptr,
+                                                recv_indice,
+                                                storage_offset,
+                                                total_recv_count,
+                                                embedding_dim,
+                                                embedding_stride,
+                                                embedding_dim,
+                                                bcomm->Rank() * local_node_count,
+                                                stream);
+  }
   WM_CUDA_CHECK(cudaGetLastError());
   all_recv_idx = 0;
   for (int i = 0; i < bcomm->Size(); i++) {
@@ -1046,6 +1518,7 @@ void WholeMemoryNCCLGather(WMType param_t,
                      output,
                      parameter_wnmt,
                      indice,
+                     nullptr,
                      storage_offset,
                      indice_count,
                      embedding_dim,
@@ -1055,6 +1528,237 @@ void WholeMemoryNCCLGather(WMType param_t,
                      stream);
 }
 
+void WholeMemoryNCCLGatherColumns(WMType param_t,
+                                  WMType index_t,
+                                  void *output,
+                                  whole_graph::WholeNCCLMemory_t parameter_wnmt,
+                                  const void *indice,
+                                  const int *columns,
+                                  size_t storage_offset,
+                                  int64_t indice_count,
+                                  int64_t column_count,
+                                  int64_t embedding_stride,
+                                  int64_t output_stride,
+                                  CUDAEnvFns cuda_env_fns,
+                                  cudaStream_t stream) {
+  WM_CHECK(columns != nullptr);
+  param_t = NormalizeNCCLWMType(param_t);
+  DISPATCH_TWO_TYPES(param_t,
+                     index_t,
+                     WholeMemoryNCCLGatherFunc,
+                     output,
+                     parameter_wnmt,
+                     indice,
+                     columns,
+                     storage_offset,
+                     indice_count,
+                     column_count,
+                     embedding_stride,
+                     output_stride,
+                     cuda_env_fns,
+                     stream);
+}
+
+template<typename ParamT>
+void WholeMemoryNCCLGroupedUnpackFunc(const void *packed_input,
+                                      void *output,
+                                      const int *reverse_indice,
+                                      int64_t indice_count,
+                                      int64_t embedding_dim,
+                                      int64_t packed_stride,
+                                      cudaStream_t stream) {
+  WholeMemoryScatterFunc<ParamT, int>(packed_input,
+                                      output,
+                                      reverse_indice,
+                                      0,
+                                      indice_count,
+                                      embedding_dim,
+                                      embedding_dim,
+                                      packed_stride,
+                                      0,
+                                      stream);
+}
+
+REGISTER_DISPATCH_ONE_TYPE(WholeMemoryNCCLGroupedUnpackFunc, WholeMemoryNCCLGroupedUnpackFunc, SINT)
+
+template<typename IdxT>
+void WholeMemoryNCCLGroupedGatherFunc(const std::vector<WMType> &param_ts,
+                                      const std::vector<void *> &outputs,
+                                      const std::vector<whole_graph::WholeNCCLMemory_t> &parameter_wnmts,
+                                      const void *indice,
+                                      const std::vector<size_t> &storage_offsets,
+                                      int64_t indice_count,
+                                      const std::vector<int64_t> &embedding_dims,
+                                      const std::vector<int64_t> &embedding_strides,
+                                      const CUDAEnvFns &cuda_env_fns,
+                                      cudaStream_t stream) {
+  WMThrustAllocator allocator(cuda_env_fns);
+  size_t table_count = param_ts.size();
+  auto *bcomm = WnmmpGetBootstrapCommunicator(parameter_wnmts[0]);
+  int64_t local_node_count = -1;
+  // Rows of all tables are packed into one row of packed_row_bytes, each table starts
+  // at a column byte offset aligned to its element size.
+  std::vector<const void *> parameter_local_ptrs(table_count);
+  std::vector<size_t> packed_offsets(table_count);
+  size_t packed_row_bytes = 0;
+  for (size_t t = 0; t < table_count; t++) {
+    size_t elt_size = GetWMTSize(param_ts[t]);
+    size_t parameter_local_size;
+    WnmmpGetLocalMemory(parameter_wnmts[t], (void **) &parameter_local_ptrs[t], &parameter_local_size);
+    parameter_local_size = WnmmpGetChunkSize(parameter_wnmts[t]);
+    int64_t table_local_node_count = parameter_local_size / elt_size / embedding_strides[t];
+    if (t == 0) local_node_count = table_local_node_count;
+    WM_CHECK(WnmmpGetBootstrapCommunicator(parameter_wnmts[t]) == bcomm);
+    WM_CHECK(table_local_node_count == local_node_count);
+    packed_row_bytes = DivUp(packed_row_bytes, elt_size) * elt_size;
+    packed_offsets[t] = packed_row_bytes;
+    packed_row_bytes += embedding_dims[t] * elt_size;
+  }
+  packed_row_bytes = DivUp(packed_row_bytes, sizeof(int64_t)) * sizeof(int64_t);
+  const IdxT *indice_ptr = (const IdxT *) indice;
+  TempMemoryHandle rank_count_ptr_tmh, rank_count_host_tmh, rank_offset_host_tmh, recv_rank_count_host_tmh,
+      sorted_indice_tmh, reverse_indice_tmh, recv_ids_tmh, local_output_tmh, unshuffled_output_tmh;
+  int *rank_count = (int *) cuda_env_fns.allocate_temp_fn(bcomm->Size() * sizeof(int), &rank_count_ptr_tmh);
+  int *rank_count_host = (int *) cuda_env_fns.allocate_host_temp_fn(bcomm->Size() * sizeof(int), &rank_count_host_tmh);
+  int *rank_offset_host = (int *) cuda_env_fns.allocate_host_temp_fn((bcomm->Size() + 1) * sizeof(int), &rank_offset_host_tmh);
+  int *recv_rank_count_host = (int *) cuda_env_fns.allocate_host_temp_fn(bcomm->Size() * sizeof(int), &recv_rank_count_host_tmh);
+  IdxT *sorted_indice = (IdxT *) cuda_env_fns.allocate_temp_fn(indice_count * sizeof(IdxT), &sorted_indice_tmh);
+  int *reverse_indice = (int *) cuda_env_fns.allocate_temp_fn(indice_count * sizeof(int), &reverse_indice_tmh);
+  // Exchange node count
+  WholeMemoryNCCLNodeCountForRanks(indice_ptr, rank_count, indice_count, bcomm->Size(), local_node_count, stream);
+  WM_CUDA_CHECK(cudaMemcpyAsync(rank_count_host, rank_count, bcomm->Size() * sizeof(int), cudaMemcpyDeviceToHost, stream));
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  bcomm->AllToAll(rank_count_host, sizeof(int), recv_rank_count_host, sizeof(int));
+  bcomm->RecordEvent();
+  rank_offset_host[0] = 0;
+  for (int i = 0; i < bcomm->Size(); i++) {
+    rank_offset_host[i + 1] = rank_offset_host[i] + rank_count_host[i];
+  }
+  bcomm->Synchronize();
+  // Exchange ids, once for all tables
+  WM_CUDA_CHECK(cudaMemcpyAsync(sorted_indice, indice, sizeof(IdxT) * indice_count, cudaMemcpyDeviceToDevice, stream));
+  thrust::sequence(thrust::cuda::par(allocator).on(stream),
+                   reverse_indice,
+                   reverse_indice + indice_count,
+                   0);
+  thrust::sort_by_key(thrust::cuda::par(allocator).on(stream),
+                      sorted_indice,
+                      sorted_indice + indice_count,
+                      reverse_indice);
+  int total_recv_count = 0;
+  for (int i = 0; i < bcomm->Size(); i++) {
+    total_recv_count += recv_rank_count_host[i];
+  }
+  IdxT *recv_indice = (IdxT *) cuda_env_fns.allocate_temp_fn(total_recv_count * sizeof(IdxT), &recv_ids_tmh);
+  char *local_output = (char *) cuda_env_fns.allocate_temp_fn(total_recv_count * packed_row_bytes, &local_output_tmh);
+  char *unshuffled_output = (char *) cuda_env_fns.allocate_temp_fn(indice_count * packed_row_bytes, &unshuffled_output_tmh);
+  std::vector<void *> send_ptrs(bcomm->Size()), recv_ptrs(bcomm->Size());
+  std::vector<int> send_sizes(bcomm->Size()), recv_sizes(bcomm->Size());
+  int64_t all_recv_idx = 0;
+  for (int i = 0; i < bcomm->Size(); i++) {
+    send_ptrs[i] = sorted_indice + rank_offset_host[i];
+    recv_ptrs[i] = recv_indice + all_recv_idx;
+    send_sizes[i] = rank_count_host[i] * sizeof(IdxT);
+    recv_sizes[i] = recv_rank_count_host[i] * sizeof(IdxT);
+    all_recv_idx += recv_rank_count_host[i];
+  }
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  bcomm->AllToAllV((const void **) send_ptrs.data(), send_sizes.data(), recv_ptrs.data(), recv_sizes.data());
+  bcomm->RecordEvent();
+  bcomm->Synchronize();
+  // Local Gather of every table into packed rows
+  for (size_t t = 0; t < table_count; t++) {
+    WMType param_t = NormalizeNCCLWMType(param_ts[t]);
+    size_t elt_size = GetWMTSize(param_t);
+    DISPATCH_THREE_TYPES(param_t,
+                         param_t,
+                         GetWMType<IdxT>(),
+                         WholeMemoryGatherIntFunc,
+                         local_output + packed_offsets[t],
+                         parameter_local_ptrs[t],
+                         recv_indice,
+                         storage_offsets[t],
+                         total_recv_count,
+                         embedding_dims[t],
+                         embedding_strides[t],
+                         packed_row_bytes / elt_size,
+                         bcomm->Rank() * local_node_count,
+                         stream);
+  }
+  WM_CUDA_CHECK(cudaGetLastError());
+  all_recv_idx = 0;
+  for (int i = 0; i < bcomm->Size(); i++) {
+    send_ptrs[i] = local_output + all_recv_idx * packed_row_bytes;
+    send_sizes[i] = recv_rank_count_host[i] * packed_row_bytes;
+    all_recv_idx += recv_rank_count_host[i];
+    recv_ptrs[i] = unshuffled_output + rank_offset_host[i] * packed_row_bytes;
+    recv_sizes[i] = rank_count_host[i] * packed_row_bytes;
+  }
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  // AllToAllV for packed rows of all tables
+  bcomm->AllToAllV((const void **) send_ptrs.data(), send_sizes.data(), recv_ptrs.data(), recv_sizes.data());
+  bcomm->RecordEvent();
+  bcomm->Synchronize();
+  // Local Reorder and unpack
+  for (size_t t = 0; t < table_count; t++) {
+    WMType param_t = NormalizeNCCLWMType(param_ts[t]);
+    size_t elt_size = GetWMTSize(param_t);
+    DISPATCH_ONE_TYPE(param_t,
+                      WholeMemoryNCCLGroupedUnpackFunc,
+                      unshuffled_output + packed_offsets[t],
+                      outputs[t],
+                      reverse_indice,
+                      indice_count,
+                      embedding_dims[t],
+                      packed_row_bytes / elt_size,
+                      stream);
+  }
+  WM_CUDA_CHECK(cudaGetLastError());
+  CUDA_STREAM_SYNC(cuda_env_fns, stream);
+  cuda_env_fns.free_temp_fn(&sorted_indice_tmh);
+  cuda_env_fns.free_temp_fn(&rank_count_ptr_tmh);
+  cuda_env_fns.free_host_temp_fn(&rank_count_host_tmh);
+  cuda_env_fns.free_host_temp_fn(&rank_offset_host_tmh);
+  cuda_env_fns.free_host_temp_fn(&recv_rank_count_host_tmh);
+  cuda_env_fns.free_temp_fn(&reverse_indice_tmh);
+  cuda_env_fns.free_temp_fn(&recv_ids_tmh);
+  cuda_env_fns.free_temp_fn(&local_output_tmh);
+  cuda_env_fns.free_temp_fn(&unshuffled_output_tmh);
+}
+
+REGISTER_DISPATCH_ONE_TYPE(WholeMemoryNCCLGroupedGatherFunc, WholeMemoryNCCLGroupedGatherFunc, SINT3264)
+
+void WholeMemoryNCCLGroupedGather(const std::vector<WMType> &param_ts,
+                                  WMType index_t,
+                                  const std::vector<void *> &outputs,
+                                  const std::vector<whole_graph::WholeNCCLMemory_t> &parameter_wnmts,
+                                  const void *indice,
+                                  const std::vector<size_t> &storage_offsets,
+                                  int64_t indice_count,
+                                  const std::vector<int64_t> &embedding_dims,
+                                  const std::vector<int64_t> &embedding_strides,
+                                  CUDAEnvFns cuda_env_fns,
+                                  cudaStream_t stream) {
+  size_t table_count = param_ts.size();
+  WM_CHECK(table_count > 0);
+  WM_CHECK(outputs.size() == table_count && parameter_wnmts.size() == table_count);
+  WM_CHECK(storage_offsets.size() == table_count && embedding_dims.size() == table_count);
+  WM_CHECK(embedding_strides.size() == table_count);
+  DISPATCH_ONE_TYPE(index_t,
+                    WholeMemoryNCCLGroupedGatherFunc,
+                    param_ts,
+                    outputs,
+                    parameter_wnmts,
+                    indice,
+                    storage_offsets,
+                    indice_count,
+                    embedding_dims,
+                    embedding_strides,
+                    cuda_env_fns,
+                    stream);
+}
+
 template<typename ParamT, typename IdxT>
 void WholeMemoryNCCLScatterFunc(const void *input,
                                 whole_graph::WholeNCCLMemory_t parameter_wnmt,
@@ -1244,8 +1948,154 @@ __global__ void AggregateGradientKernel(const int *csr_row_ptr,
   }
 }
 
+template<typename WireT>
+__device__ __forceinline__ WireT EncodeWireValue(float value, float inv_scale) {
+  return (WireT) value;
+}
+
+template<>
+__device__ __forceinline__ int8_t EncodeWireValue<int8_t>(float value, float inv_scale) {
+  return (int8_t) fminf(fmaxf(rintf(value * inv_scale), -127.0f), 127.0f);
+}
+
+template<typename WireT>
+__device__ __forceinline__ float DecodeWireValue(WireT value, float scale) {
+  return (float) value;
+}
+
+template<>
+__device__ __forceinline__ float DecodeWireValue<int8_t>(int8_t value, float scale) {
+  return (float) value * scale;
+}
+
+// Row bytes of gradients on the wire, padded to float. int8 rows store their scale before the payload.
+static size_t GradWireRowBytes(WMType wire_t, int64_t embedding_dim) {
+  size_t payload_bytes = DivUp(embedding_dim * GetWMTSize(wire_t), sizeof(float)) * sizeof(float);
+  return wire_t == WMT_Int8 ? payload_bytes + sizeof(float) : payload_bytes;
+}
+
+template<typename GradT, typename WireT>
+__global__ void EncodeGradWireKernel(char *wire, const GradT *grads, int embedding_dim, size_t wire_row_bytes) {
+  __shared__ float absmax;
+  const bool scaled = std::is_same<WireT, int8_t>::value;
+  const GradT *grad_row = grads + (int64_t) blockIdx.x * embedding_dim;
+  char *wire_row = wire + blockIdx.x * wire_row_bytes;
+  auto *payload = (WireT *) (scaled ? wire_row + sizeof(float) : wire_row);
+  float inv_scale = 1.0f;
+  if (scaled) {
+    if (threadIdx.x == 0) absmax = 0.0f;
+    __syncthreads();
+    float local_absmax = 0.0f;
+    for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+      local_absmax = fmaxf(local_absmax, fabsf((float) grad_row[i]));
+    }
+    // int compare is order preserving for non-negative floats.
+    atomicMax((int *) &absmax, __float_as_int(local_absmax));
+    __syncthreads();
+    if (threadIdx.x == 0) *(float *) wire_row = absmax / 127.0f;
+    inv_scale = absmax > 0.0f ? 127.0f / absmax : 0.0f;
+  }
+  for (int i = threadIdx.x; i < embedding_dim; i += blockDim.x) {
+    payload[i] = EncodeWireValue<WireT>((float) grad_row[i], inv_scale);
+  }
+}
+
+template<typename GradT, typename WireT>
+__global__ void AggregateGradWireKernel(const int *csr_row_ptr,
+                                        const int *csr_col_ind,
+                                        const char *wire,
+                                        size_t wire_row_bytes,
+                                        GradT *output_grads,
+                                        int unique_count,
+                                        int embedding_dim) {
+  const bool scaled = std::is_same<WireT, int8_t>::value;
+  int row_idx = blockIdx.x;
+  int col_start = csr_row_ptr[row_idx];
+  int col_end = csr_row_ptr[row_idx + 1];
+  for (int embedding_idx = threadIdx.x; embedding_idx < embedding_dim; embedding_idx += blockDim.x) {
+    float emb_value = 0.0f;
+    for (int col_idx = col_start; col_idx < col_end; col_idx++) {
+      const char *wire_row = wire + (size_t) csr_col_ind[col_idx] * wire_row_bytes;
+      float scale = scaled ? *(const float *) wire_row : 1.0f;
+      auto *payload = (const WireT *) (scaled ? wire_row + sizeof(float) : wire_row);
+      emb_value += DecodeWireValue<WireT>(payload[embedding_idx], scale);
+    }
+    output_grads[(int64_t) row_idx * embedding_dim + embedding_idx] = (GradT) emb_value;
+  }
+}
+
+template<typename GradT>
+void EncodeGradWire(WMType wire_t,
+                    char *wire,
+                    const GradT *grads,
+                    int64_t indice_count,
+                    int64_t embedding_dim,
+                    size_t wire_row_bytes,
+                    cudaStream_t stream) {
+  if (indice_count == 0) return;
+  int thread_count = embedding_dim;
+  if (thread_count > 256) thread_count = 256;
+  switch (wire_t) {
+    case WMT_Half: {
+      EncodeGradWireKernel<GradT, __half><<<indice_count, thread_count, 0, stream>>>(wire, grads, embedding_dim, wire_row_bytes);
+      break;
+    }
+    case WMT_Bfloat16: {
+      EncodeGradWireKernel<GradT, __nv_bfloat16><<<indice_count, thread_count, 0, stream>>>(wire, grads, embedding_dim, wire_row_bytes);
+      break;
+    }
+    case WMT_Int8: {
+      EncodeGradWireKernel<GradT, int8_t><<<indice_count, thread_count, 0, stream>>>(wire, grads, embedding_dim, wire_row_bytes);
+      break;
+    }
+    default: {
+      fprintf(stderr, "Gradient wire type %s not supported.\n", GetWMTName(wire_t));
+      abort();
+    }
+  }
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
+template<typename GradT>
+void AggregateGradWire(WMType wire_t,
+                       const int *csr_row_ptr,
+                       const int *csr_col_ind,
+                       const char *wire,
+                       size_t wire_row_bytes,
+                       GradT *output_grads,
+                       int64_t unique_count,
+                       int64_t embedding_dim,
+                       cudaStream_t stream) {
+  if (unique_count == 0) return;
+  int thread_count = embedding_dim;
+  if (thread_count > 256) thread_count = 256;
+  switch (wire_t) {
+    case WMT_Half: {
+      AggregateGradWireKernel<GradT, __half><<<unique_count, thread_count, 0, stream>>>(
+          csr_row_ptr, csr_col_ind, wire, wire_row_bytes, output_grads, unique_count, embedding_dim);
+      break;
+    }
+    case WMT_Bfloat16: {
+      AggregateGradWireKernel<GradT, __nv_bfloat16><<<unique_count, thread_count, 0, stream>>>(
+          csr_row_ptr, csr_col_ind, wire, wire_row_bytes, output_grads, unique_count, embedding_dim);
+      break;
+    }
+    case WMT_Int8: {
+      AggregateGradWireKernel<GradT, int8_t><<<unique_count, thread_count, 0, stream>>>(
+          csr_row_ptr, csr_col_ind, wire, wire_row_bytes, output_grads, unique_count, embedding_dim);
+      break;
+    }
+    default: {
+      fprintf(stderr, "Gradient wire type %s not supported.\n", GetWMTName(wire_t));
+      abort();
+    }
+  }
+  WM_CUDA_CHECK(cudaGetLastError());
+}
+
 template<typename GradT, typename IdxT>
-void WholeMemoryExchangeEmbeddingGradsFunc(std::function<void *(size_t)> local_indice_allocator,
+void WholeMemoryExchangeEmbeddingGradsFunc(WMType wire_t,
+                                           std::function<void *(size_t)> local_indice_allocator,
                                            std::function<void *(size_t)> local_grad_allocator,
                                            const void *sparse_indices,
                                            const void *sparse_grads,
@@ -1322,22 +2172,32 @@ void WholeMemoryExchangeEmbeddingGradsFunc(std::function<void *(size_t)> local_i
                                            0,
                                            stream);
   WM_CUDA_CHECK(cudaGetLastError());
-  GradT *recv_embedding = (GradT *) cuda_env_fns.allocate_temp_fn(total_recv_count * sizeof(GradT) * embedding_dim, &recv_embedding_tmh);
+  // Gradients are encoded to wire_t for AllToAllV if it is not GradT
+  bool encode_wire = wire_t != GetWMType<GradT>();
+  size_t wire_row_bytes = encode_wire ? GradWireRowBytes(wire_t, embedding_dim) : embedding_dim * sizeof(GradT);
+  TempMemoryHandle send_wire_tmh;
+  char *send_wire = (char *) reordered_input;
+  if (encode_wire) {
+    send_wire = (char *) cuda_env_fns.allocate_temp_fn(indice_count * wire_row_bytes, &send_wire_tmh);
+    EncodeGradWire<GradT>(wire_t, send_wire, reordered_input, indice_count, embedding_dim, wire_row_bytes, stream);
+  }
+  char *recv_wire = (char *) cuda_env_fns.allocate_temp_fn(total_recv_count * wire_row_bytes, &recv_embedding_tmh);
   CUDA_STREAM_SYNC(cuda_env_fns, stream);
   cuda_env_fns.free_temp_fn(&sorted_indice_tmh);
   cuda_env_fns.free_temp_fn(&reverse_indice_tmh);
   all_recv_idx = 0;
   for (int i = 0; i < bcomm->Size(); i++) {
-    send_ptrs[i] = reordered_input + rank_offset_host[i] * embedding_dim;
-    recv_ptrs[i] = recv_embedding + all_recv_idx * embedding_dim;
-    send_sizes[i] = rank_count_host[i] * embedding_dim * sizeof(GradT);
-    recv_sizes[i] = recv_rank_count_host[i] * embedding_dim * sizeof(GradT);
+    send_ptrs[i] = send_wire + rank_offset_host[i] * wire_row_bytes;
+    recv_ptrs[i] = recv_wire + all_recv_idx * wire_row_bytes;
+    send_sizes[i] = rank_count_host[i] * wire_row_bytes;
+    recv_sizes[i] = recv_rank_count_host[i] * wire_row_bytes;
     all_recv_idx += recv_rank_count_host[i];
   }
   // AllToAllV for embeddings
   bcomm->AllToAllV((const void **) send_ptrs.data(), send_sizes.data(), recv_ptrs.data(), recv_sizes.data());
   bcomm->RecordEvent();
   bcomm->Synchronize();
+  if (encode_wire) cuda_env_fns.free_temp_fn(&send_wire_tmh);
   // Aggregation
   TempMemoryHandle unique_indice_tmh;
   int *unique_indice = (int *) cuda_env_fns.allocate_temp_fn((total_recv_count + 1) * sizeof(int), &unique_indice_tmh);
@@ -1375,8 +2235,20 @@ void WholeMemoryExchangeEmbeddingGradsFunc(std::function<void *(size_t)> local_i
 
   int thread_count = embedding_dim;
   if (thread_count > 256) thread_count = 256;
-  AggregateGradientKernel<GradT><<<unique_count, thread_count, 0, stream>>>(unique_indice, reverse_indice, recv_embedding, output_grads, unique_count, embedding_dim);
-  WM_CUDA_CHECK(cudaGetLastError());
+  if (encode_wire) {
+    AggregateGradWire<GradT>(wire_t,
+                             unique_indice,
+                             reverse_indice,
+                             recv_wire,
+                             wire_row_bytes,
+                             output_grads,
+                             unique_count,
+                             embedding_dim,
+                             stream);
+  } else {
+    AggregateGradientKernel<GradT><<<unique_count, thread_count, 0, stream>>>(unique_indice, reverse_indice, (GradT *) recv_wire, output_grads, unique_count, embedding_dim);
+    WM_CUDA_CHECK(cudaGetLastError());
+  }
   CUDA_STREAM_SYNC(cuda_env_fns, stream);
 
   cuda_env_fns.free_temp_fn(&rank_count_ptr_tmh);
@@ -1399,6 +2271,7 @@ REGISTER_DISPATCH_TWO_TYPES(WholeMemoryExchangeEmbeddingGradsFunc,
 
 void WholeMemoryExchangeEmbeddingGrads(WMType index_t,
                                        WMType grad_t,
+                                       WMType wire_t,
                                        std::function<void *(size_t)> local_indice_allocator,
                                        std::function<void *(size_t)> local_grad_allocator,
                                        const void *sparse_indices,
@@ -1413,6 +2286,7 @@ void WholeMemoryExchangeEmbeddingGrads(WMType index_t,
   DISPATCH_TWO_TYPES(grad_t,
                      index_t,
                      WholeMemoryExchangeEmbeddingGradsFunc,
+                     wire_t,
                      local_indice_allocator,
                      local_grad_allocator,
                      sparse_indices,
@@ -1490,8 +2364,10 @@ void WholeMemoryEmbeddingLocalApplyGradientsFunc(OptimizerInfo opt_info,
       break;
     }
     case OPT_TYPE_LAZY_ADAM: {
-      kernel_fn =
-          WholeMemoryEmbeddingLocalApplyGradientsKernel<EmbType, StateType, LazyAdamSparseEmbOptimizer<EmbType, StateType>>;
+      using LazyAdamAlgo = typename std::conditional<std::is_same<StateType, int8_t>::value,
+                                                     LazyAdamInt8SparseEmbOptimizer<EmbType, StateType>,
+                                                     LazyAdamSparseEmbOptimizer<EmbType, StateType>>::type;
+      kernel_fn = WholeMemoryEmbeddingLocalApplyGradientsKernel<EmbType, StateType, LazyAdamAlgo>;
       break;
     }
     case OPT_TYPE_ADAGRAD: {
@@ -1504,11 +2380,28 @@ void WholeMemoryEmbeddingLocalApplyGradientsFunc(OptimizerInfo opt_info,
           WholeMemoryEmbeddingLocalApplyGradientsKernel<EmbType, StateType, RMSPropSparseEmbOptimizer<EmbType, StateType>>;
       break;
     }
+    case OPT_TYPE_ROWWISE_ADAGRAD: {
+      kernel_fn = WholeMemoryEmbeddingLocalApplyGradientsKernel<EmbType,
+                                                                StateType,
+                                                                RowWiseAdaGradSparseEmbOptimizer<EmbType, StateType>>;
+      break;
+    }
+    case OPT_TYPE_ROWWISE_ADAM: {
+      kernel_fn = WholeMemoryEmbeddingLocalApplyGradientsKernel<EmbType,
+                                                                StateType,
+                                                                RowWiseAdamSparseEmbOptimizer<EmbType, StateType>>;
+      break;
+    }
     default: {
       fprintf(stderr, "Optimizer type %d not supported.\n", (int) opt_info.type);
       abort();
     }
   }
+  if (std::is_same<StateType, int8_t>::value && opt_info.type != OPT_TYPE_SGD
+      && opt_info.type != OPT_TYPE_LAZY_ADAM) {
+    fprintf(stderr, "Optimizer type %d does not support int8 states.\n", (int) opt_info.type);
+    abort();
+  }
   int thread_block = thread_countx;
   kernel_fn<<<block_count, thread_block, 0, stream>>>(opt_info,
                                                       local_update_list,
@@ -1528,7 +2421,7 @@ void WholeMemoryEmbeddingLocalApplyGradientsFunc(OptimizerInfo opt_info,
 REGISTER_DISPATCH_TWO_TYPES(WholeMemoryEmbeddingLocalApplyGradientsFunc,
                             WholeMemoryEmbeddingLocalApplyGradientsFunc,
                             HALF_FLOAT,
-                            HALF_FLOAT)
+                            INT8_BF16_HALF_FLOAT)
 
 void WholeMemoryEmbeddingLocalApplyGradients(WMType grad_t,
                                              WMType state_t,